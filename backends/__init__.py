@@ -0,0 +1,529 @@
+# ----------------------------------------------------------------------------
+# backends
+#     the data-source interface used by fc_properties, field_properties and
+#     batch_profile, so profiling does not depend on arcpy:
+#
+#         arcpy_backend    file geodatabases (and anything arcpy can read)
+#         sqlite_backend   GeoPackages and plain SQLite databases (stdlib)
+#         memory_backend   in-memory tables, for tests and benchmarks
+#
+#     get_backend(path) picks the backend for a path.  Describe results and
+#     record counts are cached here, per run, until clear_cache() is called.
+#     Subtypes are cached with them.  Attribute domains belong to the
+#     workspace, not the dataset, so they are cached per workspace until
+#     clear_domain_cache() is called.  Each backend data call is timed in a
+#     run_stats span named "backend.<method>".
+# ----------------------------------------------------------------------------
+import collections
+import logging
+import os
+import re
+import run_stats
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+sqlite_extensions = (".gpkg", ".sqlite", ".sqlite3", ".db")
+workspace_extensions = (".gdb",) + sqlite_extensions  # a path component that is a workspace
+timed_methods = ("list_datasets", "describe", "list_domains", "list_subtypes", "count",
+                 "oid_bounds", "extent", "shape_measures")  # iter_rows is timed row by row
+
+
+# extent is (xmin, ymin, xmax, ymax) where the describe call records it,
+# so extent() need not describe the dataset again; None otherwise
+FcDescription = collections.namedtuple("FcDescription", ["base_name",
+                                                         "shape_type",
+                                                         "has_z",
+                                                         "has_m",
+                                                         "sr_name",
+                                                         "sr_factory_code",
+                                                         "sr_type",
+                                                         "sr_linear_unit_name",
+                                                         "sr_angular_unit_name",
+                                                         "oid_field_name",
+                                                         "fields",
+                                                         "extent"
+                                                         ]
+                                       )
+FcDescription.__new__.__defaults__ = (None,)  # extent
+
+# field attributes keep the arcpy.Field names so the snapshot is a drop-in
+# replacement for arcpy.ListFields()
+FieldDescription = collections.namedtuple("FieldDescription", ["baseName",
+                                                               "aliasName",
+                                                               "type",
+                                                               "length",
+                                                               "precision",
+                                                               "scale",
+                                                               "isNullable",
+                                                               "required",
+                                                               "editable",
+                                                               "domain"
+                                                               ]
+                                          )
+
+
+# an attribute domain.  domain_type is "CodedValue", with coded_values
+# {code: description}, or "Range", with range (minimum, maximum), inclusive
+DomainDescription = collections.namedtuple("DomainDescription", ["name",
+                                                                 "domain_type",
+                                                                 "field_type",
+                                                                 "coded_values",
+                                                                 "range"
+                                                                 ]
+                                           )
+
+# a subtype of a dataset.  defaults is {field name: default value} and
+# domains {field name: domain name}, "" where the subtype has no domain;
+# fields missing from either take the field's own default or domain
+SubtypeDescription = collections.namedtuple("SubtypeDescription", ["code",
+                                                                   "name",
+                                                                   "subtype_field",
+                                                                   "is_default",
+                                                                   "defaults",
+                                                                   "domains"
+                                                                   ]
+                                            )
+
+
+def make_field(name, field_type, length=0, alias=None, is_nullable=True, domain=""):
+    """
+    :return: a FieldDescription with the defaults of a new nullable field
+    :rtype: FieldDescription
+    """
+    return FieldDescription(baseName=name,
+                            aliasName=alias or name,
+                            type=field_type,
+                            length=length,
+                            precision=0,
+                            scale=0,
+                            isNullable=is_nullable,
+                            required=field_type in ("OID", "Geometry"),
+                            editable=field_type not in ("OID", "Geometry"),
+                            domain=domain)
+
+
+# ----------------------------------------------------------------------------
+# Backend
+#     the interface every backend implements
+# ----------------------------------------------------------------------------
+
+class Backend(object):
+
+    # True if iter_rows filters by OID in the data source, so unselected rows
+    # are never read into Python (cheap OID-stride sampling and partitions)
+    filters_at_source = False
+
+    # True if shape_measures returns the areas, lengths and centroids of the
+    # shapes measured by the data source; otherwise geometry_properties
+    # measures the SHAPE@WKB of each shape itself
+    measures_shapes = False
+
+    def handles(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def workspace(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :return: the path of the workspace (e.g. geodatabase) holding the dataset
+        :rtype: basestring
+        """
+        raise NotImplementedError
+
+    def list_datasets(self, workspace_path):
+        """
+        :param workspace_path: the path of a workspace
+        :type workspace_path: basestring
+
+        :return: the full paths of every feature class and table, sorted
+        :rtype: list of basestring
+        """
+        raise NotImplementedError
+
+    def describe(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :rtype: FcDescription
+        """
+        raise NotImplementedError
+
+    def list_domains(self, workspace_path):
+        """
+        :param workspace_path: the path of a workspace
+        :type workspace_path: basestring
+
+        :return: every attribute domain defined in the workspace
+        :rtype: list of DomainDescription
+        """
+        return []
+
+    def list_subtypes(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :return: the subtypes of the dataset, none if it has no subtype field
+        :rtype: list of SubtypeDescription
+        """
+        return []
+
+    def source_files(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :return: the files the dataset is stored in, whose sizes and
+                 modified times change when it is edited
+        :rtype: list of basestring
+        """
+        return []
+
+    def list_fields(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :rtype: tuple of FieldDescription
+        """
+        return self.describe(path).fields
+
+    def count(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :return: the number of records
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    def oid_bounds(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :return: (smallest OID, largest OID), (None, None) if there are no rows
+        :rtype: tuple
+        """
+        low = high = None
+        for oid, in self.iter_rows(path, ["OID@"]):
+            if low is None or oid < low:
+                low = oid
+            if high is None or oid > high:
+                high = oid
+        return low, high
+
+    def extent(self, path):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :return: (xmin, ymin, xmax, ymax) as recorded by the data source, or
+                 None if it can only be found by reading the shapes
+        :rtype: tuple of float
+        """
+        return None
+
+    def shape_measures(self, path, oid_range=None):
+        """
+        only called if measures_shapes is True
+
+        :param path: a feature class path
+        :type path: basestring
+
+        :param oid_range: only shapes where low <= OID < high; None for an open end
+        :type oid_range: tuple of int
+
+        :return: a NumPy structured array with one row per shape that is not
+                 NULL, of area, length, centroid_x and centroid_y
+        :rtype: numpy.ndarray
+        """
+        raise NotImplementedError
+
+    def iter_rows(self, path, field_names, oid_stride=None, oid_range=None):
+        """
+        :param path: a dataset path
+        :type path: basestring
+
+        :param field_names: the fields to read; "OID@" for the OID field and
+                            "SHAPE@WKB" for the shape as well-known binary
+        :type field_names: list of basestring
+
+        :param oid_stride: only rows where OID % oid_stride == 0
+        :type oid_stride: int
+
+        :param oid_range: only rows where low <= OID < high; None for an open end
+        :type oid_range: tuple of int
+
+        :return: one tuple of values per row, in field_names order
+        :rtype: iterable
+        """
+        raise NotImplementedError
+
+
+# -----------------------------------------
+# backend selection
+# -----------------------------------------
+
+_registered_backends = []
+
+
+def register_backend(backend):
+    """
+    check backend before the built in backends in get_backend
+
+    :param backend: e.g. a MemoryBackend holding test tables
+    :type backend: Backend
+    """
+    _registered_backends.insert(0, backend)
+
+
+def unregister_backend(backend):
+    """
+    :param backend: a backend passed to register_backend
+    :type backend: Backend
+    """
+    _registered_backends.remove(backend)
+
+
+def is_sqlite_path(path):
+    """
+    :return: True if the path is, or is inside, a GeoPackage or SQLite database
+    :rtype: bool
+    """
+    return split_sqlite_path(path)[0] is not None
+
+
+def split_sqlite_path(path):
+    """
+    :return: (database path, table name or None); (None, None) if not a SQLite path
+    :rtype: tuple
+    """
+    # the extension must end a path component, e.g. not the folder data.gpkg_old
+    for component in re.finditer(r"[^\\/]+", path):
+        if os.path.splitext(component.group())[1].lower() in sqlite_extensions:
+            table = path[component.end():].strip("\\/") or None
+            return path[:component.end()], table
+    return None, None
+
+
+def is_workspace_path(path):
+    """
+    :return: True if the path is a geodatabase or database, rather than a dataset in one
+    :rtype: bool
+    """
+    if path.rstrip("\\/").lower().endswith(".gdb"):
+        return True
+    database, table = split_sqlite_path(path)
+    return database is not None and table is None
+
+
+def get_backend(path):
+    """
+    :param path: a dataset or workspace path
+    :type path: basestring
+
+    :rtype: Backend
+    """
+    for backend in _registered_backends:
+        if backend.handles(path):
+            return _timed(backend)
+    if is_sqlite_path(path):
+        from backends import sqlite_backend
+        return _timed(sqlite_backend.SqliteBackend())
+    from backends import arcpy_backend
+    return _timed(arcpy_backend.ArcpyBackend())
+
+
+def _timed(backend):
+    """
+    time the data calls of a backend in run_stats spans.  The bound methods
+    are wrapped on the instance, once, so the backend keeps its class.
+
+    :rtype: Backend
+    """
+    if not backend.__dict__.get("_timed"):
+        for name in timed_methods:
+            setattr(backend, name, run_stats.timed_function("backend." + name, getattr(backend, name),
+                                                            counts_rows=name == "shape_measures"))
+        backend.iter_rows = run_stats.timed_iterator("backend.iter_rows", backend.iter_rows)
+        backend._timed = True
+    return backend
+
+
+# ----------------------------------------------------------------------------
+# cached metadata
+#     describing a dataset is expensive (hundreds of ms on a networked fGDB),
+#     so describe() and count() are called once per dataset per run
+# ----------------------------------------------------------------------------
+
+_describe_cache = {}
+_count_cache = {}
+_oid_bounds_cache = {}
+_subtype_cache = {}
+
+# instrumentation: number of backend describe calls made, keyed by path
+describe_calls = collections.Counter()
+
+
+def clear_cache():
+    """forget all cached descriptions and record counts"""
+    _describe_cache.clear()
+    _count_cache.clear()
+    _oid_bounds_cache.clear()
+    _subtype_cache.clear()
+    describe_calls.clear()
+
+
+def describe(path):
+    """
+    :param path: a dataset path
+    :type path: basestring
+
+    :rtype: FcDescription
+    """
+    description = _describe_cache.get(path)
+    if description is None:
+        log.debug("Describing " + path)
+        describe_calls[path] += 1
+        description = get_backend(path).describe(path)
+        _describe_cache[path] = description
+    return description
+
+
+def count(path):
+    """
+    :param path: a dataset path
+    :type path: basestring
+
+    :return: the number of records
+    :rtype: int
+    """
+    record_count = _count_cache.get(path)
+    if record_count is None:
+        record_count = get_backend(path).count(path)
+        _count_cache[path] = record_count
+    return record_count
+
+
+def oid_bounds(path):
+    """
+    :param path: a dataset path
+    :type path: basestring
+
+    :return: (smallest OID, largest OID), (None, None) if there are no rows
+    :rtype: tuple
+    """
+    bounds = _oid_bounds_cache.get(path)
+    if bounds is None:
+        bounds = get_backend(path).oid_bounds(path)
+        _oid_bounds_cache[path] = bounds
+    return bounds
+
+
+# ----------------------------------------------------------------------------
+# cached domains
+#     every domain of a workspace is read in one call, the first time a
+#     dataset in it needs one, and kept across datasets and runs: profiling
+#     every feature class of a geodatabase reads its domains once.
+#     batch_profile and partitioned_scan hand the loaded domains to their
+#     workers with set_domains, so the workers do not read them again.
+# ----------------------------------------------------------------------------
+
+_domain_cache = {}
+
+# instrumentation: number of backend list_domains calls made, keyed by workspace
+domain_loads = collections.Counter()
+
+
+def clear_domain_cache():
+    """forget all cached domains, e.g. after they have been edited"""
+    _domain_cache.clear()
+    domain_loads.clear()
+
+
+def get_domains(path):
+    """
+    :param path: a dataset or workspace path
+    :type path: basestring
+
+    :return: {domain name: DomainDescription} of the workspace
+    :rtype: dict
+    """
+    workspace_path = _workspace_of(path)
+    domains = _domain_cache.get(workspace_path)
+    if domains is None:
+        log.debug("Reading the domains of " + workspace_path)
+        domain_loads[workspace_path] += 1
+        domains = dict((domain.name, domain) for domain in get_backend(path).list_domains(workspace_path))
+        _domain_cache[workspace_path] = domains
+    return domains
+
+
+def set_domains(path, domains):
+    """
+    cache domains already read, e.g. by the parent of a pool worker
+
+    :param path: a dataset or workspace path
+    :type path: basestring
+
+    :param domains: the result of get_domains for the same workspace
+    :type domains: dict
+    """
+    _domain_cache[_workspace_of(path)] = domains
+
+
+def _workspace_of(path):
+    """:return: the workspace path of a dataset or workspace path"""
+    if is_workspace_path(path):
+        return path
+    return get_backend(path).workspace(path)
+
+
+def subtypes(path):
+    """
+    :param path: a dataset path
+    :type path: basestring
+
+    :return: the subtypes of the dataset, by code; empty if it has none
+    :rtype: list of SubtypeDescription
+    """
+    dataset_subtypes = _subtype_cache.get(path)
+    if dataset_subtypes is None:
+        dataset_subtypes = sorted(get_backend(path).list_subtypes(path), key=lambda subtype: subtype.code)
+        _subtype_cache[path] = dataset_subtypes
+    return dataset_subtypes
+
+
+def shape_field_name(path):
+    """
+    :param path: a dataset path
+    :type path: basestring
+
+    :return: the name of the geometry field, None for a table
+    :rtype: basestring
+    """
+    for field in describe(path).fields:
+        if field.type == "Geometry":
+            return field.baseName
+    return None
+
+
+def dataset_name(path):
+    """
+    :return: the last element of a dataset path, with either separator
+    :rtype: basestring
+    """
+    return path.rstrip("\\/").replace("/", "\\").rsplit("\\", 1)[-1]
@@ -0,0 +1,234 @@
+# ----------------------------------------------------------------------------
+# arcpy_backend
+#     file geodatabases, and anything else arcpy.Describe can read
+#
+#     importing arcpy takes seconds (and checks out a licence), so it is
+#     imported by load_arcpy() on first use rather than at module load:
+#     path handling such as workspace() never pays for it.
+# ----------------------------------------------------------------------------
+import logging
+import os
+import backends
+import sampling
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+dataset_types = ["FeatureClass", "Table"]
+
+# the geometry tokens read by shape_measures, and the names they are given
+shape_measure_tokens = [("SHAPE@AREA", "area"),
+                        ("SHAPE@LENGTH", "length"),
+                        ("SHAPE@X", "centroid_x"),
+                        ("SHAPE@Y", "centroid_y")]
+
+arcpy = None  # the arcpy module, once load_arcpy() has imported it
+
+
+def load_arcpy():
+    """
+    :return: the arcpy module, imported on the first call
+    :rtype: module
+    """
+    global arcpy
+    if arcpy is None:
+        log.debug("Importing arcpy")
+        import arcpy
+    return arcpy
+
+
+class ArcpyBackend(backends.Backend):
+
+    filters_at_source = True
+    measures_shapes = True
+
+    def handles(self, path):
+        return True
+
+    def workspace(self, path):
+        return path.split(".gdb", 1)[0] + ".gdb"
+
+    def list_datasets(self, workspace_path):
+        """every feature class and standalone table, including those inside feature datasets"""
+        dataset_paths = []
+        for dirpath, dirnames, filenames in load_arcpy().da.Walk(workspace_path, datatype=dataset_types):
+            for filename in filenames:
+                dataset_paths.append(os.path.join(dirpath, filename))
+        dataset_paths.sort()
+        return dataset_paths
+
+    def list_domains(self, workspace_path):
+        """every domain of the geodatabase, in one call"""
+        domains = []
+        for d in load_arcpy().da.ListDomains(workspace_path):
+            is_coded = d.domainType == "CodedValue"
+            domains.append(backends.DomainDescription(name=d.name,
+                                                      domain_type=d.domainType,
+                                                      field_type=d.type,
+                                                      coded_values=dict(d.codedValues) if is_coded else None,
+                                                      range=None if is_coded else tuple(d.range)))
+        return domains
+
+    def list_subtypes(self, path):
+        """
+        arcpy.da.ListSubtypes gives a dataset without subtypes a single
+        subtype, 0, with no subtype field; it is left out
+        """
+        subtypes = []
+        for code, subtype in load_arcpy().da.ListSubtypes(path).items():
+            if not subtype["SubtypeField"]:
+                continue
+            field_values = subtype["FieldValues"]
+            subtypes.append(backends.SubtypeDescription(
+                code=code,
+                name=subtype["Name"],
+                subtype_field=subtype["SubtypeField"],
+                is_default=subtype["Default"],
+                defaults=dict((name, values[0]) for name, values in field_values.items()),
+                domains=dict((name, values[1].name if values[1] is not None else "")
+                             for name, values in field_values.items())))
+        return subtypes
+
+    def source_files(self, path):
+        """
+        every file in the geodatabase folder.  Mapping a feature class to its
+        aNNNNNNNN.gdbtable files needs the system catalog, so an edit to any
+        dataset changes the fingerprint of all of them.  Lock files change
+        when the geodatabase is only read, so they are left out.
+        """
+        gdb_path = self.workspace(path)
+        if not os.path.isdir(gdb_path):
+            return []
+        return sorted(os.path.join(gdb_path, name) for name in os.listdir(gdb_path)
+                      if not name.lower().endswith(".lock"))
+
+    def describe(self, path):
+        desc = load_arcpy().Describe(path)
+
+        # standalone tables have no shape, spatial reference or extent
+        sr = getattr(desc, "spatialReference", None)
+        extent = getattr(desc, "extent", None)
+        fields = tuple(backends.FieldDescription(baseName=f.baseName,
+                                                 aliasName=f.aliasName,
+                                                 type=f.type,
+                                                 length=f.length,
+                                                 precision=f.precision,
+                                                 scale=f.scale,
+                                                 isNullable=f.isNullable,
+                                                 required=f.required,
+                                                 editable=f.editable,
+                                                 domain=f.domain)
+                       for f in desc.fields)
+
+        return backends.FcDescription(base_name=desc.baseName,
+                                      shape_type=getattr(desc, "shapeType", "Table"),
+                                      has_z=getattr(desc, "hasZ", False),
+                                      has_m=getattr(desc, "hasM", False),
+                                      sr_name=getattr(sr, "name", "Unknown"),
+                                      sr_factory_code=getattr(sr, "factoryCode", 0),
+                                      sr_type=getattr(sr, "type", "Unknown"),
+                                      sr_linear_unit_name=getattr(sr, "linearUnitName", ""),
+                                      sr_angular_unit_name=getattr(sr, "angularUnitName", ""),
+                                      oid_field_name=getattr(desc, "OIDFieldName", "OBJECTID"),
+                                      fields=fields,
+                                      extent=None if extent is None else (extent.XMin, extent.YMin,
+                                                                          extent.XMax, extent.YMax))
+
+    def count(self, path):
+        """
+        GetCount on the dataset path reads the row count a file geodatabase
+        keeps with each table, without reading the rows.  No named table
+        view is made, so concurrent profiles cannot collide.  A source
+        GetCount cannot read is counted with an OID cursor.
+        """
+        arcpy = load_arcpy()
+        try:
+            return int(arcpy.management.GetCount(path).getOutput(0))
+        except arcpy.ExecuteError as e:
+            log.debug("GetCount failed, counting " + path + " with a cursor: " + str(e).replace("\n", "; "))
+        return cursor_count(path)
+
+    def oid_bounds(self, path):
+        """
+        a file geodatabase reads the first OID each way through its OID
+        index (ORDER BY), so only two rows are read; other sources read
+        just the OIDs into a NumPy array
+        """
+        oid_field_name = backends.describe(path).oid_field_name
+        if ".gdb" in path.lower():
+            low = first_oid(path, oid_field_name)
+            if low is None:
+                return None, None
+            return low, first_oid(path, oid_field_name, descending=True)
+        oids = load_arcpy().da.TableToNumPyArray(path, ["OID@"])["OID@"]
+        if not len(oids):
+            return None, None
+        return int(oids.min()), int(oids.max())
+
+    def extent(self, path):
+        """read with the rest of the description, by the one Describe of the run"""
+        return backends.describe(path).extent
+
+    def shape_measures(self, path, oid_range=None):
+        """
+        areas, lengths and centroids measured by arcpy, read straight into a
+        NumPy array without a Python object per shape.  NULL shapes are skipped.
+        """
+        where_clause = oid_where_clause(backends.describe(path).oid_field_name, oid_range=oid_range)
+        measures = load_arcpy().da.FeatureClassToNumPyArray(path,
+                                                            [token for token, name in shape_measure_tokens],
+                                                            where_clause=where_clause or "",
+                                                            skip_nulls=True)
+        measures.dtype.names = tuple(name for token, name in shape_measure_tokens)
+        return measures
+
+    def iter_rows(self, path, field_names, oid_stride=None, oid_range=None):
+        where_clause = oid_where_clause(backends.describe(path).oid_field_name, oid_stride, oid_range)
+        if where_clause:
+            cursor = load_arcpy().da.SearchCursor(path, field_names, where_clause)
+        else:
+            cursor = load_arcpy().da.SearchCursor(path, field_names)
+        with cursor:
+            for row in cursor:
+                yield row
+
+
+def first_oid(path, oid_field_name, descending=False):
+    """
+    :return: the smallest (or largest) OID of a dataset, None if it has no rows
+    :rtype: int
+    """
+    order_by = "ORDER BY " + oid_field_name + (" DESC" if descending else "")
+    with load_arcpy().da.SearchCursor(path, ["OID@"], sql_clause=(None, order_by)) as cursor:
+        for oid, in cursor:
+            return oid
+    return None
+
+
+def cursor_count(path):
+    """
+    :return: the rows of a dataset, counted by streaming only its OID column
+    :rtype: int
+    """
+    count = 0
+    with load_arcpy().da.SearchCursor(path, ["OID@"]) as cursor:
+        for _ in cursor:
+            count += 1
+    return count
+
+
+def oid_where_clause(oid_field_name, oid_stride=None, oid_range=None):
+    """
+    :return: a where clause selecting the OIDs, or None to select every row
+    :rtype: basestring
+    """
+    clauses = []
+    if oid_stride and oid_stride > 1:
+        clauses.append(sampling.oid_stride_where_clause(oid_field_name, oid_stride))
+    if oid_range is not None:
+        if oid_range[0] is not None:
+            clauses.append(oid_field_name + " >= " + str(int(oid_range[0])))
+        if oid_range[1] is not None:
+            clauses.append(oid_field_name + " < " + str(int(oid_range[1])))
+    return " AND ".join(clauses) or None
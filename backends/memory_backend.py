@@ -0,0 +1,129 @@
+# ----------------------------------------------------------------------------
+# memory_backend
+#     tables held in Python lists, keyed by a made-up path such as
+#     r"mem\test.gdb\roads".  Used by the tests and benchmarks, so the
+#     profiler can be exercised without arcpy or a geodatabase.  Shapes are
+#     held in the Geometry field as well-known binary (WKB).
+# ----------------------------------------------------------------------------
+import logging
+import backends
+log = logging.getLogger()
+
+
+class MemoryBackend(backends.Backend):
+
+    def __init__(self):
+        self.tables = {}
+        self.domains = {}
+        self.subtypes = {}
+
+    def add_domain(self, workspace_path, name, coded_values=None, value_range=None, field_type="Long"):
+        """
+        :param workspace_path: the workspace the domain is defined in, e.g. r"mem\test.gdb"
+        :type workspace_path: basestring
+
+        :param coded_values: {code: description} for a coded value domain
+        :type coded_values: dict
+
+        :param value_range: (minimum, maximum) for a range domain
+        :type value_range: tuple
+        """
+        domain = backends.DomainDescription(name=name,
+                                            domain_type="CodedValue" if coded_values is not None else "Range",
+                                            field_type=field_type,
+                                            coded_values=coded_values,
+                                            range=value_range)
+        self.domains.setdefault(workspace_path, []).append(domain)
+
+    def add_table(self, path, fields, rows, shape_type="Table", has_z=False, has_m=False,
+                  sr_name="Unknown", sr_factory_code=0, sr_type="Unknown",
+                  sr_linear_unit_name="", sr_angular_unit_name="", oid_field_name="OBJECTID"):
+        """
+        :param path: the path the table is known by
+        :type path: basestring
+
+        :param fields: FieldDescriptions, or (name, type) tuples
+        :type fields: list
+
+        :param rows: one tuple of values per row, in fields order
+        :type rows: list of tuples
+        """
+        fields = tuple(f if isinstance(f, backends.FieldDescription) else backends.make_field(*f)
+                       for f in fields)
+        description = backends.FcDescription(base_name=backends.dataset_name(path),
+                                             shape_type=shape_type,
+                                             has_z=has_z,
+                                             has_m=has_m,
+                                             sr_name=sr_name,
+                                             sr_factory_code=sr_factory_code,
+                                             sr_type=sr_type,
+                                             sr_linear_unit_name=sr_linear_unit_name,
+                                             sr_angular_unit_name=sr_angular_unit_name,
+                                             oid_field_name=oid_field_name,
+                                             fields=fields)
+        self.tables[path] = (description, [tuple(row) for row in rows])
+
+    def add_subtype(self, path, code, name, subtype_field, defaults=None, domains=None, is_default=False):
+        """
+        :param path: the path of a table added by add_table
+        :type path: basestring
+
+        :param defaults: {field name: default value} for this subtype
+        :type defaults: dict
+
+        :param domains: {field name: domain name} for this subtype, "" for none
+        :type domains: dict
+        """
+        subtype = backends.SubtypeDescription(code=code,
+                                              name=name,
+                                              subtype_field=subtype_field,
+                                              is_default=is_default,
+                                              defaults=defaults or {},
+                                              domains=domains or {})
+        self.subtypes.setdefault(path, []).append(subtype)
+
+    def handles(self, path):
+        return path in self.tables or any(table_path.startswith(path.rstrip("\\/") + "\\")
+                                          for table_path in self.tables)
+
+    def workspace(self, path):
+        """the geodatabase or GeoPackage holding the dataset, even in a feature dataset; else its folder"""
+        parts = path.split("\\")
+        for index, part in enumerate(parts[:-1]):
+            if part.lower().endswith(backends.workspace_extensions):
+                return "\\".join(parts[:index + 1])
+        return path.rsplit("\\", 1)[0]
+
+    def list_datasets(self, workspace_path):
+        prefix = workspace_path.rstrip("\\/") + "\\"
+        return sorted(path for path in self.tables if path.startswith(prefix))
+
+    def list_domains(self, workspace_path):
+        return list(self.domains.get(workspace_path.rstrip("\\/"), []))
+
+    def list_subtypes(self, path):
+        return list(self.subtypes.get(path, []))
+
+    def describe(self, path):
+        return self.tables[path][0]
+
+    def count(self, path):
+        return len(self.tables[path][1])
+
+    def iter_rows(self, path, field_names, oid_stride=None, oid_range=None):
+        description, rows = self.tables[path]
+        names = [f.baseName for f in description.fields]
+        shape_names = [f.baseName for f in description.fields if f.type == "Geometry"]
+        tokens = {"OID@": description.oid_field_name,
+                  "SHAPE@WKB": shape_names[0] if shape_names else None}
+        indexes = [names.index(tokens.get(name) or name) for name in field_names]
+        oid_index = names.index(description.oid_field_name) if description.oid_field_name in names else None
+        for row in rows:
+            if oid_index is not None:
+                oid = row[oid_index]
+                if oid_stride and oid_stride > 1 and oid % oid_stride:
+                    continue
+                if oid_range is not None and ((oid_range[0] is not None and oid < oid_range[0]) or
+                                              (oid_range[1] is not None and oid >= oid_range[1])):
+                    continue
+            yield tuple(row[i] for i in indexes)
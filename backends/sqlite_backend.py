@@ -0,0 +1,316 @@
+# ----------------------------------------------------------------------------
+# sqlite_backend
+#     GeoPackages and plain SQLite databases, read with the standard library
+#     sqlite3 module.  A dataset path is the database path followed by the
+#     table name, as for a file geodatabase, e.g. r"C:\data\roads.gpkg\roads"
+#
+#     GeoPackage feature tables are described from the gpkg_contents,
+#     gpkg_geometry_columns and gpkg_spatial_ref_sys tables; any other table
+#     is described as a standalone table with no spatial reference.
+#
+#     The GeoPackage schema extension's column constraints are read as
+#     domains: 'enum' constraints as coded values and 'range' constraints as
+#     ranges, named on each column in gpkg_data_columns.  'glob' constraints
+#     have no geodatabase equivalent and are not read.
+# ----------------------------------------------------------------------------
+import logging
+import os
+import re
+import sqlite3
+import backends
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+
+# GeoPackage geometry type names to arcpy shape types
+shape_types = {"POINT": "Point",
+               "MULTIPOINT": "Multipoint",
+               "LINESTRING": "Polyline",
+               "MULTILINESTRING": "Polyline",
+               "CURVE": "Polyline",
+               "MULTICURVE": "Polyline",
+               "POLYGON": "Polygon",
+               "MULTIPOLYGON": "Polygon",
+               "SURFACE": "Polygon",
+               "MULTISURFACE": "Polygon"}
+
+# GeoPackage geometry header envelope sizes in bytes, by the envelope
+# contents indicator in bits 1-3 of the header flags
+envelope_sizes = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+# WKT unit names to arcpy unit names
+unit_names = {"metre": "Meter",
+              "meter": "Meter",
+              "degree": "Degree",
+              "foot": "Foot",
+              "us survey foot": "Foot_US"}
+
+
+def _quote(name):
+    """quote an SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _field_type(declared_type, is_integer_key):
+    """
+    :param declared_type: the column type from PRAGMA table_info, e.g. TEXT(50)
+    :type declared_type: basestring
+
+    :return: (arcpy field type, length)
+    :rtype: tuple
+    """
+    declared = declared_type.upper()
+    match = re.search(r"\((\d+)\)", declared)
+    length = int(match.group(1)) if match else 0
+    if is_integer_key:
+        return "OID", 4
+    if "CHAR" in declared or "TEXT" in declared or "CLOB" in declared:
+        return "String", length
+    if declared.startswith(("TINYINT", "SMALLINT", "MEDIUMINT")):
+        return "SmallInteger", 2
+    if "INT" in declared or declared == "BOOLEAN":
+        return "Integer", 4
+    if declared.startswith("FLOAT"):
+        return "Single", 4
+    if "REAL" in declared or "DOUB" in declared or "NUMERIC" in declared:
+        return "Double", 8
+    if declared in ("DATE", "DATETIME"):
+        return "Date", 8
+    if "BLOB" in declared:
+        return "Blob", 0
+    return "String", length
+
+
+def _crs_from_wkt(wkt):
+    """
+    :param wkt: a WKT 1 or WKT 2 coordinate reference system definition
+    :type wkt: basestring
+
+    :return: (sr_type, linear unit name, angular unit name)
+    :rtype: tuple
+    """
+    wkt = (wkt or "").strip().upper()
+    if wkt.startswith(("PROJCS", "PROJCRS")):
+        sr_type = "Projected"
+    elif wkt.startswith(("GEOGCS", "GEOGCRS", "GEODCRS")):
+        sr_type = "Geographic"
+    else:
+        return "Unknown", "", ""
+
+    units = re.findall(r'(ANGLEUNIT|LENGTHUNIT|UNIT)\["([^"]+)"', wkt)
+    angular = [name for keyword, name in units if keyword == "ANGLEUNIT"]
+    linear = [name for keyword, name in units if keyword == "LENGTHUNIT"]
+    if not angular and units:
+        # WKT 1: the first UNIT is the GEOGCS unit, the last the PROJCS unit
+        angular = [units[0][1]]
+        if sr_type == "Projected":
+            linear = [units[-1][1]]
+
+    def arcpy_name(names):
+        if not names:
+            return ""
+        name = names[-1].lower()
+        return unit_names.get(name, name.title())
+
+    return sr_type, arcpy_name(linear), arcpy_name(angular)
+
+
+def wkb_from_gpkg(blob):
+    """
+    :param blob: a GeoPackage geometry: a header, then the geometry as WKB
+    :type blob: bytes
+
+    :return: the WKB, None for a NULL geometry.  A blob without the "GP"
+             magic is returned as is.
+    :rtype: bytes
+    """
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    if blob[:2] != b"GP":
+        return blob
+    flags = bytearray(blob[3:4])[0]
+    return blob[8 + envelope_sizes.get((flags >> 1) & 7, 0):]
+
+
+class SqliteBackend(backends.Backend):
+
+    filters_at_source = True
+
+    def handles(self, path):
+        return backends.is_sqlite_path(path)
+
+    def workspace(self, path):
+        return backends.split_sqlite_path(path)[0]
+
+    def source_files(self, path):
+        database = self.workspace(path)
+        # committed changes may still be in the write-ahead log
+        return [f for f in (database, database + "-wal") if os.path.exists(f)]
+
+    def _connect(self, path):
+        database, table = backends.split_sqlite_path(path)
+        return sqlite3.connect(database), table
+
+    @staticmethod
+    def _has_table(connection, name):
+        return connection.execute("SELECT COUNT(*) FROM sqlite_master "
+                                  "WHERE type = 'table' AND name = ?", (name,)).fetchone()[0] > 0
+
+    @classmethod
+    def _is_geopackage(cls, connection):
+        return cls._has_table(connection, "gpkg_contents")
+
+    def list_domains(self, workspace_path):
+        """the column constraints of the GeoPackage schema extension"""
+        connection, _ = self._connect(workspace_path)
+        try:
+            if not self._has_table(connection, "gpkg_data_column_constraints"):
+                return []
+            constraints = connection.execute(
+                "SELECT constraint_name, constraint_type, value, min, max, description "
+                "FROM gpkg_data_column_constraints "
+                "WHERE constraint_type IN ('enum', 'range') ORDER BY constraint_name").fetchall()
+        finally:
+            connection.close()
+        coded_values = {}
+        ranges = {}
+        for name, constraint_type, value, minimum, maximum, description in constraints:
+            if constraint_type == "enum":
+                coded_values.setdefault(name, {})[value] = description
+            else:
+                # exclusive bounds (min_is_inclusive = 0) are read as inclusive
+                ranges[name] = (minimum, maximum)
+        domains = [backends.DomainDescription(name, "CodedValue", "", values, None)
+                   for name, values in sorted(coded_values.items())]
+        domains += [backends.DomainDescription(name, "Range", "", None, value_range)
+                    for name, value_range in sorted(ranges.items())]
+        return domains
+
+    def list_datasets(self, workspace_path):
+        connection, _ = self._connect(workspace_path)
+        try:
+            if self._is_geopackage(connection):
+                names = [r[0] for r in connection.execute(
+                    "SELECT table_name FROM gpkg_contents WHERE data_type IN ('features', 'attributes')")]
+            else:
+                names = [r[0] for r in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        finally:
+            connection.close()
+        return sorted(os.path.join(workspace_path, name) for name in names)
+
+    def describe(self, path):
+        connection, table = self._connect(path)
+        try:
+            geometry = None
+            srs = None
+            if self._is_geopackage(connection):
+                geometry = connection.execute(
+                    "SELECT column_name, geometry_type_name, srs_id, z, m "
+                    "FROM gpkg_geometry_columns WHERE table_name = ?", (table,)).fetchone()
+                if geometry is not None:
+                    srs = connection.execute(
+                        "SELECT srs_name, organization, organization_coordsys_id, definition "
+                        "FROM gpkg_spatial_ref_sys WHERE srs_id = ?", (geometry[2],)).fetchone()
+            columns = connection.execute("PRAGMA table_info(" + _quote(table) + ")").fetchall()
+            constraint_names = {}
+            if self._has_table(connection, "gpkg_data_columns"):
+                constraint_names = dict(connection.execute(
+                    "SELECT column_name, constraint_name FROM gpkg_data_columns "
+                    "WHERE table_name = ? AND constraint_name IS NOT NULL", (table,)))
+        finally:
+            connection.close()
+        if not columns:
+            raise ValueError("table not found: " + path)
+
+        # an INTEGER PRIMARY KEY is the rowid, so it is the OID field
+        integer_keys = [c[1] for c in columns if c[5] and c[2].upper() == "INTEGER"]
+        oid_field_name = integer_keys[0] if len(integer_keys) == 1 else "rowid"
+
+        fields = []
+        for cid, name, declared_type, not_null, default, primary_key in columns:
+            if geometry is not None and name == geometry[0]:
+                field_type, length = "Geometry", 0
+            else:
+                field_type, length = _field_type(declared_type or "", name == oid_field_name)
+            field = backends.make_field(name, field_type, length, is_nullable=not not_null,
+                                        domain=constraint_names.get(name, ""))
+            fields.append(field)
+
+        if geometry is None:
+            shape_type, has_z, has_m = "Table", False, False
+        else:
+            shape_type = shape_types.get(geometry[1].upper(), geometry[1].title())
+            has_z, has_m = geometry[3] in (1, 2), geometry[4] in (1, 2)
+
+        if srs is None or (geometry is not None and geometry[2] in (-1, 0)):
+            sr_name, sr_factory_code, sr_type, linear, angular = "Unknown", 0, "Unknown", "", ""
+        else:
+            sr_name = srs[0]
+            sr_factory_code = srs[2] if (srs[1] or "").upper() == "EPSG" else 0
+            sr_type, linear, angular = _crs_from_wkt(srs[3])
+
+        return backends.FcDescription(base_name=table,
+                                      shape_type=shape_type,
+                                      has_z=has_z,
+                                      has_m=has_m,
+                                      sr_name=sr_name,
+                                      sr_factory_code=sr_factory_code,
+                                      sr_type=sr_type,
+                                      sr_linear_unit_name=linear,
+                                      sr_angular_unit_name=angular,
+                                      oid_field_name=oid_field_name,
+                                      fields=tuple(fields))
+
+    def count(self, path):
+        connection, table = self._connect(path)
+        try:
+            return connection.execute("SELECT COUNT(*) FROM " + _quote(table)).fetchone()[0]
+        finally:
+            connection.close()
+
+    def oid_bounds(self, path):
+        oid_field_name = _quote(backends.describe(path).oid_field_name)
+        connection, table = self._connect(path)
+        try:
+            return tuple(connection.execute("SELECT MIN(" + oid_field_name + "), MAX(" + oid_field_name +
+                                            ") FROM " + _quote(table)).fetchone())
+        finally:
+            connection.close()
+
+    def iter_rows(self, path, field_names, oid_stride=None, oid_range=None):
+        oid_field_name = backends.describe(path).oid_field_name
+        shape_field_name = backends.shape_field_name(path)
+        if "SHAPE@WKB" in field_names and shape_field_name is None:
+            raise ValueError("no geometry column: " + path)
+        tokens = {"OID@": oid_field_name, "SHAPE@WKB": shape_field_name}
+        columns = [_quote(tokens.get(name) or name) for name in field_names]
+        shape_indexes = [i for i, name in enumerate(field_names) if name == "SHAPE@WKB"]
+        connection, table = self._connect(path)
+        sql = "SELECT " + ", ".join(columns) + " FROM " + _quote(table)
+        clauses = []
+        parameters = []
+        if oid_stride and oid_stride > 1:
+            clauses.append(_quote(oid_field_name) + " % ? = 0")
+            parameters.append(int(oid_stride))
+        if oid_range is not None and oid_range[0] is not None:
+            clauses.append(_quote(oid_field_name) + " >= ?")
+            parameters.append(int(oid_range[0]))
+        if oid_range is not None and oid_range[1] is not None:
+            clauses.append(_quote(oid_field_name) + " < ?")
+            parameters.append(int(oid_range[1]))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        try:
+            for row in connection.execute(sql, parameters):
+                if shape_indexes:
+                    row = list(row)
+                    for i in shape_indexes:
+                        row[i] = wkb_from_gpkg(row[i])
+                    row = tuple(row)
+                yield row
+        finally:
+            connection.close()
@@ -0,0 +1,163 @@
+import collections
+import datetime
+import logging
+import multiprocessing
+import os
+import traceback
+import backends
+import progress
+import xls_output
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+summary_ext = "_gdb_profile_summary.xls"
+
+ProfileResult = collections.namedtuple("ProfileResult", ["dataset_path",
+                                                         "status",
+                                                         "report_path",
+                                                         "duration",
+                                                         "error"])
+
+
+# -----------------------------------------
+# list_datasets
+#     every feature class and standalone table in a geodatabase,
+#     including those inside feature datasets, or in a GeoPackage
+# -----------------------------------------
+
+def list_datasets(gdb_path):
+    """
+    :param gdb_path: fully qualified path to a file geodatabase or GeoPackage
+    :type gdb_path: basestring
+
+    :return: the full path of every feature class and table, sorted
+    :rtype: list of basestring
+    """
+    dataset_paths = backends.get_backend(gdb_path).list_datasets(gdb_path)
+    log.debug("list_datasets found " + str(len(dataset_paths)) + " datasets")
+    return dataset_paths
+
+
+# -----------------------------------------
+# worker functions
+#     a pool worker imports generate_profile (and its backend) once, in
+#     _init_worker, then profiles many datasets.  _profile_one never
+#     raises, so one bad dataset does not stop the run.  Once the run is
+#     cancelled, the dataset being profiled gets a partial report and the
+#     rest are skipped, all with the status CANCELLED.
+# -----------------------------------------
+
+def _init_worker(gdb_path, domains, cancel_event):
+    """
+    import the profiling modules once per worker process, cache the
+    domains of the geodatabase read by profile_gdb, and share its cancel event
+    """
+    import generate_profile
+    backends.set_domains(gdb_path, domains)
+    progress.attach_worker(None, cancel_event)
+
+
+def _profile_one(job):
+    """
+    :param job: (dataset_path, out_folder, overwrite, generate_profile keyword arguments)
+    :type job: tuple
+
+    :rtype: ProfileResult
+    """
+    import generate_profile
+    dataset_path, out_folder, overwrite, options = job
+    start = datetime.datetime.now()
+    if progress.is_cancelled():
+        return ProfileResult(dataset_path, "CANCELLED", "", datetime.timedelta(0), "")
+    try:
+        report_path = generate_profile.generate_profile(dataset_path, out_folder, overwrite, **options)
+        return ProfileResult(dataset_path, "OK", report_path,
+                             datetime.datetime.now() - start, "")
+    except progress.Cancelled as e:
+        return ProfileResult(dataset_path, "CANCELLED", e.report_path,
+                             datetime.datetime.now() - start, str(e))
+    except Exception as e:
+        log.error("Profiling failed for " + dataset_path + ": " + str(e).replace("\n", "; "))
+        return ProfileResult(dataset_path, "FAILED", "",
+                             datetime.datetime.now() - start,
+                             traceback.format_exc())
+
+
+# -----------------------------------------
+# profile_gdb
+#     :pre the geodatabase exists
+#     :pre the output folder has write access
+#     :post one report per dataset and a run summary are written
+# -----------------------------------------
+
+def profile_gdb(gdb_path, out_folder, overwrite, processes=None, **options):
+    """
+    :param gdb_path: fully qualified path to a file geodatabase
+    :type gdb_path: basestring
+
+    :param out_folder: the output folder
+    :type out_folder: basestring
+
+    :param overwrite: a flag to indicate if outputs should be overwritten
+    :type overwrite: bool
+
+    :param processes: worker processes, defaults to the CPU count.
+                      1 profiles in this process, without a pool.
+    :type processes: int
+
+    :param options: keyword arguments for generate_profile, e.g. sample_size
+    :type options: dict
+
+    :return: one result per dataset
+    :rtype: list of ProfileResult
+    """
+    dataset_paths = list_datasets(gdb_path)
+    # every dataset shares the domains of the geodatabase, so they are read once
+    domains = backends.get_domains(gdb_path)
+    requested_processes = processes
+    processes = min(processes or multiprocessing.cpu_count(), max(len(dataset_paths), 1))
+    # pool workers cannot start pools of their own, so only a sequential run
+    # (e.g. a geodatabase of one large feature class) reads partitions in parallel
+    options = dict(options, processes=1 if processes > 1 else requested_processes)
+    jobs = [(dataset_path, out_folder, overwrite, options) for dataset_path in dataset_paths]
+    log.info("Profiling " + str(len(jobs)) + " datasets with " + str(processes) + " processes")
+
+    results = []
+    if processes == 1:
+        for job in jobs:
+            results.append(_profile_one(job))
+            log.info(results[-1].status + " " + results[-1].dataset_path)
+    else:
+        cancel_event = multiprocessing.Event()
+        pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                    initargs=(gdb_path, domains, cancel_event))
+        replaced_event = progress.set_cancel_event(cancel_event)
+        try:
+            profiled = pool.imap_unordered(_profile_one, jobs, chunksize=1)
+            while len(results) < len(jobs):
+                try:
+                    result = profiled.next(progress.report_interval)
+                except multiprocessing.TimeoutError:
+                    progress.is_cancelled()  # passes a cancel on to the workers
+                    continue
+                results.append(result)
+                log.info(result.status + " " + result.dataset_path)
+        finally:
+            progress.set_cancel_event(replaced_event)
+            pool.close()
+            pool.join()
+    results.sort(key=lambda r: r.dataset_path)
+
+    failed = [r for r in results if r.status == "FAILED"]
+    cancelled = [r for r in results if r.status == "CANCELLED"]
+    log.info(str(len(results) - len(failed) - len(cancelled)) + " profiled, " + str(len(failed)) + " failed" +
+             (", " + str(len(cancelled)) + " cancelled" if cancelled else ""))
+
+    gdb_name = os.path.splitext(os.path.basename(gdb_path.rstrip("\\/")))[0]
+    summary_path = os.path.join(out_folder, gdb_name + summary_ext)
+    xls_output.write_run_summary(gdb_path, results, summary_path)
+
+    return results
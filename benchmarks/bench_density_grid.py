@@ -0,0 +1,81 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: times the density grid and measures its peak memory for the
+#              centroids of the MGAZ56_5_million_rec_point fixture (the label
+#              points of a 2,500 x 2,000 fishnet of 100 m cells, see
+#              create_test_data.py), generated here a chunk at a time as
+#              geometry_properties reads them, so no geodatabase is needed.
+#              The grid's memory depends on its cells, not on the points.
+#
+# Run instructions:  execute from the repo root
+#                    python -m benchmarks.bench_density_grid
+# ----------------------------------------------------------------------------
+
+import logging
+import time
+import numpy
+import geometry_properties
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+origin = (500000.0, 6950000.0)
+fishnet_cell = 100.0
+fishnet_columns = 2500
+fishnet_rows = 2000
+cell_sizes = [None, 100.0, 10.0]  # None is the default for the units, Meter
+
+
+def label_point_chunks(chunk_size):
+    """:return: (x, y) arrays of the fishnet label points, chunk_size at a time"""
+    total = fishnet_columns * fishnet_rows
+    for start in range(0, total, chunk_size):
+        index = numpy.arange(start, min(start + chunk_size, total))
+        x = origin[0] + (index % fishnet_columns + 0.5) * fishnet_cell
+        y = origin[1] + (index // fishnet_columns + 0.5) * fishnet_cell
+        yield x, y
+
+
+def run(cell_size):
+    """:return: the density grid of every label point"""
+    grid = geometry_properties.DensityGrid(cell_size or geometry_properties.default_cell_sizes["Meter"])
+    for x, y in label_point_chunks(geometry_properties.chunk_size):
+        grid.add(x, y)
+    return grid
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main():
+    log.info("{:>10} {:>10} {:>12} {:>10} {:>14} {:>10}".format("cell (m)", "grid", "points",
+                                                                "seconds", "points/s", "peak MB"))
+    for cell_size in cell_sizes:
+        started = time.time()
+        grid = run(cell_size)
+        seconds = time.time() - started
+        peak = "n/a"
+        if tracemalloc is not None:
+            tracemalloc.start()
+            run(cell_size)
+            peak = "{:.1f}".format(tracemalloc.get_traced_memory()[1] / 1048576.0)
+            tracemalloc.stop()
+        log.info("{:>10g} {:>10} {:>12,} {:>10.2f} {:>14,.0f} {:>10}".format(
+            grid.cell_size, "x".join(str(n) for n in reversed(grid.counts.shape)),
+            grid.point_count, seconds, grid.point_count / seconds, peak))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
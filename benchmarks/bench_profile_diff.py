@@ -0,0 +1,84 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: times profile_diff loading and comparing two synthetic sets
+#              of JSON Lines profiles, one file per feature class, as a
+#              whole-geodatabase nightly delivery would produce
+#
+# Run instructions:  execute from the repo root
+#                    python -m benchmarks.bench_profile_diff
+# ----------------------------------------------------------------------------
+
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import timeit
+import profile_diff
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+fc_counts = [1000, 5000]
+fields_per_fc = 40
+changed_fraction = 0.05  # of feature classes with a changed record count and statistic
+repeats = 3
+
+
+def write_profiles(folder, fc_count, changed):
+    """one .jsonl export per feature class; changed feature classes get more records and NULLs"""
+    os.mkdir(folder)
+    for i in range(fc_count):
+        fc_path = "d:\\deliveries\\data.gdb\\fc_" + str(i)
+        records = 1000 + (100 if i in changed else 0)
+        lines = [{"record_type": "fc", "fc_path": fc_path, "fc_name": "fc_" + str(i), "geometry_type": "Polygon",
+                  "crs_wkid": 28356, "crs_name": "GDA94 / MGA zone 56", "total_records": records}]
+        for j in range(fields_per_fc):
+            name = "field_" + str(j)
+            lines.append({"record_type": "field", "fc_path": fc_path, "field_name": name, "field_type": "Double",
+                          "field_length": 8, "field_is_nullable": True, "field_domain": ""})
+            lines.append({"record_type": "field_statistics", "fc_path": fc_path, "field_name": name,
+                          "record_count": records, "no_data_count": 100 if i in changed else 0,
+                          "distinct_count": 900, "mean": 50.0, "standard_deviation": 5.0,
+                          "top_values": [{"value": 1.0, "count": 10, "max_error": 0}]})
+        with open(os.path.join(folder, "fc_" + str(i) + "_fc_profile.jsonl"), "w") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main():
+    log.info("{:>10} {:>14} {:>10} {:>10}".format("fcs", "load both (s)", "diff (s)", "changes"))
+    for fc_count in fc_counts:
+        folder = tempfile.mkdtemp()
+        try:
+            changed = set(random.Random(1).sample(range(fc_count), int(fc_count * changed_fraction)))
+            write_profiles(os.path.join(folder, "old"), fc_count, set())
+            write_profiles(os.path.join(folder, "new"), fc_count, changed)
+
+            level = log.level
+            log.setLevel(logging.WARNING)  # quieten the per-call messages
+            load_time = min(timeit.repeat(lambda: profile_diff.load_profiles(os.path.join(folder, "old")),
+                                          number=1, repeat=repeats))
+            old = profile_diff.load_profiles(os.path.join(folder, "old"))
+            new = profile_diff.load_profiles(os.path.join(folder, "new"))
+            diff_time = min(timeit.repeat(lambda: profile_diff.diff_profiles(old, new), number=1, repeat=repeats))
+            changes = profile_diff.diff_profiles(old, new)
+            log.setLevel(level)
+            log.info("{:>10,} {:>14.3f} {:>10.3f} {:>10,}".format(fc_count, load_time * 2, diff_time, len(changes)))
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
@@ -0,0 +1,366 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: times each stage of a profile (properties, structure, field
+#              statistics, geometry and the report) and measures its peak
+#              memory, for feature classes of each row count and field count,
+#              read through a stand-in backend of generated rows, so it runs
+#              anywhere (no arcpy, no test geodatabase).  Results can be saved
+#              as a baseline, and a later run fails (exit code 1) if any stage
+#              is slower, or uses more memory, than the baseline by more than
+#              the tolerance.
+#
+#              Cases with more than max_values values (rows x fields) are
+#              skipped unless --max-values 0 is given: 5M rows of 1,000 fields
+#              is hours of scanning.
+#
+# Run instructions:  execute from the repo root
+#                    python -m benchmarks.bench_profile_stages
+#                    python -m benchmarks.bench_profile_stages --save baseline.json
+#                    python -m benchmarks.bench_profile_stages --baseline baseline.json
+#                    python -m benchmarks.bench_profile_stages --rows 10000 --fields 10 100
+# ----------------------------------------------------------------------------
+
+import argparse
+import collections
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import timeit
+import backends
+import fc_properties
+import geometry_properties
+import partitioned_scan
+import xls_output
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+try:
+    range = xrange  # python 2.7
+except NameError:
+    pass
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+row_counts = [10000, 1000000, 5000000]
+field_counts = [10, 100, 1000]
+max_values = 20000000  # skip cases of more rows x fields; 0 for no limit
+stages = ["properties", "structure", "field_statistics", "geometry", "report"]
+processes = 1  # field statistics in this process, so the stage is timed alone
+report_format = "xls"
+tolerance = 0.25  # fail if rows/s falls, or peak memory grows, by more than this fraction
+min_gated_seconds = 0.1  # stages quicker than this in the baseline are too noisy to gate
+min_gated_bytes = 1048576  # nor are memory peaks smaller than this
+
+# the stand-in tables: attribute field types in rotation, values drawn from a
+# pool of generated rows (more than field_properties.exact_cardinality_limit,
+# so high cardinality fields switch to their sketches), holding at most
+# pool_value_limit values
+field_types = ["Integer", "Double", "String", "Date", "SmallInteger"]
+pool_rows = 16384
+pool_value_limit = 2000000
+null_fraction = 0.05
+workspace_path = "synthetic.gdb"
+
+StageResult = collections.namedtuple("StageResult", ["rows", "fields", "stage", "seconds",
+                                                     "rows_per_second", "peak_bytes"])
+
+
+# ----------------------------------------------------------------------------
+# SyntheticBackend
+#     a stand-in for a file geodatabase.  A table is described by its path,
+#     e.g. r"synthetic.gdb\rows_10000_fields_10": an OBJECTID, a point SHAPE
+#     and the attribute fields.  Rows are drawn from a pool of generated rows
+#     by OBJECTID, so reading one costs little and the table is never held.
+# ----------------------------------------------------------------------------
+
+class SyntheticBackend(backends.Backend):
+
+    filters_at_source = True
+
+    def __init__(self):
+        self.tables = {}
+
+    def add_table(self, row_count, field_count, seed=1):
+        """
+        :return: the path of a table of row_count rows and field_count attribute fields
+        :rtype: basestring
+        """
+        path = workspace_path + "\\rows_" + str(row_count) + "_fields_" + str(field_count)
+        fields = [backends.make_field("OBJECTID", "OID"), backends.make_field("SHAPE", "Geometry")]
+        fields += [backends.make_field("FIELD_" + str(i), field_types[i % len(field_types)],
+                                       50 if field_types[i % len(field_types)] == "String" else 0)
+                   for i in range(field_count)]
+        description = backends.FcDescription(base_name=backends.dataset_name(path),
+                                             shape_type="Point",
+                                             has_z=False,
+                                             has_m=False,
+                                             sr_name="GDA_1994_MGA_Zone_56",
+                                             sr_factory_code=28356,
+                                             sr_type="Projected",
+                                             sr_linear_unit_name="Meter",
+                                             sr_angular_unit_name="Degree",
+                                             oid_field_name="OBJECTID",
+                                             fields=tuple(fields))
+        size = max(1, min(pool_rows, pool_value_limit // (field_count + 1)))
+        rng = random.Random(seed)
+        columns = {"SHAPE": [struct.pack("<BIdd", 1, 1, rng.uniform(300000, 400000), rng.uniform(6e6, 6.1e6))
+                             for _ in range(size)]}
+        for field in fields[2:]:
+            columns[field.baseName] = [None if rng.random() < null_fraction else make_value(field.type, rng)
+                                       for _ in range(size)]
+        self.tables[path] = (description, row_count, columns)
+        return path
+
+    def handles(self, path):
+        return path.startswith(workspace_path)
+
+    def workspace(self, path):
+        return workspace_path
+
+    def list_datasets(self, workspace_path):
+        return sorted(self.tables)
+
+    def describe(self, path):
+        return self.tables[path][0]
+
+    def count(self, path):
+        return self.tables[path][1]
+
+    def oid_bounds(self, path):
+        row_count = self.tables[path][1]
+        return (1, row_count) if row_count else (None, None)
+
+    def iter_rows(self, path, field_names, oid_stride=None, oid_range=None):
+        description, row_count, columns = self.tables[path]
+        tokens = {"SHAPE@WKB": "SHAPE"}
+        size = len(columns["SHAPE"])
+        oid_index = field_names.index("OID@") if "OID@" in field_names else None
+        pool = list(zip(*[columns.get(tokens.get(name, name)) or [None] * size for name in field_names]))
+        low, high = 1, row_count + 1
+        if oid_range is not None:
+            low = max(low, oid_range[0] if oid_range[0] is not None else low)
+            high = min(high, oid_range[1] if oid_range[1] is not None else high)
+        step = oid_stride if oid_stride and oid_stride > 1 else 1
+        low = ((low + step - 1) // step) * step
+        if oid_index is None:
+            for oid in range(low, high, step):
+                yield pool[oid % size]
+        else:
+            for oid in range(low, high, step):
+                row = list(pool[oid % size])
+                row[oid_index] = oid
+                yield tuple(row)
+
+
+def make_value(field_type, rng):
+    """:return: a random value of the field type"""
+    if field_type == "Integer":
+        return rng.randint(0, 1000)
+    if field_type == "SmallInteger":
+        return rng.randint(0, 9)
+    if field_type == "Double":
+        return rng.uniform(0, 1e6)
+    if field_type == "Date":
+        return datetime.datetime(2000, 1, 1) + datetime.timedelta(days=rng.randint(0, 9000))
+    return u"VALUE " + str(rng.randint(0, 5000))
+
+
+# -----------------------------------------
+# run_case
+#     the stages of generate_profile, one at a time
+# -----------------------------------------
+
+def run_case(fc_path, xls_path, trace_memory=False):
+    """
+    :param fc_path: a table of a registered SyntheticBackend
+    :type fc_path: basestring
+
+    :param xls_path: the report to write
+    :type xls_path: basestring
+
+    :param trace_memory: measure the peak memory of each stage with tracemalloc
+                         (which slows the stage, so times are from a run without it)
+    :type trace_memory: bool
+
+    :return: (stage, seconds, peak bytes or None) in stage order
+    :rtype: list of tuples
+    """
+    fc_properties.clear_describe_cache()
+    measurements = []
+
+    def timed(stage, function, *args, **kwargs):
+        if trace_memory:
+            tracemalloc.start()
+        started = timeit.default_timer()
+        result = function(*args, **kwargs)
+        seconds = timeit.default_timer() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        measurements.append((stage, seconds, peak))
+        return result
+
+    properties = timed("properties", fc_properties.get_fc_properties, fc_path)
+    structure = timed("structure", fc_properties.get_fc_structure, fc_path)
+    field_profile = timed("field_statistics", partitioned_scan.get_field_profile, fc_path, processes=processes)
+    geometry_statistics = timed("geometry", geometry_properties.get_geometry_statistics, fc_path)
+    timed("report", xls_output.write_fc_profile, properties, structure, xls_path,
+          field_statistics=field_profile.fields,
+          geometry_statistics=geometry_statistics,
+          subtype_statistics=field_profile.subtypes)
+    return measurements
+
+
+def run(rows_list, fields_list, limit=max_values, measure_memory=True):
+    """
+    :return: one result per stage of each case within the limit
+    :rtype: list of StageResult
+    """
+    backend = SyntheticBackend()
+    backends.register_backend(backend)
+    out_folder = tempfile.mkdtemp()
+    level = log.level
+    results = []
+    try:
+        for row_count in rows_list:
+            for field_count in fields_list:
+                if limit and row_count * field_count > limit:
+                    log.info("skipping {:,} rows x {:,} fields, over --max-values".format(row_count, field_count))
+                    continue
+                fc_path = backend.add_table(row_count, field_count)
+                xls_path = os.path.join(out_folder, "bench." + report_format)
+                log.setLevel(logging.WARNING)  # quieten the per-stage progress messages
+                try:
+                    timings = run_case(fc_path, xls_path)
+                    peaks = [None] * len(timings)
+                    if measure_memory and tracemalloc is not None:
+                        peaks = [peak for stage, seconds, peak in run_case(fc_path, xls_path, trace_memory=True)]
+                finally:
+                    log.setLevel(level)
+                del backend.tables[fc_path]
+                for (stage, seconds, unused), peak in zip(timings, peaks):
+                    result = StageResult(rows=row_count, fields=field_count, stage=stage, seconds=seconds,
+                                         rows_per_second=row_count / seconds if seconds else None,
+                                         peak_bytes=peak)
+                    results.append(result)
+                    log.info(format_result(result))
+    finally:
+        backends.unregister_backend(backend)
+        fc_properties.clear_describe_cache()
+        shutil.rmtree(out_folder)
+    return results
+
+
+def format_result(result):
+    """:return: a result as a line of the results table"""
+    peak = "n/a" if result.peak_bytes is None else "{:.1f}".format(result.peak_bytes / 1048576.0)
+    rate = "n/a" if result.rows_per_second is None else "{:,.0f}".format(result.rows_per_second)
+    return "{:>10,} {:>7,} {:18} {:>10.3f} {:>14} {:>10}".format(result.rows, result.fields, result.stage,
+                                                                  result.seconds, rate, peak)
+
+
+# -----------------------------------------
+# baselines
+# -----------------------------------------
+
+def save(results, path):
+    """write the results, and where they were measured, as JSON"""
+    with open(path, "w") as f:
+        json.dump({"python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "created": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                   "results": [result._asdict() for result in results]}, f, indent=1)
+
+
+def regressions(results, baseline, tolerance=tolerance):
+    """
+    :param results: this run
+    :type results: list of StageResult
+
+    :param baseline: a file written by save, as read by json.load
+    :type baseline: dict
+
+    :param tolerance: the fraction rows/s may fall, or peak memory grow, by
+    :type tolerance: float
+
+    :return: a description of each stage that regressed past the tolerance;
+             stages not in the baseline, or too quick or small to measure
+             reliably, are not gated
+    :rtype: list of basestring
+    """
+    baseline_results = dict(((r["rows"], r["fields"], r["stage"]), r) for r in baseline["results"])
+    failures = []
+    for result in results:
+        base = baseline_results.get((result.rows, result.fields, result.stage))
+        if base is None:
+            continue
+        case = "{:,} rows x {:,} fields {}".format(result.rows, result.fields, result.stage)
+        if base["seconds"] >= min_gated_seconds and result.rows_per_second is not None and \
+                result.rows_per_second < base["rows_per_second"] * (1 - tolerance):
+            failures.append("{}: {:,.0f} rows/s, baseline {:,.0f}".format(case, result.rows_per_second,
+                                                                          base["rows_per_second"]))
+        if base["peak_bytes"] and result.peak_bytes is not None and base["peak_bytes"] >= min_gated_bytes and \
+                result.peak_bytes > base["peak_bytes"] * (1 + tolerance):
+            failures.append("{}: peak {:.1f} MB, baseline {:.1f} MB".format(case, result.peak_bytes / 1048576.0,
+                                                                            base["peak_bytes"] / 1048576.0))
+    return failures
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main(argv=None):
+    """
+    :return: the exit code: 1 if a stage regressed past the baseline, else 0
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="time each profiling stage against a stand-in backend")
+    parser.add_argument("--rows", type=int, nargs="+", default=row_counts, help="row counts")
+    parser.add_argument("--fields", type=int, nargs="+", default=field_counts, help="attribute field counts")
+    parser.add_argument("--max-values", type=int, default=max_values,
+                        help="skip cases of more rows x fields, 0 for no limit")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory (tracemalloc) run")
+    parser.add_argument("--save", help="write the results to this JSON file, e.g. as a baseline")
+    parser.add_argument("--baseline", help="fail if a stage regresses from the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=tolerance,
+                        help="the fraction rows/s may fall, or peak memory grow, by")
+    args = parser.parse_args(argv)
+
+    log.info("{:>10} {:>7} {:18} {:>10} {:>14} {:>10}".format("rows", "fields", "stage", "seconds",
+                                                               "rows/s", "peak MB"))
+    results = run(args.rows, args.fields, args.max_values, not args.no_memory)
+    if args.save:
+        save(results, args.save)
+        log.info("results saved to " + args.save)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f), args.tolerance)
+        for failure in failures:
+            log.error("REGRESSION " + failure)
+        if failures:
+            return 1
+        log.info("no stage regressed by more than {:.0%}".format(args.tolerance))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(main())
@@ -0,0 +1,85 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: compares the record count in arcpy_backend (GetCount on the
+#              dataset path) with the OID cursor it falls back to, and the
+#              MakeTableView / GetCount implementation before 1.3
+#
+# Run instructions:  deploy the test data with create_test_data.py,
+#                    configure run config and execute from the repo root
+#                    python -m benchmarks.bench_record_count
+# ----------------------------------------------------------------------------
+
+import logging
+import os
+import timeit
+import arcpy
+import fc_properties
+from backends import arcpy_backend
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+fgdb = r"C:\tmp\fc_profiler_testdata\fc_profiler_test.gdb"
+fc_names = ["MGAZ56_602_rec_polyline",
+            "MGAZ56_5_million_rec_polygon",
+            "MGAZ56_5_million_rec_point"]
+repeats = 3
+
+
+# -----------------------------------------
+# the pre-1.3 implementation, kept for comparison only
+# -----------------------------------------
+
+def table_view_record_count(fc_path):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :return count: the record count for a feature class
+    :rtype result: int
+    """
+    table_view = "count_rec_tblview"
+    arcpy.Delete_management(table_view)
+    arcpy.MakeTableView_management(in_table=fc_path,
+                                   out_view=table_view)
+    count = int(arcpy.GetCount_management(table_view).getOutput(0))
+    arcpy.Delete_management(table_view)
+    return count
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main():
+    log.info("{:32} {:>12} {:>12} {:>12} {:>12}".format("feature class", "records",
+                                                        "view (s)", "cursor (s)", "GetCount (s)"))
+    for fc_name in fc_names:
+        fc_path = os.path.join(fgdb, fc_name)
+
+        view_count = table_view_record_count(fc_path)
+        cursor_count = arcpy_backend.cursor_count(fc_path)
+        count = fc_properties.get_fc_total_record_count(fc_path)
+        if not view_count == cursor_count == count:
+            log.error("count mismatch for " + fc_name + ": " +
+                      str(view_count) + ", " + str(cursor_count) + ", " + str(count))
+
+        view_time = min(timeit.repeat(lambda: table_view_record_count(fc_path),
+                                      number=1, repeat=repeats))
+        cursor_time = min(timeit.repeat(lambda: arcpy_backend.cursor_count(fc_path),
+                                        number=1, repeat=repeats))
+        # time the backend directly; fc_properties caches the count
+        count_time = min(timeit.repeat(lambda: arcpy_backend.ArcpyBackend().count(fc_path),
+                                       number=1, repeat=repeats))
+        log.info("{:32} {:>12,} {:>12.3f} {:>12.3f} {:>12.3f}".format(fc_name, count, view_time,
+                                                                      cursor_time, count_time))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
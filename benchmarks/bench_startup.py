@@ -0,0 +1,106 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: measures start up cost: the time to import each module in a
+#              fresh interpreter, and the time for the command line to
+#              answer --help and to reject a feature class that does not exist
+#
+# Run instructions:  execute from the repo root
+#                    python -m benchmarks.bench_startup
+# ----------------------------------------------------------------------------
+
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+modules = ["backends",
+           "sampling",
+           "sketches",
+           "fc_properties",
+           "field_properties",
+           "xlwt",
+           "xls_output",
+           "generate_profile",
+           "batch_profile",
+           "arcpy",
+           "fc_profiler"]
+repeats = 5
+repo_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# -----------------------------------------
+# import_time
+#     each import is timed in a new interpreter, so nothing is already loaded
+# -----------------------------------------
+
+def import_time(module):
+    """
+    :param module: the module name
+    :type module: basestring
+
+    :return: the import time in seconds, None if the module cannot be imported
+    :rtype: float
+    """
+    code = ("import time; start = time.time(); import " + module +
+            "; print(repr(time.time() - start))")
+    times = []
+    for _ in range(repeats):
+        process = subprocess.Popen([sys.executable, "-c", code], cwd=repo_folder,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = process.communicate()
+        if process.returncode != 0:
+            return None
+        times.append(float(out.decode().strip()))
+    return min(times)
+
+
+def cli_time(args):
+    """
+    :param args: fc_profiler.py arguments
+    :type args: list of basestring
+
+    :return: the wall clock seconds for the command line to exit
+    :rtype: float
+    """
+    command = [sys.executable, os.path.join(repo_folder, "fc_profiler.py")] + args
+
+    def run():
+        subprocess.call(command, cwd=repo_folder,
+                        stdout=open(os.devnull, "w"), stderr=subprocess.STDOUT)
+    return min(timeit.repeat(run, number=1, repeat=repeats))
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main():
+    log.info("{:20} {:>12}".format("module", "import (ms)"))
+    for module in modules:
+        seconds = import_time(module)
+        if seconds is None:
+            log.info("{:20} {:>12}".format(module, "n/a"))
+        else:
+            log.info("{:20} {:>12.1f}".format(module, seconds * 1000))
+
+    out_folder = tempfile.mkdtemp()
+    missing_fc = os.path.join(out_folder, "missing.gdb", "roads")
+    log.info("")
+    log.info("{:20} {:>12}".format("command line", "time (ms)"))
+    log.info("{:20} {:>12.1f}".format("--help", cli_time(["--help"]) * 1000))
+    log.info("{:20} {:>12.1f}".format("missing fc", cli_time([missing_fc, out_folder]) * 1000))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
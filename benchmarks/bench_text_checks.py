@@ -0,0 +1,100 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: throughput, in values per second, of the text field checks
+#              (non-ASCII, Windows reserved and control characters) done
+#              character by character in Python, by three precompiled
+#              regular expression searches per value, and by
+#              field_properties.TextStatistics, which clears most values
+#              with a single search
+#
+# Run instructions:  execute from the repo root
+#                    python -m benchmarks.bench_text_checks
+# ----------------------------------------------------------------------------
+
+import logging
+import random
+import timeit
+import field_properties
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+value_count = 200000
+suspect_fraction = 0.03  # values holding a character that is checked for
+repeats = 3
+
+
+def make_values():
+    """:return: street-address-like values, suspect_fraction of them with a checked character"""
+    rng = random.Random(1)
+    streets = [u"SMITH ST", u"GEORGE ST", u"PACIFIC HWY", u"OLD NORTHERN RD", u"THE AVENUE"]
+    suspects = [u"\u00e9", u"/", u"\t", u"?", u"\u2013"]
+    values = []
+    for i in range(value_count):
+        value = str(rng.randint(1, 999)) + u" " + rng.choice(streets)
+        if rng.random() < suspect_fraction:
+            position = rng.randint(0, len(value))
+            value = value[:position] + rng.choice(suspects) + value[position:]
+        values.append(value)
+    return values
+
+
+def check_by_character(values):
+    reserved = set(field_properties.reserved_characters)
+    counts = [0, 0, 0]
+    for value in values:
+        non_ascii = reserved_found = control = False
+        for c in value:
+            code = ord(c)
+            if code > 127:
+                non_ascii = True
+            elif code < 32 or code == 127:
+                control = True
+            elif c in reserved:
+                reserved_found = True
+        counts[0] += non_ascii
+        counts[1] += reserved_found
+        counts[2] += control
+    return counts
+
+
+def check_by_three_searches(values):
+    searches = [search for key, search in field_properties._text_searches]
+    counts = [0, 0, 0]
+    for value in values:
+        for i, search in enumerate(searches):
+            if search(value) is not None:
+                counts[i] += 1
+    return counts
+
+
+def check_by_text_statistics(values):
+    text = field_properties.TextStatistics()
+    add = text.add
+    for value in values:
+        add(value)
+    return [text.counts[key] for key, label in field_properties.text_checks]
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main():
+    values = make_values()
+    log.info("{:32} {:>10} {:>14}   {}".format("method", "seconds", "values/s", "counts"))
+    for name, check in [("character by character", check_by_character),
+                        ("three regex searches", check_by_three_searches),
+                        ("TextStatistics (one search)", check_by_text_statistics)]:
+        seconds = min(timeit.repeat(lambda: check(values), number=1, repeat=repeats))
+        log.info("{:32} {:>10.3f} {:>14,.0f}   {}".format(name, seconds, len(values) / seconds, check(values)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
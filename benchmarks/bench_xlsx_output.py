@@ -0,0 +1,113 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: compares write time and peak memory of the xlwt (.xls) and
+#              streaming xlsx_writer (.xlsx) reports, for a structure sheet
+#              of a wide feature class and a long top values sheet
+#
+# Run instructions:  execute from the repo root
+#                    python -m benchmarks.bench_xlsx_output
+# ----------------------------------------------------------------------------
+
+import collections
+import logging
+import os
+import shutil
+import tempfile
+import timeit
+import field_properties
+import xls_output
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+log = logging.getLogger()
+
+# -----------------------------------------
+# run config (globals)
+# -----------------------------------------
+field_counts = [1000]  # structure rows; wider than the 256 columns an xls sheet allows, as rows
+top_value_rows = [10000, 60000]  # top values rows; xls stops at 65,536
+repeats = 3
+
+StructureRow = collections.namedtuple("StructureRow", ["field_name", "field_name_len", "field_alias",
+                                                       "field_type", "field_length", "field_precision",
+                                                       "field_scale", "field_is_nullable",
+                                                       "field_is_required", "field_is_editable",
+                                                       "field_domain"])
+
+
+def make_structure(field_count):
+    """:return: (headings, rows) as get_fc_structure returns them, for field_count fields"""
+    headings = StructureRow("Name", "Name field len", "Alias", "Type", "Length", "Precision", "Scale",
+                            "is nullable?", "is required?", "is editable?", "Domain Name")
+    rows = [StructureRow("FIELD_" + str(i), 9, "Field " + str(i) + " alias", "String", 50, 0, 0,
+                         "True", "False", "True", "")
+            for i in range(field_count)]
+    return headings, rows
+
+
+def make_field_statistics(row_count):
+    """:return: String fields whose top values sheet has row_count rows"""
+    fields = [("name_" + str(i), "String") for i in range(row_count // field_properties.top_n)]
+    rows = [tuple("value " + str(i) for _ in fields) for i in range(field_properties.top_n)]
+    return field_properties.scan_rows(fields, rows)
+
+
+def measure(write, path):
+    """
+    :return: (best seconds, peak traced bytes or None)
+    :rtype: tuple
+    """
+    level = log.level
+    log.setLevel(logging.WARNING)  # quieten the per-sheet progress messages
+    try:
+        return _measure(write, path)
+    finally:
+        log.setLevel(level)
+
+
+def _measure(write, path):
+    seconds = min(timeit.repeat(lambda: write(path), number=1, repeat=repeats))
+    peak = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        write(path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def main():
+    out_folder = tempfile.mkdtemp()
+    properties = [("Feature Class", "bench"), ("Geometry Type", "Polygon")]
+    cases = [(str(n) + " field structure", make_structure(n), None) for n in field_counts]
+    for n in top_value_rows:
+        cases.append((str(n) + " top values", make_structure(10), make_field_statistics(n)))
+
+    log.info("{:26} {:>10} {:>12} {:>10} {:>12}".format("case", "xls (s)", "xls peak MB",
+                                                        "xlsx (s)", "xlsx peak MB"))
+    try:
+        for name, structure, field_statistics in cases:
+            results = []
+            for ext in (".xls", ".xlsx"):
+                def write(path):
+                    xls_output.write_fc_profile(properties, structure, path, field_statistics=field_statistics)
+                seconds, peak = measure(write, os.path.join(out_folder, "bench" + ext))
+                results += [seconds, "n/a" if peak is None else "{:.1f}".format(peak / 1048576.0)]
+            log.info("{:26} {:>10.3f} {:>12} {:>10.3f} {:>12}".format(name, *results))
+    finally:
+        shutil.rmtree(out_folder)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
@@ -14,7 +14,13 @@ import os
 import sys
 import argparse
 import datetime
-from generate_profile import generate_profile
+import backends
+import profile_cache
+import progress
+
+# generate_profile and batch_profile (and through them xlwt, and arcpy when
+# a geodatabase is read) are imported in main(), after the inputs are
+# validated, so --help and bad arguments return without loading them.
 
 start_time = datetime.datetime.now()
 log = logging.getLogger()
@@ -72,14 +78,51 @@ def setup_logger(logfile):
 
 def parse_arguments():
     """
-    :return: (fc_path, output folder)
-    :rtype tuple
+    :return: the arguments, by option name
+    :rtype argparse.Namespace
     """
     parser = argparse.ArgumentParser(description="fc_profiler")
-    parser.add_argument("fc_path", help="full path to the feature class")
+    parser.add_argument("fc_path", help="full path to the feature class, or to a file geodatabase "
+                                        "or GeoPackage to profile every feature class and table in it")
     parser.add_argument("out_folder", help="the output folder")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes, for the datasets of a geodatabase or the OBJECTID "
+                             "partitions of a large feature class (default: CPU count)")
+    parser.add_argument("--format", choices=["xls", "xlsx"], default="xls", dest="report_format",
+                        help="the report format; xlsx has no 65,536 row or 256 column sheet limit "
+                             "(default: %(default)s)")
+    parser.add_argument("--export", choices=["jsonl", "csv"], default=None, dest="export_format",
+                        help="also write each profile as JSON Lines or CSV records, for bulk loading")
+    parser.add_argument("--histogram", choices=["sketch", "fixed"], default=None, dest="histogram_mode",
+                        help="numeric histograms: sketch approximates the bins in the one table scan; fixed "
+                             "counts exact bins, but reads the numeric fields twice, a min/max pre-pass "
+                             "before the statistics scan (default: sketch)")
+    sample = parser.add_mutually_exclusive_group()
+    sample.add_argument("--sample", type=int, default=None, metavar="N",
+                        help="profile field statistics from a sample of N records")
+    sample.add_argument("--sample-fraction", type=float, default=None, metavar="F",
+                        help="profile field statistics from a sample of this fraction (0-1) of records")
+    cache = parser.add_argument_group("profile cache",
+                                      "a feature class whose schema, record count and files are unchanged "
+                                      "since it was last profiled reuses its cached profile")
+    cache.add_argument("--force", action="store_true",
+                       help="profile every feature class, even if its cached profile is current")
+    cache.add_argument("--no-cache", action="store_true", help="neither read nor write the cache")
+    cache.add_argument("--cache-folder", default=None,
+                       help="the cache folder (default: " + profile_cache.cache_folder_name +
+                            " in the output folder)")
+    cache.add_argument("--cache-max-entries", type=int, default=profile_cache.max_entries, metavar="N",
+                       help="keep at most N cached profiles (default: %(default)s)")
+    cache.add_argument("--cache-max-age", type=int, default=profile_cache.max_age_days, metavar="DAYS",
+                       help="drop cached profiles not used for DAYS days (default: %(default)s)")
     args = parser.parse_args()
-    return args.fc_path, args.out_folder
+    if args.sample is not None and args.sample < 1:
+        parser.error("--sample must be at least 1")
+    if args.sample_fraction is not None and not 0 < args.sample_fraction <= 1:
+        parser.error("--sample-fraction must be greater than 0 and at most 1")
+    if args.cache_max_entries < 0 or args.cache_max_age < 0:
+        parser.error("--cache-max-entries and --cache-max-age cannot be negative")
+    return args
 
 
 # ------------------------------------------------------------
@@ -100,10 +143,13 @@ def validate_inputs(fc_path, out_folder):
     :type fc_path: basestring
     """
 
-    # check that the input GDB exists
-    fc_gdb_path = fc_path.split(".gdb", 1)[0] + ".gdb"
+    # check that the input GDB (or GeoPackage) exists
+    if backends.is_workspace_path(fc_path):
+        fc_gdb_path = fc_path
+    else:
+        fc_gdb_path = backends.get_backend(fc_path).workspace(fc_path)
     log.debug("Checking input feature class exists")
-    if not os.path.isdir(fc_gdb_path):
+    if not os.path.exists(fc_gdb_path):
         log.warning("Input file GDB does not exist. Stopping.")
         sys.exit(1)
 
@@ -120,40 +166,113 @@ def validate_inputs(fc_path, out_folder):
 # -----------------------------------------
 
 
-def main(fc_path, out_folder):
+def main(fc_path, out_folder, processes=None, sample_size=None, sample_fraction=None,
+         cache_folder=None, force=False, cache_max_entries=profile_cache.max_entries,
+         cache_max_age=profile_cache.max_age_days, report_format="xls", export_format=None,
+         histogram_mode=None):
     """main
-    :param fc_path: - fully qualified path to the input feature class to profile
+    :param fc_path: - fully qualified path to the input feature class to profile,
+                      or to a file geodatabase or GeoPackage to profile every dataset in it
     :type fc_path: basestring
 
     :param out_folder: - fully qualified path to the output folder to write to
     :type fc_path: basestring
+
+    :param processes: - worker processes when profiling a geodatabase,
+                        or reading the partitions of a large feature class
+    :type processes: int
+
+    :param sample_size: - profile field statistics from a sample of this many records
+    :type sample_size: int
+
+    :param sample_fraction: - profile field statistics from this fraction of the records
+    :type sample_fraction: float
+
+    :param cache_folder: - reuse the profiles of unchanged feature classes from this folder,
+                           None to profile without the cache
+    :type cache_folder: basestring
+
+    :param force: - profile even if the cached profile is current
+    :type force: bool
+
+    :param cache_max_entries: - evict the least recently used profiles beyond this many
+    :type cache_max_entries: int
+
+    :param cache_max_age: - evict profiles not used for this many days
+    :type cache_max_age: int
+
+    :param report_format: - 'xls', or 'xlsx' for sheets beyond 65,536 rows or 256 columns
+    :type report_format: basestring
+
+    :param export_format: - also write each profile as 'jsonl' or 'csv' records, None for neither
+    :type export_format: basestring
+
+    :param histogram_mode: - 'sketch', or 'fixed' for exact bins from a second scan; None for the default
+    :type histogram_mode: basestring
+
+    :return: the program exit code, 1 if any dataset could not be profiled or the run was cancelled
+    :rtype: int
     """
+    exit_code = 0
 
     log.info("fc_profiler Start")
 
     log.info("Validating inputs")
     validate_inputs(fc_path, out_folder)
 
-    log.info("Generating profile")
-    generate_profile(fc_path, out_folder, overwrite)
+    if backends.is_workspace_path(fc_path):
+        from batch_profile import profile_gdb
+        log.info("Generating profiles for every dataset in the geodatabase")
+        results = profile_gdb(fc_path, out_folder, overwrite, processes,
+                              sample_size=sample_size, sample_fraction=sample_fraction,
+                              cache_folder=cache_folder, force=force, report_format=report_format,
+                              export_format=export_format, histogram_mode=histogram_mode)
+        if any(result.status != "OK" for result in results):
+            log.warning("Some datasets could not be profiled or were cancelled, see the run summary")
+            exit_code = 1
+    else:
+        from generate_profile import generate_profile
+        log.info("Generating profile")
+        try:
+            generate_profile(fc_path, out_folder, overwrite, sample_size, sample_fraction,
+                             cache_folder=cache_folder, force=force, processes=processes,
+                             report_format=report_format, export_format=export_format,
+                             histogram_mode=histogram_mode)
+        except progress.Cancelled as e:
+            log.warning("Cancelled, the partial profile is in " + e.report_path)
+            exit_code = 1
+
+    if cache_folder is not None:
+        profile_cache.ProfileCache(cache_folder).evict(cache_max_entries, cache_max_age)
 
     log.info("fc_profiler Finished")
     end_time = datetime.datetime.now()
     duration = end_time - start_time
     log.info("fc_profiler Duration " + str(duration))
+    return exit_code
 
 
 if __name__ == "__main__":
     args = parse_arguments()
-    fc_path = args[0]
-    out_folder = args[1]
+    fc_path = args.fc_path
+    out_folder = args.out_folder
+    if args.no_cache:
+        cache_folder = None
+    else:
+        cache_folder = args.cache_folder or os.path.join(out_folder, profile_cache.cache_folder_name)
     logfile = os.path.join(out_folder, program_name + logfile_ext)
     setup_logger(logfile)
+    # Ctrl+C stops the scan and writes what was read; a progress line is only shown on a console
+    progress.cancel_on_interrupt()
+    if sys.stderr.isatty():
+        progress.add_reporter(progress.ConsoleReporter())
     log.debug("arg fc_path = " + fc_path)
     log.debug("arg out_folder = " + out_folder)
 
     # magic happens
-    main(fc_path, out_folder)
+    exit_code = main(fc_path, out_folder, args.processes, args.sample, args.sample_fraction,
+                     cache_folder, args.force, args.cache_max_entries, args.cache_max_age,
+                     args.report_format, args.export_format, args.histogram_mode)
 
     log.debug("Closing the log file")
     log = logging.getLogger()
@@ -162,3 +281,5 @@ if __name__ == "__main__":
         log.removeHandler(h)
         h.flush()
         h.close()
+
+    sys.exit(exit_code)
@@ -1,9 +1,40 @@
 import collections
 import logging
-import arcpy
+import backends
 log = logging.getLogger()
 
 
+# ----------------------------------------------------------------------------
+# describe snapshot
+#     describing a feature class is expensive (hundreds of ms on a networked
+#     fGDB), so the backend describes it once per run.  The parts of the
+#     result the getters need are held in a compact, immutable FcDescription,
+#     cached against the fc_path until clear_describe_cache() is called.
+# ----------------------------------------------------------------------------
+
+FcDescription = backends.FcDescription
+FieldDescription = backends.FieldDescription
+
+# instrumentation: number of backend describe calls made, keyed by fc_path
+describe_calls = backends.describe_calls
+
+
+def clear_describe_cache():
+    """forget all cached FcDescriptions and record counts, forcing the next getter to read them again"""
+    backends.clear_cache()
+
+
+def get_fc_description(fc_path):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :returns description: the cached snapshot of the feature class description
+    :rtype description: FcDescription
+    """
+    return backends.describe(fc_path)
+
+
 def get_fc_properties(fc_path):
     """
     :param fc_path: fully qualified path to a feature class
@@ -34,7 +65,7 @@ def get_fc_properties(fc_path):
 
 # -----------------------------------------
 # get_fc_gdb_name
-#     :pre the fc_path is a valid fGDB path
+#     :pre the fc_path is a valid fGDB, GeoPackage or SQLite path
 # -----------------------------------------
 
 
@@ -46,7 +77,7 @@ def get_fc_gdb_path(fc_path):
     :returns gdb_path: the path of the parent file geodatabase
     :rtype basestring
     """
-    gdb_path = fc_path.split(".gdb", 1)[0] + ".gdb"
+    gdb_path = backends.get_backend(fc_path).workspace(fc_path)
     log.debug("get_fc_gdb_path returning: " + gdb_path)
     return gdb_path
 
@@ -64,7 +95,7 @@ def get_fc_name(fc_path):
     :returns base_name: the feature class name
     :rtype basestring
     """
-    base_name = arcpy.Describe(fc_path).baseName
+    base_name = get_fc_description(fc_path).base_name
     log.debug("get_fc_name returning: " + base_name)
     return base_name
 
@@ -83,7 +114,7 @@ def get_fc_geometry_type(fc_path):
     :rtype geometry_type: basestring
 
     """
-    geometry_type = arcpy.Describe(fc_path).shapeType
+    geometry_type = get_fc_description(fc_path).shape_type
     log.debug("get_fc_geometry_type returning: " + geometry_type)
     return geometry_type
 
@@ -97,13 +128,13 @@ def get_crs_name(fc_path):
     :param fc_path: fully qualified path to a feature class
     :type fc_path: basestring
 
-    :returns sr.name: the coordinate system name
-    :rtype sr.name: basestring
+    :returns sr_name: the coordinate system name
+    :rtype sr_name: basestring
 
     """
-    sr = arcpy.Describe(fc_path).spatialReference
-    log.debug("get_crs_name returning: " + sr.name)
-    return sr.name
+    sr_name = get_fc_description(fc_path).sr_name
+    log.debug("get_crs_name returning: " + sr_name)
+    return sr_name
 
 
 def get_crs_wkid(fc_path):
@@ -111,12 +142,12 @@ def get_crs_wkid(fc_path):
     :param fc_path: fully qualified path to a feature class
     :type fc_path: basestring
 
-    :returns sr.factoryCode: the coordinate system EPSG WKID
-    :rtype sr.factoryCode: int
+    :returns wkid: the coordinate system EPSG WKID
+    :rtype wkid: int
     """
-    sr = arcpy.Describe(fc_path).spatialReference
-    log.debug("get_crs_wkid returning: " + str(sr.factoryCode))
-    return sr.factoryCode
+    wkid = get_fc_description(fc_path).sr_factory_code
+    log.debug("get_crs_wkid returning: " + str(wkid))
+    return wkid
 
 
 # post: usually in the set {geographic, projected}
@@ -125,12 +156,12 @@ def get_crs_type(fc_path):
     :param fc_path: fully qualified path to a feature class
     :type fc_path: basestring
 
-    :returns sr.type: the coordinate system type
-    :rtype sr.type: basestring
+    :returns sr_type: the coordinate system type
+    :rtype sr_type: basestring
     """
-    sr = arcpy.Describe(fc_path).spatialReference
-    log.debug("get_crs_type returning: " + str(sr.type))
-    return sr.type
+    sr_type = get_fc_description(fc_path).sr_type
+    log.debug("get_crs_type returning: " + str(sr_type))
+    return sr_type
 
 
 # post: usually in the set {degrees, meters}
@@ -143,11 +174,11 @@ def get_crs_units(fc_path):
     :rtype units: basestring
     """
 
-    sr = arcpy.Describe(fc_path).spatialReference
-    if sr.type == "Projected":
-        units = sr.linearUnitName
-    elif sr.type == "Geographic":
-        units = sr.angularUnitName
+    description = get_fc_description(fc_path)
+    if description.sr_type == "Projected":
+        units = description.sr_linear_unit_name
+    elif description.sr_type == "Geographic":
+        units = description.sr_angular_unit_name
     else:
         units = "Unknown"
     log.debug("get_crs_units returning: " + str(units))
@@ -166,7 +197,7 @@ def is_z_enabled(fc_path):
     :return result: True if the feature class has Z values enabled
     :rtype result: bool
     """
-    result = arcpy.Describe(fc_path).hasZ
+    result = get_fc_description(fc_path).has_z
     log.debug("is_z_enabled returning: " + str(result))
     return result
 
@@ -183,15 +214,18 @@ def is_m_enabled(fc_path):
     :return result: True if the feature class has M values enabled
     :rtype result: bool
     """
-    result = arcpy.Describe(fc_path).hasM
+    result = get_fc_description(fc_path).has_m
     log.debug("is_m_enabled returning: " + str(result))
     return result
 
 
-# -----------------------------------------
+# ----------------------------------------------------------------------------
 # get_fc_total_record_count
 #     no where clause, returns total rows
-# -----------------------------------------
+#     the backend counts without a geoprocessing tool or a named table view
+#     (the arcpy backend streams only the OID column through a private
+#     cursor).  The count is cached with the describe snapshot.
+# ----------------------------------------------------------------------------
 
 def get_fc_total_record_count(fc_path):
     """
@@ -202,12 +236,7 @@ def get_fc_total_record_count(fc_path):
     :rtype result: int
     """
 
-    table_view = "count_rec_tblview"
-    arcpy.Delete_management("count_rec_tblview")  #just in case it exists
-    arcpy.MakeTableView_management(in_table=fc_path,
-                                   out_view=table_view)
-    count = int(arcpy.GetCount_management(table_view).getOutput(0))
-    arcpy.Delete_management(table_view)
+    count = backends.count(fc_path)
     log.debug("get_fc_record_count returning: " + str(count))
 
     return count
@@ -226,8 +255,7 @@ def get_fc_field_count(fc_path):
     :rtype result: int
     """
 
-    fields = arcpy.ListFields(dataset=fc_path, field_type="All")
-    count = len(fields)
+    count = len(get_fc_description(fc_path).fields)
     log.debug("get_fc_field_count returning: " + str(count))
     return count
 
@@ -276,8 +304,7 @@ def get_fc_structure(fc_path):
 
     log.debug('Getting structure from the feature class')
     data_rows = []
-    field_list = arcpy.ListFields(dataset=fc_path, field_type="All")
-    for field in field_list:
+    for field in get_fc_description(fc_path).fields:
         data_rows.append(Row(field_name=field.baseName,
                              field_name_len=len(field.baseName),
                              field_alias=field.aliasName,
@@ -1,5 +1,1510 @@
-import arcpy
+import collections
+import datetime
+import json
 import logging
+import math
+import re
+import backends
+import fc_properties
+import progress
+import sampling
+import sketches
+import wkb
 log = logging.getLogger()
 
-# STUB
\ No newline at end of file
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+
+# fields that are not profiled value by value
+unprofiled_field_types = ("Geometry", "Raster", "Blob")
+
+# numeric fields, by their ListFields names (AddField calls them Short, Long,
+# Float and Double)
+numeric_field_types = ("SmallInteger", "Integer", "BigInteger", "Single", "Double",
+                       "Short", "Long", "Float")
+
+# fields where every value is unique, so value frequencies are meaningless
+unique_field_types = ("OID", "GlobalID")
+
+# TOP N most frequent values.  Values are counted exactly until a field has
+# more than exact_cardinality_limit distinct values, then the field switches
+# to a SpaceSaving sketch holding sketch_capacity counters, so the maximum
+# over-count of any reported value is records / sketch_capacity.
+top_n = 100
+exact_cardinality_limit = 10000
+sketch_capacity = 2000
+
+# distinct values are counted exactly up to exact_distinct_limit, then
+# estimated by a HyperLogLog sketch of 2 ** distinct_precision bytes
+exact_distinct_limit = 1000
+distinct_precision = 12
+
+# numeric histograms.  'sketch' reads the table once and derives approximate
+# bin counts from the quantile sketch; 'fixed' counts fixed-width bins
+# exactly, but costs a second scan: a min/max pre-pass over the numeric
+# fields before the statistics scan.
+histogram_mode = "sketch"
+histogram_bins = 20
+quantile_sketch_k = 200
+percentiles = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# text fields are scanned for values holding characters that break exports
+# and file names, keeping text_example_count examples of each (truncated
+# to text_example_length characters)
+text_field_types = ("String",)
+text_checks = [("non_ascii", "non-ASCII"),
+               ("reserved", "Windows reserved"),
+               ("control", "control characters")]
+reserved_characters = u'<>:"/\\|?*'
+text_example_count = 3
+text_example_length = 100
+
+# values outside the domain of their field are counted, keeping
+# domain_example_count distinct examples
+domain_example_count = 5
+
+# shape classes, in report order, and the OBJECTIDs kept as examples of each
+shape_classes = [("null", "NULL shape"),
+                 ("empty", "empty shape"),
+                 ("single_part", "single part"),
+                 ("multipart", "multipart"),
+                 ("degenerate", "degenerate (too few vertices)")]
+sample_oid_count = 10
+
+# seed for reservoir sampling; None for a different sample every run
+sample_seed = None
+
+# increment when the to_state() layout changes, so old stored states are refused
+state_version = 1
+
+try:
+    string_types = basestring  # python 2.7
+except NameError:
+    string_types = str
+
+
+# the text checks as precompiled regular expressions.  Most values are plain
+# printable ASCII, so a single search for any other character clears them;
+# only the values it matches are searched for each check.
+_clean_characters = u"".join(re.escape(chr(c)) for c in range(0x20, 0x7f) if chr(c) not in reserved_characters)
+_suspect_search = re.compile(u"[^" + _clean_characters + u"]").search
+_text_searches = [("non_ascii", re.compile(u"[^\x00-\x7f]").search),
+                  ("reserved", re.compile(u"[" + re.escape(reserved_characters) + u"]").search),
+                  ("control", re.compile(u"[\x00-\x1f\x7f]").search)]
+
+TopValue = collections.namedtuple("TopValue", ["value", "count", "max_error"])
+HistogramBin = collections.namedtuple("HistogramBin", ["lower", "upper", "count"])
+
+
+# ----------------------------------------------------------------------------
+# TopValues
+#     the most frequent values of a field, counted exactly while the field
+#     has few distinct values, then in bounded memory by a SpaceSaving sketch
+# ----------------------------------------------------------------------------
+
+class TopValues(object):
+
+    def __init__(self, n=top_n, exact_limit=exact_cardinality_limit, capacity=sketch_capacity):
+        """
+        :param n: the number of values to report
+        :type n: int
+
+        :param exact_limit: distinct values counted exactly before switching to the sketch
+        :type exact_limit: int
+
+        :param capacity: the number of counters held by the sketch
+        :type capacity: int
+        """
+        self.n = n
+        self.exact_limit = exact_limit
+        self.capacity = capacity
+        self.exact_counts = {}
+        self.sketch = None
+
+    @property
+    def mode(self):
+        """'exact' or 'sketch'"""
+        return "exact" if self.sketch is None else "sketch"
+
+    def add(self, value, count=1):
+        """
+        :param value: a non-NULL field value
+        :param count: the number of occurrences to add
+        :type count: int
+        """
+        if self.sketch is None:
+            counts = self.exact_counts
+            counts[value] = counts.get(value, 0) + count
+            if len(counts) > self.exact_limit:
+                self._switch_to_sketch()
+        else:
+            self.sketch.add(value, count)
+
+    def _switch_to_sketch(self):
+        log.debug("more than " + str(self.exact_limit) +
+                  " distinct values, switching to a SpaceSaving sketch")
+        self.sketch = sketches.SpaceSaving(self.capacity)
+        self.sketch.seed(self.exact_counts)
+        self.exact_counts = None
+
+    def merge(self, other):
+        """
+        combine with the top values of another partition of the same field.
+        Two exact counts merge exactly.
+
+        :param other: the other partition's top values
+        :type other: TopValues
+        """
+        if other.sketch is None:
+            for value, count in other.exact_counts.items():
+                self.add(value, count)
+            return
+        if self.sketch is None:
+            self._switch_to_sketch()
+        self.sketch.merge(other.sketch)
+
+    def to_state(self):
+        """
+        :return: the counts as lists, dicts and field values
+        :rtype: dict
+        """
+        return {"n": self.n,
+                "exact_limit": self.exact_limit,
+                "capacity": self.capacity,
+                "exact_counts": None if self.exact_counts is None else
+                [[value, count] for value, count in self.exact_counts.items()],
+                "sketch": None if self.sketch is None else self.sketch.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: TopValues
+        """
+        top_values = cls(state["n"], state["exact_limit"], state["capacity"])
+        if state["sketch"] is None:
+            top_values.exact_counts = dict((value, count) for value, count in state["exact_counts"])
+        else:
+            top_values.exact_counts = None
+            top_values.sketch = sketches.SpaceSaving.from_state(state["sketch"])
+        return top_values
+
+    def top(self):
+        """
+        :return: the n most frequent values, count descending.  Exact counts
+                 have a max_error of 0; sketch counts may over-count by up to
+                 max_error, never under-count.
+        :rtype: list of TopValue
+        """
+        if self.sketch is None:
+            items = sorted(self.exact_counts.items(), key=lambda kv: kv[1], reverse=True)
+            return [TopValue(value, count, 0) for value, count in items[:self.n]]
+        return [TopValue(*item) for item in self.sketch.top(self.n)]
+
+
+# ----------------------------------------------------------------------------
+# DistinctCount
+#     the number of distinct values in a field, exact while small, then
+#     estimated in a few KB by a HyperLogLog sketch
+# ----------------------------------------------------------------------------
+
+class DistinctCount(object):
+
+    def __init__(self, exact_limit=exact_distinct_limit, precision=distinct_precision):
+        """
+        :param exact_limit: distinct values held exactly before switching to the sketch
+        :type exact_limit: int
+
+        :param precision: the HyperLogLog precision, 4 to 16
+        :type precision: int
+        """
+        self.exact_limit = exact_limit
+        self.precision = precision
+        self.values = set()
+        self.sketch = None
+
+    @property
+    def mode(self):
+        """'exact' or 'estimate'"""
+        return "exact" if self.sketch is None else "estimate"
+
+    @property
+    def standard_error(self):
+        """the relative standard error of count(), 0.0 when exact"""
+        return 0.0 if self.sketch is None else self.sketch.standard_error
+
+    def add(self, value):
+        """
+        :param value: a non-NULL field value
+        """
+        if self.sketch is None:
+            self.values.add(value)
+            if len(self.values) > self.exact_limit:
+                self._switch_to_sketch()
+        else:
+            self.sketch.add(value)
+
+    def _switch_to_sketch(self):
+        self.sketch = sketches.HyperLogLog(self.precision)
+        for value in self.values:
+            self.sketch.add(value)
+        self.values = None
+
+    def merge(self, other):
+        """
+        combine with the distinct count of another partition of the same field
+
+        :param other: the other partition's count
+        :type other: DistinctCount
+        """
+        if other.sketch is None:
+            for value in other.values:
+                self.add(value)
+            return
+        if self.sketch is None:
+            self._switch_to_sketch()
+        self.sketch.merge(other.sketch)
+
+    def to_state(self):
+        """
+        :return: the values or sketch as lists, dicts and field values
+        :rtype: dict
+        """
+        return {"exact_limit": self.exact_limit,
+                "precision": self.precision,
+                "values": None if self.values is None else list(self.values),
+                "sketch": None if self.sketch is None else self.sketch.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: DistinctCount
+        """
+        distinct = cls(state["exact_limit"], state["precision"])
+        if state["sketch"] is None:
+            distinct.values = set(state["values"])
+        else:
+            distinct.values = None
+            distinct.sketch = sketches.HyperLogLog.from_state(state["sketch"])
+        return distinct
+
+    def count(self):
+        """
+        :return: the number of distinct values, estimated in 'estimate' mode
+        :rtype: int
+        """
+        if self.sketch is None:
+            return len(self.values)
+        return self.sketch.estimate()
+
+
+# ----------------------------------------------------------------------------
+# FixedWidthHistogram
+#     exact bin counts over a value range known before the scan
+# ----------------------------------------------------------------------------
+
+class FixedWidthHistogram(object):
+
+    def __init__(self, minimum, maximum, bins=histogram_bins):
+        """
+        :param minimum: the smallest value expected
+        :param maximum: the largest value expected
+        :param bins: the number of bins
+        :type bins: int
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.bins = bins if maximum > minimum else 1
+        self.width = float(maximum - minimum) / self.bins or 1.0
+        self.counts = [0] * self.bins
+        # values outside [minimum, maximum], e.g. edits since the pre-pass,
+        # are counted in the end bins and here
+        self.out_of_range = 0
+
+    def add(self, value):
+        """
+        :param value: a number
+        """
+        if value < self.minimum:
+            self.out_of_range += 1
+            index = 0
+        else:
+            index = int((value - self.minimum) / self.width)
+            if index >= self.bins:
+                if value > self.maximum:
+                    self.out_of_range += 1
+                index = self.bins - 1
+        self.counts[index] += 1
+
+    def compatible(self, other):
+        """True if other has the same bins, so the counts can be added"""
+        return (self.minimum, self.maximum, self.bins) == (other.minimum, other.maximum, other.bins)
+
+    def merge(self, other):
+        """
+        :param other: a histogram with the same bins
+        :type other: FixedWidthHistogram
+        """
+        if not self.compatible(other):
+            raise ValueError("cannot merge histograms with different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.out_of_range += other.out_of_range
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"minimum": self.minimum,
+                "maximum": self.maximum,
+                "bins": self.bins,
+                "counts": list(self.counts),
+                "out_of_range": self.out_of_range}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: FixedWidthHistogram
+        """
+        histogram = cls(state["minimum"], state["maximum"], state["bins"])
+        histogram.counts = list(state["counts"])
+        histogram.out_of_range = state["out_of_range"]
+        return histogram
+
+    def histogram(self):
+        """
+        :rtype: list of HistogramBin
+        """
+        return [HistogramBin(self.minimum + i * self.width,
+                             self.minimum + (i + 1) * self.width if i < self.bins - 1 else self.maximum,
+                             count)
+                for i, count in enumerate(self.counts)]
+
+
+# ----------------------------------------------------------------------------
+# NumericStatistics
+#     count, min, max, mean and standard deviation (Welford), percentiles
+#     and a histogram of a numeric field, in memory independent of row count
+# ----------------------------------------------------------------------------
+
+class NumericStatistics(object):
+
+    def __init__(self, value_range=None):
+        """
+        :param value_range: optional (min, max) from a pre-pass, enabling
+                            exact fixed-width bins
+        :type value_range: tuple
+        """
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.quantiles = sketches.KllSketch(quantile_sketch_k)
+        self.fixed_histogram = None
+        if value_range is not None:
+            self.fixed_histogram = FixedWidthHistogram(value_range[0], value_range[1])
+
+    def add(self, value):
+        """
+        :param value: a non-NULL number
+        """
+        self.count += 1
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.quantiles.add(value)
+        if self.fixed_histogram is not None:
+            self.fixed_histogram.add(value)
+
+    def merge(self, other):
+        """
+        combine with the statistics of another partition of the same field,
+        using Chan et al.'s pairwise update of the mean and sum of squares.
+        Fixed histograms merge if their bins match (the partitions shared a
+        pre-pass); otherwise the histogram falls back to the quantile sketch.
+
+        :param other: the other partition's statistics
+        :type other: NumericStatistics
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            fixed_histogram = other.fixed_histogram
+            if fixed_histogram is not None:
+                fixed_histogram = FixedWidthHistogram.from_state(fixed_histogram.to_state())
+        elif self.fixed_histogram is not None and other.fixed_histogram is not None \
+                and self.fixed_histogram.compatible(other.fixed_histogram):
+            fixed_histogram = self.fixed_histogram
+            fixed_histogram.merge(other.fixed_histogram)
+        else:
+            fixed_histogram = None
+        self.fixed_histogram = fixed_histogram
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self.quantiles.merge(other.quantiles)
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"count": self.count,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "mean": self.mean,
+                "m2": self.m2,
+                "quantiles": self.quantiles.to_state(),
+                "fixed_histogram": None if self.fixed_histogram is None else self.fixed_histogram.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: NumericStatistics
+        """
+        numeric = cls()
+        numeric.count = state["count"]
+        numeric.minimum = state["minimum"]
+        numeric.maximum = state["maximum"]
+        numeric.mean = state["mean"]
+        numeric.m2 = state["m2"]
+        numeric.quantiles = sketches.KllSketch.from_state(state["quantiles"])
+        if state["fixed_histogram"] is not None:
+            numeric.fixed_histogram = FixedWidthHistogram.from_state(state["fixed_histogram"])
+        return numeric
+
+    @property
+    def standard_deviation(self):
+        """the population standard deviation, None if there are no values"""
+        if self.count == 0:
+            return None
+        return (self.m2 / self.count) ** 0.5
+
+    def percentiles(self):
+        """
+        :return: (fraction, value) for each of the configured percentiles
+        :rtype: list of tuples
+        """
+        return list(zip(percentiles, self.quantiles.quantiles(percentiles)))
+
+    @property
+    def histogram_is_exact(self):
+        return self.fixed_histogram is not None
+
+    def histogram(self, bins=histogram_bins):
+        """
+        :param bins: the number of bins when derived from the quantile sketch
+        :type bins: int
+
+        :return: exact fixed-width bins if a range was given, otherwise bins
+                 over [min, max] with counts estimated from the sketch
+        :rtype: list of HistogramBin
+        """
+        if self.fixed_histogram is not None:
+            return self.fixed_histogram.histogram()
+        if self.count == 0:
+            return []
+        shape = FixedWidthHistogram(self.minimum, self.maximum, bins).histogram()
+        fractions = [0.0] + self.quantiles.cdf([b.upper for b in shape[:-1]]) + [1.0]
+        return [HistogramBin(b.lower, b.upper,
+                             int(round(self.count * (fractions[i + 1] - fractions[i]))))
+                for i, b in enumerate(shape)]
+
+
+# ----------------------------------------------------------------------------
+# TextStatistics
+#     counts of the values of a text field holding non-ASCII, Windows
+#     reserved (< > : " / \ | ? *) or control characters, with examples
+# ----------------------------------------------------------------------------
+
+class TextStatistics(object):
+
+    def __init__(self):
+        self.counts = dict((key, 0) for key, label in text_checks)
+        self.examples = dict((key, []) for key, label in text_checks)
+
+    def add(self, value):
+        """
+        :param value: a text value
+        :type value: basestring
+        """
+        if _suspect_search(value) is None:
+            return
+        for key, search in _text_searches:
+            if search(value) is not None:
+                self.counts[key] += 1
+                examples = self.examples[key]
+                if len(examples) < text_example_count:
+                    example = value[:text_example_length]
+                    if example not in examples:
+                        examples.append(example)
+
+    def merge(self, other):
+        """
+        :param other: the text statistics of another partition of the same field
+        :type other: TextStatistics
+        """
+        for key, label in text_checks:
+            self.counts[key] += other.counts[key]
+            examples = self.examples[key]
+            for example in other.examples[key]:
+                if len(examples) < text_example_count and example not in examples:
+                    examples.append(example)
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"counts": dict(self.counts),
+                "examples": dict((key, list(examples)) for key, examples in self.examples.items())}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: TextStatistics
+        """
+        text = cls()
+        text.counts.update(state["counts"])
+        text.examples.update((key, list(examples)) for key, examples in state["examples"].items())
+        return text
+
+
+# ----------------------------------------------------------------------------
+# DomainCheck
+#     the values of a field checked against its attribute domain: coded
+#     values are looked up in a hash set of the codes, ranges are a bounds
+#     check.  Gives the recorded domain too: the codes used, or the minimum
+#     and maximum recorded.
+# ----------------------------------------------------------------------------
+
+def _domain_code(code, field_type):
+    """
+    :return: the code as a number if the field is numeric, so codes stored as
+             text (e.g. GeoPackage enums) match the values; equal ints and
+             floats hash alike, so 1 matches a code of 1.0
+    """
+    if field_type in numeric_field_types and isinstance(code, string_types):
+        try:
+            return float(code)
+        except ValueError:
+            pass
+    return code
+
+
+class DomainCheck(object):
+
+    def __init__(self, domain, field_type=None):
+        """
+        :param domain: the domain of the field
+        :type domain: backends.DomainDescription
+
+        :param field_type: the type of the field checked
+        :type field_type: basestring
+        """
+        self.domain_name = domain.name
+        self.domain_type = domain.domain_type
+        if domain.domain_type == "CodedValue":
+            self.codes = frozenset(_domain_code(code, field_type) for code in domain.coded_values or {})
+            self.range = None
+        else:
+            self.codes = None
+            self.range = tuple(domain.range)
+        self.checked_count = 0
+        self.out_of_domain_count = 0
+        self.examples = []
+        self.codes_used = set()
+        self.minimum = None
+        self.maximum = None
+
+    def _in_range(self, value):
+        low, high = self.range
+        try:
+            return (low is None or low <= value) and (high is None or value <= high)
+        except TypeError:  # e.g. text in a numeric range
+            return False
+
+    def add(self, value):
+        """
+        :param value: a non-NULL field value
+        """
+        self.checked_count += 1
+        if self.codes is not None:
+            if value in self.codes:
+                self.codes_used.add(value)
+                return
+        else:
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+            if self._in_range(value):
+                return
+        self.out_of_domain_count += 1
+        if len(self.examples) < domain_example_count and value not in self.examples:
+            self.examples.append(value)
+
+    def merge(self, other):
+        """
+        :param other: the check of another partition of the same field
+        :type other: DomainCheck
+        """
+        if other.domain_name != self.domain_name:
+            raise ValueError("cannot merge checks of domain " + other.domain_name + " into " + self.domain_name)
+        self.checked_count += other.checked_count
+        self.out_of_domain_count += other.out_of_domain_count
+        for example in other.examples:
+            if len(self.examples) < domain_example_count and example not in self.examples:
+                self.examples.append(example)
+        self.codes_used.update(other.codes_used)
+        if other.minimum is not None and (self.minimum is None or other.minimum < self.minimum):
+            self.minimum = other.minimum
+        if other.maximum is not None and (self.maximum is None or other.maximum > self.maximum):
+            self.maximum = other.maximum
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"domain_name": self.domain_name,
+                "domain_type": self.domain_type,
+                "codes": None if self.codes is None else list(self.codes),
+                "range": None if self.range is None else list(self.range),
+                "checked_count": self.checked_count,
+                "out_of_domain_count": self.out_of_domain_count,
+                "examples": list(self.examples),
+                "codes_used": list(self.codes_used),
+                "minimum": self.minimum,
+                "maximum": self.maximum}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: DomainCheck
+        """
+        coded_values = None if state["codes"] is None else dict((code, None) for code in state["codes"])
+        check = cls(backends.DomainDescription(name=state["domain_name"],
+                                               domain_type=state["domain_type"],
+                                               field_type="",
+                                               coded_values=coded_values,
+                                               range=state["range"]))
+        check.checked_count = state["checked_count"]
+        check.out_of_domain_count = state["out_of_domain_count"]
+        check.examples = list(state["examples"])
+        check.codes_used = set(state["codes_used"])
+        check.minimum = state["minimum"]
+        check.maximum = state["maximum"]
+        return check
+
+    @property
+    def defined_domain(self):
+        """the domain as text, e.g. '12 coded values' or '0 to 100'"""
+        if self.codes is not None:
+            return "{:,} coded values".format(len(self.codes))
+        return "{} to {}".format(*self.range)
+
+    @property
+    def recorded_domain(self):
+        """the values recorded as text, e.g. '9 of 12 codes used' or '3 to 250'"""
+        if self.codes is not None:
+            return "{:,} of {:,} codes used".format(len(self.codes_used), len(self.codes))
+        if self.minimum is None:
+            return ""
+        return "{} to {}".format(self.minimum, self.maximum)
+
+
+# ----------------------------------------------------------------------------
+# FieldStatistics
+#     per-field accumulator fed one value at a time by scan_rows, so every
+#     statistic for every field is gathered in a single pass of the table
+# ----------------------------------------------------------------------------
+
+class FieldStatistics(object):
+
+    def __init__(self, field_name, field_type, value_range=None, domain=None):
+        """
+        :param field_name: the field name
+        :type field_name: basestring
+
+        :param field_type: the field type, as reported by get_fc_structure
+        :type field_type: basestring
+
+        :param value_range: (min, max) of a numeric field from a pre-pass
+        :type value_range: tuple
+
+        :param domain: the attribute domain to check the values against
+        :type domain: backends.DomainDescription
+        """
+        self.field_name = field_name
+        self.field_type = field_type
+        # set by get_field_statistics when the statistics are from a sample
+        self.sample_info = None
+        self.record_count = 0
+        self.null_count = 0
+        self.blank_count = 0
+        if field_type in unique_field_types:
+            self.top_values = None
+            self.distinct = None
+        else:
+            self.top_values = TopValues()
+            self.distinct = DistinctCount()
+        if field_type in numeric_field_types:
+            self.numeric = NumericStatistics(value_range)
+        else:
+            self.numeric = None
+        self.text = TextStatistics() if field_type in text_field_types else None
+        self.domain = DomainCheck(domain, field_type) if domain is not None else None
+
+    def add(self, value):
+        """
+        :param value: the field value of one record
+        """
+        self.record_count += 1
+        if value is None:
+            self.null_count += 1
+            return
+        if isinstance(value, string_types):
+            if value.strip() == "":
+                self.blank_count += 1
+            if self.text is not None:
+                self.text.add(value)
+        if self.top_values is not None:
+            self.top_values.add(value)
+            self.distinct.add(value)
+        if self.numeric is not None:
+            self.numeric.add(value)
+        if self.domain is not None:
+            self.domain.add(value)
+
+    def merge(self, other):
+        """
+        combine with the statistics of another partition of the same field,
+        so that two partial profiles give the profile of their union
+
+        :param other: the other partition's statistics
+        :type other: FieldStatistics
+        """
+        if (other.field_name, other.field_type) != (self.field_name, self.field_type):
+            raise ValueError("cannot merge statistics of " + other.field_name + " into " + self.field_name)
+        self.sample_info = sampling.merge_sample_info(self.sample_info, self.record_count,
+                                                      other.sample_info, other.record_count)
+        self.record_count += other.record_count
+        self.null_count += other.null_count
+        self.blank_count += other.blank_count
+        if self.top_values is not None:
+            self.top_values.merge(other.top_values)
+            self.distinct.merge(other.distinct)
+        if self.numeric is not None:
+            self.numeric.merge(other.numeric)
+        if self.text is not None and other.text is not None:
+            self.text.merge(other.text)
+        if self.domain is not None and other.domain is not None:
+            self.domain.merge(other.domain)
+
+    def to_state(self):
+        """
+        :return: the statistics as lists, dicts, numbers and field values
+        :rtype: dict
+        """
+        return {"field_name": self.field_name,
+                "field_type": self.field_type,
+                "sample_info": None if self.sample_info is None else list(self.sample_info),
+                "record_count": self.record_count,
+                "null_count": self.null_count,
+                "blank_count": self.blank_count,
+                "top_values": None if self.top_values is None else self.top_values.to_state(),
+                "distinct": None if self.distinct is None else self.distinct.to_state(),
+                "numeric": None if self.numeric is None else self.numeric.to_state(),
+                "text": None if self.text is None else self.text.to_state(),
+                "domain": None if self.domain is None else self.domain.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: FieldStatistics
+        """
+        stats = cls(state["field_name"], state["field_type"])
+        if state["sample_info"] is not None:
+            stats.sample_info = sampling.SampleInfo(*state["sample_info"])
+        stats.record_count = state["record_count"]
+        stats.null_count = state["null_count"]
+        stats.blank_count = state["blank_count"]
+        if state["top_values"] is not None:
+            stats.top_values = TopValues.from_state(state["top_values"])
+            stats.distinct = DistinctCount.from_state(state["distinct"])
+        if state["numeric"] is not None:
+            stats.numeric = NumericStatistics.from_state(state["numeric"])
+        # states stored before text fields were scanned have no text statistics
+        stats.text = None if state.get("text") is None else TextStatistics.from_state(state["text"])
+        stats.domain = None if state.get("domain") is None else DomainCheck.from_state(state["domain"])
+        return stats
+
+    @property
+    def no_data_count(self):
+        """NULL plus blank"""
+        return self.null_count + self.blank_count
+
+    @property
+    def populated_count(self):
+        """neither NULL nor blank"""
+        return self.record_count - self.no_data_count
+
+    def percent(self, count):
+        """
+        :param count: a count of records
+        :type count: int
+
+        :return: count as a fraction of the records seen, 0.0 if there are none
+        :rtype: float
+        """
+        if self.record_count == 0:
+            return 0.0
+        return float(count) / self.record_count
+
+    def percent_interval(self, count):
+        """
+        :param count: a count of sampled records
+        :type count: int
+
+        :return: the confidence interval (low, high) of percent(count),
+                 or None if every record was read
+        :rtype: tuple of float
+        """
+        if self.sample_info is None:
+            return None
+        return sampling.proportion_interval(count, self.record_count,
+                                            self.sample_info.population_size)
+
+
+# ----------------------------------------------------------------------------
+# ShapeClasses
+#     counts of the shapes in each of shape_classes, with the first
+#     sample_oid_count OBJECTIDs of each as examples.  The SHAPE@WKB of each
+#     row is classified as it is read (classify_shape), from its part and
+#     vertex counts only, in the same pass as the attribute statistics.
+# ----------------------------------------------------------------------------
+
+def classify_shape(shape_wkb):
+    """
+    :param shape_wkb: the well-known binary of a shape, None for a NULL shape
+    :type shape_wkb: bytes
+
+    :return: the keys of the shape_classes the shape is in: null or empty;
+             otherwise single_part or multipart, and degenerate if any part
+             has too few vertices for its kind (e.g. a ring of 3 vertices)
+    :rtype: tuple of basestring
+    """
+    if shape_wkb is None:
+        return "null",
+    parts = wkb.part_sizes(shape_wkb)
+    if not parts:
+        return "empty",
+    classes = ("multipart",) if sum(1 for kind, vertices in parts
+                                    if kind != wkb.interior_ring_part) > 1 else ("single_part",)
+    if any(vertices < wkb.minimum_vertices[kind] for kind, vertices in parts):
+        classes += ("degenerate",)
+    return classes
+
+
+class ShapeClasses(object):
+
+    def __init__(self):
+        self.counts = dict((key, 0) for key, label in shape_classes)
+        self.sample_oids = dict((key, []) for key, label in shape_classes)
+
+    def add(self, oid, classes):
+        """
+        :param oid: the OBJECTID of the shape
+        :type oid: int
+
+        :param classes: the result of classify_shape
+        :type classes: tuple of basestring
+        """
+        for key in classes:
+            self.counts[key] += 1
+            if len(self.sample_oids[key]) < sample_oid_count:
+                self.sample_oids[key].append(oid)
+
+    def merge(self, other):
+        """
+        :param other: the shape classes of another partition
+        :type other: ShapeClasses
+        """
+        for key, label in shape_classes:
+            self.counts[key] += other.counts[key]
+            self.sample_oids[key] = sorted(self.sample_oids[key] + other.sample_oids[key])[:sample_oid_count]
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"counts": dict(self.counts),
+                "sample_oids": dict((key, list(oids)) for key, oids in self.sample_oids.items())}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: ShapeClasses
+        """
+        classes = cls()
+        classes.counts.update(state["counts"])
+        classes.sample_oids.update((key, list(oids)) for key, oids in state["sample_oids"].items())
+        return classes
+
+    def properties(self):
+        """
+        :return: ("Shapes: <class>", "<count>, e.g. OBJECTID <oids>") pairs for
+                 the FC properties sheet, in shape_classes order
+        :rtype: list of tuples
+        """
+        properties = []
+        for key, label in shape_classes:
+            text = "{:,}".format(self.counts[key])
+            if self.sample_oids[key]:
+                text += ", e.g. OBJECTID " + ", ".join(str(oid) for oid in self.sample_oids[key])
+            properties.append(("Shapes: " + label, text))
+        return properties
+
+
+# ----------------------------------------------------------------------------
+# SubtypeStatistics
+#     the field statistics of each subtype code, gathered in the same pass
+#     as those of the whole table: scan_rows also feeds each row to the
+#     accumulators of its subtype code, created on the code's first record.
+#     Each subtype's values are checked against the subtype's own domains.
+#     Codes that are not subtypes, and NULL, are profiled too.
+# ----------------------------------------------------------------------------
+
+class SubtypeStatistics(object):
+
+    def __init__(self, subtypes, workspace_domains=None):
+        """
+        :param subtypes: the subtypes of the dataset, at least one
+        :type subtypes: list of backends.SubtypeDescription
+
+        :param workspace_domains: {domain name: DomainDescription}, see
+                                  backends.get_domains; only needed to scan
+        :type workspace_domains: dict
+        """
+        self.subtype_field = subtypes[0].subtype_field
+        self.subtypes = dict((subtype.code, subtype) for subtype in subtypes)
+        self.workspace_domains = workspace_domains or {}
+        # {subtype code: one accumulator per field}
+        self.fields = {}
+
+    def domain(self, code, field_name, field_domain=None):
+        """
+        :param field_domain: the domain of the field itself
+        :type field_domain: backends.DomainDescription
+
+        :return: the domain checked for the field in a subtype, None for none
+        :rtype: backends.DomainDescription
+        """
+        subtype = self.subtypes.get(code)
+        if subtype is None or field_name not in subtype.domains:
+            return field_domain
+        return self.workspace_domains.get(subtype.domains[field_name])
+
+    def domain_varies(self, field_name, domain_name):
+        """
+        :return: True if a subtype gives the field a domain other than its own
+        :rtype: bool
+        """
+        return any(subtype.domains.get(field_name, domain_name) != domain_name
+                   for subtype in self.subtypes.values())
+
+    def field_statistics(self, code, fields, value_ranges=None, domains=None):
+        """
+        :param code: a subtype field value
+        :type code: int
+
+        :param fields: value_ranges, domains: as for scan_rows
+        :return: the accumulators of the code, created on its first record
+        :rtype: list of FieldStatistics
+        """
+        stats = self.fields.get(code)
+        if stats is None:
+            value_ranges = value_ranges or {}
+            domains = domains or {}
+            stats = [FieldStatistics(name, field_type, value_ranges.get(name),
+                                     self.domain(code, name, domains.get(name)))
+                     for name, field_type in fields]
+            self.fields[code] = stats
+        return stats
+
+    def codes(self):
+        """
+        :return: the codes with records: the subtypes by code, then other codes, then NULL
+        :rtype: list
+        """
+        return sorted(self.fields, key=lambda code: (code is None, code not in self.subtypes, code))
+
+    def name(self, code):
+        """:return: the subtype name of a code, or why it has none"""
+        if code in self.subtypes:
+            return self.subtypes[code].name
+        return "(NULL)" if code is None else "(not a subtype)"
+
+    def record_count(self, code):
+        """:return: the records of a subtype code"""
+        stats = self.fields.get(code)
+        return stats[0].record_count if stats else 0
+
+    def merge(self, other):
+        """
+        :param other: the subtype statistics of another partition
+        :type other: SubtypeStatistics
+        """
+        for code, other_stats in other.fields.items():
+            if code in self.fields:
+                for stats, other_field_stats in zip(self.fields[code], other_stats):
+                    stats.merge(other_field_stats)
+            else:
+                self.fields[code] = other_stats
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"subtypes": [list(subtype) for code, subtype in sorted(self.subtypes.items())],
+                "fields": [[code, [stats.to_state() for stats in self.fields[code]]] for code in self.codes()]}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: SubtypeStatistics
+        """
+        subtypes = cls([backends.SubtypeDescription(*subtype) for subtype in state["subtypes"]])
+        for code, field_states in state["fields"]:
+            subtypes.fields[code] = [FieldStatistics.from_state(f) for f in field_states]
+        return subtypes
+
+    def properties(self):
+        """
+        :return: (name, value) pairs for the FC properties sheet
+        :rtype: list of tuples
+        """
+        defaults = [subtype for subtype in self.subtypes.values() if subtype.is_default]
+        text = "{:,} defined".format(len(self.subtypes))
+        if defaults:
+            text += ", default {} ({})".format(defaults[0].code, defaults[0].name)
+        other_records = sum(self.record_count(code) for code in self.fields if code not in self.subtypes)
+        return [("Subtype field", self.subtype_field),
+                ("Subtypes", text),
+                ("Records not of a subtype", "{:,}".format(other_records))]
+
+
+# ----------------------------------------------------------------------------
+# FieldProfile
+#     the field statistics of a feature class, the classes of its shapes,
+#     the statistics of each subtype, and the OBJECTID ranges they were
+#     read from.  Profiles of disjoint ranges merge into the profile of
+#     their union, so newly appended records can be profiled and merged into
+#     a stored profile, or partitions profiled in parallel and combined.
+#     to_json() and from_json() store a profile as text.
+# ----------------------------------------------------------------------------
+
+class FieldProfile(object):
+
+    def __init__(self, fields, oid_ranges=None, shapes=None, subtypes=None):
+        """
+        :param fields: one accumulator per profiled field
+        :type fields: list of FieldStatistics
+
+        :param oid_ranges: the [low, high) OBJECTID ranges read; None for an
+                           open end, [[None, None]] for the whole table
+        :type oid_ranges: list of lists
+
+        :param shapes: the classes of the shapes read, None for a table
+        :type shapes: ShapeClasses
+
+        :param subtypes: the field statistics of each subtype, None without subtypes
+        :type subtypes: SubtypeStatistics
+        """
+        self.fields = fields
+        self.oid_ranges = oid_ranges or []
+        self.shapes = shapes
+        self.subtypes = subtypes
+
+    @property
+    def sample_info(self):
+        """how the records were chosen, None if every record was read"""
+        return self.fields[0].sample_info if self.fields else None
+
+    def merge(self, other):
+        """
+        :param other: the profile of other records of the same feature class
+        :type other: FieldProfile
+
+        :raises ValueError: if the fields differ or the OBJECTID ranges overlap
+        """
+        if [(f.field_name, f.field_type) for f in other.fields] != \
+                [(f.field_name, f.field_type) for f in self.fields]:
+            raise ValueError("cannot merge profiles of different fields")
+        oid_ranges = sorted(self.oid_ranges + other.oid_ranges,
+                            key=lambda r: float("-inf") if r[0] is None else r[0])
+        for previous, following in zip(oid_ranges, oid_ranges[1:]):
+            if previous[1] is None or following[0] is None or previous[1] > following[0]:
+                raise ValueError("cannot merge profiles of overlapping OBJECTID ranges")
+        for stats, other_stats in zip(self.fields, other.fields):
+            stats.merge(other_stats)
+        if self.shapes is not None and other.shapes is not None:
+            self.shapes.merge(other.shapes)
+        if self.subtypes is not None and other.subtypes is not None:
+            self.subtypes.merge(other.subtypes)
+        # adjacent ranges read as one, so merged partitions of a whole table are [[None, None]]
+        self.oid_ranges = []
+        for oid_range in oid_ranges:
+            if self.oid_ranges and self.oid_ranges[-1][1] == oid_range[0]:
+                self.oid_ranges[-1] = [self.oid_ranges[-1][0], oid_range[1]]
+            else:
+                self.oid_ranges.append(list(oid_range))
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"state_version": state_version,
+                "oid_ranges": self.oid_ranges,
+                "fields": [stats.to_state() for stats in self.fields],
+                "shapes": None if self.shapes is None else self.shapes.to_state(),
+                "subtypes": None if self.subtypes is None else self.subtypes.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: FieldProfile
+        """
+        if state.get("state_version") != state_version:
+            raise ValueError("unsupported profile state version: " + str(state.get("state_version")))
+        shapes = state.get("shapes")
+        subtypes = state.get("subtypes")
+        return cls([FieldStatistics.from_state(f) for f in state["fields"]],
+                   [list(r) for r in state["oid_ranges"]],
+                   None if shapes is None else ShapeClasses.from_state(shapes),
+                   None if subtypes is None else SubtypeStatistics.from_state(subtypes))
+
+    def to_json(self):
+        """
+        :return: the state as JSON, with dates tagged so they read back as dates
+        :rtype: basestring
+        """
+        return json.dumps(self.to_state(), default=_json_default, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text):
+        """
+        :param text: the result of to_json()
+        :type text: basestring
+
+        :rtype: FieldProfile
+        """
+        return cls.from_state(json.loads(text, object_hook=_json_object_hook))
+
+
+def _json_default(value):
+    """encode the field values json cannot"""
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.strftime("%Y-%m-%dT%H:%M:%S.%f")}
+    raise TypeError("cannot store " + repr(value) + " in a profile state")
+
+
+def _json_object_hook(obj):
+    """decode the field values encoded by _json_default"""
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.datetime.strptime(obj["$datetime"], "%Y-%m-%dT%H:%M:%S.%f")
+    return obj
+
+
+# -----------------------------------------
+# scan_rows
+#     the streaming column-statistics engine
+# -----------------------------------------
+
+def scan_rows(fields, rows, value_ranges=None, shapes=None, domains=None, subtypes=None):
+    """
+    :param fields: (field name, field type) pairs, in row order
+    :type fields: list of tuples
+
+    :param rows: the rows to profile, each a sequence of values in field order
+    :type rows: iterable
+
+    :param value_ranges: optional {field name: (min, max)} for numeric fields
+    :type value_ranges: dict
+
+    :param shapes: optional shape classes to count; each row then ends with
+                   the OBJECTID and the classify_shape result
+    :type shapes: ShapeClasses
+
+    :param domains: optional {field name: DomainDescription} to check the values against
+    :type domains: dict
+
+    :param subtypes: optional subtype statistics to also feed each row to,
+                     by the value of its subtype field
+    :type subtypes: SubtypeStatistics
+
+    :return: one accumulator per field
+    :rtype: list of FieldStatistics
+    """
+    value_ranges = value_ranges or {}
+    domains = domains or {}
+    table_domains = domains
+    subtype_index = None
+    if subtypes is not None:
+        subtype_index = [name for name, field_type in fields].index(subtypes.subtype_field)
+        # a field whose domain differs by subtype is only checked per subtype
+        table_domains = dict((name, domain) for name, domain in domains.items()
+                             if not subtypes.domain_varies(name, domain.name))
+    field_stats = [FieldStatistics(name, field_type, value_ranges.get(name), table_domains.get(name))
+                   for name, field_type in fields]
+    adders = [stats.add for stats in field_stats]
+
+    row_count = 0
+    add_shape = shapes.add if shapes is not None else None
+    subtype_adders = {}
+    for row in rows:
+        for add, value in zip(adders, row):
+            add(value)
+        if subtype_index is not None:
+            code = row[subtype_index]
+            code_adders = subtype_adders.get(code)
+            if code_adders is None:
+                code_adders = [stats.add for stats in subtypes.field_statistics(code, fields, value_ranges, domains)]
+                subtype_adders[code] = code_adders
+            for add, value in zip(code_adders, row):
+                add(value)
+        if add_shape is not None:
+            add_shape(row[-2], row[-1])
+        row_count += 1
+
+    log.debug("scan_rows read " + str(row_count) + " rows")
+    return field_stats
+
+
+# -----------------------------------------
+# get_value_ranges
+#     the min/max pre-pass for fixed-width histograms
+# -----------------------------------------
+
+def get_value_ranges(field_names, rows):
+    """
+    :param field_names: the fields in row order
+    :type field_names: list of basestring
+
+    :param rows: the rows to read
+    :type rows: iterable
+
+    :return: {field name: (min, max)} for fields with at least one value
+    :rtype: dict
+    """
+    minimums = [None] * len(field_names)
+    maximums = [None] * len(field_names)
+    for row in rows:
+        for i, value in enumerate(row):
+            if value is None:
+                continue
+            if minimums[i] is None or value < minimums[i]:
+                minimums[i] = value
+            if maximums[i] is None or value > maximums[i]:
+                maximums[i] = value
+    return dict((name, (minimum, maximum))
+                for name, minimum, maximum in zip(field_names, minimums, maximums)
+                if minimum is not None)
+
+
+# -----------------------------------------
+# get_field_statistics
+# -----------------------------------------
+
+def get_field_statistics(fc_path, histogram_mode=histogram_mode,
+                         sample_size=None, sample_fraction=None,
+                         oid_range=None, value_ranges=None, shapes=None, subtypes=None):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :param histogram_mode: 'fixed' or 'sketch', see run config
+    :type histogram_mode: basestring
+
+    :param sample_size: profile a sample of this many records
+    :type sample_size: int
+
+    :param sample_fraction: profile a sample of this fraction of the records
+    :type sample_fraction: float
+
+    :param oid_range: only profile records where low <= OBJECTID < high
+    :type oid_range: tuple of int
+
+    :param value_ranges: {field name: (min, max)} for fixed histograms,
+                         instead of a pre-pass; partitions that will be
+                         merged must share them
+    :type value_ranges: dict
+
+    :param shapes: also classify the shapes of the same records, in the same pass
+    :type shapes: ShapeClasses
+
+    :param subtypes: also profile each subtype of the same records, in the same pass
+    :type subtypes: SubtypeStatistics
+
+    :return: one accumulator per profiled field
+    :rtype: list of FieldStatistics
+    """
+    if oid_range is not None and (sample_size or sample_fraction):
+        raise ValueError("an OBJECTID range cannot be sampled")
+    description = fc_properties.get_fc_description(fc_path)
+    fields = [(field.baseName, field.type)
+              for field in description.fields
+              if field.type not in unprofiled_field_types]
+    field_names = [name for name, field_type in fields]
+    log.debug("Profiling " + str(len(fields)) + " fields")
+
+    # the domains of the whole workspace are read once and cached, see backends.get_domains
+    domains = {}
+    if any(field.domain for field in description.fields):
+        workspace_domains = backends.get_domains(fc_path)
+        domains = dict((field.baseName, workspace_domains[field.domain])
+                       for field in description.fields
+                       if field.domain in workspace_domains and field.baseName in field_names)
+
+    # the shapes are read as WKB and classified as they stream, so only the
+    # classes are held, e.g. by a reservoir sample
+    read_names = field_names
+    if shapes is not None:
+        read_names = field_names + ["OID@", "SHAPE@WKB"]
+
+    # ----------------------------------
+    # choose the rows
+    # ----------------------------------
+    backend = backends.get_backend(fc_path)
+    oid_stride = None
+    sample_rows = None
+    method = None
+
+    def read_rows(names, **options):
+        """the rows, with the WKB of the shape (always last) replaced by its classes"""
+        rows = progress.track(backend.iter_rows(fc_path, names, **options))
+        if "SHAPE@WKB" not in names:
+            return rows
+        return (tuple(row[:-1]) + (classify_shape(row[-1]),) for row in rows)
+    if sample_size or sample_fraction:
+        population_size = fc_properties.get_fc_total_record_count(fc_path)
+        target = sample_size or int(math.ceil(population_size * sample_fraction))
+        if target < population_size:
+            stride = population_size // target
+            if backend.filters_at_source and stride > 1:
+                oid_stride = stride
+                method = "OBJECTID stride, 1 in " + str(stride)
+            if sample_size or oid_stride is None:
+                log.debug("Reservoir sampling " + str(target) + " records")
+                progress.start("Sampling records", population_size // (oid_stride or 1))
+                sample_rows = sampling.reservoir_sample(
+                    read_rows(read_names, oid_stride=oid_stride), target, sample_seed)
+                method = method + " then reservoir" if method else "reservoir"
+
+    def rows_of(names, label):
+        """the chosen rows, reduced to the named fields"""
+        if sample_rows is None:
+            # partitions are reported by partitioned_scan, as one scan
+            if oid_range is None:
+                progress.start(label, fc_properties.get_fc_total_record_count(fc_path) // (oid_stride or 1))
+            return read_rows(names, oid_stride=oid_stride, oid_range=oid_range)
+        indexes = [read_names.index(name) for name in names]
+        return ([row[i] for i in indexes] for row in sample_rows)
+
+    # ----------------------------------
+    # profile them
+    # ----------------------------------
+    numeric_fields = [name for name, field_type in fields if field_type in numeric_field_types]
+    if histogram_mode != "fixed":
+        value_ranges = None
+    elif value_ranges is None and numeric_fields:
+        log.debug("Getting the value ranges of " + str(len(numeric_fields)) + " numeric fields")
+        value_ranges = get_value_ranges(numeric_fields, rows_of(numeric_fields, "Reading value ranges"))
+
+    field_stats = scan_rows(fields, rows_of(read_names, "Reading field statistics"),
+                            value_ranges, shapes, domains, subtypes)
+    progress.finish()
+
+    if method is not None:
+        sample_info = sampling.SampleInfo(method=method,
+                                          sample_size=field_stats[0].record_count if field_stats else 0,
+                                          population_size=population_size)
+        log.info("Field statistics are from a sample of " + str(sample_info.sample_size) +
+                 " of " + str(population_size) + " records (" + method + ")")
+        for stats in field_stats:
+            stats.sample_info = sample_info
+        if subtypes is not None:
+            for code_stats in subtypes.fields.values():
+                for stats in code_stats:
+                    stats.sample_info = sample_info
+    return field_stats
+
+
+# -----------------------------------------
+# get_field_profile
+#     the field statistics, the shape classes and the subtype statistics of
+#     a feature class, as a FieldProfile, which generate_profile reports and which can be stored
+#     and merged
+# -----------------------------------------
+
+def get_field_profile(fc_path, histogram_mode=histogram_mode, sample_size=None, sample_fraction=None,
+                      oid_range=None, value_ranges=None):
+    """
+    see get_field_statistics
+
+    :rtype: FieldProfile
+    """
+    shapes = ShapeClasses() if backends.shape_field_name(fc_path) is not None else None
+    subtype_descriptions = backends.subtypes(fc_path)
+    subtypes = None
+    if subtype_descriptions:
+        subtypes = SubtypeStatistics(subtype_descriptions, backends.get_domains(fc_path))
+    field_stats = get_field_statistics(fc_path,
+                                       histogram_mode=histogram_mode,
+                                       sample_size=sample_size,
+                                       sample_fraction=sample_fraction,
+                                       oid_range=oid_range,
+                                       value_ranges=value_ranges,
+                                       shapes=shapes,
+                                       subtypes=subtypes)
+    return FieldProfile(field_stats, [list(oid_range) if oid_range is not None else [None, None]], shapes,
+                        subtypes)
@@ -1,6 +1,13 @@
 import logging
 import os
 import fc_properties
+import field_properties
+import geometry_properties
+import partitioned_scan
+import profile_cache
+import progress
+import run_stats
+import structured_output
 import xls_output
 
 log = logging.getLogger()
@@ -8,7 +15,10 @@ log = logging.getLogger()
 # --------------------------------------------
 # run config (globals) - not user configurable
 # --------------------------------------------
-report_ext = "_fc_profile.xls"
+report_exts = {"xls": "_fc_profile.xls",  # xlwt, 65,536 rows and 256 columns a sheet
+               "xlsx": "_fc_profile.xlsx"}  # streamed by xlsx_writer, no practical limit
+run_stats_ext = "_run_stats.json"  # the timing of each stage and backend call, see run_stats
+partial_suffix = "_PARTIAL"  # before the extension of the report of a cancelled run
 
 
 # -----------------------------------------
@@ -42,11 +52,15 @@ def delete_existing_xls(xls_path):
 #
 #     :pre the input feature class exists
 #     :pre the output folder has write access
-#     :post an xls file will be written
-#     :return None
+#     :post an xls file will be written, with the run stats beside it
+#     :return the path of the xls file
+#     :raises progress.Cancelled if the run was cancelled, after writing
+#             what was read to a report marked PARTIAL
 # -----------------------------------------
 
-def generate_profile(fc_path, out_folder, overwrite):
+def generate_profile(fc_path, out_folder, overwrite, sample_size=None, sample_fraction=None,
+                     cache_folder=None, force=False, processes=None, report_format="xls",
+                     export_format=None, histogram_mode=None):
     """
     :param fc_path: the full path to the feature class
     :type fc_path: basestring
@@ -57,23 +71,186 @@ def generate_profile(fc_path, out_folder, overwrite):
     :param overwrite: a flag to indicate if outputs should be overwritten
     :type overwrite: bool
 
+    :param sample_size: profile the field statistics of a sample of this many records
+    :type sample_size: int
+
+    :param sample_fraction: profile the field statistics of this fraction of the records
+    :type sample_fraction: float
+
+    :param cache_folder: reuse the cached profile of an unchanged feature class from this folder
+    :type cache_folder: basestring
+
+    :param force: profile even if the cached profile is current
+    :type force: bool
+
+    :param processes: worker processes reading the OBJECTID partitions of a
+                      large feature class, defaults to the CPU count
+    :type processes: int
+
+    :param report_format: 'xls' or 'xlsx', see report_exts
+    :type report_format: basestring
+
+    :param export_format: also write the profile for bulk loading, as 'jsonl' or 'csv';
+                          see structured_output
+    :type export_format: basestring
+
+    :param histogram_mode: 'sketch', or 'fixed' for exact bins at the cost of a
+                           second scan; None for field_properties.histogram_mode
+    :type histogram_mode: basestring
+
+    :return xls_path: the full path to the output xls file
+    :rtype xls_path: basestring
+
+    :raises progress.Cancelled: if the run was cancelled; its report_path is the partial report
     """
 
+    # start each run with a fresh Describe snapshot, and time it from here
+    fc_properties.clear_describe_cache()
+    run_stats.reset()
+    progress.reset()
+
     log.info("Determining output XLS filename")
-    xls_path = os.path.join(out_folder, fc_properties.get_fc_name(fc_path) + report_ext)
+    xls_path = os.path.join(out_folder, fc_properties.get_fc_name(fc_path) + report_exts[report_format])
+
+    histogram_mode = histogram_mode or field_properties.histogram_mode
+    export = None
+    if export_format is not None:
+        export_path = os.path.join(out_folder, fc_properties.get_fc_name(fc_path) +
+                                   structured_output.formats[export_format])
+        log.info("Exporting to " + export_path)
+        export = structured_output.ProfileWriter(export_path, export_format, fc_path)
+    try:
+        with run_stats.timed("generate_profile"):
+            xls_path, cancelled = _generate_profile(fc_path, xls_path, overwrite, sample_size, sample_fraction,
+                                                    cache_folder, force, processes, report_format, export,
+                                                    histogram_mode)
+    finally:
+        if export is not None:
+            export.close()
+
+    run_stats_path = os.path.join(out_folder, fc_properties.get_fc_name(fc_path) + run_stats_ext)
+    log.info("Writing run stats to " + run_stats_path)
+    run_stats.write_json(run_stats_path, fc_path)
+    if cancelled:
+        raise progress.Cancelled(xls_path, progress.cancelled_at())
+    return xls_path
+
+
+def partial_path(xls_path):
+    """
+    :return: the path of the report of a cancelled run, so it is not
+             mistaken for a complete report
+    :rtype: basestring
+    """
+    root, ext = os.path.splitext(xls_path)
+    return root + partial_suffix + ext
+
+
+def _generate_profile(fc_path, xls_path, overwrite, sample_size, sample_fraction,
+                      cache_folder, force, processes, report_format, export, histogram_mode):
+    """
+    generate_profile, with the export open; export is None if there is none
+
+    :return: (the path of the report, True if the run was cancelled and the report is partial)
+    :rtype: tuple
+    """
+    cache = None
+    if cache_folder is not None:
+        cache = profile_cache.ProfileCache(cache_folder)
+        fingerprint = profile_cache.fingerprint(fc_path, {"sample_size": sample_size,
+                                                          "sample_fraction": sample_fraction,
+                                                          "report_format": report_format,
+                                                          "histogram_mode": histogram_mode})
+        with run_stats.timed("cache_restore"):
+            restored = not force and cache.restore(fc_path, fingerprint, xls_path)
+        if restored:
+            log.info("Unchanged since it was last profiled, reusing the cached profile")
+            if export is not None:
+                export.write_fc()
+                export.write_fields(fc_properties.get_fc_structure(fc_path))
+                field_profile = cache.load_profile(fc_path)
+                if field_profile is not None:
+                    export.write_field_statistics(field_profile.fields)
+            return xls_path, False
+
     if overwrite is True:
         log.info("Deleting existing xls file")
         delete_existing_xls(xls_path)
 
     log.info("Getting feature class properties")
-    fc_properties_list = fc_properties.get_fc_properties(fc_path)
+    with run_stats.timed("properties"):
+        fc_properties_list = fc_properties.get_fc_properties(fc_path)
+        if export is not None:
+            export.write_fc()
 
     log.info("Getting feature class structure")
-    fc_structure = fc_properties.get_fc_structure(fc_path)
+    with run_stats.timed("structure"):
+        fc_structure = fc_properties.get_fc_structure(fc_path)
+        if export is not None:
+            export.write_fields(fc_structure)
+
+    log.info("Getting field statistics")
+    with run_stats.timed("field_statistics") as span:
+        field_profile = partitioned_scan.get_field_profile(fc_path,
+                                                           processes=processes,
+                                                           histogram_mode=histogram_mode,
+                                                           sample_size=sample_size,
+                                                           sample_fraction=sample_fraction)
+        # a cancelled scan's statistics are only reported, marked PARTIAL
+        if export is not None and not progress.is_cancelled():
+            export.write_field_statistics(field_profile.fields)
+        if field_profile.fields:
+            span.rows = field_profile.fields[0].record_count
+    fields_cancelled = progress.is_cancelled()
+
+    # the shape classes were counted in the same pass as the field statistics
+    if field_profile.shapes is not None:
+        fc_properties_list.extend(field_profile.shapes.properties())
+    if field_profile.subtypes is not None:
+        fc_properties_list.extend(field_profile.subtypes.properties())
+
+    # Total Records and the structure are always exact; say where the statistics came from
+    sample_info = field_profile.sample_info
+    if fields_cancelled:
+        fc_properties_list.append(("Statistics from", "PARTIAL: the {:,} records read before cancelling"
+                                   .format(span.rows or 0)))
+    elif sample_info is None:
+        fc_properties_list.append(("Statistics from", "all records"))
+    else:
+        fc_properties_list.append(("Statistics from",
+                                   "SAMPLE of {:,} records ({})".format(sample_info.sample_size,
+                                                                        sample_info.method)))
+
+    geometry_statistics = None
+    if not fields_cancelled:
+        log.info("Getting geometry statistics")
+        with run_stats.timed("geometry") as span:
+            geometry_statistics = geometry_properties.get_geometry_statistics(fc_path)
+            if geometry_statistics is not None:
+                span.rows = geometry_statistics.record_count
+
+    cancelled = progress.is_cancelled()
+    if cancelled:
+        # the geometry of part of the shapes would be misleading, so it is left out
+        geometry_statistics = None
+        xls_path = partial_path(xls_path)
+        fc_properties_list.insert(0, ("Status", "PARTIAL: cancelled " + progress.cancelled_at()))
+        log.warning("Writing the partial profile to " + xls_path)
+        if overwrite is True:
+            delete_existing_xls(xls_path)
 
     log.info("Writing to XLS")
-    xls_output.write_fc_profile(fc_properties_list,
-                                fc_structure,
-                                xls_path)
+    with run_stats.timed("report"):
+        xls_output.write_fc_profile(fc_properties_list,
+                                    fc_structure,
+                                    xls_path,
+                                    field_statistics=field_profile.fields,
+                                    geometry_statistics=geometry_statistics,
+                                    subtype_statistics=field_profile.subtypes,
+                                    run_stats=run_stats.spans())
 
+    if cache is not None and not cancelled:
+        with run_stats.timed("cache_store"):
+            cache.store(fc_path, fingerprint, xls_path, field_profile)
 
+    return xls_path, cancelled
@@ -0,0 +1,554 @@
+import collections
+import itertools
+import logging
+import struct
+import numpy
+import backends
+import fc_properties
+import field_properties
+import progress
+import wkb as wkb_structure
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+
+# shapes are measured this many at a time, so memory does not grow with the
+# feature class
+chunk_size = 100000
+
+# areas and lengths are counted in log10 bins, size_bins_per_decade to a
+# power of ten, from 10 ** size_min_exponent to 10 ** size_max_exponent in
+# the feature class units.  Smaller and larger sizes are counted in the end bins.
+size_bins_per_decade = 20
+size_min_exponent = -6
+size_max_exponent = 12
+
+# the density grid counts centroids in square cells of density_cell_size in
+# the feature class units; None picks a size for the CRS units (get_crs_units).
+# The grid grows to cover the centroids it is given; when it would be more
+# than max_grid_cells cells a side the cell size doubles (2 x 2 cells are
+# merged), so its memory is bounded whatever the extent.
+density_cell_size = None
+default_cell_sizes = {"Meter": 1000.0,
+                      "Foot": 3280.0,
+                      "Foot_US": 3280.0,
+                      "Degree": 0.01}
+unknown_units_cell_size = 1.0
+max_grid_cells = 1024
+densest_cell_count = 20  # the densest cells reported
+
+# the percentiles reported, as for numeric fields
+percentiles = field_properties.percentiles
+
+# kinds of WKB part
+point_part = wkb_structure.point_part
+path_part = wkb_structure.path_part
+exterior_ring_part = wkb_structure.exterior_ring_part
+interior_ring_part = wkb_structure.interior_ring_part
+
+
+# a cell of the density grid: its bounds, in the feature class units, and centroid count
+GridCell = collections.namedtuple("GridCell", ["xmin", "ymin", "xmax", "ymax", "count"])
+
+# one row per shape that is not NULL; the extent of the chunk, None if the
+# backend measured the shapes and did not read their coordinates
+GeometryChunk = collections.namedtuple("GeometryChunk", ["area",
+                                                         "length",
+                                                         "centroid_x",
+                                                         "centroid_y",
+                                                         "extent"])
+
+
+# ----------------------------------------------------------------------------
+# measuring well-known binary
+#     the WKB of a chunk of shapes is parsed into one array of x, y
+#     coordinates and one row per part (point, path or ring): the shape it
+#     belongs to, its kind and its number of vertices.  Only the structure is
+#     walked in Python; the coordinates are read with numpy.frombuffer and
+#     every measure is computed over the whole chunk at once.
+# ----------------------------------------------------------------------------
+
+def _read_wkb(wkb, offset, shape, parts):
+    """
+    append the parts of the WKB geometry at offset to parts
+
+    :return: the offset after the geometry
+    :rtype: int
+    """
+    byte_order, geometry_type, dimensions, offset = wkb_structure.read_header(wkb, offset)
+    dtype = numpy.dtype(byte_order + "f8")
+
+    def read_vertices(count, kind):
+        vertices = numpy.frombuffer(wkb, dtype, count * dimensions, offset).reshape(count, dimensions)
+        if count:
+            parts.append((shape, kind, vertices[:, :2]))
+        return offset + 8 * count * dimensions
+
+    if geometry_type == 1:
+        point = numpy.frombuffer(wkb, dtype, dimensions, offset)
+        offset += 8 * dimensions
+        if not numpy.isnan(point[0]):  # an empty point is NaN
+            parts.append((shape, point_part, point[:2].reshape(1, 2)))
+    elif geometry_type == 2:
+        count, = struct.unpack_from(byte_order + "I", wkb, offset)
+        offset += 4
+        offset = read_vertices(count, path_part)
+    elif geometry_type == 3:
+        rings, = struct.unpack_from(byte_order + "I", wkb, offset)
+        offset += 4
+        for ring in range(rings):
+            count, = struct.unpack_from(byte_order + "I", wkb, offset)
+            offset += 4
+            offset = read_vertices(count, exterior_ring_part if ring == 0 else interior_ring_part)
+    else:
+        members, = struct.unpack_from(byte_order + "I", wkb, offset)
+        offset += 4
+        for member in range(members):
+            offset = _read_wkb(wkb, offset, shape, parts)
+    return offset
+
+
+def measure_wkb(shapes):
+    """
+    :param shapes: the WKB of each shape; NULL shapes (None) are skipped
+    :type shapes: list of bytes
+
+    :return: the planar area, length (perimeter for polygons) and centroid of
+             each shape.  Empty shapes have no centroid (NaN).
+    :rtype: GeometryChunk
+    """
+    parts = []
+    shape_count = 0
+    for wkb in shapes:
+        if wkb is not None:
+            _read_wkb(wkb, 0, shape_count, parts)
+            shape_count += 1
+    if not parts:
+        nan = numpy.zeros(shape_count) + numpy.nan
+        return GeometryChunk(numpy.zeros(shape_count), numpy.zeros(shape_count), nan, nan.copy(), None)
+
+    part_shapes = numpy.array([part[0] for part in parts])
+    part_kinds = numpy.array([part[1] for part in parts])
+    part_sizes = numpy.array([len(part[2]) for part in parts])
+    xy = numpy.concatenate([part[2] for part in parts]).astype(float)
+    x, y = xy[:, 0], xy[:, 1]
+    part_count = len(parts)
+    part_starts = numpy.cumsum(part_sizes) - part_sizes
+    vertex_parts = numpy.repeat(numpy.arange(part_count), part_sizes)
+
+    # segments join consecutive vertices of the same part; coordinates are
+    # taken relative to the first vertex of the part, so the cross products of
+    # large projected coordinates keep their precision
+    origin_x, origin_y = x[part_starts], y[part_starts]
+    local_x = x - origin_x[vertex_parts]
+    local_y = y - origin_y[vertex_parts]
+    same_part = vertex_parts[:-1] == vertex_parts[1:]
+    segment_parts = vertex_parts[:-1][same_part]
+    x0, x1 = local_x[:-1][same_part], local_x[1:][same_part]
+    y0, y1 = local_y[:-1][same_part], local_y[1:][same_part]
+    segment_lengths = numpy.hypot(x1 - x0, y1 - y0)
+    cross = x0 * y1 - x1 * y0
+
+    def sum_by_part(weights):
+        return numpy.bincount(segment_parts, weights=weights, minlength=part_count)
+
+    def sum_by_part_vertices(weights):
+        return numpy.bincount(vertex_parts, weights=weights, minlength=part_count)
+
+    def sum_by_shape(weights):
+        return numpy.bincount(part_shapes, weights=weights, minlength=shape_count)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        # polygons: shoelace area of each ring, holes subtracted
+        is_ring = part_kinds >= exterior_ring_part
+        ring_cross = numpy.where(is_ring, sum_by_part(cross), 0.0)
+        ring_area = numpy.abs(ring_cross) / 2
+        ring_weight = numpy.where(part_kinds == interior_ring_part, -ring_area, ring_area)
+        ring_centroid_x = sum_by_part((x0 + x1) * cross) / (3 * ring_cross) + origin_x
+        ring_centroid_y = sum_by_part((y0 + y1) * cross) / (3 * ring_cross) + origin_y
+        has_area = ring_area > 0
+        area = sum_by_shape(ring_weight)
+        area_centroid_x = sum_by_shape(numpy.where(has_area, ring_weight * ring_centroid_x, 0.0)) / area
+        area_centroid_y = sum_by_shape(numpy.where(has_area, ring_weight * ring_centroid_y, 0.0)) / area
+
+        # lines, and polygons with no area: the length weighted segment midpoints
+        part_length = sum_by_part(segment_lengths)
+        length = sum_by_shape(part_length)
+        line_centroid_x = sum_by_shape(sum_by_part((x0 + x1) / 2 * segment_lengths) +
+                                       origin_x * part_length) / length
+        line_centroid_y = sum_by_shape(sum_by_part((y0 + y1) / 2 * segment_lengths) +
+                                       origin_y * part_length) / length
+
+        # points, and shapes of coincident vertices: the mean vertex
+        vertex_count = sum_by_shape(part_sizes)
+        vertex_centroid_x = sum_by_shape(sum_by_part_vertices(x)) / vertex_count
+        vertex_centroid_y = sum_by_shape(sum_by_part_vertices(y)) / vertex_count
+
+    centroid_x = numpy.where(area > 0, area_centroid_x, numpy.where(length > 0, line_centroid_x, vertex_centroid_x))
+    centroid_y = numpy.where(area > 0, area_centroid_y, numpy.where(length > 0, line_centroid_y, vertex_centroid_y))
+    extent = (float(x.min()), float(y.min()), float(x.max()), float(y.max()))
+    return GeometryChunk(area, length, centroid_x, centroid_y, extent)
+
+
+# ----------------------------------------------------------------------------
+# SizeDistribution
+#     count, min, max, total, zero count, percentiles and a log10 histogram
+#     of non-negative sizes (areas or lengths), added an array at a time
+# ----------------------------------------------------------------------------
+
+class SizeDistribution(object):
+
+    def __init__(self):
+        self.count = 0
+        self.zero_count = 0
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.counts = numpy.zeros((size_max_exponent - size_min_exponent) * size_bins_per_decade,
+                                  dtype=numpy.int64)
+
+    def add(self, sizes):
+        """
+        :param sizes: the sizes; NaN are ignored
+        :type sizes: numpy.ndarray
+        """
+        sizes = numpy.abs(sizes[~numpy.isnan(sizes)])
+        if not len(sizes):
+            return
+        self.count += len(sizes)
+        self.total += float(sizes.sum())
+        minimum, maximum = float(sizes.min()), float(sizes.max())
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+        positive = sizes[sizes > 0]
+        self.zero_count += len(sizes) - len(positive)
+        bins = numpy.floor((numpy.log10(positive) - size_min_exponent) * size_bins_per_decade)
+        bins = numpy.clip(bins, 0, len(self.counts) - 1).astype(numpy.int64)
+        self.counts += numpy.bincount(bins, minlength=len(self.counts))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentiles(self, fractions=percentiles):
+        """
+        :return: (fraction, estimated value) pairs, interpolated within the
+                 log10 bins, so within a bin width (about 12%) of the true value
+        :rtype: list of tuples
+        """
+        if not self.count:
+            return [(fraction, None) for fraction in fractions]
+        cumulative = numpy.cumsum(self.counts)
+        values = []
+        for fraction in fractions:
+            rank = fraction * self.count - self.zero_count
+            if rank <= 0:
+                values.append((fraction, 0.0))
+                continue
+            index = min(int(numpy.searchsorted(cumulative, rank)), len(cumulative) - 1)
+            below = cumulative[index] - self.counts[index]
+            within = (rank - below) / float(self.counts[index]) if self.counts[index] else 1.0
+            value = 10 ** (size_min_exponent + (index + within) / float(size_bins_per_decade))
+            values.append((fraction, min(max(value, self.minimum), self.maximum)))
+        return values
+
+    def histogram(self):
+        """
+        :return: the counts of zero sizes, then by power of ten, from the
+                 smallest to the largest size
+        :rtype: list of field_properties.HistogramBin
+        """
+        bins = []
+        if self.zero_count:
+            bins.append(field_properties.HistogramBin(0.0, 0.0, self.zero_count))
+        decades = self.counts.reshape(-1, size_bins_per_decade).sum(axis=1)
+        populated = numpy.nonzero(decades)[0]
+        if len(populated):
+            for decade in range(populated[0], populated[-1] + 1):
+                exponent = size_min_exponent + decade
+                bins.append(field_properties.HistogramBin(10.0 ** exponent, 10.0 ** (exponent + 1),
+                                                          int(decades[decade])))
+        return bins
+
+
+# ----------------------------------------------------------------------------
+# DensityGrid
+#     counts of points (centroids) in the cells of a square grid, added an
+#     array at a time with numpy.bincount of the flattened cell indexes.
+#     Cells are aligned to multiples of the cell size, so a grid can be
+#     coarsened by merging 2 x 2 cells without rereading the points.
+# ----------------------------------------------------------------------------
+
+class DensityGrid(object):
+
+    def __init__(self, cell_size):
+        """
+        :param cell_size: the starting cell width and height, in the point units
+        :type cell_size: float
+        """
+        self.cell_size = float(cell_size)
+        self.column0 = None  # the cell index, x / cell_size, of the first column
+        self.row0 = None  # the cell index of the first (southern) row
+        self.counts = numpy.zeros((0, 0), dtype=numpy.int64)  # [row, column]
+
+    def add(self, x, y):
+        """
+        :param x: the x of each point; no NaN
+        :type x: numpy.ndarray
+
+        :param y: the y of each point
+        :type y: numpy.ndarray
+        """
+        if not len(x):
+            return
+        while True:
+            columns = numpy.floor(x / self.cell_size).astype(numpy.int64)
+            rows = numpy.floor(y / self.cell_size).astype(numpy.int64)
+            low_column, high_column = int(columns.min()), int(columns.max())
+            low_row, high_row = int(rows.min()), int(rows.max())
+            if self.column0 is not None:
+                low_column = min(low_column, self.column0)
+                high_column = max(high_column, self.column0 + self.counts.shape[1] - 1)
+                low_row = min(low_row, self.row0)
+                high_row = max(high_row, self.row0 + self.counts.shape[0] - 1)
+            if high_column - low_column < max_grid_cells and high_row - low_row < max_grid_cells:
+                break
+            self._coarsen()
+        self._cover(low_column, low_row, high_column, high_row)
+        row_count, column_count = self.counts.shape
+        cells = (rows - self.row0) * column_count + (columns - self.column0)
+        self.counts += numpy.bincount(cells, minlength=row_count * column_count).reshape(row_count, column_count)
+
+    def _cover(self, low_column, low_row, high_column, high_row):
+        """grow the grid with empty cells to cover the cell indexes"""
+        if self.column0 is None:
+            self.column0, self.row0 = low_column, low_row
+            self.counts = numpy.zeros((high_row - low_row + 1, high_column - low_column + 1), dtype=numpy.int64)
+            return
+        row_count, column_count = self.counts.shape
+        padding = ((self.row0 - low_row, high_row - (self.row0 + row_count - 1)),
+                   (self.column0 - low_column, high_column - (self.column0 + column_count - 1)))
+        if any(before or after for before, after in padding):
+            self.counts = numpy.pad(self.counts, padding, "constant")
+            self.column0, self.row0 = low_column, low_row
+
+    def _coarsen(self):
+        """double the cell size, merging 2 x 2 cells"""
+        self.cell_size *= 2
+        if self.column0 is None:
+            return
+        # align the grid to even cell indexes and an even number of cells
+        row_count, column_count = self.counts.shape
+        before_row, before_column = self.row0 % 2, self.column0 % 2
+        padding = ((before_row, (before_row + row_count) % 2),
+                   (before_column, (before_column + column_count) % 2))
+        counts = numpy.pad(self.counts, padding, "constant")
+        row_count, column_count = counts.shape
+        self.counts = counts.reshape(row_count // 2, 2, column_count // 2, 2).sum(axis=3).sum(axis=1)
+        self.row0 = (self.row0 - before_row) // 2
+        self.column0 = (self.column0 - before_column) // 2
+
+    @property
+    def point_count(self):
+        return int(self.counts.sum())
+
+    @property
+    def extent(self):
+        """:return: (xmin, ymin, xmax, ymax) of the grid, None if it is empty"""
+        if self.column0 is None:
+            return None
+        row_count, column_count = self.counts.shape
+        return (self.column0 * self.cell_size, self.row0 * self.cell_size,
+                (self.column0 + column_count) * self.cell_size, (self.row0 + row_count) * self.cell_size)
+
+    def cell(self, row, column):
+        """
+        :return: the cell at row, column of counts
+        :rtype: GridCell
+        """
+        xmin = (self.column0 + column) * self.cell_size
+        ymin = (self.row0 + row) * self.cell_size
+        return GridCell(xmin, ymin, xmin + self.cell_size, ymin + self.cell_size, int(self.counts[row, column]))
+
+    def densest(self, n=densest_cell_count):
+        """
+        :return: the n cells with the most points, most first
+        :rtype: list of GridCell
+        """
+        flat = self.counts.ravel()
+        n = min(n, int(numpy.count_nonzero(flat)))
+        if not n:
+            return []
+        indexes = numpy.argpartition(-flat, n - 1)[:n]
+        indexes = indexes[numpy.argsort(-flat[indexes], kind="mergesort")]
+        return [self.cell(*divmod(int(i), self.counts.shape[1])) for i in indexes]
+
+    def gini(self):
+        """
+        :return: the Gini coefficient of the cell counts, a measure of skew:
+                 0.0 if every cell of the grid has as many points, approaching
+                 1.0 as the points concentrate in one cell.  None if empty.
+        :rtype: float
+        """
+        total = self.point_count
+        if not total:
+            return None
+        counts = numpy.sort(self.counts.ravel()).astype(float)
+        n = len(counts)
+        ranks = numpy.arange(1, n + 1)
+        return float((2 * ranks - n - 1).dot(counts) / (n * total))
+
+    def coarsened(self, max_cells):
+        """
+        :param max_cells: the most cells a side
+        :type max_cells: int
+
+        :return: a copy merged 2 x 2 until it has at most max_cells cells a side, e.g. for display
+        :rtype: DensityGrid
+        """
+        grid = DensityGrid(self.cell_size)
+        grid.column0, grid.row0, grid.counts = self.column0, self.row0, self.counts.copy()
+        while max(grid.counts.shape) > max_cells:
+            grid._coarsen()
+        return grid
+
+
+# ----------------------------------------------------------------------------
+# GeometryStatistics
+#     the extent, size distributions, centroids and density grid of the
+#     shapes of a feature class, accumulated a GeometryChunk at a time
+# ----------------------------------------------------------------------------
+
+class GeometryStatistics(object):
+
+    def __init__(self, shape_type, record_count, cell_size=unknown_units_cell_size, units="Unknown"):
+        """
+        :param shape_type: e.g. Polygon
+        :type shape_type: basestring
+
+        :param record_count: the records in the feature class
+        :type record_count: int
+
+        :param cell_size: the starting cell size of the density grid
+        :type cell_size: float
+
+        :param units: the units of the coordinates, for the report
+        :type units: basestring
+        """
+        self.shape_type = shape_type
+        self.record_count = record_count
+        self.shape_count = 0   # shapes that are not NULL
+        self.empty_count = 0   # shapes with no vertices
+        self.extent = None
+        self.areas = SizeDistribution()
+        self.lengths = SizeDistribution()
+        self.centroid_sum_x = 0.0
+        self.centroid_sum_y = 0.0
+        self.units = units
+        self.density = DensityGrid(cell_size)
+
+    def add(self, chunk):
+        """
+        :param chunk: the measures of some of the shapes
+        :type chunk: GeometryChunk
+        """
+        empty = numpy.isnan(chunk.centroid_x)
+        self.shape_count += len(empty)
+        self.empty_count += int(empty.sum())
+        self.areas.add(chunk.area[~empty])
+        self.lengths.add(chunk.length[~empty])
+        self.centroid_sum_x += float(chunk.centroid_x[~empty].sum())
+        self.centroid_sum_y += float(chunk.centroid_y[~empty].sum())
+        self.density.add(chunk.centroid_x[~empty], chunk.centroid_y[~empty])
+        if chunk.extent is not None:
+            self.add_extent(chunk.extent)
+
+    def add_extent(self, extent):
+        """
+        :param extent: (xmin, ymin, xmax, ymax)
+        :type extent: tuple of float
+        """
+        if self.extent is None:
+            self.extent = tuple(extent)
+        else:
+            self.extent = (min(self.extent[0], extent[0]), min(self.extent[1], extent[1]),
+                           max(self.extent[2], extent[2]), max(self.extent[3], extent[3]))
+
+    @property
+    def null_count(self):
+        return self.record_count - self.shape_count
+
+    @property
+    def measured_count(self):
+        """the shapes that are neither NULL nor empty"""
+        return self.shape_count - self.empty_count
+
+    @property
+    def mean_centre(self):
+        """:return: (x, y) of the mean centroid, None if there are no shapes"""
+        if not self.measured_count:
+            return None
+        return self.centroid_sum_x / self.measured_count, self.centroid_sum_y / self.measured_count
+
+
+# -----------------------------------------
+# get_geometry_statistics
+# -----------------------------------------
+
+def iter_chunks(fc_path):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :return: the measures of every shape, chunk_size shapes at a time
+    :rtype: iterable of GeometryChunk
+    """
+    backend = backends.get_backend(fc_path)
+    if backend.measures_shapes:
+        # one bulk read per OBJECTID range of chunk_size
+        low, high = backends.oid_bounds(fc_path)
+        if low is None:
+            return
+        for start in range(low, high + 1, chunk_size):
+            if progress.is_cancelled():
+                return
+            measures = backend.shape_measures(fc_path, (start, start + chunk_size))
+            progress.advance(len(measures))
+            yield GeometryChunk(measures["area"], measures["length"],
+                                measures["centroid_x"], measures["centroid_y"], None)
+    else:
+        rows = progress.track(backend.iter_rows(fc_path, ["SHAPE@WKB"]))
+        while True:
+            shapes = [row[0] for row in itertools.islice(rows, chunk_size)]
+            if not shapes:
+                return
+            yield measure_wkb(shapes)
+
+
+def get_geometry_statistics(fc_path):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :return: the geometry statistics, None for a table
+    :rtype: GeometryStatistics
+    """
+    shape_type = fc_properties.get_fc_geometry_type(fc_path)
+    if shape_type == "Table" or backends.shape_field_name(fc_path) is None:
+        return None
+    units = fc_properties.get_crs_units(fc_path)
+    cell_size = density_cell_size or default_cell_sizes.get(units, unknown_units_cell_size)
+    statistics = GeometryStatistics(shape_type, fc_properties.get_fc_total_record_count(fc_path),
+                                    cell_size, units)
+    progress.start("Reading geometry", statistics.record_count)
+    for chunk in iter_chunks(fc_path):
+        statistics.add(chunk)
+        log.debug("Measured " + str(statistics.shape_count) + " shapes")
+    progress.finish()
+    if statistics.extent is None:
+        extent = backends.get_backend(fc_path).extent(fc_path)
+        if extent is not None and statistics.measured_count:
+            statistics.add_extent(extent)
+    return statistics
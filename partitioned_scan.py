@@ -0,0 +1,210 @@
+import logging
+import multiprocessing
+import backends
+import fc_properties
+import field_properties
+import progress
+import run_stats
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+min_partition_records = 250000  # smaller partitions cost more in process start up than they save
+partitions_per_process = 2  # more partitions than workers, so a slow partition does not hold up the rest
+
+
+# ----------------------------------------------------------------------------
+# partitioned scan
+#     the field statistics of one large feature class, read in parallel.
+#     The OBJECTID range is split into partitions, each read by a pool
+#     worker through a where clause (OBJECTID >= low AND OBJECTID < high),
+#     and the partial FieldProfiles are merged.  Fixed histograms must share
+#     their bins, so the min/max pre-pass is partitioned too and its ranges
+#     combined before the main scan.
+#
+#     Workers return FieldProfile state (plain dicts) rather than the
+#     accumulators, so nothing depends on how they pickle.  Pool workers
+#     cannot start pools of their own, so batch_profile asks for one process.
+#     The workspace domains are read once, here, and handed to the workers.
+#     Workers return their run_stats spans too, merged into the parent's, so
+#     backend calls made in workers add up as process seconds.  They count
+#     the rows they read in a shared counter, which is reported here as one
+#     scan, and stop at their next chunk when the shared cancel event is
+#     set, returning what they read for a partial profile.
+# ----------------------------------------------------------------------------
+
+def plan_partitions(oid_bounds, record_count, processes):
+    """
+    :param oid_bounds: (smallest OBJECTID, largest OBJECTID)
+    :type oid_bounds: tuple of int
+
+    :param record_count: the number of records
+    :type record_count: int
+
+    :param processes: the worker processes available
+    :type processes: int
+
+    :return: [low, high) OBJECTID ranges covering the table, the first and
+             last open ended; a single [None, None] if it is not worth splitting
+    :rtype: list of lists
+    """
+    low, high = oid_bounds
+    partition_count = min(processes * partitions_per_process, record_count // min_partition_records)
+    if low is None or processes < 2 or partition_count < 2:
+        return [[None, None]]
+    partition_count = min(partition_count, high - low + 1)
+    width = (high - low + 1) / float(partition_count)
+    bounds = [None] + [low + int(round(width * i)) for i in range(1, partition_count)] + [None]
+    return [[bounds[i], bounds[i + 1]] for i in range(partition_count)]
+
+
+def _init_worker(fc_path, domains, rows_read, cancel_event):
+    """cache the domains read by get_field_profile, and share its progress"""
+    backends.set_domains(fc_path, domains)
+    progress.attach_worker(rows_read, cancel_event)
+
+
+def _map(pool, function, jobs, label, record_count, rows_read):
+    """
+    pool.map, reporting the rows the workers read and passing on a cancel
+
+    :return: the results of every job, partial if the run was cancelled
+    :rtype: list
+    """
+    rows_read.value = 0
+    progress.start(label, record_count)
+    progress.is_cancelled()  # a run already cancelled is passed on before the workers start
+    results = pool.map_async(function, jobs, chunksize=1)
+    while not results.ready():
+        results.wait(progress.report_interval)
+        progress.update(rows_read.value)
+        progress.is_cancelled()
+    progress.finish()
+    return results.get()
+
+
+def _get_value_ranges(job):
+    """
+    :param job: (fc_path, numeric field names, oid_range)
+    :type job: tuple
+
+    :return: ({field name: (min, max)}, run_stats state)
+    :rtype: tuple
+    """
+    fc_path, numeric_fields, oid_range = job
+    run_stats.reset()
+    rows = progress.track(backends.get_backend(fc_path).iter_rows(fc_path, numeric_fields, oid_range=oid_range))
+    return field_properties.get_value_ranges(numeric_fields, rows), run_stats.to_state()
+
+
+def _profile_partition(job):
+    """
+    :param job: (fc_path, histogram_mode, oid_range, value_ranges)
+    :type job: tuple
+
+    :return: (the partition's FieldProfile state, run_stats state)
+    :rtype: tuple
+    """
+    fc_path, histogram_mode, oid_range, value_ranges = job
+    run_stats.reset()
+    field_profile = field_properties.get_field_profile(fc_path,
+                                                       histogram_mode=histogram_mode,
+                                                       oid_range=oid_range,
+                                                       value_ranges=value_ranges or {})
+    return field_profile.to_state(), run_stats.to_state()
+
+
+def merge_value_ranges(value_ranges_list):
+    """
+    :param value_ranges_list: {field name: (min, max)} of each partition
+    :type value_ranges_list: list of dict
+
+    :return: {field name: (min, max)} over all the partitions
+    :rtype: dict
+    """
+    merged = {}
+    for value_ranges in value_ranges_list:
+        for name, (minimum, maximum) in value_ranges.items():
+            if name in merged:
+                minimum = min(minimum, merged[name][0])
+                maximum = max(maximum, merged[name][1])
+            merged[name] = (minimum, maximum)
+    return merged
+
+
+def get_field_profile(fc_path, processes=None, histogram_mode=field_properties.histogram_mode,
+                      sample_size=None, sample_fraction=None):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :param processes: worker processes, defaults to the CPU count.
+                      1 reads in this process, without a pool.
+    :type processes: int
+
+    :param histogram_mode: 'fixed' or 'sketch', see field_properties
+    :type histogram_mode: basestring
+
+    :param sample_size: profile a sample of this many records; samples are not partitioned
+    :type sample_size: int
+
+    :param sample_fraction: profile a sample of this fraction of the records
+    :type sample_fraction: float
+
+    :rtype: field_properties.FieldProfile
+    """
+    processes = processes or multiprocessing.cpu_count()
+    partitions = [[None, None]]
+    if not (sample_size or sample_fraction):
+        record_count = fc_properties.get_fc_total_record_count(fc_path)
+        if processes > 1 and record_count >= 2 * min_partition_records:
+            partitions = plan_partitions(backends.oid_bounds(fc_path),
+                                         record_count, processes)
+    if len(partitions) == 1:
+        return field_properties.get_field_profile(fc_path,
+                                                  histogram_mode=histogram_mode,
+                                                  sample_size=sample_size,
+                                                  sample_fraction=sample_fraction)
+
+    processes = min(processes, len(partitions))
+    log.info("Reading " + str(len(partitions)) + " OBJECTID partitions with " + str(processes) + " processes")
+    description = fc_properties.get_fc_description(fc_path)
+    numeric_fields = [field.baseName for field in description.fields
+                      if field.type in field_properties.numeric_field_types and
+                      field.type not in field_properties.unprofiled_field_types]
+
+    domains = {}
+    if any(field.domain for field in description.fields) or backends.subtypes(fc_path):
+        domains = backends.get_domains(fc_path)
+    rows_read = multiprocessing.Value("l", 0)
+    cancel_event = multiprocessing.Event()
+    pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                initargs=(fc_path, domains, rows_read, cancel_event))
+    replaced_event = progress.set_cancel_event(cancel_event)
+    try:
+        value_ranges = {}
+        if histogram_mode == "fixed" and numeric_fields:
+            log.debug("Getting the value ranges of " + str(len(numeric_fields)) + " numeric fields")
+            results = _map(pool, _get_value_ranges,
+                           [(fc_path, numeric_fields, oid_range) for oid_range in partitions],
+                           "Reading value ranges", record_count, rows_read)
+            value_ranges = merge_value_ranges([partition_ranges for partition_ranges, spans in results])
+            for partition_ranges, spans in results:
+                run_stats.merge_state(spans)
+        results = _map(pool, _profile_partition,
+                       [(fc_path, histogram_mode, oid_range, value_ranges) for oid_range in partitions],
+                       "Reading field statistics", record_count, rows_read)
+    finally:
+        progress.set_cancel_event(replaced_event)
+        pool.close()
+        pool.join()
+
+    states = [state for state, spans in results]
+    for state, spans in results:
+        run_stats.merge_state(spans)
+    field_profile = field_properties.FieldProfile.from_state(states[0])
+    for state in states[1:]:
+        field_profile.merge(field_properties.FieldProfile.from_state(state))
+    return field_profile
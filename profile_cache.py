@@ -0,0 +1,205 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import backends
+import fc_properties
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+cache_folder_name = "fc_profile_cache"  # default cache folder, inside the output folder
+cache_version = 1  # increment when the report changes, to invalidate every cached profile
+max_entries = 5000  # default eviction: keep the most recently used profiles
+max_age_days = 30  # default eviction: drop profiles not used for this long
+timestamp_format = "%Y-%m-%dT%H:%M:%S"
+state_ext = ".state.json"
+report_ext = ".report"  # a copy of the .xls or .xlsx report
+
+
+# ----------------------------------------------------------------------------
+# fingerprint
+#     a cheap stand-in for "has this feature class changed since it was last
+#     profiled?": the schema (from get_fc_structure), the description, the
+#     record count, and the sizes and modified times of the files the data is
+#     stored in.  The profile options are included, so a sampled profile is
+#     never reused for a full one.
+# ----------------------------------------------------------------------------
+
+def fingerprint(fc_path, options=None):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :param options: the generate_profile options that change the report, e.g. sample_size
+    :type options: dict
+
+    :return: a hex digest that changes when the feature class or options change
+    :rtype: basestring
+    """
+    description = fc_properties.get_fc_description(fc_path)
+    heading, structure = fc_properties.get_fc_structure(fc_path)
+    parts = [cache_version,
+             description._replace(fields=None),
+             [tuple(row) for row in structure],
+             fc_properties.get_fc_total_record_count(fc_path),
+             sorted((options or {}).items())]
+    for file_path in backends.get_backend(fc_path).source_files(fc_path):
+        stat = os.stat(file_path)
+        parts.append((os.path.basename(file_path), stat.st_size, stat.st_mtime))
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------------------------
+# ProfileCache
+#     a folder of previous reports.  Each feature class has files named by a
+#     hash of its path: <key>.report, a copy of the report, <key>.state.json,
+#     its mergeable FieldProfile state, and <key>.json, its fingerprint and
+#     when it was last used.  One set per feature class, written by rename,
+#     so pool workers never write the same file.
+# ----------------------------------------------------------------------------
+
+class ProfileCache(object):
+
+    def __init__(self, cache_folder):
+        """
+        :param cache_folder: the folder holding the cached reports, created if missing
+        :type cache_folder: basestring
+        """
+        self.cache_folder = cache_folder
+        if not os.path.isdir(cache_folder):
+            try:
+                os.makedirs(cache_folder)
+            except OSError:
+                # another worker created it first
+                if not os.path.isdir(cache_folder):
+                    raise
+
+    def _paths(self, fc_path):
+        """:return: (entry json path, cached report path, profile state path)"""
+        key = hashlib.sha1(fc_path.lower().encode("utf-8")).hexdigest()
+        return (os.path.join(self.cache_folder, key + ".json"),
+                os.path.join(self.cache_folder, key + report_ext),
+                os.path.join(self.cache_folder, key + state_ext))
+
+    def _read_entry(self, entry_path):
+        try:
+            with open(entry_path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _replace(source, destination):
+        """rename source over destination (os.rename will not on Windows)"""
+        if os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
+    def _write_entry(self, entry_path, entry):
+        temp_path = entry_path + "." + str(os.getpid()) + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entry, f, indent=1, sort_keys=True)
+        self._replace(temp_path, entry_path)
+
+    def restore(self, fc_path, fingerprint, xls_path):
+        """
+        copy the cached report to xls_path if the fingerprint matches
+
+        :param fc_path: fully qualified path to a feature class
+        :type fc_path: basestring
+
+        :param fingerprint: the current fingerprint of the feature class
+        :type fingerprint: basestring
+
+        :param xls_path: where the report should be
+        :type xls_path: basestring
+
+        :return: True if the cached report was used
+        :rtype: bool
+        """
+        entry_path, cached_xls, state_path = self._paths(fc_path)
+        entry = self._read_entry(entry_path)
+        if entry is None or entry.get("fingerprint") != fingerprint or not os.path.exists(cached_xls):
+            return False
+        shutil.copyfile(cached_xls, xls_path)
+        entry["last_used"] = datetime.datetime.now().strftime(timestamp_format)
+        self._write_entry(entry_path, entry)
+        return True
+
+    def store(self, fc_path, fingerprint, xls_path, field_profile=None):
+        """
+        :param fc_path: fully qualified path to a feature class
+        :type fc_path: basestring
+
+        :param fingerprint: the fingerprint the report was generated for
+        :type fingerprint: basestring
+
+        :param xls_path: the report just written
+        :type xls_path: basestring
+
+        :param field_profile: the field statistics in the report
+        :type field_profile: field_properties.FieldProfile
+        """
+        entry_path, cached_xls, state_path = self._paths(fc_path)
+        temp_xls = cached_xls + "." + str(os.getpid()) + ".tmp"
+        shutil.copyfile(xls_path, temp_xls)
+        self._replace(temp_xls, cached_xls)
+        if field_profile is not None:
+            temp_state = state_path + "." + str(os.getpid()) + ".tmp"
+            with open(temp_state, "w") as f:
+                f.write(field_profile.to_json())
+            self._replace(temp_state, state_path)
+        now = datetime.datetime.now().strftime(timestamp_format)
+        self._write_entry(entry_path, {"fc_path": fc_path,
+                                       "fingerprint": fingerprint,
+                                       "created": now,
+                                       "last_used": now})
+
+    def load_profile(self, fc_path):
+        """
+        :param fc_path: fully qualified path to a feature class
+        :type fc_path: basestring
+
+        :return: the stored field statistics, to merge newly appended records into;
+                 None if there are none
+        :rtype: field_properties.FieldProfile
+        """
+        import field_properties  # not at module load, which the command line does at start up
+        state_path = self._paths(fc_path)[2]
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path) as f:
+            return field_properties.FieldProfile.from_json(f.read())
+
+    def evict(self, max_entries=max_entries, max_age_days=max_age_days):
+        """
+        remove profiles not used for max_age_days, then the least recently
+        used beyond max_entries
+
+        :return: the number of profiles removed
+        :rtype: int
+        """
+        entries = []
+        for name in os.listdir(self.cache_folder):
+            if name.endswith(".json") and not name.endswith(state_ext):
+                entry_path = os.path.join(self.cache_folder, name)
+                entry = self._read_entry(entry_path) or {}
+                entries.append((entry.get("last_used", ""), entry_path))
+        entries.sort(reverse=True)
+
+        oldest = (datetime.datetime.now() - datetime.timedelta(days=max_age_days)).strftime(timestamp_format)
+        evicted = [entry_path for i, (last_used, entry_path) in enumerate(entries)
+                   if i >= max_entries or last_used < oldest]
+        for entry_path in evicted:
+            key_path = entry_path[:-len(".json")]
+            for path in (entry_path, key_path + report_ext, key_path + state_ext):
+                if os.path.exists(path):
+                    os.remove(path)
+        if evicted:
+            log.info("Evicted " + str(len(evicted)) + " profiles from the cache")
+        return len(evicted)
@@ -0,0 +1,267 @@
+__author__ = "Mic Zatorsky"
+__copyright__ = "Copyright 2018, Michael Zatorsky "
+__license__ = "CC BT-SA 4.0"
+
+# ----------------------------------------------------------------------------
+# description: compares two sets of stored profiles, e.g. last night's and
+#              tonight's delivery, and reports schema and statistics drift:
+#              feature classes and fields added, removed or retyped, CRS
+#              changes, record count deltas and statistics that shifted
+#              past the thresholds below
+#
+#              A stored profile is the JSON Lines export of fc_profiler
+#              (--export jsonl).  Each side is a .jsonl file or a folder of
+#              them.  Feature classes are matched by workspace and name,
+#              e.g. roads.gdb/transport/roads, fields by name within them,
+#              through dictionaries, so comparing thousands of feature
+#              classes is one pass over each side.
+#
+# Run instructions:  python profile_diff.py <old> <new> <output .xls, .xlsx>
+# ----------------------------------------------------------------------------
+
+import argparse
+import collections
+import glob
+import json
+import logging
+import os
+import sys
+import backends
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+no_data_change = 0.05  # report a change of at least 5 percentage points in NULL/blank records
+distinct_change = 0.2  # report a relative change of at least 20% in the distinct count
+mean_change = 0.5  # report a mean that moved at least this many (old) standard deviations
+
+Change = collections.namedtuple("Change", ["fc_name",
+                                           "field_name",
+                                           "change",
+                                           "old",
+                                           "new"])
+
+workspace_extensions = backends.workspace_extensions + (".sde",)
+
+# the records of one feature class, by record type; fields and statistics by lower case field name
+FcProfile = collections.namedtuple("FcProfile", ["fc", "fields", "field_statistics"])
+
+
+# -----------------------------------------
+# load_profiles
+# -----------------------------------------
+
+def profile_files(path):
+    """
+    :param path: a .jsonl export, or a folder of them
+    :type path: basestring
+
+    :rtype: list of basestring
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.jsonl")))
+    return [path]
+
+
+def profile_key(fc_path):
+    """
+    :param fc_path: the feature class profiled
+    :type fc_path: basestring
+
+    :return: the lower case workspace name and the path within it, e.g.
+             "delivery.gdb/transport/roads" for C:\\data\\delivery.gdb\\transport\\roads;
+             the folder and name if it is not in a workspace, e.g. a shapefile
+    :rtype: basestring
+    """
+    parts = [part for part in fc_path.replace("\\", "/").split("/") if part]
+    start = max(len(parts) - 2, 0)
+    for index in range(len(parts) - 1):
+        if parts[index].lower().endswith(workspace_extensions):
+            start = index
+    return "/".join(parts[start:]).lower()
+
+
+def load_profiles(path):
+    """
+    :param path: a .jsonl export, or a folder of them
+    :type path: basestring
+
+    :return: {profile_key: FcProfile}
+    :rtype: dict
+    """
+    profiles = {}
+    fc_paths = {}
+    for file_path in profile_files(path):
+        with open(file_path) as f:
+            # one json.loads of the whole file is much faster than one per line
+            records = json.loads("[" + ",".join(line for line in f.read().splitlines() if line.strip()) + "]")
+        for record in records:
+            fc_path = record["fc_path"]
+            key = profile_key(fc_path)
+            if fc_paths.setdefault(key, fc_path) != fc_path:
+                raise ValueError("{} and {} are both profiled as {} in {}".format(fc_paths[key], fc_path, key, path))
+            profile = profiles.get(key)
+            if profile is None:
+                profile = profiles[key] = FcProfile({}, {}, {})
+            record_type = record["record_type"]
+            if record_type == "fc":
+                profile.fc.update(record)
+            elif record_type == "field":
+                profile.fields[record["field_name"].lower()] = record
+            elif record_type == "field_statistics":
+                profile.field_statistics[record["field_name"].lower()] = record
+    log.info("Loaded " + str(len(profiles)) + " profiles from " + path)
+    return profiles
+
+
+# -----------------------------------------
+# diff
+# -----------------------------------------
+
+def no_data_fraction(stats):
+    return float(stats["no_data_count"]) / stats["record_count"] if stats["record_count"] else 0.0
+
+
+def diff_field_statistics(fc_name, field_name, old, new):
+    """
+    :param old: the old field_statistics record
+    :type old: dict
+
+    :param new: the new field_statistics record
+    :type new: dict
+
+    :rtype: list of Change
+    """
+    changes = []
+    old_no_data, new_no_data = no_data_fraction(old), no_data_fraction(new)
+    if abs(new_no_data - old_no_data) >= no_data_change:
+        changes.append(Change(fc_name, field_name, "no data %", round(old_no_data, 4), round(new_no_data, 4)))
+
+    old_distinct, new_distinct = old.get("distinct_count"), new.get("distinct_count")
+    if old_distinct is not None and new_distinct is not None and \
+            abs(new_distinct - old_distinct) >= distinct_change * max(old_distinct, 1):
+        changes.append(Change(fc_name, field_name, "distinct count", old_distinct, new_distinct))
+
+    old_mean, new_mean = old.get("mean"), new.get("mean")
+    if old_mean is not None and new_mean is not None:
+        scale = old.get("standard_deviation") or 0.0
+        if (scale and abs(new_mean - old_mean) >= mean_change * scale) or (not scale and new_mean != old_mean):
+            changes.append(Change(fc_name, field_name, "mean", old_mean, new_mean))
+
+    old_top, new_top = old.get("top_values"), new.get("top_values")
+    if old_top and new_top and old_top[0]["value"] != new_top[0]["value"]:
+        changes.append(Change(fc_name, field_name, "most frequent value", old_top[0]["value"], new_top[0]["value"]))
+    return changes
+
+
+def diff_fc(fc_name, old, new):
+    """
+    :param old: the old profile of the feature class
+    :type old: FcProfile
+
+    :param new: the new profile of the feature class
+    :type new: FcProfile
+
+    :rtype: list of Change
+    """
+    changes = []
+    if old.fc.get("geometry_type") != new.fc.get("geometry_type"):
+        changes.append(Change(fc_name, "", "geometry type", old.fc.get("geometry_type"), new.fc.get("geometry_type")))
+    # a new WKID, name or both is one change of CRS
+    old_crs = (old.fc.get("crs_wkid"), old.fc.get("crs_name"))
+    new_crs = (new.fc.get("crs_wkid"), new.fc.get("crs_name"))
+    if old_crs != new_crs:
+        changes.append(Change(fc_name, "", "CRS", old_crs, new_crs))
+    old_count, new_count = old.fc.get("total_records"), new.fc.get("total_records")
+    if old_count != new_count:
+        changes.append(Change(fc_name, "", "record count", old_count, new_count))
+
+    for key in sorted(set(old.fields) - set(new.fields)):
+        changes.append(Change(fc_name, old.fields[key]["field_name"], "field removed",
+                              old.fields[key]["field_type"], None))
+    for key in sorted(set(new.fields) - set(old.fields)):
+        changes.append(Change(fc_name, new.fields[key]["field_name"], "field added",
+                              None, new.fields[key]["field_type"]))
+    for key in sorted(set(old.fields) & set(new.fields)):
+        old_field, new_field = old.fields[key], new.fields[key]
+        if old_field["field_type"] != new_field["field_type"]:
+            changes.append(Change(fc_name, new_field["field_name"], "field retyped",
+                                  old_field["field_type"], new_field["field_type"]))
+        elif old_field["field_length"] != new_field["field_length"]:
+            changes.append(Change(fc_name, new_field["field_name"], "field length",
+                                  old_field["field_length"], new_field["field_length"]))
+        if old_field["field_is_nullable"] != new_field["field_is_nullable"]:
+            changes.append(Change(fc_name, new_field["field_name"], "field nullable",
+                                  old_field["field_is_nullable"], new_field["field_is_nullable"]))
+        if old_field["field_domain"] != new_field["field_domain"]:
+            changes.append(Change(fc_name, new_field["field_name"], "field domain",
+                                  old_field["field_domain"], new_field["field_domain"]))
+
+    for key in sorted(set(old.field_statistics) & set(new.field_statistics)):
+        changes.extend(diff_field_statistics(fc_name, new.field_statistics[key]["field_name"],
+                                             old.field_statistics[key], new.field_statistics[key]))
+    return changes
+
+
+def diff_profiles(old_profiles, new_profiles):
+    """
+    :param old_profiles: the result of load_profiles for the old set
+    :type old_profiles: dict
+
+    :param new_profiles: the result of load_profiles for the new set
+    :type new_profiles: dict
+
+    :return: every change, by feature class name, or by key where the name is not unique
+    :rtype: list of Change
+    """
+    keys = sorted(set(old_profiles) | set(new_profiles))
+    fc_names = dict((key, (new_profiles.get(key) or old_profiles[key]).fc.get("fc_name", key)) for key in keys)
+    # feature classes of the same name in different workspaces are reported by their key
+    name_counts = collections.Counter(name.lower() for name in fc_names.values())
+    changes = []
+    for key in keys:
+        old, new = old_profiles.get(key), new_profiles.get(key)
+        fc_name = fc_names[key] if name_counts[fc_names[key].lower()] == 1 else key
+        if new is None:
+            changes.append(Change(fc_name, "", "feature class removed", old.fc.get("total_records"), None))
+        elif old is None:
+            changes.append(Change(fc_name, "", "feature class added", None, new.fc.get("total_records")))
+        else:
+            changes.extend(diff_fc(fc_name, old, new))
+    log.info(str(len(changes)) + " changes")
+    return changes
+
+
+# -----------------------------------------
+# main
+# -----------------------------------------
+
+def parse_arguments():
+    """
+    :return: the arguments, by option name
+    :rtype argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="compare two sets of fc_profiler --export jsonl profiles")
+    parser.add_argument("old", help="the old .jsonl profile, or a folder of them")
+    parser.add_argument("new", help="the new .jsonl profile, or a folder of them")
+    parser.add_argument("out_path", help="the change report, .xls or .xlsx")
+    return parser.parse_args()
+
+
+def main(old_path, new_path, out_path):
+    """
+    :return: the exit code, 1 if anything changed
+    :rtype: int
+    """
+    import xls_output
+    changes = diff_profiles(load_profiles(old_path), load_profiles(new_path))
+    xls_output.write_profile_diff(old_path, new_path, changes, out_path)
+    return 1 if changes else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_arguments()
+    sys.exit(main(args.old, args.new, args.out_path))
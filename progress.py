@@ -0,0 +1,333 @@
+# ----------------------------------------------------------------------------
+# progress
+#     progress reporting and cancellation for the long scans: the field
+#     statistics (and their value range pre-pass) and the geometry.  A scan
+#     starts a stage with its expected rows, e.g. the record count, and
+#     reads its rows through track(), which counts them a chunk at a time,
+#     so the cost per row is that of itertools.chain.
+#
+#     Reporters are called at most every report_interval seconds with the
+#     stage's rows, rows/s and ETA: fc_profiler.py rewrites a console line,
+#     fc_profiler.pyt drives the ArcGIS progressor.  Cancellation (Ctrl+C,
+#     or the Cancel button of a tool) is checked between chunks; a
+#     cancelled scan stops reading and returns what it has, and
+#     generate_profile writes it as a report marked PARTIAL.
+#
+#     Pool workers share a row counter and a cancel event with the process
+#     that started them (see attach_worker), so partition workers are
+#     reported as one scan and stop with it.
+# ----------------------------------------------------------------------------
+import itertools
+import logging
+import signal
+import sys
+import timeit
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+report_interval = 1.0  # seconds between progress reports
+chunk_rows = 10000  # rows read between progress and cancellation checks
+
+timer = timeit.default_timer
+
+_reporters = []
+_cancel_checks = []
+_current = None  # the Stage being read
+_last_report = 0.0
+_cancel_requested = False
+_cancelled_at = None
+_cancel_event = None  # a multiprocessing.Event shared with pool workers
+_shared_rows = None  # a multiprocessing.Value of the rows read by pool workers
+
+
+class Cancelled(Exception):
+
+    def __init__(self, report_path, cancelled_at):
+        """
+        :param report_path: the partial report written, None if there is none
+        :type report_path: basestring
+
+        :param cancelled_at: the stage and rows read when the run was cancelled
+        :type cancelled_at: basestring
+        """
+        Exception.__init__(self, "cancelled " + cancelled_at)
+        self.report_path = report_path
+        self.cancelled_at = cancelled_at
+
+
+class Stage(object):
+
+    def __init__(self, label, total):
+        """
+        :param label: what is being read, e.g. "Reading field statistics"
+        :type label: basestring
+
+        :param total: the rows expected, None if unknown
+        :type total: int
+        """
+        self.label = label
+        self.total = total
+        self.rows = 0
+        self.started = timer()
+
+    @property
+    def rows_per_second(self):
+        seconds = timer() - self.started
+        return self.rows / seconds if seconds > 0 else None
+
+    @property
+    def percent(self):
+        """0 to 100, None if the total is unknown"""
+        if not self.total:
+            return None
+        return min(100.0, 100.0 * self.rows / self.total)
+
+    @property
+    def eta_seconds(self):
+        """the seconds left at the current rate, None if unknown"""
+        rate = self.rows_per_second
+        if not self.total or not rate:
+            return None
+        return max(0, self.total - self.rows) / rate
+
+    def summary(self):
+        """:return: e.g. 'Reading field statistics: 250,000 of 1,000,000 rows'"""
+        if self.total:
+            return "{}: {:,} of {:,} rows".format(self.label, self.rows, self.total)
+        return "{}: {:,} rows".format(self.label, self.rows)
+
+    def text(self):
+        """:return: the summary, the percentage, rows/s and ETA"""
+        text = self.summary()
+        if self.percent is not None:
+            text += " ({:.1f}%)".format(self.percent)
+        rate = self.rows_per_second
+        if rate:
+            text += ", {:,.0f} rows/s".format(rate)
+        eta = self.eta_seconds
+        if eta is not None:
+            minutes, seconds = divmod(int(round(eta)), 60)
+            text += ", ETA {}:{:02d}:{:02d}".format(minutes // 60, minutes % 60, seconds)
+        return text
+
+
+# -----------------------------------------
+# reporters
+# -----------------------------------------
+
+class ConsoleReporter(object):
+    """rewrites one console line with the progress of each stage"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self.width = 0
+
+    def __call__(self, stage, final=False):
+        text = stage.text()
+        self.stream.write("\r" + text.ljust(self.width))
+        self.width = len(text)
+        if final:
+            self.stream.write("\n")
+            self.width = 0
+        self.stream.flush()
+
+
+def add_reporter(reporter):
+    """
+    :param reporter: called with (Stage, final) at most every report_interval
+                     seconds, and with final True as each stage ends
+    :type reporter: function
+    """
+    _reporters.append(reporter)
+
+
+def remove_reporter(reporter):
+    _reporters.remove(reporter)
+
+
+def add_cancel_check(check):
+    """
+    :param check: called between chunks; returns True to cancel the run
+    :type check: function
+    """
+    _cancel_checks.append(check)
+
+
+def remove_cancel_check(check):
+    _cancel_checks.remove(check)
+
+
+def _report(final=False):
+    global _last_report
+    _last_report = timer()
+    for reporter in _reporters:
+        reporter(_current, final)
+
+
+# -----------------------------------------
+# stages
+# -----------------------------------------
+
+def reset():
+    """start a run: no stage, and not cancelled"""
+    global _current, _cancel_requested, _cancelled_at
+    _current = None
+    _cancel_requested = False
+    _cancelled_at = None
+
+
+def start(label, total=None):
+    """
+    start reading a stage, ending the last one
+
+    :param label: what is being read, e.g. "Reading geometry"
+    :type label: basestring
+
+    :param total: the rows expected, None if unknown
+    :type total: int
+    """
+    global _current
+    finish()
+    _current = Stage(label, total)
+    if _reporters:
+        _report()
+
+
+def finish():
+    """end the stage being read, reporting it one last time"""
+    global _current
+    if _current is not None and _reporters:
+        _report(final=True)
+    _current = None
+
+
+def advance(rows):
+    """
+    :param rows: rows read since the last call
+    :type rows: int
+    """
+    if _shared_rows is not None:
+        with _shared_rows.get_lock():
+            _shared_rows.value += rows
+    if _current is not None:
+        _current.rows += rows
+        if _reporters and timer() - _last_report >= report_interval:
+            _report()
+
+
+def update(rows):
+    """
+    :param rows: all the rows read in the stage, e.g. by pool workers
+    :type rows: int
+    """
+    if _current is not None:
+        _current.rows = rows
+        if _reporters and timer() - _last_report >= report_interval:
+            _report()
+
+
+def track(rows):
+    """
+    :param rows: the rows of a scan
+    :type rows: iterable
+
+    :return: the rows, counted towards the stage a chunk at a time, and
+             ending early if the run is cancelled
+    :rtype: iterable
+    """
+    return itertools.chain.from_iterable(_chunks(iter(rows)))
+
+
+def _chunks(rows):
+    """chunk_rows rows at a time, until they run out or the run is cancelled"""
+    while not is_cancelled():
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield chunk
+        advance(len(chunk))
+
+
+# -----------------------------------------
+# cancellation
+# -----------------------------------------
+
+def cancel():
+    """
+    cancel the run; safe to call from a signal handler, it only sets a flag
+    that is_cancelled() acts on
+    """
+    global _cancel_requested
+    _cancel_requested = True
+
+
+def is_cancelled():
+    """
+    :return: True if the run has been cancelled, by cancel(), a cancel
+             check, or the process that started this pool worker
+    :rtype: bool
+    """
+    global _cancel_requested, _cancelled_at
+    if not _cancel_requested:
+        if _cancel_event is not None and _cancel_event.is_set():
+            _cancel_requested = True
+        elif any(check() for check in _cancel_checks):
+            _cancel_requested = True
+    if _cancel_requested:
+        if _cancelled_at is None:
+            _cancelled_at = "while " + _current.summary() if _current is not None else "between stages"
+            log.warning("Cancelled " + _cancelled_at)
+        if _cancel_event is not None and not _cancel_event.is_set():
+            _cancel_event.set()
+    return _cancel_requested
+
+
+def cancelled_at():
+    """:return: the stage and rows read when the run was cancelled, None if it was not"""
+    return _cancelled_at
+
+
+def cancel_on_interrupt():
+    """make Ctrl+C cancel the run, leaving a partial report; a second Ctrl+C stops at once"""
+    def interrupted(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        sys.stderr.write("\nCancelling, press Ctrl+C again to stop at once\n")
+        cancel()
+    signal.signal(signal.SIGINT, interrupted)
+
+
+# -----------------------------------------
+# pool workers
+# -----------------------------------------
+
+def set_cancel_event(event):
+    """
+    :param event: shared with the pool workers started with it, None once they are done
+    :type event: multiprocessing.Event
+
+    :return: the event it replaces
+    """
+    global _cancel_event
+    replaced = _cancel_event
+    _cancel_event = event
+    return replaced
+
+
+def attach_worker(rows_read, cancel_event):
+    """
+    called in each pool worker: count the rows read in rows_read, stop when
+    cancel_event is set, and leave Ctrl+C to the process that started it
+
+    :param rows_read: the rows read by every worker, None to not count them
+    :type rows_read: multiprocessing.Value
+
+    :param cancel_event: set when the run is cancelled
+    :type cancel_event: multiprocessing.Event
+    """
+    global _shared_rows, _cancel_event
+    _shared_rows = rows_read
+    _cancel_event = cancel_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
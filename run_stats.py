@@ -0,0 +1,284 @@
+# ----------------------------------------------------------------------------
+# run_stats
+#     timing spans around each profiling stage and backend call, so a slow
+#     profile can be diagnosed after the fact.  A span is named, e.g.
+#     "field_statistics" or "backend.iter_rows", and totals the calls made,
+#     their wall time and the rows they processed; it also keeps the peak
+#     memory of the process at the end of its calls.
+#
+#         with run_stats.timed("geometry") as span:
+#             ...
+#             span.rows = record_count
+#
+#     Spans are kept, per process, until reset() is called.  Only the
+#     standard library is used, and a span costs a timer call and a
+#     getrusage call, so spans go around whole stages and calls; the rows
+#     of backend.iter_rows are timed as they are read.
+# ----------------------------------------------------------------------------
+import collections
+import datetime
+import io
+import json
+import logging
+import sys
+import timeit
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+timer = timeit.default_timer
+
+_spans = collections.OrderedDict()
+
+
+class Span(object):
+
+    def __init__(self, name):
+        """
+        :param name: e.g. a stage, or "backend.<method>"
+        :type name: basestring
+        """
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = None
+        self.peak_bytes = None
+
+    def add(self, seconds, rows=None, peak_bytes=None):
+        """
+        :param seconds: the wall time of one call
+        :type seconds: float
+
+        :param rows: the rows the call processed, None if it does not process rows
+        :type rows: int
+
+        :param peak_bytes: the peak memory of the process by the end of the call
+        :type peak_bytes: int
+        """
+        self.calls += 1
+        self.seconds += seconds
+        if rows is not None:
+            self.rows = (self.rows or 0) + rows
+        if peak_bytes is not None and (self.peak_bytes is None or peak_bytes > self.peak_bytes):
+            self.peak_bytes = peak_bytes
+
+    @property
+    def rows_per_second(self):
+        """None if the span has no rows or no measurable time"""
+        if self.rows is None or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+    def merge(self, other):
+        """
+        :param other: a span of the same name, e.g. from a pool worker;
+                      seconds add up, so they are process seconds
+        :type other: Span
+        """
+        self.calls += other.calls - 1
+        self.add(other.seconds, other.rows, other.peak_bytes)
+
+    def to_state(self):
+        """
+        :rtype: dict
+        """
+        return {"name": self.name,
+                "calls": self.calls,
+                "seconds": self.seconds,
+                "rows": self.rows,
+                "rows_per_second": self.rows_per_second,
+                "peak_bytes": self.peak_bytes}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: Span
+        """
+        span = cls(state["name"])
+        span.calls = state["calls"]
+        span.seconds = state["seconds"]
+        span.rows = state["rows"]
+        span.peak_bytes = state["peak_bytes"]
+        return span
+
+
+def reset():
+    """forget every span, e.g. at the start of a run"""
+    _spans.clear()
+
+
+def get_span(name):
+    """
+    :return: the span of the name, created on first use
+    :rtype: Span
+    """
+    span = _spans.get(name)
+    if span is None:
+        span = _spans[name] = Span(name)
+    return span
+
+
+def spans():
+    """
+    :return: every span, in the order they were first entered
+    :rtype: list of Span
+    """
+    return list(_spans.values())
+
+
+def to_state():
+    """
+    :return: every span, as dicts
+    :rtype: list of dict
+    """
+    return [span.to_state() for span in _spans.values()]
+
+
+def merge_state(state):
+    """
+    :param state: the result of to_state() in another process, e.g. a pool worker
+    :type state: list of dict
+    """
+    for span_state in state:
+        span = Span.from_state(span_state)
+        if span.calls:
+            get_span(span.name).merge(span)
+
+
+def write_json(json_path, fc_path):
+    """
+    write every span, e.g. next to the report of a profile
+
+    :param json_path: the JSON file to write, overwritten if it exists
+    :type json_path: basestring
+
+    :param fc_path: the feature class profiled
+    :type fc_path: basestring
+    """
+    log.debug("Writing run stats to " + json_path)
+    text = json.dumps({"fc_path": fc_path,
+                       "written": datetime.datetime.now().isoformat(),
+                       "spans": to_state()}, indent=2)
+    with io.open(json_path, "w", encoding="utf-8") as f:
+        f.write(u"" + text)
+
+
+# -----------------------------------------
+# timing
+# -----------------------------------------
+
+class timed(object):
+    """a context manager adding one call to the named span; set rows on it to count rows"""
+
+    def __init__(self, name):
+        self.span = get_span(name)
+        self.rows = None
+        self.started = None
+
+    def __enter__(self):
+        self.started = timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.span.add(timer() - self.started, self.rows, peak_memory())
+        return False
+
+
+def timed_function(name, function, counts_rows=False):
+    """
+    :param counts_rows: the length of the result, e.g. a NumPy array, is its rows
+    :type counts_rows: bool
+
+    :return: function, adding a call to the named span each time it is called
+    :rtype: function
+    """
+    def timed_call(*args, **kwargs):
+        started = timer()
+        result = function(*args, **kwargs)
+        get_span(name).add(timer() - started, len(result) if counts_rows else None, peak_memory())
+        return result
+    return timed_call
+
+
+def timed_iterator(name, function):
+    """
+    :return: function, whose result is iterated with only the time spent
+             producing each item, and the items, added to the named span
+    :rtype: function
+    """
+    def timed_call(*args, **kwargs):
+        return _timed_items(name, function(*args, **kwargs))
+    return timed_call
+
+
+def _timed_items(name, items):
+    """yield the items, then add their count and the time spent producing them"""
+    iterator = iter(items)
+    clock = timer
+    seconds = 0.0
+    count = 0
+    try:
+        while True:
+            started = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                seconds += clock() - started
+                break
+            seconds += clock() - started
+            count += 1
+            yield item
+    finally:
+        get_span(name).add(seconds, count, peak_memory())
+
+
+# -----------------------------------------
+# peak_memory
+# -----------------------------------------
+
+def peak_memory():
+    """
+    :return: the peak resident memory of this process in bytes, None if unknown
+    :rtype: int
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KB elsewhere
+    if sys.platform == "win32":
+        return _windows_peak_working_set()
+    return None
+
+
+def _windows_peak_working_set():
+    """:return: the peak working set of this process, from GetProcessMemoryInfo"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
@@ -0,0 +1,177 @@
+import collections
+import itertools
+import logging
+import math
+import random
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+confidence_z = 1.96  # 95% confidence intervals
+
+SampleInfo = collections.namedtuple("SampleInfo", ["method",
+                                                   "sample_size",
+                                                   "population_size"])
+
+
+# ----------------------------------------------------------------------------
+# reservoir_sample
+#     a uniform random sample of `size` rows in one pass of a stream of
+#     unknown length, using Li's Algorithm L: rather than drawing a random
+#     number for every row, it draws how many rows to skip before the next
+#     replacement, so the skipped rows cost only the cursor read.
+# ----------------------------------------------------------------------------
+
+def reservoir_sample(rows, size, seed=None):
+    """
+    :param rows: the rows to sample
+    :type rows: iterable
+
+    :param size: the number of rows wanted
+    :type size: int
+
+    :param seed: optional random seed, for repeatable samples
+    :type seed: int
+
+    :return: up to size rows, in no particular order
+    :rtype: list
+    """
+    rnd = random.Random(seed)
+    rows = iter(rows)
+    reservoir = list(itertools.islice(rows, size))
+    if len(reservoir) < size or size == 0:
+        return reservoir
+
+    # 1.0 - random() is in (0, 1], so log() is defined
+    w = math.exp(math.log(1.0 - rnd.random()) / size)
+    while w < 1.0:
+        skip = int(math.floor(math.log(1.0 - rnd.random()) / math.log(1.0 - w)))
+        chosen = list(itertools.islice(rows, skip, skip + 1))
+        if not chosen:
+            break
+        reservoir[rnd.randrange(size)] = chosen[0]
+        w *= math.exp(math.log(1.0 - rnd.random()) / size)
+    return reservoir
+
+
+# -----------------------------------------
+# oid_stride_where_clause
+#     a systematic sample of every stride-th OBJECTID, evaluated by the
+#     data source so unsampled rows never reach Python
+# -----------------------------------------
+
+def oid_stride_where_clause(oid_field_name, stride):
+    """
+    :param oid_field_name: the name of the OID field
+    :type oid_field_name: basestring
+
+    :param stride: keep one OID in every stride
+    :type stride: int
+
+    :rtype: basestring
+    """
+    return "MOD(" + oid_field_name + ", " + str(int(stride)) + ") = 0"
+
+
+# -----------------------------------------
+# merge_sample_info
+#     how the records of two merged partial profiles were chosen
+# -----------------------------------------
+
+def merge_sample_info(a, a_records, b, b_records):
+    """
+    :param a: how the first profile's records were chosen, None if all were read
+    :type a: SampleInfo
+
+    :param a_records: the number of records the first profile read
+    :type a_records: int
+
+    :param b: how the second profile's records were chosen, None if all were read
+    :type b: SampleInfo
+
+    :param b_records: the number of records the second profile read
+    :type b_records: int
+
+    :return: the SampleInfo of the union, None if every record of both was read
+    :rtype: SampleInfo
+    """
+    if a is None and b is None:
+        return None
+    a = a or SampleInfo("all records", a_records, a_records)
+    b = b or SampleInfo("all records", b_records, b_records)
+    method = a.method if a.method == b.method else a.method + " + " + b.method
+    return SampleInfo(method, a.sample_size + b.sample_size, a.population_size + b.population_size)
+
+
+# -----------------------------------------
+# confidence intervals
+# -----------------------------------------
+
+def finite_population_correction(sample_size, population_size):
+    """
+    :return: the factor that narrows an interval as the sample approaches the population
+    :rtype: float
+    """
+    if not population_size or population_size <= 1:
+        return 1.0
+    if sample_size >= population_size:
+        return 0.0
+    return math.sqrt(float(population_size - sample_size) / (population_size - 1))
+
+
+def proportion_interval(successes, sample_size, population_size=None, z=confidence_z):
+    """
+    the Wilson score interval of a proportion, with the finite population
+    correction when the population size is known.  The correction is made
+    through the effective sample size, n (N - 1) / (N - n), in both the
+    centre and the half width, so the interval always holds the estimate.
+
+    :param successes: the number of sampled records with the property
+    :type successes: int
+
+    :param sample_size: the number of sampled records
+    :type sample_size: int
+
+    :param population_size: the total number of records
+    :type population_size: int
+
+    :return: (low, high) as fractions
+    :rtype: tuple of float
+    """
+    if sample_size == 0:
+        return 0.0, 1.0
+    p = successes / float(sample_size)
+    n = effective_sample_size(sample_size, population_size)
+    if n is None:
+        return p, p
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    # at p = 0 or 1 the bound is p itself, which rounding can miss
+    return max(0.0, min(p, centre - half_width)), min(1.0, max(p, centre + half_width))
+
+
+def effective_sample_size(sample_size, population_size):
+    """
+    :return: the sample size of an infinite population with the variance of
+             this sample, n (N - 1) / (N - n); None if the sample is the population
+    :rtype: float
+    """
+    if not population_size or population_size <= 1:
+        return float(sample_size)
+    if sample_size >= population_size:
+        return None
+    return float(sample_size) * (population_size - 1) / (population_size - sample_size)
+
+
+def mean_interval(mean, standard_deviation, sample_size, population_size=None, z=confidence_z):
+    """
+    :return: (low, high) confidence interval of a sample mean
+    :rtype: tuple of float
+    """
+    if not sample_size or standard_deviation is None:
+        return None, None
+    half_width = z * standard_deviation / math.sqrt(sample_size)
+    half_width *= finite_population_correction(sample_size, population_size)
+    return mean - half_width, mean + half_width
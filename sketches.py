@@ -0,0 +1,441 @@
+import base64
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import random
+import struct
+log = logging.getLogger()
+
+try:
+    text_type = unicode  # python 2.7
+except NameError:
+    text_type = str
+
+
+def hash64(value):
+    """
+    a 64 bit hash that, unlike hash(), is the same in every process, so
+    sketches built by different workers can be merged
+
+    :param value: a field value
+    :return: the hash
+    :rtype: int
+    """
+    if not isinstance(value, text_type):
+        value = text_type(value)
+    return struct.unpack("<Q", hashlib.md5(value.encode("utf-8")).digest()[:8])[0]
+
+
+# ----------------------------------------------------------------------------
+# SpaceSaving
+#     bounded-memory heavy-hitter counter (Metwally, Agrawal, El Abbadi 2005)
+#
+#     holds at most `capacity` counters.  When a new item arrives and the
+#     counters are full, the item with the smallest count is evicted and the
+#     new item inherits that count (+1), recording it as its maximum error.
+#
+#     guarantees, where n is the number of items added:
+#         true count <= count(item) <= true count + error(item)
+#         error(item) <= n / capacity
+#         every item with a true count > n / capacity is held
+#
+#     two sketches merge as mergeable summaries (Agarwal et al. 2012): an item
+#     missing from a full sketch is given that sketch's smallest count, as both
+#     count and error, so the guarantees hold for the union
+# ----------------------------------------------------------------------------
+
+class SpaceSaving(object):
+
+    def __init__(self, capacity):
+        """
+        :param capacity: the maximum number of counters held
+        :type capacity: int
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.n = 0
+        # min-heap of (count, tie breaker, item), one entry per counter.
+        # Counts only grow, so entries go stale rather than wrong; stale
+        # entries are refreshed lazily on eviction.  The tie breaker stops
+        # heapq comparing items of different types.
+        self._heap = []
+        self._tie_breaker = itertools.count()
+
+    def seed(self, counts):
+        """
+        start from exact counts, keeping the `capacity` most frequent items.
+        Dropped items had counts <= the smallest kept count, so the
+        over-estimate guarantees still hold if they re-appear.
+
+        :param counts: exact {item: count}
+        :type counts: dict
+        """
+        kept = heapq.nlargest(self.capacity, counts.items(), key=lambda kv: kv[1])
+        self.counts = dict(kept)
+        self.errors = dict.fromkeys(self.counts, 0)
+        self.n = sum(counts.values())
+        self._heap = [(count, next(self._tie_breaker), item) for item, count in kept]
+        heapq.heapify(self._heap)
+
+    def add(self, item, count=1):
+        """
+        :param item: a hashable value
+        :param count: the number of occurrences to add
+        :type count: int
+        """
+        self.n += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, next(self._tie_breaker), item))
+        else:
+            min_count, min_item = self._pop_min()
+            del counts[min_item]
+            del self.errors[min_item]
+            counts[item] = min_count + count
+            self.errors[item] = min_count
+            heapq.heappush(self._heap, (min_count + count, next(self._tie_breaker), item))
+
+    def _pop_min(self):
+        """pop the counter with the smallest current count"""
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            current = self.counts[item]
+            if current == count:
+                return count, item
+            heapq.heappush(self._heap, (current, next(self._tie_breaker), item))
+
+    def _min_count(self):
+        """the smallest count held if the sketch is full, else 0"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """
+        :param other: a sketch of another partition of the stream
+        :type other: SpaceSaving
+        """
+        self_min = self._min_count()
+        other_min = other._min_count()
+        merged = []
+        for item in set(self.counts) | set(other.counts):
+            merged.append((item,
+                           self.counts.get(item, self_min) + other.counts.get(item, other_min),
+                           self.errors.get(item, self_min) + other.errors.get(item, other_min)))
+        self._set_items(heapq.nlargest(self.capacity, merged, key=lambda ice: ice[1]))
+        self.n += other.n
+
+    def _set_items(self, items):
+        """replace the counters with (item, count, error) tuples"""
+        self.counts = dict((item, count) for item, count, error in items)
+        self.errors = dict((item, error) for item, count, error in items)
+        self._heap = [(count, next(self._tie_breaker), item) for item, count, error in items]
+        heapq.heapify(self._heap)
+
+    def to_state(self):
+        """
+        :return: the sketch as lists, dicts and numbers
+        :rtype: dict
+        """
+        return {"capacity": self.capacity,
+                "n": self.n,
+                "items": [[item, count, self.errors[item]] for item, count in self.counts.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: SpaceSaving
+        """
+        sketch = cls(state["capacity"])
+        sketch._set_items([tuple(item) for item in state["items"]])
+        sketch.n = state["n"]
+        return sketch
+
+    @property
+    def max_error(self):
+        """the largest possible over-count of any item"""
+        return max(self.errors.values()) if self.errors else 0
+
+    def top(self, n):
+        """
+        :param n: the number of items to return
+        :type n: int
+
+        :return: the n most frequent (item, count, error), count descending
+        :rtype: list of tuples
+        """
+        items = heapq.nlargest(n, self.counts.items(), key=lambda kv: kv[1])
+        return [(item, count, self.errors[item]) for item, count in items]
+
+
+# ----------------------------------------------------------------------------
+# HyperLogLog
+#     approximate distinct count (Flajolet, Fusy, Gandouet, Meunier 2007)
+#     in 2 ** precision one-byte registers, with the linear counting
+#     correction for small cardinalities.  A 64 bit hash makes the large
+#     range correction unnecessary.
+#
+#     precision   memory   standard error
+#          10       1 KB       3.3%
+#          12       4 KB       1.6%
+#          14      16 KB       0.8%
+#
+#     sketches of the same precision merge by taking the register maximum
+# ----------------------------------------------------------------------------
+
+class HyperLogLog(object):
+
+    # 2 ** -rank for every possible register value
+    _inverse_powers = [2.0 ** -rank for rank in range(66)]
+
+    def __init__(self, precision=12):
+        """
+        :param precision: the number of index bits, 4 to 16
+        :type precision: int
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self._value_bits = 64 - precision
+        self._value_mask = (1 << self._value_bits) - 1
+
+    def add(self, value):
+        """
+        :param value: a field value
+        """
+        self.add_hash(hash64(value))
+
+    def add_hash(self, x):
+        """
+        :param x: a 64 bit hash of a value
+        :type x: int
+        """
+        index = x >> self._value_bits
+        rank = self._value_bits - (x & self._value_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        :param other: a sketch of the same precision
+        :type other: HyperLogLog
+        """
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def to_state(self):
+        """
+        :return: the sketch, with the registers base64 encoded
+        :rtype: dict
+        """
+        return {"precision": self.precision,
+                "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: HyperLogLog
+        """
+        sketch = cls(state["precision"])
+        sketch.registers = bytearray(base64.b64decode(state["registers"]))
+        return sketch
+
+    @property
+    def standard_error(self):
+        """the relative standard error of the estimate"""
+        return 1.04 / math.sqrt(self.m)
+
+    def estimate(self):
+        """
+        :return: the estimated number of distinct values added
+        :rtype: int
+        """
+        m = self.m
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        inverse_powers = self._inverse_powers
+        estimate = alpha * m * m / sum(inverse_powers[r] for r in self.registers)
+
+        if estimate <= 2.5 * m:
+            zeros = self.registers.count(b"\x00")
+            if zeros:
+                estimate = m * math.log(float(m) / zeros)
+        return int(round(estimate))
+
+
+# ----------------------------------------------------------------------------
+# KllSketch
+#     streaming quantile sketch (Karnin, Lang, Liberty 2016)
+#
+#     values are appended to level 0.  When the sketch is full, the first
+#     level over its capacity is sorted and every other value (random odd or
+#     even offset) is promoted to the next level, where it stands for two
+#     values.  Level capacities shrink geometrically by 2/3 below the top
+#     level, so memory is about 3k values however many are added, and a rank
+#     is answered to within about 1.7 / k of n with high probability.
+#
+#     sketches with the same k merge by concatenating levels and compressing
+# ----------------------------------------------------------------------------
+
+class KllSketch(object):
+
+    def __init__(self, k=200, seed=None):
+        """
+        :param k: the top level capacity; larger is more accurate
+        :type k: int
+
+        :param seed: optional seed for the compaction coin flips
+        :type seed: int
+        """
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+        self._random = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def add(self, value):
+        """
+        :param value: a number
+        """
+        self.compactors[0].append(value)
+        self.n += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        for level in range(len(self.compactors)):
+            compactor = self.compactors[level]
+            if len(compactor) >= self._capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self._grow()
+                compactor.sort()
+                # an odd value out stays behind at this level
+                keep = compactor[:1] if len(compactor) % 2 else []
+                pairs = compactor[len(keep):]
+                offset = self._random.randint(0, 1)
+                self.compactors[level + 1].extend(pairs[offset::2])
+                self.compactors[level] = keep
+                self._size = sum(len(c) for c in self.compactors)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other):
+        """
+        :param other: a sketch of the same k
+        :type other: KllSketch
+        """
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.n += other.n
+        self._size = sum(len(c) for c in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def to_state(self):
+        """
+        :return: the sketch as lists and numbers
+        :rtype: dict
+        """
+        return {"k": self.k,
+                "n": self.n,
+                "compactors": [list(compactor) for compactor in self.compactors]}
+
+    @classmethod
+    def from_state(cls, state, seed=None):
+        """
+        :param state: the result of to_state()
+        :type state: dict
+
+        :rtype: KllSketch
+        """
+        sketch = cls(state["k"], seed)
+        for _ in range(len(state["compactors"]) - 1):
+            sketch._grow()
+        sketch.compactors = [list(compactor) for compactor in state["compactors"]]
+        sketch.n = state["n"]
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        return sketch
+
+    def _weighted_values(self):
+        """the retained values and their weights, value ascending"""
+        weighted = [(value, 1 << level)
+                    for level, compactor in enumerate(self.compactors)
+                    for value in compactor]
+        weighted.sort(key=lambda vw: vw[0])
+        return weighted
+
+    def quantiles(self, fractions):
+        """
+        :param fractions: the quantiles wanted, each 0.0 to 1.0
+        :type fractions: list of float
+
+        :return: the estimated value at each quantile, None if the sketch is empty
+        :rtype: list
+        """
+        weighted = self._weighted_values()
+        if not weighted:
+            return [None] * len(fractions)
+        total = float(sum(weight for _, weight in weighted))
+        results = []
+        for fraction in fractions:
+            target = fraction * total
+            cumulative = 0
+            result = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = value
+                    break
+            results.append(result)
+        return results
+
+    def cdf(self, split_points):
+        """
+        :param split_points: ascending values
+        :type split_points: list
+
+        :return: the estimated fraction of values <= each split point
+        :rtype: list of float
+        """
+        weighted = self._weighted_values()
+        total = float(sum(weight for _, weight in weighted)) or 1.0
+        results = []
+        i = 0
+        cumulative = 0
+        for point in split_points:
+            while i < len(weighted) and weighted[i][0] <= point:
+                cumulative += weighted[i][1]
+                i += 1
+            results.append(cumulative / total)
+        return results
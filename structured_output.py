@@ -0,0 +1,225 @@
+import csv
+import datetime
+import json
+import logging
+import sys
+import fc_properties
+import field_properties
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+schema_version = 1  # increment when a column is removed or changes meaning; adding one does not
+formats = {"jsonl": "_fc_profile.jsonl",
+           "csv": "_fc_profile.csv"}
+
+# ----------------------------------------------------------------------------
+# the schema
+#     three record types, each with a fixed set of keys, in this order.
+#     Every record carries schema_version, record_type and fc_path, so the
+#     records of many feature classes can be loaded into one table.
+#       fc                one per feature class: get_fc_properties, typed
+#       field             one per field: get_fc_structure
+#       field_statistics  one per profiled field: the FieldStatistics, and
+#                         how they were sampled, if they were
+#     Values not known, e.g. the numeric statistics of a text field, are null.
+#     Nested values (top values, percentiles, histogram) are lists of
+#     objects; in the CSV they are JSON text.
+# ----------------------------------------------------------------------------
+common_keys = ["schema_version", "record_type", "fc_path"]
+
+fc_keys = ["fc_name", "workspace", "geometry_type",
+           "crs_name", "crs_wkid", "crs_type", "crs_units",
+           "has_z", "has_m", "total_records", "total_fields", "profiled_at"]
+
+field_keys = ["field_name", "field_name_len", "field_alias", "field_type",
+              "field_length", "field_precision", "field_scale",
+              "field_is_nullable", "field_is_required", "field_is_editable", "field_domain"]
+
+field_statistics_keys = ["field_name", "field_type",
+                         "record_count", "null_count", "blank_count", "no_data_count", "populated_count",
+                         "distinct_count", "distinct_error", "top_values_mode", "top_values",
+                         "numeric_count", "minimum", "maximum", "mean", "standard_deviation",
+                         "percentiles", "histogram_exact", "histogram",
+                         "non_ascii_count", "reserved_count", "control_count",
+                         "domain_checked_count", "out_of_domain_count", "out_of_domain_examples",
+                         "sample_method", "sample_size", "population_size"]
+
+# the CSV columns: every key of every record type, once
+csv_columns = list(common_keys)
+for key in fc_keys + field_keys + field_statistics_keys:
+    if key not in csv_columns:
+        csv_columns.append(key)
+
+
+def json_value(value):
+    """encode the field values json cannot; dates as ISO 8601 text"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+# ----------------------------------------------------------------------------
+# records
+# ----------------------------------------------------------------------------
+
+def fc_record(fc_path):
+    """
+    :param fc_path: fully qualified path to a feature class
+    :type fc_path: basestring
+
+    :rtype: dict
+    """
+    return {"fc_name": fc_properties.get_fc_name(fc_path),
+            "workspace": fc_properties.get_fc_gdb_path(fc_path),
+            "geometry_type": fc_properties.get_fc_geometry_type(fc_path),
+            "crs_name": fc_properties.get_crs_name(fc_path),
+            "crs_wkid": fc_properties.get_crs_wkid(fc_path),
+            "crs_type": fc_properties.get_crs_type(fc_path),
+            "crs_units": fc_properties.get_crs_units(fc_path),
+            "has_z": bool(fc_properties.is_z_enabled(fc_path)),
+            "has_m": bool(fc_properties.is_m_enabled(fc_path)),
+            "total_records": fc_properties.get_fc_total_record_count(fc_path),
+            "total_fields": fc_properties.get_fc_field_count(fc_path),
+            "profiled_at": datetime.datetime.now().replace(microsecond=0).isoformat()}
+
+
+def field_record(structure_row):
+    """
+    :param structure_row: a data row of get_fc_structure
+    :type structure_row: namedtuple
+
+    :rtype: dict
+    """
+    record = structure_row._asdict()
+    for key in ["field_is_nullable", "field_is_required", "field_is_editable"]:
+        record[key] = str(record[key]) == "True"
+    return record
+
+
+def field_statistics_record(stats):
+    """
+    :param stats: the statistics of one field
+    :type stats: field_properties.FieldStatistics
+
+    :rtype: dict
+    """
+    record = {"field_name": stats.field_name,
+              "field_type": stats.field_type,
+              "record_count": stats.record_count,
+              "null_count": stats.null_count,
+              "blank_count": stats.blank_count,
+              "no_data_count": stats.no_data_count,
+              "populated_count": stats.populated_count}
+    if stats.distinct is None:
+        # every value of an OID or GlobalID is distinct
+        record.update(distinct_count=stats.populated_count, distinct_error=0.0)
+    else:
+        record.update(distinct_count=stats.distinct.count(), distinct_error=stats.distinct.standard_error)
+    if stats.top_values is not None:
+        record["top_values_mode"] = stats.top_values.mode
+        record["top_values"] = [{"value": t.value, "count": t.count, "max_error": t.max_error}
+                                for t in stats.top_values.top()]
+    numeric = stats.numeric
+    if numeric is not None:
+        record.update(numeric_count=numeric.count,
+                      minimum=numeric.minimum,
+                      maximum=numeric.maximum,
+                      mean=numeric.mean if numeric.count else None,
+                      standard_deviation=numeric.standard_deviation,
+                      percentiles=[{"fraction": fraction, "value": value}
+                                   for fraction, value in numeric.percentiles()],
+                      histogram_exact=numeric.histogram_is_exact,
+                      histogram=[{"lower": b.lower, "upper": b.upper, "count": b.count}
+                                 for b in numeric.histogram()])
+    if stats.text is not None:
+        for key, label in field_properties.text_checks:
+            record[key + "_count"] = stats.text.counts[key]
+    if stats.domain is not None:
+        record.update(domain_checked_count=stats.domain.checked_count,
+                      out_of_domain_count=stats.domain.out_of_domain_count,
+                      out_of_domain_examples=list(stats.domain.examples))
+    if stats.sample_info is not None:
+        record.update(sample_method=stats.sample_info.method,
+                      sample_size=stats.sample_info.sample_size,
+                      population_size=stats.sample_info.population_size)
+    return record
+
+
+# ----------------------------------------------------------------------------
+# ProfileWriter
+#     writes the records of one feature class as each profiling stage
+#     finishes, flushing after each, so a run that fails part way still
+#     leaves the stages it completed.
+# ----------------------------------------------------------------------------
+
+class ProfileWriter(object):
+
+    def __init__(self, path, output_format, fc_path):
+        """
+        :param path: the output file, overwritten
+        :type path: basestring
+
+        :param output_format: 'jsonl' or 'csv'
+        :type output_format: basestring
+
+        :param fc_path: the feature class the records describe
+        :type fc_path: basestring
+        """
+        if output_format not in formats:
+            raise ValueError("unknown output format: " + str(output_format))
+        self.path = path
+        self.output_format = output_format
+        self.fc_path = fc_path
+        if output_format == "csv":
+            if sys.version_info[0] < 3:
+                self._file = open(path, "wb")
+            else:
+                self._file = open(path, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(csv_columns)
+        else:
+            self._file = open(path, "w")
+
+    def _write(self, record_type, keys, records):
+        for record in records:
+            row = dict((key, record.get(key)) for key in keys)
+            row.update(schema_version=schema_version, record_type=record_type, fc_path=self.fc_path)
+            if self.output_format == "csv":
+                self._csv.writerow([self._csv_value(row.get(column)) for column in csv_columns])
+            else:
+                self._file.write(json.dumps(row, default=json_value, sort_keys=True) + "\n")
+        self._file.flush()
+
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return ""
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, default=json_value, sort_keys=True)
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def write_fc(self):
+        self._write("fc", fc_keys, [fc_record(self.fc_path)])
+
+    def write_fields(self, fc_structure):
+        """
+        :param fc_structure: the result of get_fc_structure
+        :type fc_structure: tuple of (namedtuple, list of namedtuples)
+        """
+        self._write("field", field_keys, [field_record(row) for row in fc_structure[1]])
+
+    def write_field_statistics(self, field_statistics):
+        """
+        :param field_statistics: one accumulator per profiled field
+        :type field_statistics: list of field_properties.FieldStatistics
+        """
+        self._write("field_statistics", field_statistics_keys,
+                    [field_statistics_record(stats) for stats in field_statistics])
+
+    def close(self):
+        self._file.close()
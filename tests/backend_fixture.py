@@ -0,0 +1,30 @@
+# -------------------------------------------------------------------------
+# backend_fixture
+#     a TestCase base class for tests reading tables from a MemoryBackend.
+#
+#     usage:
+#         class TestSomething(MemoryBackendTestCase):
+#             def setUp(self):
+#                 MemoryBackendTestCase.setUp(self)
+#                 self.backend.add_table(path, fields=[...], rows=[...])
+# -------------------------------------------------------------------------
+from unittest import TestCase
+import backends
+from backends.memory_backend import MemoryBackend
+
+
+class MemoryBackendTestCase(TestCase):
+    """registers self.backend, a new backend_class, with empty describe and domain caches"""
+
+    backend_class = MemoryBackend
+
+    def setUp(self):
+        self.backend = self.backend_class()
+        backends.register_backend(self.backend)
+        backends.clear_cache()
+        backends.clear_domain_cache()
+
+    def tearDown(self):
+        backends.unregister_backend(self.backend)
+        backends.clear_cache()
+        backends.clear_domain_cache()
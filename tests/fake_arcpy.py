@@ -0,0 +1,224 @@
+# -------------------------------------------------------------------------
+# fake_arcpy
+#     a minimal in-memory stand-in for the parts of arcpy used by
+#     backends.arcpy_backend, so it can be tested without ArcGIS.
+#
+#     usage:
+#         fake_arcpy.add_fc(path, base_name=..., fields=[...])
+#         arcpy_backend.arcpy = fake_arcpy
+#
+#     install() and uninstall() make it the arcpy module for the code that
+#     imports arcpy itself, e.g. fc_profiler.pyt, for the tests of a module
+# -------------------------------------------------------------------------
+import collections
+import os
+import sys
+
+# number of Describe calls made, keyed by path
+describe_calls = collections.Counter()
+
+# number of da.ListDomains calls made, keyed by workspace
+list_domains_calls = collections.Counter()
+
+# number of rows read by cursors, keyed by path
+rows_read = collections.Counter()
+
+# the labels shown by the progressor, in order
+progressor_labels = []
+
+_feature_classes = {}
+_domains = []
+_replaced_modules = []  # the arcpy modules replaced by install()
+
+
+class _Object(object):
+    """attribute bag"""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ExecuteError(Exception):
+    """fake arcpy.ExecuteError, raised by a failed geoprocessing tool"""
+
+
+def make_field(name, field_type="String", length=50, domain=""):
+    """create a fake arcpy.Field"""
+    return _Object(baseName=name,
+                   name=name,
+                   aliasName=name,
+                   type=field_type,
+                   length=length,
+                   precision=0,
+                   scale=0,
+                   isNullable=True,
+                   required=False,
+                   editable=True,
+                   domain=domain)
+
+
+def add_fc(path,
+           base_name,
+           shape_type="Point",
+           has_z=False,
+           has_m=False,
+           sr_name="GCS_GDA_1994",
+           sr_factory_code=4283,
+           sr_type="Geographic",
+           fields=None,
+           rows=None,
+           subtypes=None,
+           get_count_fails=False,
+           extent=None):
+    """register a fake feature class
+
+    rows is a list of {field_name: value} dicts, "OID@" reads OBJECTID;
+    subtypes is as returned by arcpy.da.ListSubtypes;
+    get_count_fails makes management.GetCount raise ExecuteError;
+    extent is (xmin, ymin, xmax, ymax)
+    """
+    if fields is None:
+        fields = [make_field("OBJECTID", "OID", 4), make_field("Shape", "Geometry", 0)]
+    sr = _Object(name=sr_name,
+                 factoryCode=sr_factory_code,
+                 type=sr_type,
+                 linearUnitName="Meter",
+                 angularUnitName="Degree")
+    _feature_classes[path] = _Object(baseName=base_name,
+                                     shapeType=shape_type,
+                                     hasZ=has_z,
+                                     hasM=has_m,
+                                     spatialReference=sr,
+                                     fields=fields,
+                                     rows=rows or [],
+                                     subtypes=subtypes,
+                                     get_count_fails=get_count_fails)
+    if extent is not None:
+        _feature_classes[path].extent = _Object(XMin=extent[0], YMin=extent[1], XMax=extent[2], YMax=extent[3])
+
+
+def add_domain(name, coded_values=None, value_range=None, field_type="Long"):
+    """register a fake domain, found in every workspace; a range domain if coded_values is None"""
+    _domains.append(_Object(name=name,
+                            domainType="CodedValue" if coded_values is not None else "Range",
+                            type=field_type,
+                            codedValues=coded_values or {},
+                            range=value_range or []))
+
+
+def install():
+    """use this module as arcpy, e.g. in setUpModule, until uninstall() is called"""
+    _replaced_modules.append(sys.modules.get("arcpy"))
+    sys.modules["arcpy"] = sys.modules[__name__]
+
+
+def uninstall():
+    """restore the arcpy module replaced by the last install(), e.g. in tearDownModule"""
+    replaced = _replaced_modules.pop()
+    if replaced is None:
+        del sys.modules["arcpy"]
+    else:
+        sys.modules["arcpy"] = replaced
+
+
+def reset():
+    """remove all fake feature classes and call counts"""
+    _feature_classes.clear()
+    del _domains[:]
+    describe_calls.clear()
+    list_domains_calls.clear()
+    rows_read.clear()
+    del progressor_labels[:]
+
+
+def Describe(path):
+    describe_calls[path] += 1
+    return _feature_classes[path]
+
+
+def ListFields(dataset, field_type="All"):
+    return list(_feature_classes[dataset].fields)
+
+
+class _SearchCursor(object):
+    """
+    fake arcpy.da.SearchCursor, iterates tuples of the requested fields;
+    the where clause is ignored, an ORDER BY postfix is followed
+    """
+    def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None,
+                 explode_to_points=False, sql_clause=(None, None)):
+        tokens = {"OID@": "OBJECTID"}
+        self._names = [tokens.get(n, n) for n in field_names]
+        rows = _feature_classes[in_table].rows
+        postfix = (sql_clause[1] or "").split()
+        if postfix[:2] == ["ORDER", "BY"]:
+            rows = sorted(rows, key=lambda row: row.get(postfix[2]), reverse=postfix[3:] == ["DESC"])
+        self._rows = iter(rows)
+        self._path = in_table
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        rows_read[self._path] += 1
+        return tuple(row.get(n) for n in self._names)
+
+    next = __next__  # python 2.7
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def _walk(top, datatype=None):
+    """fake arcpy.da.Walk, yields (dirpath, dirnames, filenames) of registered paths under top"""
+    folders = collections.defaultdict(list)
+    for path in _feature_classes:
+        if path.startswith(top):
+            folders[os.path.dirname(path)].append(os.path.basename(path))
+    for dirpath in sorted(folders):
+        yield dirpath, [], sorted(folders[dirpath])
+
+
+def _list_subtypes(table):
+    """fake arcpy.da.ListSubtypes: as for a dataset without subtypes, unless add_fc was given some"""
+    if _feature_classes[table].subtypes:
+        return _feature_classes[table].subtypes
+    return {0: {"Name": "Subtype 0", "Default": True, "SubtypeField": "", "FieldValues": {}}}
+
+
+def _list_domains(workspace):
+    """fake arcpy.da.ListDomains"""
+    list_domains_calls[workspace] += 1
+    return list(_domains)
+
+
+def _get_count(in_rows):
+    """fake arcpy.management.GetCount: the row count, without reading the rows"""
+    fc = _feature_classes[in_rows]
+    if fc.get_count_fails:
+        raise ExecuteError("ERROR 000732: Input Rows: Dataset " + in_rows + " does not exist or is not supported")
+    return _Object(getOutput=lambda index: str(len(fc.rows)))
+
+
+def SetProgressor(type, message="", min_range=0, max_range=100, step_value=1):
+    progressor_labels.append(message)
+
+
+def SetProgressorLabel(label):
+    progressor_labels.append(label)
+
+
+def SetProgressorPosition(position=None):
+    pass
+
+
+def ResetProgressor():
+    pass
+
+
+env = _Object()
+management = _Object(GetCount=_get_count)
+da = _Object(SearchCursor=_SearchCursor, Walk=_walk, ListDomains=_list_domains, ListSubtypes=_list_subtypes)
@@ -0,0 +1,178 @@
+from unittest import TestCase
+import os
+import shutil
+import sqlite3
+import tempfile
+import backends
+import batch_profile
+import fc_properties
+import field_properties
+import generate_profile
+from tests.backend_fixture import MemoryBackendTestCase
+from backends.sqlite_backend import SqliteBackend
+
+
+# self.assertEqual( <expected>, <actual>)
+
+mga56_wkt = ('PROJCS["GDA94 / MGA zone 56",GEOGCS["GDA94",DATUM["Geocentric_Datum_of_Australia_1994",'
+             'SPHEROID["GRS 1980",6378137,298.257222101]],PRIMEM["Greenwich",0],'
+             'UNIT["degree",0.0174532925199433]],PROJECTION["Transverse_Mercator"],'
+             'UNIT["metre",1],AUTHORITY["EPSG","28356"]]')
+
+
+def make_geopackage(gpkg_path):
+    """a GeoPackage with a point feature table and an attribute table"""
+    connection = sqlite3.connect(gpkg_path)
+    connection.executescript("""
+        CREATE TABLE gpkg_spatial_ref_sys (srs_name TEXT, srs_id INTEGER PRIMARY KEY,
+            organization TEXT, organization_coordsys_id INTEGER, definition TEXT);
+        CREATE TABLE gpkg_contents (table_name TEXT PRIMARY KEY, data_type TEXT, srs_id INTEGER);
+        CREATE TABLE gpkg_geometry_columns (table_name TEXT, column_name TEXT,
+            geometry_type_name TEXT, srs_id INTEGER, z TINYINT, m TINYINT);
+        CREATE TABLE sites (fid INTEGER PRIMARY KEY AUTOINCREMENT, geom POINT,
+            name TEXT(50), height DOUBLE, storeys SMALLINT);
+        CREATE TABLE owners (fid INTEGER PRIMARY KEY, owner TEXT);
+        INSERT INTO gpkg_contents VALUES ('sites', 'features', 28356);
+        INSERT INTO gpkg_contents VALUES ('owners', 'attributes', 0);
+        INSERT INTO gpkg_geometry_columns VALUES ('sites', 'geom', 'POINT', 28356, 1, 0);
+    """)
+    connection.execute("INSERT INTO gpkg_spatial_ref_sys VALUES ('GDA94 / MGA zone 56', 28356, "
+                       "'EPSG', 28356, ?)", (mga56_wkt,))
+    connection.executemany("INSERT INTO sites (name, height, storeys) VALUES (?, ?, ?)",
+                           [("site " + str(i % 7) if i % 5 else None, i * 1.5, i % 3)
+                            for i in range(1, 101)])
+    connection.commit()
+    connection.close()
+
+
+class TestSplitSqlitePath(TestCase):
+
+    def test_dataset_and_workspace_paths(self):
+        self.assertEqual((r"C:\data\a.gpkg", "roads"), backends.split_sqlite_path(r"C:\data\a.gpkg\roads"))
+        self.assertEqual(("/data/a.sqlite", None), backends.split_sqlite_path("/data/a.sqlite"))
+        self.assertEqual((None, None), backends.split_sqlite_path(r"C:\data\a.gdb\roads"))
+
+    def test_extension_ends_a_path_component(self):
+        self.assertEqual((r"C:\data.gpkg_old\x.gpkg", "t"), backends.split_sqlite_path(r"C:\data.gpkg_old\x.gpkg\t"))
+        self.assertEqual(("/data/a.sqlite3", "t"), backends.split_sqlite_path("/data/a.sqlite3/t"))
+        self.assertEqual((None, None), backends.split_sqlite_path(r"C:\old.db_backup\a.gdb\roads"))
+
+    def test_workspace_paths(self):
+        self.assertTrue(backends.is_workspace_path(r"C:\data\a.gdb"))
+        self.assertTrue(backends.is_workspace_path("/data/a.gpkg"))
+        self.assertFalse(backends.is_workspace_path("/data/a.gpkg/roads"))
+
+
+class TestMemoryBackend(MemoryBackendTestCase):
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        self.backend.add_table("mem\\test.gdb\\roads",
+                               fields=[("OBJECTID", "OID"), ("name", "String")],
+                               rows=[(oid, "road " + str(oid)) for oid in range(1, 21)])
+        self.backend.add_table("mem\\test.gdb\\bridges", fields=[("OBJECTID", "OID")], rows=[])
+
+    def test_get_backend_prefers_registered_backends(self):
+        self.assertIs(self.backend, backends.get_backend("mem\\test.gdb\\roads"))
+        self.assertIs(self.backend, backends.get_backend("mem\\test.gdb"))
+
+    def test_describe_count_and_list(self):
+        self.assertEqual("roads", fc_properties.get_fc_name("mem\\test.gdb\\roads"))
+        self.assertEqual(20, fc_properties.get_fc_total_record_count("mem\\test.gdb\\roads"))
+        self.assertEqual(["mem\\test.gdb\\bridges", "mem\\test.gdb\\roads"],
+                         batch_profile.list_datasets("mem\\test.gdb"))
+
+    def test_feature_dataset_workspace(self):
+        rail = "mem\\test.gdb\\transport\\rail"
+        self.backend.add_table(rail, fields=[("OBJECTID", "OID")], rows=[])
+        self.backend.add_domain("mem\\test.gdb", "gauge", coded_values={1: "standard"})
+        self.assertEqual("mem\\test.gdb", self.backend.workspace(rail))
+        self.assertEqual(["gauge"], list(backends.get_domains(rail)))
+
+    def test_oid_filters(self):
+        rows = self.backend.iter_rows("mem\\test.gdb\\roads", ["OID@"], oid_stride=5, oid_range=(1, 16))
+        self.assertEqual([(5,), (10,), (15,)], list(rows))
+
+
+class TestSqliteBackend(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(self.gpkg)
+        self.sites = os.path.join(self.gpkg, "sites")
+        backends.clear_cache()
+
+    def tearDown(self):
+        backends.clear_cache()
+        shutil.rmtree(self.folder)
+
+    def test_get_backend_by_extension(self):
+        self.assertIsInstance(backends.get_backend(self.sites), SqliteBackend)
+
+    def test_describe_feature_table(self):
+        self.assertEqual("sites", fc_properties.get_fc_name(self.sites))
+        self.assertEqual(self.gpkg, fc_properties.get_fc_gdb_path(self.sites))
+        self.assertEqual("Point", fc_properties.get_fc_geometry_type(self.sites))
+        self.assertEqual("GDA94 / MGA zone 56", fc_properties.get_crs_name(self.sites))
+        self.assertEqual(28356, fc_properties.get_crs_wkid(self.sites))
+        self.assertEqual("Projected", fc_properties.get_crs_type(self.sites))
+        self.assertEqual("Meter", fc_properties.get_crs_units(self.sites))
+        self.assertTrue(fc_properties.is_z_enabled(self.sites))
+        self.assertFalse(fc_properties.is_m_enabled(self.sites))
+        self.assertEqual([("fid", "OID"), ("geom", "Geometry"), ("name", "String"),
+                          ("height", "Double"), ("storeys", "SmallInteger")],
+                         [(f.baseName, f.type) for f in backends.describe(self.sites).fields])
+        self.assertEqual(50, backends.describe(self.sites).fields[2].length)
+
+    def test_describe_attribute_table(self):
+        owners = os.path.join(self.gpkg, "owners")
+        self.assertEqual("Table", fc_properties.get_fc_geometry_type(owners))
+        self.assertEqual("Unknown", fc_properties.get_crs_units(owners))
+
+    def test_count_and_list(self):
+        self.assertEqual(100, fc_properties.get_fc_total_record_count(self.sites))
+        self.assertEqual([os.path.join(self.gpkg, "owners"), self.sites],
+                         batch_profile.list_datasets(self.gpkg))
+
+    def test_oid_filters_run_in_sqlite(self):
+        rows = backends.get_backend(self.sites).iter_rows(self.sites, ["OID@", "name"],
+                                                          oid_stride=10, oid_range=(1, 50))
+        self.assertEqual([10, 20, 30, 40], [row[0] for row in rows])
+
+    def test_field_statistics(self):
+        stats = field_properties.get_field_statistics(self.sites)
+        self.assertEqual(["fid", "name", "height", "storeys"], [s.field_name for s in stats])
+        self.assertEqual(20, stats[1].null_count)
+        self.assertEqual(7, stats[1].distinct.count())
+        self.assertAlmostEqual(75.75, stats[2].numeric.mean)
+
+    def test_column_constraints_are_domains(self):
+        connection = sqlite3.connect(self.gpkg)
+        connection.executescript("""
+            CREATE TABLE gpkg_data_columns (table_name TEXT, column_name TEXT, name TEXT, title TEXT,
+                description TEXT, mime_type TEXT, constraint_name TEXT);
+            CREATE TABLE gpkg_data_column_constraints (constraint_name TEXT, constraint_type TEXT,
+                value TEXT, min NUMERIC, min_is_inclusive BOOLEAN, max NUMERIC, max_is_inclusive BOOLEAN,
+                description TEXT);
+            INSERT INTO gpkg_data_columns VALUES ('sites', 'storeys', 'storeys', NULL, NULL, NULL, 'storeys');
+            INSERT INTO gpkg_data_columns VALUES ('sites', 'height', 'height', NULL, NULL, NULL, 'height');
+            INSERT INTO gpkg_data_column_constraints VALUES ('storeys', 'enum', '0', NULL, NULL, NULL, NULL, 'none');
+            INSERT INTO gpkg_data_column_constraints VALUES ('storeys', 'enum', '1', NULL, NULL, NULL, NULL, 'one');
+            INSERT INTO gpkg_data_column_constraints VALUES ('height', 'range', NULL, 0, 1, 100, 1, 'metres');
+        """)
+        connection.commit()
+        connection.close()
+        backends.clear_domain_cache()
+        self.assertEqual(["", "height", "storeys"], [f.domain for f in backends.describe(self.sites).fields[2:]])
+        stats = field_properties.get_field_statistics(self.sites)
+        # storeys are i % 3, so a third of them are 2; heights are 1.5 to 150
+        self.assertEqual(("2 of 2 codes used", 33), (stats[3].domain.recorded_domain,
+                                                    stats[3].domain.out_of_domain_count))
+        self.assertEqual(("0 to 100", 34), (stats[2].domain.defined_domain, stats[2].domain.out_of_domain_count))
+        backends.clear_domain_cache()
+
+    def test_generate_profile_without_arcpy(self):
+        xls_path = generate_profile.generate_profile(self.sites, self.folder, True)
+        self.assertEqual(os.path.join(self.folder, "sites_fc_profile.xls"), xls_path)
+        self.assertTrue(os.path.exists(xls_path))
@@ -0,0 +1,80 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+from tests import fake_arcpy
+import backends
+import batch_profile
+import generate_profile
+import progress
+from backends import arcpy_backend
+
+
+# self.assertEqual( <expected>, <actual>)
+
+gdb = os.path.join("c:", os.sep, "tmp", "fake.gdb")
+
+
+class TestProfileGdb(TestCase):
+
+    def setUp(self):
+        self.real_arcpy = arcpy_backend.arcpy
+        self.real_generate_profile = generate_profile.generate_profile
+        arcpy_backend.arcpy = fake_arcpy
+        fake_arcpy.reset()
+        fake_arcpy.add_fc(os.path.join(gdb, "roads"), base_name="roads")
+        fake_arcpy.add_fc(os.path.join(gdb, "transport", "rail"), base_name="rail")
+        fake_arcpy.add_fc(os.path.join(gdb, "broken"), base_name="broken")
+        self.out_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        arcpy_backend.arcpy = self.real_arcpy
+        generate_profile.generate_profile = self.real_generate_profile
+        shutil.rmtree(self.out_folder)
+
+    def test_list_datasets_includes_feature_datasets(self):
+        self.assertEqual([os.path.join(gdb, "broken"),
+                          os.path.join(gdb, "roads"),
+                          os.path.join(gdb, "transport", "rail")],
+                         batch_profile.list_datasets(gdb))
+
+    def test_failures_are_isolated_per_dataset(self):
+        def fake_generate_profile(fc_path, out_folder, overwrite, **options):
+            if fc_path.endswith("broken"):
+                raise RuntimeError("cannot open broken")
+            return os.path.join(out_folder, os.path.basename(fc_path) + ".xls")
+        generate_profile.generate_profile = fake_generate_profile
+
+        results = batch_profile.profile_gdb(gdb, self.out_folder, True, processes=1)
+
+        self.assertEqual(["FAILED", "OK", "OK"], [r.status for r in results])
+        self.assertIn("cannot open broken", results[0].error)
+        self.assertTrue(results[1].report_path.endswith("roads.xls"))
+        self.assertTrue(os.path.exists(os.path.join(self.out_folder,
+                                                    "fake" + batch_profile.summary_ext)))
+
+    def test_domains_are_read_once_per_geodatabase(self):
+        backends.clear_domain_cache()
+        fake_arcpy.add_domain("Surface", coded_values={"S": "Sealed", "U": "Unsealed"}, field_type="Text")
+        generate_profile.generate_profile = lambda fc_path, out_folder, overwrite, **options: \
+            sorted(backends.get_domains(fc_path))
+        results = batch_profile.profile_gdb(gdb, self.out_folder, True, processes=1)
+        backends.clear_domain_cache()
+        self.assertEqual([["Surface"]] * 3, [r.report_path for r in results])
+        self.assertEqual({gdb: 1}, dict(fake_arcpy.list_domains_calls))
+
+    def test_cancel_skips_the_rest(self):
+        def fake_generate_profile(fc_path, out_folder, overwrite, **options):
+            if fc_path.endswith("broken"):
+                progress.cancel()
+                raise progress.Cancelled(fc_path + "_PARTIAL.xls", "while reading")
+            return os.path.join(out_folder, os.path.basename(fc_path) + ".xls")
+        generate_profile.generate_profile = fake_generate_profile
+
+        try:
+            results = batch_profile.profile_gdb(gdb, self.out_folder, True, processes=1)
+        finally:
+            progress.reset()
+
+        self.assertEqual(["CANCELLED"] * 3, [r.status for r in results])
+        self.assertEqual([os.path.join(gdb, "broken_PARTIAL.xls"), "", ""], [r.report_path for r in results])
@@ -0,0 +1,33 @@
+from unittest import TestCase
+import backends
+from benchmarks import bench_profile_stages
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class TestSyntheticBackend(TestCase):
+
+    def test_rows_by_oid(self):
+        backend = bench_profile_stages.SyntheticBackend()
+        path = backend.add_table(100, 7)
+        self.assertEqual(9, len(backend.describe(path).fields))
+        self.assertEqual(list(range(1, 101)), [row[0] for row in backend.iter_rows(path, ["OID@", "FIELD_0"])])
+        self.assertEqual([30, 40, 50], [row[1] for row in backend.iter_rows(path, ["FIELD_1", "OID@"],
+                                                                            oid_stride=10, oid_range=(25, 51))])
+
+
+class TestRun(TestCase):
+
+    def test_every_stage_and_the_gate(self):
+        results = bench_profile_stages.run([300], [3, 12], measure_memory=False)
+        self.assertEqual(bench_profile_stages.stages * 2, [r.stage for r in results])
+        self.assertEqual([], backends._registered_backends)
+
+        baseline = {"results": [r._asdict() for r in results]}
+        self.assertEqual([], bench_profile_stages.regressions(results, baseline))
+        slower = [r._replace(seconds=r.seconds * 2, rows_per_second=r.rows_per_second / 2) for r in results]
+        baseline["results"] = [dict(r, seconds=1.0, peak_bytes=2 ** 30) for r in baseline["results"]]
+        failures = bench_profile_stages.regressions(slower, baseline, tolerance=0.25)
+        self.assertEqual(10, len(failures))
+        self.assertTrue(failures[0].startswith("300 rows x 3 fields properties: "))
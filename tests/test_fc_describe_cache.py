@@ -0,0 +1,92 @@
+from unittest import TestCase
+import sys
+from tests import fake_arcpy
+import backends
+import fc_properties
+from backends import arcpy_backend
+
+# self.assertEqual( <expected>, <actual>)
+fc_path = r"c:\tmp\fake.gdb\MGAZ56_point"
+
+
+class TestDescribeCache(TestCase):
+
+    def setUp(self):
+        self.real_arcpy = arcpy_backend.arcpy
+        arcpy_backend.arcpy = fake_arcpy
+        fake_arcpy.reset()
+        fake_arcpy.add_fc(fc_path,
+                          base_name="MGAZ56_point",
+                          sr_name="GDA_1994_MGA_Zone_56",
+                          sr_factory_code=28356,
+                          sr_type="Projected",
+                          has_z=True)
+        fc_properties.clear_describe_cache()
+
+    def tearDown(self):
+        arcpy_backend.arcpy = self.real_arcpy
+        fc_properties.clear_describe_cache()
+
+    def test_get_fc_properties_describes_once(self):
+        fc_properties.get_fc_name(fc_path)
+        fc_properties.get_fc_properties(fc_path)
+        fc_properties.get_fc_structure(fc_path)
+        self.assertEqual(1, fake_arcpy.describe_calls[fc_path])
+        self.assertEqual(1, fc_properties.describe_calls[fc_path])
+
+    def test_getters_read_from_snapshot(self):
+        self.assertEqual("MGAZ56_point", fc_properties.get_fc_name(fc_path))
+        self.assertEqual("Point", fc_properties.get_fc_geometry_type(fc_path))
+        self.assertEqual("GDA_1994_MGA_Zone_56", fc_properties.get_crs_name(fc_path))
+        self.assertEqual(28356, fc_properties.get_crs_wkid(fc_path))
+        self.assertEqual("Projected", fc_properties.get_crs_type(fc_path))
+        self.assertEqual("Meter", fc_properties.get_crs_units(fc_path))
+        self.assertTrue(fc_properties.is_z_enabled(fc_path))
+        self.assertFalse(fc_properties.is_m_enabled(fc_path))
+        self.assertEqual(2, fc_properties.get_fc_field_count(fc_path))
+        self.assertEqual(1, fake_arcpy.describe_calls[fc_path])
+
+    def test_clear_describe_cache_forces_new_describe(self):
+        fc_properties.get_fc_name(fc_path)
+        fc_properties.clear_describe_cache()
+        fc_properties.get_fc_name(fc_path)
+        self.assertEqual(2, fake_arcpy.describe_calls[fc_path])
+
+    def test_subtypes(self):
+        self.assertEqual([], backends.subtypes(fc_path))
+        subtyped_path = r"c:\tmp\fake.gdb\valves"
+        domain = fake_arcpy._Object(name="LowPressure")
+        fake_arcpy.add_fc(subtyped_path, base_name="valves", subtypes={
+            2: {"Name": "High", "Default": False, "SubtypeField": "valve_type",
+                "FieldValues": {"pressure": (500.0, None)}},
+            1: {"Name": "Low", "Default": True, "SubtypeField": "valve_type",
+                "FieldValues": {"pressure": (50.0, domain)}}})
+        self.assertEqual([(1, "Low", True, {"pressure": 50.0}, {"pressure": "LowPressure"}),
+                          (2, "High", False, {"pressure": 500.0}, {"pressure": ""})],
+                         [(s.code, s.name, s.is_default, s.defaults, s.domains)
+                          for s in backends.subtypes(subtyped_path)])
+
+    def test_oid_bounds_read_two_rows_once(self):
+        fake_arcpy.add_fc(fc_path, base_name="MGAZ56_point",
+                          rows=[{"OBJECTID": oid} for oid in [7, 3, 40, 12]])
+        self.assertEqual((3, 40), backends.oid_bounds(fc_path))
+        self.assertEqual((3, 40), backends.oid_bounds(fc_path))
+        self.assertEqual({fc_path: 2}, dict(fake_arcpy.rows_read))
+        fake_arcpy.add_fc(r"c:\tmp\fake.gdb\empty", base_name="empty")
+        self.assertEqual((None, None), backends.oid_bounds(r"c:\tmp\fake.gdb\empty"))
+
+    def test_extent_is_read_by_the_one_describe(self):
+        fake_arcpy.add_fc(fc_path, base_name="MGAZ56_point", extent=(500000.0, 6950000.0, 750000.0, 7150000.0))
+        fc_properties.get_fc_properties(fc_path)
+        self.assertEqual((500000.0, 6950000.0, 750000.0, 7150000.0), backends.get_backend(fc_path).extent(fc_path))
+        self.assertEqual(1, fake_arcpy.describe_calls[fc_path])
+
+
+class TestInstall(TestCase):
+
+    def test_uninstall_restores_arcpy(self):
+        replaced = sys.modules.get("arcpy")
+        fake_arcpy.install()
+        self.assertIs(fake_arcpy, sys.modules["arcpy"])
+        fake_arcpy.uninstall()
+        self.assertIs(replaced, sys.modules.get("arcpy"))
@@ -0,0 +1,74 @@
+from unittest import TestCase
+import importlib.machinery
+import importlib.util
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import fc_properties
+import partitioned_scan
+import run_stats
+from tests import fake_arcpy
+from tests.fake_arcpy import _Object
+from tests.test_backends import make_geopackage
+
+
+# self.assertEqual( <expected>, <actual>)
+
+pyt_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fc_profiler.pyt")
+
+
+def load_toolbox():
+    """:return: fc_profiler.pyt as a module, importing fake_arcpy as arcpy"""
+    loader = importlib.machinery.SourceFileLoader("fc_profiler_pyt", pyt_path)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+    fake_arcpy.install()
+    try:
+        loader.exec_module(module)
+    finally:
+        fake_arcpy.uninstall()
+    return module
+
+
+class TestFcProfilerTool(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(self.gpkg)
+        fake_arcpy.reset()
+        self.log_config = (logging.getLogger().level, list(logging.getLogger().handlers))
+        self.min_partition_records = partitioned_scan.min_partition_records
+        self.pool, self.cpu_count = multiprocessing.Pool, multiprocessing.cpu_count
+        self.pools = []
+        # sites would be read in partitions by a pool of 4, if the tool started one
+        partitioned_scan.min_partition_records = 10
+        multiprocessing.cpu_count = lambda: 4
+        multiprocessing.Pool = lambda *args, **kwargs: self.pools.append(args) or self.pool(*args, **kwargs)
+
+    def tearDown(self):
+        multiprocessing.Pool, multiprocessing.cpu_count = self.pool, self.cpu_count
+        partitioned_scan.min_partition_records = self.min_partition_records
+        level, handlers = self.log_config
+        root = logging.getLogger()
+        root.setLevel(level)
+        for handler in handlers:
+            if handler not in root.handlers:
+                root.addHandler(handler)
+        fc_properties.clear_describe_cache()
+        run_stats.reset()
+        shutil.rmtree(self.folder)
+
+    def test_execute_reads_in_one_process(self):
+        toolbox = load_toolbox()
+        parameters = [_Object(valueAsText=os.path.join(self.gpkg, "sites"), value=None),
+                      _Object(valueAsText=self.folder, value=None),
+                      _Object(valueAsText=None, value=None),
+                      _Object(valueAsText=None, value=None)]
+        messages = []
+        toolbox.FcProfiler().execute(parameters, _Object(addMessage=messages.append,
+                                                         addWarningMessage=messages.append))
+        self.assertEqual([], self.pools)
+        self.assertTrue(os.path.exists(os.path.join(self.folder, "sites_fc_profile.xls")))
+        self.assertIn("Reading field statistics", fake_arcpy.progressor_labels)
@@ -0,0 +1,55 @@
+from unittest import TestCase
+import threading
+from tests import fake_arcpy
+import fc_properties
+from backends import arcpy_backend
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class TestGetFcTotalRecordCount(TestCase):
+
+    def setUp(self):
+        self.real_arcpy = arcpy_backend.arcpy
+        arcpy_backend.arcpy = fake_arcpy
+        fake_arcpy.reset()
+        fc_properties.clear_describe_cache()
+        fake_arcpy.add_fc("empty", base_name="empty")
+        fake_arcpy.add_fc("rows_602", base_name="rows_602",
+                          rows=[{"OBJECTID": i} for i in range(1, 603)])
+        fake_arcpy.add_fc("rows_5000", base_name="rows_5000",
+                          rows=[{"OBJECTID": i} for i in range(1, 5001)])
+
+    def tearDown(self):
+        arcpy_backend.arcpy = self.real_arcpy
+
+    def test_zero_records(self):
+        self.assertEqual(0, fc_properties.get_fc_total_record_count("empty"))
+
+    def test_602_records(self):
+        self.assertEqual(602, fc_properties.get_fc_total_record_count("rows_602"))
+
+    def test_count_reads_no_rows(self):
+        self.assertEqual(5000, fc_properties.get_fc_total_record_count("rows_5000"))
+        self.assertEqual({}, dict(fake_arcpy.rows_read))
+
+    def test_cursor_counts_what_get_count_cannot(self):
+        fake_arcpy.add_fc("unsupported", base_name="unsupported",
+                          rows=[{"OBJECTID": i} for i in range(1, 11)], get_count_fails=True)
+        self.assertEqual(10, fc_properties.get_fc_total_record_count("unsupported"))
+        self.assertEqual({"unsupported": 10}, dict(fake_arcpy.rows_read))
+
+    def test_concurrent_counts_do_not_collide(self):
+        paths = ["rows_602", "rows_5000"] * 8
+        results = {}
+
+        def count(i, path):
+            results[i] = fc_properties.get_fc_total_record_count(path)
+
+        threads = [threading.Thread(target=count, args=(i, p)) for i, p in enumerate(paths)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual([602, 5000] * 8, [results[i] for i in range(len(paths))])
@@ -225,6 +225,26 @@ echo.
 
 
 
+echo # ------------------------------------------------------------------------
+echo # input gdb valid, out_folder valid, 2 processes,  expecting Exit Code 0
+echo # ------------------------------------------------------------------------
+set input_fc="c:\tmp\fc_profiler_testdata\fc_profiler_test.gdb"
+set out_folder="C:\tmp\fc_profiler_testdata"
+
+@echo on
+%python_exe% %fc_profiler_py% %input_fc% %out_folder% --processes 2
+@echo off
+echo ERRORLEVEL %ERRORLEVEL%
+if %ERRORLEVEL% == 0 (
+    echo PASS
+) else if %ERRORLEVEL% == 1 (
+    echo FAIL
+) else (
+    echo FAIL
+)
+echo.
+
+
 echo # ------------------------------------------------------------------------
 echo # no args, get command line help, expecting Exit Code 0
 echo # ------------------------------------------------------------------------
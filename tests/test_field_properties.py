@@ -1,5 +1,16 @@
+import datetime
+import json
 import os
+import shutil
+import struct
+import tempfile
+import zipfile
 from unittest import TestCase
+import backends
+import field_properties
+import generate_profile
+from backends.memory_backend import MemoryBackend
+from tests.backend_fixture import MemoryBackendTestCase
 
 
 # self.assertEqual( <expected>, <actual>)
@@ -15,3 +26,541 @@ class TestSomething(TestCase):
         # self.assertEqual(5, get_fc_name(get_field_by_name(field_name)))
 
 
+def generate_rows(row_count):
+    """rows of (OBJECTID, name, comment, size) with a known pattern of NULLs and blanks"""
+    for oid in range(1, row_count + 1):
+        name = None if oid % 10 == 0 else "name " + str(oid)
+        comment = [None, "", "   ", "text"][oid % 4]
+        size = None if oid % 2 else oid * 1.5
+        yield oid, name, comment, size
+
+
+class TestScanRows(TestCase):
+
+    def setUp(self):
+        self.fields = [("OBJECTID", "OID"),
+                       ("name", "String"),
+                       ("comment", "String"),
+                       ("size", "Double")]
+        self.stats = field_properties.scan_rows(self.fields, generate_rows(1000))
+
+    def test_one_accumulator_per_field(self):
+        self.assertEqual(["OBJECTID", "name", "comment", "size"],
+                         [s.field_name for s in self.stats])
+
+    def test_record_counts(self):
+        self.assertEqual([1000] * 4, [s.record_count for s in self.stats])
+
+    def test_null_counts(self):
+        self.assertEqual([0, 100, 250, 500], [s.null_count for s in self.stats])
+
+    def test_blank_counts(self):
+        self.assertEqual([0, 0, 500, 0], [s.blank_count for s in self.stats])
+
+    def test_no_data_and_populated(self):
+        comment = self.stats[2]
+        self.assertEqual(750, comment.no_data_count)
+        self.assertEqual(250, comment.populated_count)
+        self.assertEqual(0.75, comment.percent(comment.no_data_count))
+
+    def test_percent_of_empty_field(self):
+        stats = field_properties.scan_rows(self.fields, [])
+        self.assertEqual(0.0, stats[1].percent(stats[1].null_count))
+
+
+class TestTopValues(TestCase):
+
+    def test_low_cardinality_is_exact(self):
+        top_values = field_properties.TopValues(n=2, exact_limit=10, capacity=5)
+        for value in ["a", "b", "b", "c", "c", "c"]:
+            top_values.add(value)
+        self.assertEqual("exact", top_values.mode)
+        self.assertEqual([("c", 3, 0), ("b", 2, 0)], top_values.top())
+
+    def test_high_cardinality_switches_to_sketch(self):
+        top_values = field_properties.TopValues(n=3, exact_limit=100, capacity=50)
+        for i in range(10000):
+            top_values.add("common" if i % 3 == 0 else "unique " + str(i))
+        self.assertEqual("sketch", top_values.mode)
+        self.assertEqual(50, len(top_values.sketch.counts))
+        top = top_values.top()[0]
+        self.assertEqual("common", top.value)
+        self.assertTrue(top.count - top.max_error <= 3334 <= top.count)
+
+    def test_nulls_and_oids_are_not_counted(self):
+        stats = field_properties.scan_rows([("OBJECTID", "OID"), ("name", "String")],
+                                           [(1, None), (2, "a"), (3, None)])
+        self.assertIsNone(stats[0].top_values)
+        self.assertEqual([("a", 1, 0)], stats[1].top_values.top())
+
+
+class TestDistinctCount(TestCase):
+
+    def test_exact_below_limit(self):
+        distinct = field_properties.DistinctCount(exact_limit=100)
+        for i in range(1000):
+            distinct.add(i % 50)
+        self.assertEqual(("exact", 50, 0.0), (distinct.mode, distinct.count(), distinct.standard_error))
+
+    def test_estimate_above_limit(self):
+        distinct = field_properties.DistinctCount(exact_limit=100, precision=12)
+        for i in range(50000):
+            distinct.add(i)
+        self.assertEqual("estimate", distinct.mode)
+        self.assertIsNone(distinct.values)
+        self.assertAlmostEqual(50000, distinct.count(), delta=50000 * 3 * distinct.standard_error)
+
+    def test_merge_partitions(self):
+        partitions = []
+        for start in (0, 3000, 6000):
+            distinct = field_properties.DistinctCount(exact_limit=5000)
+            for i in range(start, start + 4000):
+                distinct.add(i)
+            partitions.append(distinct)
+        self.assertEqual("exact", partitions[0].mode)
+        merged = partitions[0]
+        merged.merge(partitions[1])
+        merged.merge(partitions[2])
+        self.assertEqual("estimate", merged.mode)
+        self.assertAlmostEqual(10000, merged.count(), delta=10000 * 3 * merged.standard_error)
+
+    def test_fed_from_row_stream(self):
+        stats = field_properties.scan_rows([("OBJECTID", "OID"), ("name", "String")],
+                                           [(1, "a"), (2, "b"), (3, "a"), (4, None)])
+        self.assertIsNone(stats[0].distinct)
+        self.assertEqual(2, stats[1].distinct.count())
+
+
+class TestNumericStatistics(TestCase):
+
+    def test_summary(self):
+        numeric = field_properties.NumericStatistics()
+        for value in [2, 4, 4, 4, 5, 5, 7, 9]:
+            numeric.add(value)
+        self.assertEqual((8, 2, 9), (numeric.count, numeric.minimum, numeric.maximum))
+        self.assertAlmostEqual(5.0, numeric.mean)
+        self.assertAlmostEqual(2.0, numeric.standard_deviation)
+
+    def test_fixed_histogram_is_exact(self):
+        numeric = field_properties.NumericStatistics(value_range=(0, 99))
+        for value in range(100):
+            numeric.add(value)
+        bins = numeric.histogram()
+        self.assertTrue(numeric.histogram_is_exact)
+        self.assertEqual(field_properties.histogram_bins, len(bins))
+        self.assertEqual(100, sum(b.count for b in bins))
+        self.assertEqual((0, 99), (bins[0].lower, bins[-1].upper))
+
+    def test_single_value_range(self):
+        numeric = field_properties.NumericStatistics(value_range=(5, 5))
+        numeric.add(5)
+        numeric.add(5)
+        self.assertEqual([(5, 5, 2)], numeric.histogram())
+
+    def test_out_of_range_values_are_counted(self):
+        histogram = field_properties.FixedWidthHistogram(0, 10, bins=2)
+        for value in [-1, 0, 10, 11]:
+            histogram.add(value)
+        self.assertEqual(([2, 2], 2), (histogram.counts, histogram.out_of_range))
+
+    def test_sketch_histogram_is_estimated(self):
+        numeric = field_properties.NumericStatistics()
+        for value in range(10000):
+            numeric.add(value)
+        bins = numeric.histogram(bins=10)
+        self.assertFalse(numeric.histogram_is_exact)
+        for b in bins:
+            self.assertAlmostEqual(1000, b.count, delta=200)
+
+    def test_percentiles(self):
+        numeric = field_properties.NumericStatistics()
+        for value in range(1001):
+            numeric.add(value)
+        self.assertAlmostEqual(500, dict(numeric.percentiles())[0.5], delta=20)
+
+
+class RecordingBackend(MemoryBackend):
+    """a MemoryBackend that records the fields of every iter_rows call"""
+
+    def __init__(self, filters_at_source=False):
+        MemoryBackend.__init__(self)
+        self.filters_at_source = filters_at_source
+        self.requests = []
+
+    def iter_rows(self, path, field_names, oid_stride=None, oid_range=None):
+        self.requests.append((list(field_names), oid_stride))
+        return MemoryBackend.iter_rows(self, path, field_names, oid_stride, oid_range)
+
+
+class TestGetFieldStatistics(MemoryBackendTestCase):
+
+    backend_class = RecordingBackend
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        self.backend.add_table("mem\\fc",
+                               fields=[("OBJECTID", "OID"), ("Shape", "Geometry"), ("name", "String")],
+                               rows=[(1, None, "a"), (2, None, None), (3, None, " ")])
+        self.backend.add_table("mem\\numbers",
+                               fields=[("OBJECTID", "OID"), ("size", "Double")],
+                               rows=[(1, 1.0), (2, None), (3, 3.0)])
+
+    def test_backend_rows_skip_geometry(self):
+        stats = field_properties.get_field_statistics("mem\\fc")
+        self.assertEqual([(["OBJECTID", "name"], None)], self.backend.requests)
+        self.assertEqual((1, 1), (stats[1].null_count, stats[1].blank_count))
+
+    def test_fixed_histograms_pre_pass_reads_numeric_fields(self):
+        stats = field_properties.get_field_statistics("mem\\numbers", histogram_mode="fixed")
+        self.assertEqual([["size"], ["OBJECTID", "size"]],
+                         [names for names, stride in self.backend.requests])
+        self.assertTrue(stats[1].numeric.histogram_is_exact)
+        self.assertEqual(2, sum(b.count for b in stats[1].numeric.histogram()))
+
+
+class TestSampledFieldStatistics(MemoryBackendTestCase):
+
+    backend_class = RecordingBackend
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        self.rows = [(oid, None if oid % 4 == 0 else "x") for oid in range(1, 10001)]
+        field_properties.sample_seed = 1
+
+    def tearDown(self):
+        field_properties.sample_seed = None
+        MemoryBackendTestCase.tearDown(self)
+
+    def use_backend(self, filters_at_source):
+        self.backend.filters_at_source = filters_at_source
+        self.backend.add_table("mem\\big", fields=[("OBJECTID", "OID"), ("name", "String")],
+                               rows=self.rows)
+
+    def test_reservoir_sample(self):
+        self.use_backend(filters_at_source=False)
+        stats = field_properties.get_field_statistics("mem\\big", sample_size=2000)
+        name = stats[1]
+        self.assertEqual(2000, name.record_count)
+        self.assertEqual(("reservoir", 2000, 10000),
+                         (name.sample_info.method, name.sample_info.sample_size,
+                          name.sample_info.population_size))
+        low, high = name.percent_interval(name.null_count)
+        self.assertTrue(low < 0.25 < high)
+
+    def test_oid_stride_when_the_source_filters(self):
+        self.use_backend(filters_at_source=True)
+        stats = field_properties.get_field_statistics("mem\\big", sample_fraction=0.1)
+        self.assertEqual([10], [stride for names, stride in self.backend.requests])
+        self.assertEqual(1000, stats[1].record_count)
+        self.assertEqual("OBJECTID stride, 1 in 10", stats[1].sample_info.method)
+
+    def test_sample_larger_than_table_reads_everything(self):
+        self.use_backend(filters_at_source=False)
+        stats = field_properties.get_field_statistics("mem\\big", sample_size=20000)
+        self.assertIsNone(stats[1].sample_info)
+        self.assertIsNone(stats[1].percent_interval(1))
+
+
+class TestMergeableState(TestCase):
+
+    def setUp(self):
+        self.fields = [("OBJECTID", "OID"), ("name", "String"), ("size", "Double"),
+                       ("built", "Date")]
+        self.rows = [(oid,
+                      None if oid % 9 == 0 else " " if oid % 11 == 0 else "name " + str(oid % 13),
+                      None if oid % 7 == 0 else oid * 0.5,
+                      datetime.datetime(2000 + oid % 5, 1, 1))
+                     for oid in range(1, 3001)]
+        self.value_ranges = field_properties.get_value_ranges(["size"], [(r[2],) for r in self.rows])
+
+    def scan(self, rows):
+        return field_properties.scan_rows(self.fields, rows, self.value_ranges)
+
+    def assert_same_profile(self, expected, actual):
+        for e, a in zip(expected, actual):
+            self.assertEqual((e.record_count, e.null_count, e.blank_count),
+                             (a.record_count, a.null_count, a.blank_count))
+            if e.top_values is not None:
+                self.assertEqual(sorted(e.top_values.top(), key=repr), sorted(a.top_values.top(), key=repr))
+                self.assertEqual(e.distinct.count(), a.distinct.count())
+            if e.numeric is not None:
+                self.assertEqual((e.numeric.count, e.numeric.minimum, e.numeric.maximum),
+                                 (a.numeric.count, a.numeric.minimum, a.numeric.maximum))
+                self.assertAlmostEqual(e.numeric.mean, a.numeric.mean)
+                self.assertAlmostEqual(e.numeric.standard_deviation, a.numeric.standard_deviation)
+                self.assertEqual(e.numeric.histogram(), a.numeric.histogram())
+
+    def test_merged_partitions_equal_the_whole(self):
+        whole = self.scan(self.rows)
+        parts = [self.scan(self.rows[:1000]), self.scan(self.rows[1000:1700]), self.scan(self.rows[1700:])]
+        merged = parts[0]
+        for part in parts[1:]:
+            for stats, other in zip(merged, part):
+                stats.merge(other)
+        self.assert_same_profile(whole, merged)
+
+    def test_json_round_trip(self):
+        profile = field_properties.FieldProfile(self.scan(self.rows), [[None, None]])
+        copy = field_properties.FieldProfile.from_json(profile.to_json())
+        self.assert_same_profile(profile.fields, copy.fields)
+        self.assertEqual([[None, None]], copy.oid_ranges)
+        self.assertEqual(datetime.datetime, type(copy.fields[3].top_values.top()[0].value))
+
+    def test_profile_merge_of_oid_ranges(self):
+        old = field_properties.FieldProfile(self.scan(self.rows[:2000]), [[None, 2001]])
+        new = field_properties.FieldProfile(self.scan(self.rows[2000:]), [[2001, None]])
+        old.merge(new)
+        self.assertEqual([[None, None]], old.oid_ranges)
+        self.assertEqual(3000, old.fields[0].record_count)
+
+    def test_profile_merge_keeps_gaps_between_oid_ranges(self):
+        a = field_properties.FieldProfile(self.scan(self.rows[:10]), [[1, 11]])
+        b = field_properties.FieldProfile(self.scan(self.rows[20:30]), [[21, 31]])
+        a.merge(b)
+        self.assertEqual([[1, 11], [21, 31]], a.oid_ranges)
+
+    def test_overlapping_ranges_are_refused(self):
+        a = field_properties.FieldProfile(self.scan(self.rows[:10]), [[1, 11]])
+        b = field_properties.FieldProfile(self.scan(self.rows[5:15]), [[6, 16]])
+        self.assertRaises(ValueError, a.merge, b)
+
+    def test_sketch_mode_merges(self):
+        a = field_properties.TopValues(n=5, exact_limit=50, capacity=100)
+        b = field_properties.TopValues(n=5, exact_limit=50, capacity=100)
+        for i in range(1000):
+            a.add(i % 80 if i % 3 else "common")
+            b.add(i % 10)
+        a.merge(b)
+        self.assertEqual("sketch", a.mode)
+        self.assertEqual("common", a.top()[0].value)
+
+    def test_histograms_with_different_ranges_fall_back_to_the_sketch(self):
+        a = field_properties.NumericStatistics((0, 10))
+        b = field_properties.NumericStatistics((100, 200))
+        for value in range(11):
+            a.add(value)
+        for value in range(100, 201):
+            b.add(value)
+        a.merge(b)
+        self.assertFalse(a.histogram_is_exact)
+        self.assertEqual(112, sum(b.count for b in a.histogram()))
+
+
+def wkb_polygon(*rings):
+    """the little endian WKB of a polygon"""
+    wkb = struct.pack("<BII", 1, 3, len(rings))
+    for ring in rings:
+        wkb += struct.pack("<I", len(ring)) + b"".join(struct.pack("<dd", *v) for v in ring)
+    return wkb
+
+
+def wkb_multipolygon(*polygons):
+    """the little endian WKB of a multipolygon of lists of rings"""
+    return struct.pack("<BII", 1, 6, len(polygons)) + b"".join(wkb_polygon(*rings) for rings in polygons)
+
+
+class TestShapeClasses(MemoryBackendTestCase):
+
+    backend_class = RecordingBackend
+
+    square = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+    sliver = [(0, 0), (1, 0), (0, 0)]
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        shapes = [wkb_polygon(self.square), None, wkb_polygon(), wkb_multipolygon([self.square], [self.square]),
+                  wkb_polygon(self.sliver)]
+        self.backend.add_table("mem\\parcels",
+                               fields=[("OBJECTID", "OID"), ("Shape", "Geometry"), ("name", "String")],
+                               rows=[(oid, shapes[oid % 5], "p" + str(oid)) for oid in range(1, 101)])
+
+    def tearDown(self):
+        field_properties.sample_seed = None
+        MemoryBackendTestCase.tearDown(self)
+
+    def test_classify_shape(self):
+        point = struct.pack("<BIdd", 1, 1, 1.0, 2.0)
+        empty_point = struct.pack("<BIdd", 1, 1, float("nan"), float("nan"))
+        one_vertex_line = struct.pack("<BII", 1, 2, 1) + struct.pack("<dd", 1, 2)
+        multipoint = struct.pack(">BII", 0, 4, 2) + struct.pack(">BIdd", 0, 1, 1, 2) * 2
+        self.assertEqual([("null",), ("empty",), ("empty",), ("single_part",), ("multipart",),
+                          ("single_part", "degenerate"), ("single_part",), ("single_part", "degenerate"),
+                          ("multipart",)],
+                         [field_properties.classify_shape(shape) for shape in
+                          [None, empty_point, wkb_polygon(), point, multipoint, one_vertex_line,
+                           wkb_polygon(self.square, self.square), wkb_polygon(self.sliver),
+                           wkb_multipolygon([self.square], [self.square])]])
+
+    def test_shapes_are_classified_in_the_field_scan(self):
+        field_profile = field_properties.get_field_profile("mem\\parcels")
+        self.assertEqual([["OBJECTID", "name", "OID@", "SHAPE@WKB"]], [n for n, s in self.backend.requests])
+        shapes = field_profile.shapes
+        self.assertEqual({"null": 20, "empty": 20, "single_part": 40, "multipart": 20, "degenerate": 20},
+                         shapes.counts)
+        self.assertEqual([1, 6, 11, 16, 21, 26, 31, 36, 41, 46], shapes.sample_oids["null"])
+        self.assertEqual(("Shapes: multipart", "20, e.g. OBJECTID 3, 8, 13, 18, 23, 28, 33, 38, 43, 48"),
+                         shapes.properties()[3])
+
+    def test_sampled_shapes(self):
+        field_properties.sample_seed = 1
+        field_profile = field_properties.get_field_profile("mem\\parcels", sample_size=50)
+        self.assertEqual(50, sum(field_profile.shapes.counts[key] for key in ["null", "empty",
+                                                                               "single_part", "multipart"]))
+
+    def test_merged_partitions_keep_the_lowest_oids(self):
+        low = field_properties.get_field_profile("mem\\parcels", oid_range=(None, 50))
+        high = field_properties.get_field_profile("mem\\parcels", oid_range=(50, None))
+        high = field_properties.FieldProfile.from_json(high.to_json())
+        high.merge(low)
+        whole = field_properties.get_field_profile("mem\\parcels")
+        self.assertEqual(whole.shapes.counts, high.shapes.counts)
+        self.assertEqual(whole.shapes.sample_oids, high.shapes.sample_oids)
+
+
+class TestTextStatistics(TestCase):
+
+    values = [u"plain", u"caf\u00e9", u"a/b", u"tab\there", u"x<y\u00e9", u"ok 123", u"C:\\temp", None, u"  "]
+
+    def test_checks_and_examples(self):
+        stats = field_properties.scan_rows([("name", "String")], [(v,) for v in self.values])[0]
+        self.assertEqual({"non_ascii": 2, "reserved": 3, "control": 1}, stats.text.counts)
+        self.assertEqual([u"a/b", u"x<y\u00e9", u"C:\\temp"], stats.text.examples["reserved"])
+        self.assertEqual([u"tab\there"], stats.text.examples["control"])
+
+    def test_only_text_fields_are_checked(self):
+        stats = field_properties.scan_rows([("OBJECTID", "OID"), ("size", "Double"), ("code", "String")],
+                                           [(1, 1.5, 7), (2, 2.5, u"\u00e9")])
+        self.assertEqual([None, None], [stats[0].text, stats[1].text])
+        self.assertEqual(1, stats[2].text.counts["non_ascii"])
+
+    def test_examples_are_limited_and_merge(self):
+        field_properties.text_example_count, count = 2, field_properties.text_example_count
+        try:
+            first = field_properties.scan_rows([("name", "String")], [(v,) for v in self.values])[0]
+            second = field_properties.scan_rows([("name", "String")], [(u"\u00fc" + str(i),) for i in range(5)])[0]
+            second = field_properties.FieldStatistics.from_state(json.loads(json.dumps(second.to_state())))
+            first.merge(second)
+        finally:
+            field_properties.text_example_count = count
+        self.assertEqual(7, first.text.counts["non_ascii"])
+        self.assertEqual([u"caf\u00e9", u"x<y\u00e9"], first.text.examples["non_ascii"])
+
+    def test_states_stored_before_text_checks_have_none(self):
+        state = field_properties.scan_rows([("name", "String")], [(u"a",)])[0].to_state()
+        del state["text"]
+        self.assertIsNone(field_properties.FieldStatistics.from_state(state).text)
+
+
+class TestDomainCheck(MemoryBackendTestCase):
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        self.backend.add_domain("mem\\test.gdb", "Status", coded_values={1: "Open", 2: "Closed", 3: "Unknown"})
+        self.backend.add_domain("mem\\test.gdb", "Storeys", value_range=(1, 50), field_type="Short")
+        fields = [backends.make_field("OBJECTID", "OID"),
+                  backends.make_field("status", "Integer", domain="Status"),
+                  backends.make_field("storeys", "SmallInteger", domain="Storeys"),
+                  backends.make_field("note", "String", domain="Missing")]
+        for name in ("buildings", "sheds"):
+            rows = [(oid, oid % 5 or None, oid * 3, u"n") for oid in range(1, 31)]
+            self.backend.add_table("mem\\test.gdb\\" + name, fields=fields, rows=rows)
+
+    def test_coded_values_and_ranges(self):
+        stats = field_properties.get_field_statistics("mem\\test.gdb\\buildings")
+        status, storeys = stats[1].domain, stats[2].domain
+        # status is 1-4, NULL every 5th record, so 4 is the only value outside the domain
+        self.assertEqual((24, 6, [4]), (status.checked_count, status.out_of_domain_count, status.examples))
+        self.assertEqual("3 coded values", status.defined_domain)
+        self.assertEqual("3 of 3 codes used", status.recorded_domain)
+        # storeys are 3-90, above 50 from record 17
+        self.assertEqual((30, 14), (storeys.checked_count, storeys.out_of_domain_count))
+        self.assertEqual([51, 54, 57, 60, 63], storeys.examples)
+        self.assertEqual(("1 to 50", "3 to 90"), (storeys.defined_domain, storeys.recorded_domain))
+        # a domain the workspace does not define is not checked
+        self.assertEqual([None, None], [stats[0].domain, stats[3].domain])
+
+    def test_domains_are_read_once_per_workspace(self):
+        field_properties.get_field_statistics("mem\\test.gdb\\buildings")
+        backends.clear_cache()  # as at the start of each generate_profile run
+        field_properties.get_field_statistics("mem\\test.gdb\\sheds")
+        self.assertEqual({"mem\\test.gdb": 1}, dict(backends.domain_loads))
+
+    def test_numeric_codes_stored_as_text_match(self):
+        domain = backends.DomainDescription("Status", "CodedValue", "", {"1": "Open", "2.0": "Closed"}, None)
+        stats = field_properties.scan_rows([("status", "Integer")], [(1,), (2,), (3,)], domains={"status": domain})
+        self.assertEqual((1, [3]), (stats[0].domain.out_of_domain_count, stats[0].domain.examples))
+
+    def test_merge_through_state(self):
+        domain = backends.DomainDescription("Storeys", "Range", "Short", None, (1, 50))
+        first = field_properties.scan_rows([("storeys", "SmallInteger")], [(0,), (5,)],
+                                           domains={"storeys": domain})[0]
+        second = field_properties.scan_rows([("storeys", "SmallInteger")], [(60,), (7,)],
+                                            domains={"storeys": domain})[0]
+        first.merge(field_properties.FieldStatistics.from_state(json.loads(json.dumps(second.to_state()))))
+        self.assertEqual((4, 2, [0, 60]), (first.domain.checked_count, first.domain.out_of_domain_count,
+                                           first.domain.examples))
+        self.assertEqual("0 to 60", first.domain.recorded_domain)
+
+
+class TestSubtypeStatistics(MemoryBackendTestCase):
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        self.backend.add_domain("mem\\test.gdb", "LowPressure", value_range=(0, 100), field_type="Double")
+        self.backend.add_domain("mem\\test.gdb", "HighPressure", value_range=(0, 1000), field_type="Double")
+        self.backend.add_domain("mem\\test.gdb", "Status", coded_values={"O": "Open", "C": "Closed"},
+                                field_type="Text")
+        self.path = "mem\\test.gdb\\valves"
+        fields = [backends.make_field("OBJECTID", "OID"),
+                  backends.make_field("valve_type", "Integer"),
+                  backends.make_field("pressure", "Double", domain="LowPressure"),
+                  backends.make_field("status", "String", domain="Status")]
+        # valve_type 1 (low pressure), 2 (high pressure), 9 (not a subtype) and NULL
+        rows = [(oid, [1, 2, 9, None][oid % 4], oid * 10.0, "O" if oid % 3 else "X") for oid in range(1, 41)]
+        self.backend.add_table(self.path, fields=fields, rows=rows)
+        self.backend.add_subtype(self.path, 1, "Low pressure", "valve_type", defaults={"pressure": 50.0},
+                                 domains={"pressure": "LowPressure", "status": "Status"}, is_default=True)
+        self.backend.add_subtype(self.path, 2, "High pressure", "valve_type", defaults={"pressure": 500.0},
+                                 domains={"pressure": "HighPressure", "status": "Status"})
+
+    def test_each_subtype_in_one_pass(self):
+        profile = field_properties.get_field_profile(self.path)
+        subtypes = profile.subtypes
+        self.assertEqual([1, 2, 9, None], subtypes.codes())
+        self.assertEqual([10, 10, 10, 10], [subtypes.record_count(code) for code in subtypes.codes()])
+        self.assertEqual(["Low pressure", "High pressure", "(not a subtype)", "(NULL)"],
+                         [subtypes.name(code) for code in subtypes.codes()])
+        # low pressure valves are 40 to 400: over 100 is out of their domain, not the high pressure one
+        low, high = subtypes.fields[1][2].domain, subtypes.fields[2][2].domain
+        self.assertEqual(("LowPressure", 8), (low.domain_name, low.out_of_domain_count))
+        self.assertEqual(("HighPressure", 0), (high.domain_name, high.out_of_domain_count))
+        # codes that are not subtypes are checked against the field's own domain
+        self.assertEqual("LowPressure", subtypes.fields[9][2].domain.domain_name)
+        # the domain of pressure varies by subtype, so only status is checked for the whole table
+        self.assertEqual([None, "Status"], [s.domain and s.domain.domain_name for s in profile.fields[2:]])
+        self.assertEqual(13, profile.fields[3].domain.out_of_domain_count)
+        self.assertEqual(("Records not of a subtype", "20"), subtypes.properties()[-1])
+
+    def test_partitions_merge(self):
+        whole = field_properties.get_field_profile(self.path)
+        merged = field_properties.get_field_profile(self.path, oid_range=(None, 17), value_ranges={})
+        high = field_properties.get_field_profile(self.path, oid_range=(17, None), value_ranges={})
+        merged.merge(field_properties.FieldProfile.from_json(high.to_json()))
+        self.assertEqual(whole.subtypes.codes(), merged.subtypes.codes())
+        for code in whole.subtypes.codes():
+            self.assertEqual([s.to_state()["null_count"] for s in whole.subtypes.fields[code]],
+                             [s.to_state()["null_count"] for s in merged.subtypes.fields[code]])
+            self.assertEqual(whole.subtypes.fields[code][2].domain.out_of_domain_count,
+                             merged.subtypes.fields[code][2].domain.out_of_domain_count)
+        self.assertEqual("Low pressure", merged.subtypes.name(1))
+        self.assertEqual(50.0, merged.subtypes.subtypes[1].defaults["pressure"])
+
+    def test_subtypes_sheet(self):
+        folder = tempfile.mkdtemp()
+        try:
+            xlsx_path = generate_profile.generate_profile(self.path, folder, True, report_format="xlsx")
+            with zipfile.ZipFile(xlsx_path) as package:
+                workbook = package.read("xl/workbook.xml").decode("utf-8")
+        finally:
+            shutil.rmtree(folder)
+        self.assertTrue(workbook.index('name="domains"') < workbook.index('name="subtypes"'))
@@ -0,0 +1,241 @@
+from unittest import TestCase
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+import numpy
+import backends
+import fc_properties
+import generate_profile
+import geometry_properties
+from backends.memory_backend import MemoryBackend
+from tests.backend_fixture import MemoryBackendTestCase
+from backends.sqlite_backend import wkb_from_gpkg
+from tests.test_backends import make_geopackage
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+def point(x, y, byte_order="<"):
+    return struct.pack(byte_order + "BIdd", 1 if byte_order == "<" else 0, 1, x, y)
+
+
+def line(vertices):
+    return struct.pack("<BII", 1, 2, len(vertices)) + b"".join(struct.pack("<dd", *v) for v in vertices)
+
+
+def polygon(rings):
+    wkb = struct.pack("<BII", 1, 3, len(rings))
+    for ring in rings:
+        wkb += struct.pack("<I", len(ring)) + b"".join(struct.pack("<dd", *v) for v in ring)
+    return wkb
+
+
+def square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)]
+
+
+class TestMeasureWkb(TestCase):
+
+    def test_polygon_with_a_hole(self):
+        chunk = geometry_properties.measure_wkb([polygon([square(0, 0, 10), square(2, 2, 2)])])
+        self.assertEqual([96.0, 48.0], [chunk.area[0], chunk.length[0]])
+        self.assertAlmostEqual((100 * 5.0 - 4 * 3.0) / 96, chunk.centroid_x[0])
+        self.assertEqual((0.0, 0.0, 10.0, 10.0), chunk.extent)
+
+    def test_large_projected_coordinates(self):
+        chunk = geometry_properties.measure_wkb([polygon([square(500000.0, 6000000.0, 0.5)])])
+        self.assertAlmostEqual(0.25, chunk.area[0], places=9)
+        self.assertAlmostEqual(6000000.25, chunk.centroid_y[0], places=6)
+
+    def test_lines_points_nulls_and_empties(self):
+        empty_multipolygon = struct.pack("<BII", 1, 6, 0)
+        chunk = geometry_properties.measure_wkb([line([(0, 0), (3, 4), (3, 10)]),
+                                                 None,
+                                                 point(5, 6, ">"),
+                                                 empty_multipolygon,
+                                                 point(float("nan"), float("nan"))])
+        self.assertEqual([0.0, 0.0, 0.0, 0.0], list(chunk.area))
+        self.assertEqual([11.0, 0.0, 0.0, 0.0], list(chunk.length))
+        self.assertAlmostEqual((1.5 * 5 + 3 * 6) / 11.0, chunk.centroid_x[0])
+        self.assertEqual([5.0, 6.0], [chunk.centroid_x[1], chunk.centroid_y[1]])
+        self.assertTrue(numpy.isnan(chunk.centroid_x[2:]).all())
+
+    def test_z_and_multipart(self):
+        point_z = struct.pack("<BIddd", 1, 1001, 1.0, 2.0, 99.0)
+        line_z = struct.pack("<BII", 1, 1002, 2) + struct.pack("<dddddd", 0, 0, 5, 0, 4, 5)
+        collection = struct.pack("<BII", 1, 7, 2) + point_z + line_z
+        chunk = geometry_properties.measure_wkb([collection])
+        self.assertEqual(4.0, chunk.length[0])
+        self.assertEqual((0.0, 0.0, 1.0, 4.0), chunk.extent)
+
+    def test_geopackage_header_is_stripped(self):
+        wkb = point(1, 2)
+        header = b"GP" + struct.pack("<BBi", 0, 1 | (1 << 1), 28356) + struct.pack("<dddd", 1, 1, 2, 2)
+        self.assertEqual(wkb, wkb_from_gpkg(header + wkb))
+        self.assertEqual(wkb, wkb_from_gpkg(wkb))
+        self.assertIsNone(wkb_from_gpkg(None))
+
+
+class TestSizeDistribution(TestCase):
+
+    def test_percentiles_within_a_bin_width(self):
+        sizes = numpy.random.RandomState(1).lognormal(5, 2, 20000)
+        distribution = geometry_properties.SizeDistribution()
+        distribution.add(numpy.concatenate([sizes[:10000], numpy.zeros(500)]))
+        distribution.add(sizes[10000:])
+        self.assertEqual((20500, 500), (distribution.count, distribution.zero_count))
+        exact = numpy.concatenate([sizes, numpy.zeros(500)])
+        for fraction, value in distribution.percentiles((0.01, 0.25, 0.5, 0.95)):
+            expected = numpy.percentile(exact, fraction * 100)
+            if fraction == 0.01:
+                self.assertEqual(0.0, value)
+            else:
+                self.assertAlmostEqual(1.0, value / expected, delta=0.12)
+
+    def test_histogram_by_power_of_ten(self):
+        distribution = geometry_properties.SizeDistribution()
+        distribution.add(numpy.array([0.0, 0.5, 5.0, 7.0, 500.0, numpy.nan]))
+        self.assertEqual([(0.0, 0.0, 1), (0.1, 1.0, 1), (1.0, 10.0, 2), (10.0, 100.0, 0), (100.0, 1000.0, 1)],
+                         [(round(b.lower, 9), round(b.upper, 9), b.count) for b in distribution.histogram()])
+
+
+class TestDensityGrid(TestCase):
+
+    def setUp(self):
+        self.max_grid_cells = geometry_properties.max_grid_cells
+
+    def tearDown(self):
+        geometry_properties.max_grid_cells = self.max_grid_cells
+
+    def test_uniform_points(self):
+        grid = geometry_properties.DensityGrid(10.0)
+        x, y = numpy.meshgrid(numpy.arange(5, 100, 10.0), numpy.arange(5, 50, 10.0))
+        grid.add(x.ravel(), y.ravel())
+        grid.add(x.ravel(), y.ravel())
+        self.assertEqual((5, 10), grid.counts.shape)
+        self.assertEqual((0.0, 0.0, 100.0, 50.0), grid.extent)
+        self.assertEqual(100, grid.point_count)
+        self.assertAlmostEqual(0.0, grid.gini())
+
+    def test_grid_is_coarsened_to_stay_bounded(self):
+        geometry_properties.max_grid_cells = 16
+        grid = geometry_properties.DensityGrid(1.0)
+        random = numpy.random.RandomState(1)
+        for chunk in range(10):
+            grid.add(random.uniform(-500, 500, 1000), random.uniform(0, 50, 1000))
+        grid.add(numpy.array([3.0] * 5000), numpy.array([3.0] * 5000))
+        self.assertEqual(64.0, grid.cell_size)
+        self.assertTrue(max(grid.counts.shape) <= 16)
+        self.assertEqual(15000, grid.point_count)
+        densest = grid.densest(3)
+        self.assertEqual((0.0, 0.0, 64.0, 64.0), densest[0][:4])
+        self.assertTrue(densest[0].count > 5000 > densest[1].count >= densest[2].count)
+        self.assertTrue(grid.gini() > 0.3)
+        self.assertEqual(4, max(grid.coarsened(4).counts.shape))
+        self.assertEqual(15000, grid.coarsened(4).point_count)
+
+
+class TestGetGeometryStatistics(MemoryBackendTestCase):
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        rows = [(oid, polygon([square(oid * 100, 0, oid)])) for oid in range(1, 11)]
+        rows += [(11, None), (12, polygon([])), (13, polygon([[(0, 0), (5, 0), (0, 0)]]))]
+        self.backend.add_table("mem\\test.gdb\\parcels", fields=[("OBJECTID", "OID"), ("SHAPE", "Geometry")],
+                               rows=rows, shape_type="Polygon")
+        self.backend.add_table("mem\\test.gdb\\owners", fields=[("OBJECTID", "OID")], rows=[(1,)])
+        self.chunk_size = geometry_properties.chunk_size
+
+    def tearDown(self):
+        geometry_properties.chunk_size = self.chunk_size
+        MemoryBackendTestCase.tearDown(self)
+
+    def check_parcels(self, stats):
+        self.assertEqual((13, 1, 1, 11), (stats.record_count, stats.null_count, stats.empty_count,
+                                          stats.measured_count))
+        self.assertEqual((1, sum(oid * oid for oid in range(1, 11))), (stats.areas.zero_count, stats.areas.total))
+        self.assertEqual((0.0, 100.0), (stats.areas.minimum, stats.areas.maximum))
+        self.assertEqual((4.0, 40.0), (stats.lengths.minimum, stats.lengths.maximum))
+
+    def test_wkb_in_chunks(self):
+        geometry_properties.chunk_size = 4
+        stats = geometry_properties.get_geometry_statistics("mem\\test.gdb\\parcels")
+        self.check_parcels(stats)
+        self.assertEqual((0.0, 0.0, 1010.0, 10.0), stats.extent)
+
+    def test_shapes_measured_by_the_backend(self):
+        backend = self.backend
+
+        class MeasuringBackend(MemoryBackend):
+            measures_shapes = True
+
+            def __init__(self):
+                MemoryBackend.__init__(self)
+                self.tables = backend.tables
+                self.ranges = []
+
+            def extent(self, path):
+                return 0.0, 0.0, 2000.0, 20.0
+
+            def shape_measures(self, path, oid_range=None):
+                self.ranges.append(oid_range)
+                chunk = geometry_properties.measure_wkb([row[0] for row in self.iter_rows(
+                    path, ["SHAPE@WKB"], oid_range=oid_range)])
+                measures = numpy.zeros(len(chunk.area), dtype=[(name, "f8") for name in chunk._fields[:4]])
+                for name in chunk._fields[:4]:
+                    measures[name] = getattr(chunk, name)
+                return measures
+
+        measuring = MeasuringBackend()
+        backends.register_backend(measuring)
+        try:
+            geometry_properties.chunk_size = 5
+            stats = geometry_properties.get_geometry_statistics("mem\\test.gdb\\parcels")
+        finally:
+            backends.unregister_backend(measuring)
+        self.check_parcels(stats)
+        self.assertEqual([(1, 6), (6, 11), (11, 16)], measuring.ranges)
+        self.assertEqual((0.0, 0.0, 2000.0, 20.0), stats.extent)
+
+    def test_tables_have_no_geometry_statistics(self):
+        self.assertIsNone(geometry_properties.get_geometry_statistics("mem\\test.gdb\\owners"))
+
+
+class TestGeometrySheet(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(self.gpkg)
+        connection = sqlite3.connect(self.gpkg)
+        header = b"GP" + struct.pack("<BBi", 0, 1, 28356)
+        connection.executemany("UPDATE sites SET geom = ? WHERE fid = ?",
+                               [(sqlite3.Binary(header + point(fid, fid * 2)), fid) for fid in range(1, 51)])
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        fc_properties.clear_describe_cache()
+        shutil.rmtree(self.folder)
+
+    def test_geopackage_points(self):
+        stats = geometry_properties.get_geometry_statistics(os.path.join(self.gpkg, "sites"))
+        self.assertEqual((100, 50, 50), (stats.record_count, stats.null_count, stats.measured_count))
+        self.assertEqual((1.0, 2.0, 50.0, 100.0), stats.extent)
+        self.assertEqual((25.5, 51.0), stats.mean_centre)
+        self.assertEqual(("Meter", 1000.0, 50), (stats.units, stats.density.cell_size, stats.density.point_count))
+
+    def test_geometry_sheet(self):
+        xlsx_path = generate_profile.generate_profile(os.path.join(self.gpkg, "sites"), self.folder, True,
+                                                      report_format="xlsx")
+        with zipfile.ZipFile(xlsx_path) as package:
+            workbook = ElementTree.fromstring(package.read("xl/workbook.xml"))
+        ns = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+        self.assertEqual(["geometry", "density", "run_stats"],
+                         [sheet.get("name") for sheet in workbook.findall("x:sheets/x:sheet", ns)[-3:]])
+        self.assertTrue(generate_profile.generate_profile(os.path.join(self.gpkg, "sites"), self.folder, True))
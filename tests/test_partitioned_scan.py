@@ -0,0 +1,115 @@
+from unittest import TestCase
+import datetime
+import field_properties
+import partitioned_scan
+import progress
+import run_stats
+from backends.arcpy_backend import oid_where_clause
+from tests.backend_fixture import MemoryBackendTestCase
+
+
+# self.assertEqual( <expected>, <actual>)
+
+fc_path = "mem\\test.gdb\\parcels"
+
+
+class TestPlanPartitions(TestCase):
+
+    def setUp(self):
+        self.min_partition_records = partitioned_scan.min_partition_records
+        partitioned_scan.min_partition_records = 100
+
+    def tearDown(self):
+        partitioned_scan.min_partition_records = self.min_partition_records
+
+    def test_small_table_is_not_split(self):
+        self.assertEqual([[None, None]], partitioned_scan.plan_partitions((1, 150), 150, 8))
+
+    def test_one_process_is_not_split(self):
+        self.assertEqual([[None, None]], partitioned_scan.plan_partitions((1, 1000), 1000, 1))
+
+    def test_partitions_follow_the_cores(self):
+        self.assertEqual([[None, 251], [251, 501], [501, 751], [751, None]],
+                         partitioned_scan.plan_partitions((1, 1000), 1000, 2))
+
+    def test_partitions_follow_the_record_count(self):
+        self.assertEqual(3, len(partitioned_scan.plan_partitions((1, 10000), 300, 8)))
+
+    def test_empty_table(self):
+        self.assertEqual([[None, None]], partitioned_scan.plan_partitions((None, None), 0, 8))
+
+    def test_open_ended_where_clause(self):
+        self.assertEqual("OBJECTID < 251", oid_where_clause("OBJECTID", oid_range=(None, 251)))
+        self.assertEqual("OBJECTID >= 251 AND OBJECTID < 501",
+                         oid_where_clause("OBJECTID", oid_range=(251, 501)))
+
+
+class TestPartitionedScan(MemoryBackendTestCase):
+
+    def setUp(self):
+        MemoryBackendTestCase.setUp(self)
+        self.min_partition_records = partitioned_scan.min_partition_records
+        partitioned_scan.min_partition_records = 200
+        start = datetime.datetime(2018, 1, 1)
+        # OBJECTIDs with gaps, as after deletes
+        rows = [(oid,
+                 None if oid % 7 == 0 else "zone " + str(oid % 12),
+                 None if oid % 5 == 0 else oid * 0.25,
+                 start + datetime.timedelta(days=oid % 40))
+                for oid in range(1, 4000) if oid % 3]
+        self.backend.add_table(fc_path, [("OBJECTID", "OID"), ("zone", "String"),
+                                         ("area", "Double"), ("surveyed", "Date")], rows)
+
+    def tearDown(self):
+        partitioned_scan.min_partition_records = self.min_partition_records
+        MemoryBackendTestCase.tearDown(self)
+
+    def test_oid_bounds(self):
+        self.assertEqual((1, 3998), self.backend.oid_bounds(fc_path))
+
+    def test_partitioned_profile_equals_a_single_scan(self):
+        whole = field_properties.get_field_profile(fc_path, histogram_mode="fixed")
+        parts = partitioned_scan.get_field_profile(fc_path, processes=3, histogram_mode="fixed")
+        self.assertEqual([[None, None]], parts.oid_ranges)
+        for e, a in zip(whole.fields, parts.fields):
+            self.assertEqual((e.field_name, e.record_count, e.null_count, e.blank_count),
+                             (a.field_name, a.record_count, a.null_count, a.blank_count))
+            if e.top_values is not None:
+                self.assertEqual(e.top_values.top(), a.top_values.top())
+                self.assertEqual(e.distinct.count(), a.distinct.count())
+            if e.numeric is not None:
+                self.assertEqual((e.numeric.minimum, e.numeric.maximum), (a.numeric.minimum, a.numeric.maximum))
+                self.assertAlmostEqual(e.numeric.mean, a.numeric.mean)
+                self.assertAlmostEqual(e.numeric.standard_deviation, a.numeric.standard_deviation)
+                self.assertTrue(a.numeric.histogram_is_exact)
+                self.assertEqual(e.numeric.histogram(), a.numeric.histogram())
+
+    def test_samples_are_not_partitioned(self):
+        field_profile = partitioned_scan.get_field_profile(fc_path, processes=3, sample_size=100)
+        self.assertEqual(100, field_profile.fields[0].record_count)
+
+    def test_worker_run_stats_are_merged(self):
+        run_stats.reset()
+        field_profile = partitioned_scan.get_field_profile(fc_path, processes=3)
+        record_count = field_profile.fields[0].record_count
+        # the OBJECTIDs are read for the partition bounds, then each
+        # partition's profile in a worker, in one scan of its records
+        self.assertEqual(2 * record_count, run_stats.get_span("backend.iter_rows").rows)
+        self.assertEqual(1 + 6, run_stats.get_span("backend.iter_rows").calls)
+
+        # fixed histograms read each partition's value ranges first; the
+        # partition bounds are cached
+        run_stats.reset()
+        partitioned_scan.get_field_profile(fc_path, processes=3, histogram_mode="fixed")
+        self.assertEqual(2 * record_count, run_stats.get_span("backend.iter_rows").rows)
+        self.assertEqual(2 * 6, run_stats.get_span("backend.iter_rows").calls)
+        run_stats.reset()
+
+    def test_cancel_reaches_the_workers(self):
+        progress.reset()
+        progress.cancel()
+        try:
+            field_profile = partitioned_scan.get_field_profile(fc_path, processes=3)
+        finally:
+            progress.reset()
+        self.assertEqual([0, 0, 0, 0], [stats.record_count for stats in field_profile.fields])
@@ -0,0 +1,93 @@
+from unittest import TestCase
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import fc_properties
+import field_properties
+import generate_profile
+import profile_cache
+from tests.test_backends import make_geopackage
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class TestProfileCache(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache_folder = os.path.join(self.folder, "cache")
+        gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(gpkg)
+        self.sites = os.path.join(gpkg, "sites")
+        self.real_get_field_statistics = field_properties.get_field_statistics
+        self.profiled = []
+
+        def counting_get_field_statistics(fc_path, **kwargs):
+            self.profiled.append(fc_path)
+            return self.real_get_field_statistics(fc_path, **kwargs)
+        field_properties.get_field_statistics = counting_get_field_statistics
+
+    def tearDown(self):
+        field_properties.get_field_statistics = self.real_get_field_statistics
+        fc_properties.clear_describe_cache()
+        shutil.rmtree(self.folder)
+
+    def profile(self, **options):
+        return generate_profile.generate_profile(self.sites, self.folder, True,
+                                                 cache_folder=self.cache_folder, **options)
+
+    def test_unchanged_feature_class_reuses_the_cached_profile(self):
+        xls_path = self.profile()
+        os.remove(xls_path)
+        self.assertEqual(xls_path, self.profile())
+        self.assertEqual(1, len(self.profiled))
+        self.assertTrue(os.path.exists(xls_path))
+
+    def test_profile_state_is_stored(self):
+        self.profile()
+        field_profile = profile_cache.ProfileCache(self.cache_folder).load_profile(self.sites)
+        self.assertEqual([[None, None]], field_profile.oid_ranges)
+        self.assertEqual(100, field_profile.fields[0].record_count)
+
+    def test_force_profiles_again(self):
+        self.profile()
+        self.profile(force=True)
+        self.assertEqual(2, len(self.profiled))
+
+    def test_edit_changes_the_fingerprint(self):
+        self.profile()
+        connection = sqlite3.connect(os.path.dirname(self.sites))
+        connection.execute("INSERT INTO sites (name) VALUES ('new')")
+        connection.commit()
+        connection.close()
+        self.profile()
+        self.assertEqual(2, len(self.profiled))
+
+    def test_sampled_profile_is_not_reused_for_a_full_profile(self):
+        self.profile(sample_size=10)
+        self.profile()
+        self.assertEqual(2, len(self.profiled))
+
+    def test_evict_least_recently_used_and_old_profiles(self):
+        cache = profile_cache.ProfileCache(self.cache_folder)
+        report = os.path.join(self.folder, "report.xls")
+        open(report, "w").close()
+        for i, last_used in enumerate(["2020-01-01T00:00:00", "2999-01-02T00:00:00",
+                                       "2999-01-03T00:00:00", "2999-01-01T00:00:00"]):
+            fc_path = "fc" + str(i)
+            cache.store(fc_path, "fp", report)
+            entry_path = cache._paths(fc_path)[0]
+            with open(entry_path) as f:
+                entry = json.load(f)
+            entry["last_used"] = last_used
+            with open(entry_path, "w") as f:
+                json.dump(entry, f)
+
+        self.assertEqual(2, cache.evict(max_entries=2, max_age_days=30))
+        kept = sorted(json.load(open(os.path.join(self.cache_folder, name)))["fc_path"]
+                      for name in os.listdir(self.cache_folder) if name.endswith(".json"))
+        self.assertEqual(["fc1", "fc2"], kept)
+        self.assertEqual(4, len(os.listdir(self.cache_folder)))
@@ -0,0 +1,148 @@
+from unittest import TestCase
+import os
+import shutil
+import sqlite3
+import tempfile
+import json
+import fc_properties
+import generate_profile
+import profile_diff
+from tests.test_backends import make_geopackage
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+def make_profile(fc_name, fields, total_records=100, crs_wkid=28356, crs_name="GDA94"):
+    """an FcProfile of fields [(name, type, no data count, mean)]"""
+    fc = {"fc_name": fc_name, "geometry_type": "Point", "crs_wkid": crs_wkid, "crs_name": crs_name,
+          "total_records": total_records}
+    structure = {}
+    statistics = {}
+    for name, field_type, no_data_count, mean in fields:
+        structure[name.lower()] = {"field_name": name, "field_type": field_type, "field_length": 8,
+                                   "field_is_nullable": True, "field_domain": ""}
+        statistics[name.lower()] = {"field_name": name, "record_count": total_records,
+                                    "no_data_count": no_data_count, "distinct_count": 50,
+                                    "mean": mean, "standard_deviation": 10.0 if mean is not None else None,
+                                    "top_values": [{"value": "a", "count": 5}]}
+    return profile_diff.FcProfile(fc, structure, statistics)
+
+
+class TestDiffProfiles(TestCase):
+
+    def test_unchanged(self):
+        old = {"roads": make_profile("roads", [("name", "String", 0, None)])}
+        new = {"roads": make_profile("roads", [("name", "String", 0, None)])}
+        self.assertEqual([], profile_diff.diff_profiles(old, new))
+
+    def test_feature_classes_added_and_removed(self):
+        old = {"roads": make_profile("roads", []), "rail": make_profile("rail", [])}
+        new = {"roads": make_profile("roads", []), "ferry": make_profile("ferry", [])}
+        self.assertEqual([("ferry", "feature class added"), ("rail", "feature class removed")],
+                         [(c.fc_name, c.change) for c in profile_diff.diff_profiles(old, new)])
+
+    def test_schema_changes(self):
+        old = {"roads": make_profile("roads", [("name", "String", 0, None), ("lanes", "SmallInteger", 0, 2.0),
+                                               ("old", "String", 0, None)])}
+        new = {"roads": make_profile("roads", [("NAME", "String", 0, None), ("lanes", "Double", 0, 2.0),
+                                               ("new", "Date", 0, None)], crs_wkid=7856)}
+        self.assertEqual([("", "CRS", (28356, "GDA94"), (7856, "GDA94")),
+                          ("old", "field removed", "String", None),
+                          ("new", "field added", None, "Date"),
+                          ("lanes", "field retyped", "SmallInteger", "Double")],
+                         [(c.field_name, c.change, c.old, c.new) for c in profile_diff.diff_profiles(old, new)])
+
+    def test_crs_is_one_change(self):
+        old = {"roads": make_profile("roads", [])}
+        new = {"roads": make_profile("roads", [], crs_wkid=7856, crs_name="GDA2020_MGA_Zone_56")}
+        self.assertEqual([("roads", "", "CRS", (28356, "GDA94"), (7856, "GDA2020_MGA_Zone_56"))],
+                         [tuple(c) for c in profile_diff.diff_profiles(old, new)])
+
+    def test_statistics_past_thresholds(self):
+        old = {"roads": make_profile("roads", [("a", "Double", 0, 100.0), ("b", "Double", 10, 100.0)])}
+        new = {"roads": make_profile("roads", [("a", "Double", 4, 104.0), ("b", "Double", 20, 120.0)], 100)}
+        self.assertEqual([("b", "no data %"), ("b", "mean")],
+                         [(c.field_name, c.change) for c in profile_diff.diff_profiles(old, new)])
+
+
+def write_export(jsonl_path, fcs):
+    """a .jsonl export of the fc records of fcs [(fc_path, total_records)]"""
+    with open(jsonl_path, "w") as f:
+        for fc_path, total_records in fcs:
+            f.write(json.dumps({"record_type": "fc", "fc_path": fc_path, "fc_name": fc_path.split("\\")[-1],
+                                "total_records": total_records}) + "\n")
+
+
+class TestLoadProfiles(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_profile_key(self):
+        self.assertEqual("delivery.gdb/transport/roads",
+                         profile_diff.profile_key("C:\\data\\Delivery.gdb\\Transport\\Roads"))
+        self.assertEqual("test.gpkg/sites", profile_diff.profile_key("/tmp/test.gpkg/sites"))
+        self.assertEqual("shapes/roads.shp", profile_diff.profile_key("C:\\shapes\\roads.shp"))
+
+    def test_same_name_in_two_workspaces(self):
+        old, new = os.path.join(self.folder, "old.jsonl"), os.path.join(self.folder, "new.jsonl")
+        write_export(old, [("C:\\old\\a.gdb\\roads", 100), ("C:\\old\\b.gdb\\roads", 200)])
+        write_export(new, [("C:\\new\\a.gdb\\roads", 100), ("C:\\new\\b.gdb\\roads", 250)])
+        old_profiles, new_profiles = profile_diff.load_profiles(old), profile_diff.load_profiles(new)
+        self.assertEqual(["a.gdb/roads", "b.gdb/roads"], sorted(old_profiles))
+        self.assertEqual(200, old_profiles["b.gdb/roads"].fc["total_records"])
+        self.assertEqual([("b.gdb/roads", "record count", 200, 250)],
+                         [(c.fc_name, c.change, c.old, c.new)
+                          for c in profile_diff.diff_profiles(old_profiles, new_profiles)])
+
+    def test_duplicate_key(self):
+        write_export(os.path.join(self.folder, "1.jsonl"), [("C:\\x\\a.gdb\\roads", 100)])
+        write_export(os.path.join(self.folder, "2.jsonl"), [("D:\\y\\a.gdb\\roads", 100)])
+        with self.assertRaises(ValueError):
+            profile_diff.load_profiles(self.folder)
+
+
+class TestDiffExports(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(self.gpkg)
+
+    def tearDown(self):
+        fc_properties.clear_describe_cache()
+        shutil.rmtree(self.folder)
+
+    def export(self, name):
+        out_folder = os.path.join(self.folder, name)
+        os.mkdir(out_folder)
+        for table in ["sites", "owners"]:
+            generate_profile.generate_profile(os.path.join(self.gpkg, table), out_folder, True,
+                                              export_format="jsonl")
+        return out_folder
+
+    def test_diff_of_two_deliveries(self):
+        old = self.export("old")
+        connection = sqlite3.connect(self.gpkg)
+        connection.execute("ALTER TABLE sites ADD COLUMN surveyed DATE")
+        connection.execute("UPDATE sites SET name = NULL WHERE fid > 50")
+        connection.executemany("INSERT INTO sites (name, height, storeys) VALUES (?, ?, ?)",
+                               [(None, 1.0, 1)] * 10)
+        connection.commit()
+        connection.close()
+        new = self.export("new")
+
+        changes = profile_diff.diff_profiles(profile_diff.load_profiles(old), profile_diff.load_profiles(new))
+        self.assertEqual([("sites", "", "record count", 100, 110),
+                          ("sites", "surveyed", "field added", None, "Date")],
+                         [tuple(c) for c in changes[:2]])
+        self.assertIn(("name", "no data %"), [(c.field_name, c.change) for c in changes])
+
+        report = os.path.join(self.folder, "changes.xlsx")
+        self.assertEqual(1, profile_diff.main(old, new, report))
+        self.assertTrue(os.path.exists(report))
+        self.assertEqual(0, profile_diff.main(old, old, report))
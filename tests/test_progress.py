@@ -0,0 +1,108 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+import fc_properties
+import generate_profile
+import progress
+import run_stats
+from tests.test_backends import make_geopackage
+from tests.test_xlsx_writer import read_sheet, cell_text
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class ProgressTestCase(TestCase):
+
+    def setUp(self):
+        self.config = (progress.report_interval, progress.chunk_rows, progress.timer)
+        progress.reset()
+        self.reports = []
+        self.cancel_checks = []
+        progress.add_reporter(self.report)
+
+    def tearDown(self):
+        progress.report_interval, progress.chunk_rows, progress.timer = self.config
+        progress.remove_reporter(self.report)
+        for check in self.cancel_checks:
+            progress.remove_cancel_check(check)
+        progress.reset()
+
+    def report(self, stage, final=False):
+        self.reports.append((stage.label, stage.rows, final))
+
+    def add_cancel_check(self, check):
+        self.cancel_checks.append(check)
+        progress.add_cancel_check(check)
+
+
+class TestProgress(ProgressTestCase):
+
+    def test_text(self):
+        now = [100.0]
+        progress.timer = lambda: now[0]
+        stage = progress.Stage("Reading field statistics", 1000000)
+        now[0] += 10
+        stage.rows = 250000
+        self.assertEqual("Reading field statistics: 250,000 of 1,000,000 rows (25.0%), 25,000 rows/s, ETA 0:00:30",
+                         stage.text())
+        self.assertEqual("Reading geometry: 0 rows", progress.Stage("Reading geometry", None).text())
+
+    def test_reports_are_throttled(self):
+        progress.chunk_rows = 10
+        progress.report_interval = 3600
+        progress.start("Reading", 95)
+        self.assertEqual(95, len(list(progress.track(range(95)))))
+        progress.finish()
+        self.assertEqual([("Reading", 0, False), ("Reading", 95, True)], self.reports)
+
+        progress.report_interval = 0
+        progress.start("Reading again", 95)
+        list(progress.track(range(95)))
+        self.assertEqual([10, 20, 30, 40, 50, 60, 70, 80, 90, 95], [rows for label, rows, final in self.reports[3:]])
+
+    def test_cancel_stops_the_scan(self):
+        progress.chunk_rows = 10
+        rows_read = [0]
+        self.add_cancel_check(lambda: rows_read[0] >= 30)
+        progress.start("Reading", 100)
+        for row in progress.track(range(100)):
+            rows_read[0] += 1
+        self.assertEqual(30, rows_read[0])
+        self.assertTrue(progress.is_cancelled())
+        self.assertEqual("while Reading: 30 of 100 rows", progress.cancelled_at())
+
+
+class TestCancelledProfile(ProgressTestCase):
+
+    def setUp(self):
+        ProgressTestCase.setUp(self)
+        self.folder = tempfile.mkdtemp()
+        self.gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(self.gpkg)
+
+    def tearDown(self):
+        ProgressTestCase.tearDown(self)
+        fc_properties.clear_describe_cache()
+        run_stats.reset()
+        shutil.rmtree(self.folder)
+
+    def test_partial_report(self):
+        progress.chunk_rows = 10
+        progress.report_interval = 0
+        self.add_cancel_check(lambda: ("Reading field statistics", 30, False) in self.reports)
+        with self.assertRaises(progress.Cancelled) as raised:
+            generate_profile.generate_profile(os.path.join(self.gpkg, "sites"), self.folder, True,
+                                              processes=1, report_format="xlsx")
+        report_path = raised.exception.report_path
+        self.assertEqual(os.path.join(self.folder, "sites_fc_profile_PARTIAL.xlsx"), report_path)
+        self.assertFalse(os.path.exists(os.path.join(self.folder, "sites_fc_profile.xlsx")))
+
+        properties = read_sheet(report_path, 1)
+        self.assertEqual(("Status", "PARTIAL: cancelled while Reading field statistics: 30 of 100 rows"),
+                         (cell_text(properties, "B5"), cell_text(properties, "C5")))
+        field_statistics = read_sheet(report_path, 3)
+        self.assertEqual("30", cell_text(field_statistics, "D6"))
+        # the geometry is not read once the run is cancelled
+        self.assertNotIn("Reading geometry", [label for label, rows, final in self.reports])
@@ -0,0 +1,95 @@
+from unittest import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import backends
+import fc_properties
+import generate_profile
+import run_stats
+from backends.sqlite_backend import SqliteBackend
+from tests.test_backends import make_geopackage
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class TestSpans(TestCase):
+
+    def setUp(self):
+        run_stats.reset()
+
+    def tearDown(self):
+        run_stats.reset()
+
+    def test_timed(self):
+        for rows in [10, None, 5]:
+            with run_stats.timed("scan") as span:
+                span.rows = rows
+        with run_stats.timed("report"):
+            pass
+        scan, report = run_stats.spans()
+        self.assertEqual(("scan", 3, 15), (scan.name, scan.calls, scan.rows))
+        self.assertEqual(("report", 1, None, None), (report.name, report.calls, report.rows, report.rows_per_second))
+        self.assertTrue(scan.seconds >= 0)
+
+    def test_timed_iterator_counts_the_items_read(self):
+        read = run_stats.timed_iterator("rows", lambda n: iter(range(n)))
+        self.assertEqual([0, 1, 2], list(read(3)))
+        for item in read(10):
+            break  # a generator closed early adds what it read
+        span = run_stats.get_span("rows")
+        self.assertEqual((2, 4), (span.calls, span.rows))
+
+    def test_merge_state(self):
+        with run_stats.timed("scan") as span:
+            span.rows = 10
+        worker = run_stats.to_state()
+        worker[0]["peak_bytes"] = 2 ** 40
+        run_stats.merge_state(worker + [run_stats.Span("unused").to_state()])
+        self.assertEqual([("scan", 2, 20, 2 ** 40)],
+                         [(s.name, s.calls, s.rows, s.peak_bytes) for s in run_stats.spans()])
+
+
+class TestGenerateProfile(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(self.gpkg)
+
+    def tearDown(self):
+        fc_properties.clear_describe_cache()
+        run_stats.reset()
+        shutil.rmtree(self.folder)
+
+    def test_run_stats_json(self):
+        sites = os.path.join(self.gpkg, "sites")
+        generate_profile.generate_profile(sites, self.folder, True, processes=1)
+        with io.open(os.path.join(self.folder, "sites" + generate_profile.run_stats_ext), encoding="utf-8") as f:
+            stats = json.load(f)
+        self.assertEqual(sites, stats["fc_path"])
+        spans = dict((span["name"], span) for span in stats["spans"])
+        for name in ["generate_profile", "properties", "structure", "field_statistics", "geometry", "report"]:
+            self.assertEqual(1, spans[name]["calls"], name)
+        for name in ["backend.describe", "backend.count", "backend.iter_rows"]:
+            self.assertTrue(spans[name]["calls"] >= 1, name)
+        self.assertEqual(100, spans["field_statistics"]["rows"])
+        self.assertEqual(100, spans["geometry"]["rows"])
+        self.assertTrue(spans["backend.iter_rows"]["rows"] >= 200)
+        self.assertTrue(spans["report"]["peak_bytes"] > 0)
+
+        # timing a backend keeps its class
+        self.assertTrue(isinstance(backends.get_backend(sites), SqliteBackend))
+
+    def test_one_table_scan_by_default(self):
+        sites = os.path.join(self.gpkg, "sites")
+        # the field statistics scan and the geometry scan
+        generate_profile.generate_profile(sites, self.folder, True, processes=1)
+        self.assertEqual((2, 200), (run_stats.get_span("backend.iter_rows").calls,
+                                    run_stats.get_span("backend.iter_rows").rows))
+        # fixed histograms read the numeric fields first
+        generate_profile.generate_profile(sites, self.folder, True, processes=1, histogram_mode="fixed")
+        self.assertEqual((3, 300), (run_stats.get_span("backend.iter_rows").calls,
+                                    run_stats.get_span("backend.iter_rows").rows))
@@ -0,0 +1,70 @@
+from unittest import TestCase
+import collections
+import sampling
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class TestReservoirSample(TestCase):
+
+    def test_sample_size(self):
+        sample = sampling.reservoir_sample(range(100000), 1000, seed=1)
+        self.assertEqual(1000, len(sample))
+        self.assertEqual(1000, len(set(sample)))
+
+    def test_short_stream_returns_everything(self):
+        self.assertEqual([0, 1, 2], sorted(sampling.reservoir_sample(range(3), 10)))
+
+    def test_zero_size(self):
+        self.assertEqual([], sampling.reservoir_sample(range(10), 0))
+
+    def test_sample_is_uniform(self):
+        # each of 20 values should be chosen about 5000 * 5 / 20 times
+        counts = collections.Counter()
+        for seed in range(5000):
+            counts.update(sampling.reservoir_sample(range(20), 5, seed=seed))
+        for value in range(20):
+            self.assertAlmostEqual(1250, counts[value], delta=150)
+
+    def test_repeatable_with_seed(self):
+        self.assertEqual(sampling.reservoir_sample(range(10000), 50, seed=7),
+                         sampling.reservoir_sample(range(10000), 50, seed=7))
+
+
+class TestIntervals(TestCase):
+
+    def test_proportion_interval_contains_estimate(self):
+        low, high = sampling.proportion_interval(100, 1000)
+        self.assertTrue(low < 0.1 < high)
+        self.assertAlmostEqual(0.083, low, places=3)
+        self.assertAlmostEqual(0.120, high, places=3)
+
+    def test_proportion_interval_of_zero_is_not_degenerate(self):
+        low, high = sampling.proportion_interval(0, 100)
+        self.assertEqual(0.0, low)
+        self.assertTrue(high > 0.0)
+
+    def test_whole_population_has_no_uncertainty(self):
+        self.assertEqual((0.1, 0.1), sampling.proportion_interval(100, 1000, population_size=1000))
+
+    def test_finite_population_correction_narrows(self):
+        wide = sampling.proportion_interval(100, 1000)
+        narrow = sampling.proportion_interval(100, 1000, population_size=2000)
+        self.assertLess(narrow[1] - narrow[0], wide[1] - wide[0])
+
+    def test_corrected_interval_always_holds_the_estimate(self):
+        cases = [(0, 99, 100), (99, 99, 100), (5, 9000, 10000), (1, 9999, 10000), (0, 9999, 10000),
+                 (9999, 9999, 10000), (50, 100, 101), (3, 10, 10000000), (0, 1, 2)]
+        for successes, sample_size, population_size in cases:
+            p = float(successes) / sample_size
+            low, high = sampling.proportion_interval(successes, sample_size, population_size)
+            self.assertTrue(low <= p <= high, (successes, sample_size, population_size, low, high))
+
+    def test_mean_interval(self):
+        low, high = sampling.mean_interval(10.0, 2.0, 400)
+        self.assertAlmostEqual(9.804, low)
+        self.assertAlmostEqual(10.196, high)
+
+    def test_oid_stride_where_clause(self):
+        self.assertEqual("MOD(OBJECTID, 50) = 0", sampling.oid_stride_where_clause("OBJECTID", 50))
@@ -0,0 +1,195 @@
+from unittest import TestCase
+import collections
+import random
+import sketches
+
+
+# self.assertEqual( <expected>, <actual>)
+
+def zipf_stream(top_count, distinct, seed=1):
+    """shuffled stream where the value of rank r occurs top_count / r times (at least once)"""
+    stream = [rank for rank in range(1, distinct + 1) for _ in range(max(1, top_count // rank))]
+    random.Random(seed).shuffle(stream)
+    return stream
+
+
+class TestSpaceSaving(TestCase):
+
+    def setUp(self):
+        self.stream = zipf_stream(5000, 20000)
+        self.truth = collections.Counter(self.stream)
+
+    def build(self, capacity):
+        sketch = sketches.SpaceSaving(capacity)
+        for item in self.stream:
+            sketch.add(item)
+        return sketch
+
+    def test_memory_is_bounded(self):
+        sketch = self.build(500)
+        self.assertEqual(500, len(sketch.counts))
+        self.assertEqual(500, len(sketch._heap))
+
+    def test_error_bounds(self):
+        capacity = 500
+        sketch = self.build(capacity)
+        for item, count, error in sketch.top(100):
+            self.assertLessEqual(self.truth[item], count)
+            self.assertLessEqual(count - error, self.truth[item])
+            self.assertLessEqual(error, len(self.stream) / float(capacity))
+
+    def test_heavy_hitters_are_held(self):
+        capacity = 500
+        sketch = self.build(capacity)
+        threshold = len(self.stream) / float(capacity)
+        for item, count in self.truth.items():
+            if count > threshold:
+                self.assertIn(item, sketch.counts)
+
+    def test_seed_keeps_largest_counts(self):
+        sketch = sketches.SpaceSaving(2)
+        sketch.seed({"a": 5, "b": 1, "c": 3})
+        self.assertEqual([("a", 5, 0), ("c", 3, 0)], sketch.top(2))
+        sketch.add("b")
+        self.assertEqual(("b", 4, 3), sketch.top(3)[1])
+
+    def test_merge_keeps_error_bounds(self):
+        half = len(self.stream) // 2
+        a = sketches.SpaceSaving(500)
+        b = sketches.SpaceSaving(500)
+        for item in self.stream[:half]:
+            a.add(item)
+        for item in self.stream[half:]:
+            b.add(item)
+        a.merge(b)
+        self.assertEqual(len(self.stream), a.n)
+        self.assertEqual(500, len(a.counts))
+        for item, count, error in a.top(100):
+            self.assertLessEqual(self.truth[item], count)
+            self.assertLessEqual(count - error, self.truth[item])
+
+    def test_merge_of_small_sketches_is_exact(self):
+        a = sketches.SpaceSaving(10)
+        b = sketches.SpaceSaving(10)
+        for item in "aaabbc":
+            a.add(item)
+        for item in "abd":
+            b.add(item)
+        a.merge(b)
+        self.assertEqual([("a", 4, 0), ("b", 3, 0)], a.top(2))
+
+    def test_state_round_trip(self):
+        sketch = self.build(500)
+        copy = sketches.SpaceSaving.from_state(sketch.to_state())
+        self.assertEqual(sketch.top(100), copy.top(100))
+        copy.add(-1)
+        self.assertEqual(500, len(copy.counts))
+
+    def test_mixed_types_do_not_break_the_heap(self):
+        sketch = sketches.SpaceSaving(2)
+        for item in [1, "1", 1.5, None, "x"]:
+            sketch.add(item)
+        self.assertEqual(2, len(sketch.counts))
+
+
+class TestHyperLogLog(TestCase):
+
+    def test_estimate_within_error(self):
+        hll = sketches.HyperLogLog(12)
+        for i in range(100000):
+            hll.add("value " + str(i))
+        self.assertAlmostEqual(100000, hll.estimate(), delta=100000 * 3 * hll.standard_error)
+
+    def test_small_cardinality_uses_linear_counting(self):
+        hll = sketches.HyperLogLog(12)
+        for i in range(100):
+            hll.add(i)
+            hll.add(i)
+        self.assertAlmostEqual(100, hll.estimate(), delta=2)
+
+    def test_memory_is_registers(self):
+        self.assertEqual(4096, len(sketches.HyperLogLog(12).registers))
+        self.assertEqual(1024, len(sketches.HyperLogLog(10).registers))
+
+    def test_merge_equals_union(self):
+        a = sketches.HyperLogLog(10)
+        b = sketches.HyperLogLog(10)
+        union = sketches.HyperLogLog(10)
+        for i in range(20000):
+            (a if i % 2 else b).add(i % 15000)
+            union.add(i % 15000)
+        a.merge(b)
+        self.assertEqual(union.registers, a.registers)
+
+    def test_state_round_trip(self):
+        hll = sketches.HyperLogLog(10)
+        for i in range(5000):
+            hll.add(i)
+        copy = sketches.HyperLogLog.from_state(hll.to_state())
+        self.assertEqual(hll.registers, copy.registers)
+        self.assertEqual(hll.estimate(), copy.estimate())
+
+    def test_merge_different_precision_raises(self):
+        self.assertRaises(ValueError, sketches.HyperLogLog(10).merge, sketches.HyperLogLog(12))
+
+    def test_invalid_precision_raises(self):
+        self.assertRaises(ValueError, sketches.HyperLogLog, 3)
+
+    def test_hash64_is_stable(self):
+        # must not depend on the per-process hash() seed
+        self.assertEqual(sketches.hash64(u"abc"), sketches.hash64("abc"))
+        self.assertEqual(0xb04fd23c98500190, sketches.hash64("abc"))
+
+
+class TestKllSketch(TestCase):
+
+    def setUp(self):
+        self.values = list(range(100000))
+        random.Random(2).shuffle(self.values)
+
+    def test_quantiles_within_rank_error(self):
+        kll = sketches.KllSketch(k=200, seed=1)
+        for value in self.values:
+            kll.add(value)
+        for fraction, value in zip([0.01, 0.5, 0.99], kll.quantiles([0.01, 0.5, 0.99])):
+            self.assertAlmostEqual(fraction * 100000, value, delta=100000 * 0.02)
+
+    def test_memory_is_bounded(self):
+        kll = sketches.KllSketch(k=200, seed=1)
+        for value in self.values:
+            kll.add(value)
+        retained = sum(len(c) for c in kll.compactors)
+        self.assertLess(retained, 3 * 200 + 2 * len(kll.compactors))
+        self.assertEqual(100000, kll.n)
+
+    def test_cdf(self):
+        kll = sketches.KllSketch(k=200, seed=1)
+        for value in self.values:
+            kll.add(value)
+        below_quarter, below_all = kll.cdf([25000, 100000])
+        self.assertAlmostEqual(0.25, below_quarter, delta=0.02)
+        self.assertEqual(1.0, below_all)
+
+    def test_merge(self):
+        a = sketches.KllSketch(k=200, seed=1)
+        b = sketches.KllSketch(k=200, seed=2)
+        for value in self.values[:30000]:
+            a.add(value)
+        for value in self.values[30000:]:
+            b.add(value)
+        a.merge(b)
+        self.assertEqual(100000, a.n)
+        self.assertAlmostEqual(50000, a.quantiles([0.5])[0], delta=100000 * 0.02)
+
+    def test_state_round_trip(self):
+        kll = sketches.KllSketch(k=200, seed=1)
+        for value in self.values:
+            kll.add(value)
+        copy = sketches.KllSketch.from_state(kll.to_state(), seed=1)
+        self.assertEqual(kll.quantiles([0.1, 0.5, 0.9]), copy.quantiles([0.1, 0.5, 0.9]))
+        for value in range(1000):
+            copy.add(value)
+        self.assertEqual(101000, copy.n)
+
+    def test_empty(self):
+        self.assertEqual([None], sketches.KllSketch().quantiles([0.5]))
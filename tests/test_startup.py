@@ -0,0 +1,34 @@
+from unittest import TestCase
+import os
+import subprocess
+import sys
+
+
+# self.assertEqual( <expected>, <actual>)
+
+repo_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def modules_loaded_by(code):
+    """
+    :return: the profiler modules in sys.modules after running code in a fresh interpreter
+    :rtype: list of basestring
+    """
+    watched = ["arcpy", "xlwt", "xls_output", "generate_profile", "batch_profile", "field_properties"]
+    code += "; import sys; print(','.join(m for m in " + repr(watched) + " if m in sys.modules))"
+    out = subprocess.check_output([sys.executable, "-c", code], cwd=repo_folder)
+    return [m for m in out.decode().strip().split(",") if m]
+
+
+class TestLazyImports(TestCase):
+
+    def test_cli_module_loads_no_profiling_modules(self):
+        self.assertEqual([], modules_loaded_by("import fc_profiler"))
+
+    def test_gdb_workspace_path_does_not_import_arcpy(self):
+        self.assertEqual([], modules_loaded_by(
+            "import backends; backends.get_backend(r'c:\\\\tmp\\\\a.gdb\\\\roads').workspace(r'c:\\\\tmp\\\\a.gdb\\\\roads')"))
+
+    def test_help_exits_without_error(self):
+        self.assertEqual(0, subprocess.call([sys.executable, "fc_profiler.py", "--help"], cwd=repo_folder,
+                                            stdout=open(os.devnull, "w")))
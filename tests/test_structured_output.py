@@ -0,0 +1,77 @@
+from unittest import TestCase
+import csv
+import json
+import os
+import shutil
+import tempfile
+import fc_properties
+import generate_profile
+import structured_output
+from tests.test_backends import make_geopackage
+
+
+# self.assertEqual( <expected>, <actual>)
+
+
+class TestStructuredOutput(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        gpkg = os.path.join(self.folder, "test.gpkg")
+        make_geopackage(gpkg)
+        self.sites = os.path.join(gpkg, "sites")
+
+    def tearDown(self):
+        fc_properties.clear_describe_cache()
+        shutil.rmtree(self.folder)
+
+    def profile(self, export_format, **options):
+        generate_profile.generate_profile(self.sites, self.folder, True, export_format=export_format,
+                                          **options)
+        return os.path.join(self.folder, "sites" + structured_output.formats[export_format])
+
+    def read_jsonl(self, path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_jsonl_records(self):
+        records = self.read_jsonl(self.profile("jsonl"))
+        self.assertEqual(["fc"] + ["field"] * 5 + ["field_statistics"] * 4,
+                         [r["record_type"] for r in records])
+
+        fc = records[0]
+        self.assertEqual(("sites", 100, 5, "Point", 28356, True),
+                         (fc["fc_name"], fc["total_records"], fc["total_fields"],
+                          fc["geometry_type"], fc["crs_wkid"], fc["has_z"]))
+
+        height = [r for r in records if r["record_type"] == "field" and r["field_name"] == "height"][0]
+        self.assertEqual(("Double", True), (height["field_type"], height["field_is_nullable"]))
+
+        name_stats = [r for r in records if r["record_type"] == "field_statistics" and r["field_name"] == "name"][0]
+        self.assertEqual((100, 20, 7), (name_stats["record_count"], name_stats["null_count"],
+                                        name_stats["distinct_count"]))
+        self.assertEqual(7, len(name_stats["top_values"]))
+        self.assertIsNone(name_stats["mean"])
+
+    def test_every_record_type_has_a_fixed_schema(self):
+        expected = {"fc": structured_output.fc_keys,
+                    "field": structured_output.field_keys,
+                    "field_statistics": structured_output.field_statistics_keys}
+        for record in self.read_jsonl(self.profile("jsonl")):
+            self.assertEqual(sorted(structured_output.common_keys + expected[record["record_type"]]),
+                             sorted(record))
+            self.assertEqual(structured_output.schema_version, record["schema_version"])
+
+    def test_csv_records(self):
+        with open(self.profile("csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(structured_output.csv_columns, list(rows[0].keys()))
+        height = [r for r in rows if r["record_type"] == "field_statistics" and r["field_name"] == "height"][0]
+        self.assertEqual("1.5", height["minimum"])
+        self.assertEqual(100, sum(b["count"] for b in json.loads(height["histogram"])))
+
+    def test_cached_profile_is_exported(self):
+        cache_folder = os.path.join(self.folder, "cache")
+        self.profile("jsonl", cache_folder=cache_folder)
+        records = self.read_jsonl(self.profile("jsonl", cache_folder=cache_folder))
+        self.assertEqual(4, len([r for r in records if r["record_type"] == "field_statistics"]))
@@ -3,6 +3,8 @@ import collections
 from xls_output import write_fc_profile
 import os
 import tempfile
+import field_properties
+import sampling
 
 
 # self.assertEqual( <expected>, <actual>)
@@ -159,6 +161,38 @@ class TestWrite_fc_properties(TestCase):
 
         self.assertTrue(os.path.exists(self.xls_path))
 
+    def test_write_fc_properties_with_field_statistics(self):
+        """the optional field_statistics sheet is written"""
+        fc_properties_list = [("Feature Class", "test_fc"),
+                              ("Geometry Type", "Point")]
+
+        Row = collections.namedtuple("Row", ["field_name", "field_name_len", "field_alias",
+                                             "field_type", "field_length", "field_precision",
+                                             "field_scale", "field_is_nullable",
+                                             "field_is_required", "field_is_editable",
+                                             "field_domain"])
+        heading_row = Row("Name", "Name field len", "Alias", "Type", "Length", "Precision",
+                          "Scale", "is nullable?", "is required?", "is editable?", "domain")
+        fc_structure = (heading_row, [])
+
+        field_statistics = field_properties.scan_rows([("foo", "String"), ("bar", "Double")],
+                                                      [("a", 1.5), (None, None), ("", 2.0)])
+
+        self.assertTrue(write_fc_profile(fc_properties_list,
+                                         fc_structure,
+                                         self.xls_path,
+                                         field_statistics=field_statistics))
+        self.assertTrue(os.path.exists(self.xls_path))
+
+        # sampled statistics add confidence interval columns
+        os.remove(self.xls_path)
+        for stats in field_statistics:
+            stats.sample_info = sampling.SampleInfo("reservoir", 3, 300)
+        self.assertTrue(write_fc_profile(fc_properties_list,
+                                         fc_structure,
+                                         self.xls_path,
+                                         field_statistics=field_statistics))
+
     def tearDown(self):
         if os.path.exists(self.xls_path):
             print("deleting temp file     " + self.xls_path)
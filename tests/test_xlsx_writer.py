@@ -0,0 +1,127 @@
+from unittest import TestCase
+import collections
+import os
+import shutil
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+import field_properties
+import xls_output
+import xlsx_writer
+
+
+# self.assertEqual( <expected>, <actual>)
+
+ns = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_sheet(xlsx_path, number):
+    """:return: the parsed XML of sheet number (1 based) in the xlsx file"""
+    with zipfile.ZipFile(xlsx_path) as package:
+        for name in package.namelist():
+            ElementTree.fromstring(package.read(name))  # every part is well formed
+        return ElementTree.fromstring(package.read("xl/worksheets/sheet" + str(number) + ".xml"))
+
+
+def cell_text(sheet, reference):
+    """:return: the value of a cell as text, None if it is missing or empty"""
+    cell = sheet.find(".//x:c[@r='" + reference + "']", ns)
+    if cell is None:
+        return None
+    text = cell.find("x:is/x:t", ns)
+    if text is None:
+        text = cell.find("x:v", ns)
+    return None if text is None else text.text
+
+
+class TestXlsxWriter(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.xlsx_path = os.path.join(self.folder, "test.xlsx")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_column_letters(self):
+        self.assertEqual(["A", "Z", "AA", "AB", "XFD"],
+                         [xlsx_writer.column_letters(c) for c in [0, 25, 26, 27, 16383]])
+
+    def test_values_and_styles(self):
+        book = xlsx_writer.Workbook()
+        sheet = book.add_sheet("data")
+        sheet.write(0, 0, "a < b & c", xlsx_writer.heading_style)
+        sheet.write(0, 2, 1.5)
+        sheet.write(1, 1, True)
+        sheet.write(1, 0, None, xlsx_writer.data_percent_style)
+        book.save(self.xlsx_path)
+
+        sheet_xml = read_sheet(self.xlsx_path, 1)
+        self.assertEqual("a < b & c", cell_text(sheet_xml, "A1"))
+        self.assertEqual("1.5", cell_text(sheet_xml, "C1"))
+        self.assertEqual("1", cell_text(sheet_xml, "B2"))
+        self.assertEqual(["A2", "B2"], [c.get("r") for c in sheet_xml.findall(".//x:row[@r='2']/x:c", ns)])
+        self.assertEqual(str(xlsx_writer.heading_style),
+                         sheet_xml.find(".//x:c[@r='A1']", ns).get("s"))
+
+    def test_column_widths_set_after_the_first_row(self):
+        book = xlsx_writer.Workbook()
+        sheet = book.add_sheet("data")
+        sheet.write(0, 0, "title")
+        sheet.col(3).width = 256 * 20
+        sheet.write(1, 3, "x")
+        book.save(self.xlsx_path)
+        col = read_sheet(self.xlsx_path, 1).find("x:cols/x:col", ns)
+        self.assertEqual(("4", "20.00"), (col.get("min"), col.get("width")))
+
+    def test_rows_beyond_the_xls_limit(self):
+        book = xlsx_writer.Workbook()
+        sheet = book.add_sheet("data")
+        for row in range(70000):
+            sheet.write(row, 300, row)
+        book.save(self.xlsx_path)
+        self.assertEqual("69999", cell_text(read_sheet(self.xlsx_path, 1), "KO70000"))
+
+    def test_rows_must_be_written_in_order(self):
+        sheet = xlsx_writer.Workbook().add_sheet("data")
+        sheet.write(5, 0, "x")
+        sheet.write(5, 1, "y")
+        sheet.write(6, 0, "z")
+        self.assertRaises(ValueError, sheet.write, 5, 2, "late")
+
+
+class TestWriteFcProfileXlsx(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_fc_profile_as_xlsx(self):
+        Row = collections.namedtuple("Row", ["field_name", "field_name_len", "field_alias",
+                                             "field_type", "field_length", "field_precision",
+                                             "field_scale", "field_is_nullable",
+                                             "field_is_required", "field_is_editable",
+                                             "field_domain"])
+        heading_row = Row("Name", "Name field len", "Alias", "Type", "Length", "Precision",
+                          "Scale", "is nullable?", "is required?", "is editable?", "domain")
+        fields = [Row("F" + str(i), 2, "", "Double", 8, 0, 0, "True", "False", "True", "")
+                  for i in range(1000)]
+        field_statistics = field_properties.scan_rows([("foo", "String"), ("bar", "Double")],
+                                                      [("a", 1.5), (None, None), ("", 2.0)])
+        xlsx_path = os.path.join(self.folder, "roads_fc_profile.xlsx")
+
+        self.assertTrue(xls_output.write_fc_profile([("Feature Class", "roads")],
+                                                    (heading_row, fields),
+                                                    xlsx_path,
+                                                    field_statistics=field_statistics))
+
+        with zipfile.ZipFile(xlsx_path) as package:
+            workbook = ElementTree.fromstring(package.read("xl/workbook.xml"))
+        self.assertEqual(["fc_properties", "fc_structure", "field_statistics",
+                          "top_values", "numeric_statistics", "histograms", "text"],
+                         [s.get("name") for s in workbook.findall("x:sheets/x:sheet", ns)])
+        structure = read_sheet(xlsx_path, 2)
+        self.assertEqual("Feature Class Structure", cell_text(structure, "B2"))
+        self.assertEqual("F999", cell_text(structure, "B1005"))
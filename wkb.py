@@ -0,0 +1,107 @@
+# ----------------------------------------------------------------------------
+# wkb
+#     reading the structure of well-known binary (WKB) shapes, as returned
+#     for the SHAPE@WKB token: OGC/ISO WKB, with ISO Z/M type codes or EWKB
+#     flags.  Only the standard library is used, so walking the parts of a
+#     shape is cheap enough to do for every row of a scan.
+# ----------------------------------------------------------------------------
+import struct
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+
+# kinds of part
+point_part = 0
+path_part = 1
+exterior_ring_part = 2
+interior_ring_part = 3
+
+# the fewest vertices a part of each kind can have, closing vertex included
+minimum_vertices = {point_part: 1,
+                    path_part: 2,
+                    exterior_ring_part: 4,
+                    interior_ring_part: 4}
+
+# the coordinates in a vertex beyond x and y: ISO type code // 1000
+iso_extra_dimensions = {0: 0, 1: 1, 2: 1, 3: 2}
+
+# EWKB type flags
+ewkb_z = 0x80000000
+ewkb_m = 0x40000000
+ewkb_srid = 0x20000000
+
+
+def read_header(wkb, offset=0):
+    """
+    :param wkb: well-known binary
+    :type wkb: bytes
+
+    :param offset: where the geometry starts
+    :type offset: int
+
+    :return: (byte order, "<" or ">"; OGC geometry type 1-7; coordinates per
+             vertex; the offset after the header)
+    :rtype: tuple
+    """
+    byte_order = "<" if bytearray(wkb[offset:offset + 1])[0] == 1 else ">"
+    geometry_type, = struct.unpack_from(byte_order + "I", wkb, offset + 1)
+    offset += 5
+    dimensions = 2
+    if geometry_type & ewkb_srid:
+        offset += 4
+    if geometry_type & ewkb_z:
+        dimensions += 1
+    if geometry_type & ewkb_m:
+        dimensions += 1
+    geometry_type &= 0x0FFFFFFF
+    dimensions += iso_extra_dimensions.get(geometry_type // 1000, 0)
+    geometry_type %= 1000
+    if not 1 <= geometry_type <= 7:
+        raise ValueError("unsupported WKB geometry type: " + str(geometry_type))
+    return byte_order, geometry_type, dimensions, offset
+
+
+def _read_part_sizes(wkb, offset, parts):
+    """
+    append (kind, vertex count) for each part of the geometry at offset
+
+    :return: the offset after the geometry
+    :rtype: int
+    """
+    byte_order, geometry_type, dimensions, offset = read_header(wkb, offset)
+    if geometry_type == 1:
+        x, = struct.unpack_from(byte_order + "d", wkb, offset)
+        if x == x:  # an empty point is NaN
+            parts.append((point_part, 1))
+        return offset + 8 * dimensions
+    count, = struct.unpack_from(byte_order + "I", wkb, offset)
+    offset += 4
+    if geometry_type == 2:
+        if count:
+            parts.append((path_part, count))
+        return offset + 8 * dimensions * count
+    if geometry_type == 3:
+        for ring in range(count):
+            vertices, = struct.unpack_from(byte_order + "I", wkb, offset)
+            if vertices:
+                parts.append((exterior_ring_part if ring == 0 else interior_ring_part, vertices))
+            offset += 4 + 8 * dimensions * vertices
+        return offset
+    for member in range(count):
+        offset = _read_part_sizes(wkb, offset, parts)
+    return offset
+
+
+def part_sizes(wkb):
+    """
+    :param wkb: the well-known binary of a shape
+    :type wkb: bytes
+
+    :return: (kind, vertex count) of every part with vertices, in order;
+             none for an empty shape
+    :rtype: list of tuples
+    """
+    parts = []
+    _read_part_sizes(wkb, 0, parts)
+    return parts
@@ -1,34 +1,73 @@
 import xlwt
 import logging
 import datetime
+import collections
+import os
+import field_properties
+import sampling
+import xlsx_writer
 log = logging.getLogger()
 
+# the last row index of an xls sheet
+max_row = 65535
+
+# the density grid is shown at most this many cells a side (an xls sheet has 256 columns)
+density_display_cells = 100
+
+Styles = collections.namedtuple("Styles", ["title",
+                                           "subtitle",
+                                           "heading",
+                                           "data_aligned_left",
+                                           "data_aligned_centre",
+                                           "data_percent"])
+
+
 # ---------------------------------------------------------------------------------
-# write_fc_profile
-# writes the feature class using the xlwt library available ArcGIS 10.3.
-# xlwt cannot edit existing xls files, so all writing must be done in a single pass
+# create_workbook
+# an xlwt workbook for .xls, or a streaming xlsx_writer workbook for .xlsx,
+# which has no 65,536 row or 256 column limit.  Both take the same calls.
 # ---------------------------------------------------------------------------------
 
-def write_fc_profile(fc_property_data,
-                     fc_structure,
-                     xls_path):
-    """"
-    :param fc_property_data: a list of (key, value) pairs
-    :type fc_property_data: list of tuples
+def create_workbook(path):
+    """
+    :param path: the output file, .xls or .xlsx
+    :type path: basestring
 
-    :param fc_structure: a tuple of (headings, data)
-    :type fc_structure: tuple of (namedtuple,  list of namedtuples)
+    :rtype: xlwt.Workbook or xlsx_writer.Workbook
+    """
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        return xlsx_writer.Workbook()
+    return xlwt.Workbook()
 
-    :param xls_path: the full path to the output xls file
-    :type   xls_path: basestring
 
+def last_row(book):
     """
+    :return: the last row index of a sheet in the book
+    :rtype: int
+    """
+    return xlsx_writer.max_row if isinstance(book, xlsx_writer.Workbook) else max_row
 
-    book = xlwt.Workbook()
 
-    # ----------------------------------
-    # define styles
-    # ----------------------------------
+# ---------------------------------------------------------------------------------
+# create_styles
+# the title, heading and data styles shared by every sheet
+# ---------------------------------------------------------------------------------
+
+def create_styles(book):
+    """
+    :param book: the workbook the styles are used in
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :rtype: Styles
+    """
+    if isinstance(book, xlsx_writer.Workbook):
+        return Styles(title=xlsx_writer.title_style,
+                      subtitle=xlsx_writer.subtitle_style,
+                      heading=xlsx_writer.heading_style,
+                      data_aligned_left=xlsx_writer.data_aligned_left_style,
+                      data_aligned_centre=xlsx_writer.data_aligned_centre_style,
+                      data_percent=xlsx_writer.data_percent_style)
+
     title_style = xlwt.easyxf('font:name Century Gothic, '
                               'bold on, height 320;'
                               'align: vert centre, horz left;')
@@ -52,8 +91,63 @@ def write_fc_profile(fc_property_data,
                                             'bold off; '
                                             'align: vert centre, horz centre')
 
+    data_style_percent = xlwt.easyxf('font:name Consolas, '
+                                     'bold off; '
+                                     'align: vert centre, horz centre',
+                                     num_format_str='0.00%')
+
     book.set_colour_RGB(0x21, 250, 250, 250)  # light slate grey
 
+    return Styles(title=title_style,
+                  subtitle=subtitle_style,
+                  heading=heading_style,
+                  data_aligned_left=data_style_aligned_left,
+                  data_aligned_centre=data_style_aligned_centre,
+                  data_percent=data_style_percent)
+
+
+# ---------------------------------------------------------------------------------
+# write_fc_profile
+# writes the feature class using the xlwt library available ArcGIS 10.3, or
+# xlsx_writer for an .xlsx path.
+# neither can edit existing files, so all writing must be done in a single pass,
+# and for xlsx_writer the rows of each sheet must be written in order
+# ---------------------------------------------------------------------------------
+
+def write_fc_profile(fc_property_data,
+                     fc_structure,
+                     xls_path,
+                     field_statistics=None,
+                     geometry_statistics=None,
+                     subtype_statistics=None,
+                     run_stats=None):
+    """"
+    :param fc_property_data: a list of (key, value) pairs
+    :type fc_property_data: list of tuples
+
+    :param fc_structure: a tuple of (headings, data)
+    :type fc_structure: tuple of (namedtuple,  list of namedtuples)
+
+    :param xls_path: the full path to the output .xls or .xlsx file
+    :type   xls_path: basestring
+
+    :param field_statistics: optional per-field statistics
+    :type field_statistics: list of field_properties.FieldStatistics
+
+    :param geometry_statistics: optional statistics of the shapes
+    :type geometry_statistics: geometry_properties.GeometryStatistics
+
+    :param subtype_statistics: optional field statistics of each subtype
+    :type subtype_statistics: field_properties.SubtypeStatistics
+
+    :param run_stats: optional timing of the run so far, written last
+    :type run_stats: list of run_stats.Span
+
+    """
+
+    book = create_workbook(xls_path)
+    styles = create_styles(book)
+
     # ----------------------------------
     # Write FC properties
     # ----------------------------------
@@ -66,21 +160,21 @@ def write_fc_profile(fc_property_data,
 
     # write title
     title = "Feature Class Properties"
-    sheet_fc_properties.write(1, 1, title, title_style)
+    sheet_fc_properties.write(1, 1, title, styles.title)
 
     # write sub-title
     now = datetime.datetime.now()
     now = now.replace(second=int(round(now.second, 0)), microsecond=0)
     now = now.strftime("%d-%m-%Y %H:%M:%S")
     subtitle = "Generated on " + now
-    sheet_fc_properties.write(2, 1, subtitle, subtitle_style)
+    sheet_fc_properties.write(2, 1, subtitle, styles.subtitle)
 
     # write headings and data
     log.debug("Writing fc_property_data")
     row_num = 4  # start on row 5
     for record in fc_property_data:
-        sheet_fc_properties.write(row_num, 1, record[0], heading_style)  # row, column, value
-        sheet_fc_properties.write(row_num, 2, record[1], data_style_aligned_left)  # row, column, value
+        sheet_fc_properties.write(row_num, 1, record[0], styles.heading)  # row, column, value
+        sheet_fc_properties.write(row_num, 2, record[1], styles.data_aligned_left)  # row, column, value
         row_num = row_num + 1
 
     # ----------------------------------
@@ -104,7 +198,7 @@ def write_fc_profile(fc_property_data,
 
     # write title
     title = "Feature Class Structure"
-    sheet_fc_structure.write(1, 1, title, title_style)
+    sheet_fc_structure.write(1, 1, title, styles.title)
 
     # write headings
     headings = fc_structure[0]
@@ -112,7 +206,7 @@ def write_fc_profile(fc_property_data,
     row = 4  # heading row
     col = 1  # starting column
     for heading in headings:
-        sheet_fc_structure.write(row, col, heading, heading_style)
+        sheet_fc_structure.write(row, col, heading, styles.heading)
         col = col + 1
 
     # write data
@@ -121,19 +215,47 @@ def write_fc_profile(fc_property_data,
     row = 5  # starting row
     col = 1  # starting column
     for record in structure_records:
-        sheet_fc_structure.write(row, col, record.field_name, data_style_aligned_left)
-        sheet_fc_structure.write(row, col+1, record.field_name_len, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+2, record.field_alias, data_style_aligned_left)
-        sheet_fc_structure.write(row, col+3, record.field_type, data_style_aligned_left)
-        sheet_fc_structure.write(row, col+4, record.field_length, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+5, record.field_precision, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+6, record.field_scale, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+7, record.field_is_nullable, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+8, record.field_is_required, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+9, record.field_is_editable, data_style_aligned_centre)
-        sheet_fc_structure.write(row, col+10, record.field_domain, data_style_aligned_left)
+        sheet_fc_structure.write(row, col, record.field_name, styles.data_aligned_left)
+        sheet_fc_structure.write(row, col+1, record.field_name_len, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+2, record.field_alias, styles.data_aligned_left)
+        sheet_fc_structure.write(row, col+3, record.field_type, styles.data_aligned_left)
+        sheet_fc_structure.write(row, col+4, record.field_length, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+5, record.field_precision, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+6, record.field_scale, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+7, record.field_is_nullable, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+8, record.field_is_required, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+9, record.field_is_editable, styles.data_aligned_centre)
+        sheet_fc_structure.write(row, col+10, record.field_domain, styles.data_aligned_left)
         row = row + 1
 
+    # ----------------------------------
+    # Field statistics
+    # ----------------------------------
+    if field_statistics is not None:
+        write_field_statistics(book, styles, field_statistics)
+        write_top_values(book, styles, field_statistics)
+        write_numeric_statistics(book, styles, field_statistics)
+        write_histograms(book, styles, field_statistics)
+        write_text_checks(book, styles, field_statistics)
+        if any(stats.domain is not None for stats in field_statistics):
+            write_domain_checks(book, styles, field_statistics)
+    if subtype_statistics is not None:
+        write_subtype_statistics(book, styles, subtype_statistics)
+
+    # ----------------------------------
+    # Geometry statistics
+    # ----------------------------------
+    if geometry_statistics is not None:
+        write_geometry_statistics(book, styles, geometry_statistics)
+        if geometry_statistics.density.point_count:
+            write_density_grid(book, styles, geometry_statistics)
+
+    # ----------------------------------
+    # Run stats
+    # ----------------------------------
+    if run_stats is not None:
+        write_run_stats(book, styles, run_stats)
+
     # ----------------------------------
     # save
     # ----------------------------------
@@ -149,3 +271,932 @@ def write_fc_profile(fc_property_data,
     return True
 
 
+# ---------------------------------------------------------------------------------
+# write_field_statistics
+# writes the NULL, blank and 'no data' counts and percentages of every field
+# ---------------------------------------------------------------------------------
+
+def write_field_statistics(book, styles, field_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param field_statistics: one accumulator per profiled field
+    :type field_statistics: list of field_properties.FieldStatistics
+    """
+    log.info("writing sheet_field_statistics")
+    sheet = book.add_sheet("field_statistics", cell_overwrite_ok=True)
+
+    # set column widths
+    sheet.col(1).width = 256 * 35   # name
+    sheet.col(2).width = 256 * 14   # type
+    for col in range(3, 14):
+        sheet.col(col).width = 256 * 12
+
+    # write title
+    title = "Field Statistics"
+    sheet.write(1, 1, title, styles.title)
+    sample_info = field_statistics[0].sample_info if field_statistics else None
+    if sample_info is not None:
+        sheet.write(2, 1, sample_subtitle(sample_info), styles.subtitle)
+
+    # write headings
+    headings = ["Name", "Type", "Records",
+                "NULL", "NULL %",
+                "Blank", "Blank %",
+                "No data", "No data %",
+                "Populated", "Populated %",
+                "Distinct", "Distinct error"]
+    if sample_info is not None:
+        for col in range(14, 18):
+            sheet.col(col).width = 256 * 20
+        headings += ["NULL % CI", "Blank % CI", "No data % CI", "Populated % CI"]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    log.debug(str(len(field_statistics)) + " records in field_statistics")
+    row = 5  # starting row
+    col = 1  # starting column
+    for stats in field_statistics:
+        sheet.write(row, col, stats.field_name, styles.data_aligned_left)
+        sheet.write(row, col+1, stats.field_type, styles.data_aligned_left)
+        sheet.write(row, col+2, stats.record_count, styles.data_aligned_centre)
+        sheet.write(row, col+3, stats.null_count, styles.data_aligned_centre)
+        sheet.write(row, col+4, stats.percent(stats.null_count), styles.data_percent)
+        sheet.write(row, col+5, stats.blank_count, styles.data_aligned_centre)
+        sheet.write(row, col+6, stats.percent(stats.blank_count), styles.data_percent)
+        sheet.write(row, col+7, stats.no_data_count, styles.data_aligned_centre)
+        sheet.write(row, col+8, stats.percent(stats.no_data_count), styles.data_percent)
+        sheet.write(row, col+9, stats.populated_count, styles.data_aligned_centre)
+        sheet.write(row, col+10, stats.percent(stats.populated_count), styles.data_percent)
+        if stats.distinct is None:
+            # every value of an OID or GlobalID is distinct
+            sheet.write(row, col+11, stats.populated_count, styles.data_aligned_centre)
+            sheet.write(row, col+12, 0.0, styles.data_percent)
+        else:
+            sheet.write(row, col+11, stats.distinct.count(), styles.data_aligned_centre)
+            sheet.write(row, col+12, stats.distinct.standard_error, styles.data_percent)
+        if sample_info is not None:
+            for i, count in enumerate([stats.null_count, stats.blank_count,
+                                       stats.no_data_count, stats.populated_count]):
+                sheet.write(row, col+13+i, interval_text(stats.percent_interval(count)),
+                            styles.data_aligned_centre)
+        row = row + 1
+
+
+# ---------------------------------------------------------------------------------
+# write_top_values
+# writes the TOP N most frequent values of every field, count descending.
+# sketch counts are upper bounds, the true count is no less than count - max error
+# ---------------------------------------------------------------------------------
+
+def write_top_values(book, styles, field_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param field_statistics: one accumulator per profiled field
+    :type field_statistics: list of field_properties.FieldStatistics
+    """
+    log.info("writing sheet_top_values")
+    sheet = book.add_sheet("top_values", cell_overwrite_ok=True)
+
+    # set column widths
+    sheet.col(1).width = 256 * 35   # name
+    sheet.col(2).width = 256 * 8    # rank
+    sheet.col(3).width = 256 * 50   # value
+    for col in range(4, 8):
+        sheet.col(col).width = 256 * 12
+
+    # write title
+    title = "Top Values"
+    sheet.write(1, 1, title, styles.title)
+    sample_info = field_statistics[0].sample_info if field_statistics else None
+    if sample_info is not None:
+        sheet.write(2, 1, sample_subtitle(sample_info), styles.subtitle)
+
+    # write headings
+    headings = ["Name", "Rank", "Value", "Count", "% of records", "Max error", "Mode"]
+    if sample_info is not None:
+        sheet.col(8).width = 256 * 20
+        headings.append("% of records CI")
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for stats in field_statistics:
+        if stats.top_values is None:
+            continue
+        for rank, top_value in enumerate(stats.top_values.top(), 1):
+            if row > last_row(book):
+                log.warning("top_values truncated at " + str(last_row(book)) + " rows")
+                return
+            sheet.write(row, col, stats.field_name, styles.data_aligned_left)
+            sheet.write(row, col+1, rank, styles.data_aligned_centre)
+            sheet.write(row, col+2, cell_value(top_value.value), styles.data_aligned_left)
+            sheet.write(row, col+3, top_value.count, styles.data_aligned_centre)
+            sheet.write(row, col+4, stats.percent(top_value.count), styles.data_percent)
+            sheet.write(row, col+5, top_value.max_error, styles.data_aligned_centre)
+            sheet.write(row, col+6, stats.top_values.mode, styles.data_aligned_centre)
+            if sample_info is not None:
+                sheet.write(row, col+7, interval_text(stats.percent_interval(top_value.count)),
+                            styles.data_aligned_centre)
+            row = row + 1
+
+
+# ---------------------------------------------------------------------------------
+# write_numeric_statistics
+# writes the min, max, mean, standard deviation and percentiles of numeric fields
+# ---------------------------------------------------------------------------------
+
+def write_numeric_statistics(book, styles, field_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param field_statistics: one accumulator per profiled field
+    :type field_statistics: list of field_properties.FieldStatistics
+    """
+    log.info("writing sheet_numeric_statistics")
+    sheet = book.add_sheet("numeric_statistics", cell_overwrite_ok=True)
+    numeric_fields = [stats for stats in field_statistics if stats.numeric is not None]
+
+    # set column widths
+    sheet.col(1).width = 256 * 35   # name
+    sheet.col(2).width = 256 * 14   # type
+    for col in range(3, 20):
+        sheet.col(col).width = 256 * 14
+
+    # write title
+    title = "Numeric Statistics"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = "Percentiles are estimated by a KLL quantile sketch"
+    sheet.write(2, 1, subtitle, styles.subtitle)
+
+    # write headings
+    headings = ["Name", "Type", "Values", "Min", "Max", "Mean", "Std dev"]
+    if numeric_fields:
+        headings += ["P" + '{:g}'.format(fraction * 100)
+                     for fraction, value in numeric_fields[0].numeric.percentiles()]
+    sample_info = numeric_fields[0].sample_info if numeric_fields else None
+    if sample_info is not None:
+        sheet.write(3, 1, sample_subtitle(sample_info), styles.subtitle)
+        headings.append("Mean CI")
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for stats in numeric_fields:
+        numeric = stats.numeric
+        sheet.write(row, col, stats.field_name, styles.data_aligned_left)
+        sheet.write(row, col+1, stats.field_type, styles.data_aligned_left)
+        sheet.write(row, col+2, numeric.count, styles.data_aligned_centre)
+        sheet.write(row, col+3, numeric.minimum, styles.data_aligned_centre)
+        sheet.write(row, col+4, numeric.maximum, styles.data_aligned_centre)
+        sheet.write(row, col+5, numeric.mean if numeric.count else None, styles.data_aligned_centre)
+        sheet.write(row, col+6, numeric.standard_deviation, styles.data_aligned_centre)
+        percentile_values = numeric.percentiles()
+        for i, (fraction, value) in enumerate(percentile_values):
+            sheet.write(row, col+7+i, value, styles.data_aligned_centre)
+        if sample_info is not None:
+            low, high = sampling.mean_interval(numeric.mean, numeric.standard_deviation,
+                                               numeric.count, sample_info.population_size)
+            text = "" if low is None else "[{:g}, {:g}]".format(low, high)
+            sheet.write(row, col+7+len(percentile_values), text, styles.data_aligned_centre)
+        row = row + 1
+
+
+# ---------------------------------------------------------------------------------
+# write_histograms
+# writes the histogram bins of numeric fields as one table, ready for charting
+# ---------------------------------------------------------------------------------
+
+def write_histograms(book, styles, field_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param field_statistics: one accumulator per profiled field
+    :type field_statistics: list of field_properties.FieldStatistics
+    """
+    log.info("writing sheet_histograms")
+    sheet = book.add_sheet("histograms", cell_overwrite_ok=True)
+
+    # set column widths
+    sheet.col(1).width = 256 * 35   # name
+    for col in range(2, 8):
+        sheet.col(col).width = 256 * 14
+
+    # write title
+    title = "Histograms"
+    sheet.write(1, 1, title, styles.title)
+
+    # write headings
+    headings = ["Name", "Bin", "Lower", "Upper", "Count", "% of values", "Counts"]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for stats in field_statistics:
+        numeric = stats.numeric
+        if numeric is None:
+            continue
+        counts = "exact" if numeric.histogram_is_exact else "estimated"
+        for bin_number, histogram_bin in enumerate(numeric.histogram(), 1):
+            if row > last_row(book):
+                log.warning("histograms truncated at " + str(last_row(book)) + " rows")
+                return
+            fraction = float(histogram_bin.count) / numeric.count if numeric.count else 0.0
+            sheet.write(row, col, stats.field_name, styles.data_aligned_left)
+            sheet.write(row, col+1, bin_number, styles.data_aligned_centre)
+            sheet.write(row, col+2, histogram_bin.lower, styles.data_aligned_centre)
+            sheet.write(row, col+3, histogram_bin.upper, styles.data_aligned_centre)
+            sheet.write(row, col+4, histogram_bin.count, styles.data_aligned_centre)
+            sheet.write(row, col+5, fraction, styles.data_percent)
+            sheet.write(row, col+6, counts, styles.data_aligned_centre)
+            row = row + 1
+
+
+# ---------------------------------------------------------------------------------
+# write_text_checks
+# writes the counts of text values holding non-ASCII, Windows reserved and
+# control characters, with examples
+# ---------------------------------------------------------------------------------
+
+def write_text_checks(book, styles, field_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param field_statistics: one accumulator per profiled field
+    :type field_statistics: list of field_properties.FieldStatistics
+    """
+    log.info("writing sheet_text")
+    sheet = book.add_sheet("text", cell_overwrite_ok=True)
+    text_fields = [stats for stats in field_statistics if stats.text is not None]
+    checks = field_properties.text_checks
+
+    # set column widths
+    sheet.col(1).width = 256 * 35   # name
+    for col in range(2, 3 + 2 * len(checks)):
+        sheet.col(col).width = 256 * 14
+    for col in range(3 + 2 * len(checks), 3 + 3 * len(checks)):
+        sheet.col(col).width = 256 * 40
+
+    # write title
+    title = "Text Checks"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = 'Values holding non-ASCII, Windows reserved (< > : " / \\ | ? *) or control characters'
+    sheet.write(2, 1, subtitle, styles.subtitle)
+    sample_info = text_fields[0].sample_info if text_fields else None
+    if sample_info is not None:
+        sheet.write(3, 1, sample_subtitle(sample_info), styles.subtitle)
+
+    # write headings
+    headings = ["Name", "Values"]
+    for key, label in checks:
+        headings += [label, "% " + label]
+    headings += ["e.g. " + label for key, label in checks]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for stats in text_fields:
+        sheet.write(row, col, stats.field_name, styles.data_aligned_left)
+        sheet.write(row, col+1, stats.populated_count, styles.data_aligned_centre)
+        for i, (key, label) in enumerate(checks):
+            sheet.write(row, col+2+2*i, stats.text.counts[key], styles.data_aligned_centre)
+            sheet.write(row, col+3+2*i, stats.percent(stats.text.counts[key]), styles.data_percent)
+        for i, (key, label) in enumerate(checks):
+            examples = " | ".join(printable_text(example) for example in stats.text.examples[key])
+            sheet.write(row, col+2+2*len(checks)+i, examples, styles.data_aligned_left)
+        row = row + 1
+
+
+# ---------------------------------------------------------------------------------
+# write_domain_checks
+# writes the defined domain of every field with one, the domain of the values
+# recorded, and the values outside the defined domain
+# ---------------------------------------------------------------------------------
+
+def write_domain_checks(book, styles, field_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param field_statistics: one accumulator per profiled field
+    :type field_statistics: list of field_properties.FieldStatistics
+    """
+    log.info("writing sheet_domains")
+    sheet = book.add_sheet("domains", cell_overwrite_ok=True)
+    domain_fields = [stats for stats in field_statistics if stats.domain is not None]
+
+    # set column widths
+    sheet.col(1).width = 256 * 35   # name
+    sheet.col(2).width = 256 * 30   # domain
+    sheet.col(3).width = 256 * 12   # type
+    sheet.col(4).width = 256 * 30   # defined
+    sheet.col(5).width = 256 * 30   # recorded
+    for col in range(6, 9):
+        sheet.col(col).width = 256 * 14
+    sheet.col(9).width = 256 * 60   # examples
+
+    # write title
+    title = "Domain Checks"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = "Values outside the domain of their field"
+    sheet.write(2, 1, subtitle, styles.subtitle)
+    sample_info = domain_fields[0].sample_info if domain_fields else None
+    if sample_info is not None:
+        sheet.write(3, 1, sample_subtitle(sample_info), styles.subtitle)
+
+    # write headings
+    headings = ["Name", "Domain", "Type", "Defined Domain", "Recorded Domain",
+                "Values", "Out of Domain", "% Out of Domain", "e.g."]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for stats in domain_fields:
+        domain = stats.domain
+        sheet.write(row, col, stats.field_name, styles.data_aligned_left)
+        sheet.write(row, col+1, domain.domain_name, styles.data_aligned_left)
+        sheet.write(row, col+2, domain.domain_type, styles.data_aligned_left)
+        sheet.write(row, col+3, domain.defined_domain, styles.data_aligned_left)
+        sheet.write(row, col+4, domain.recorded_domain, styles.data_aligned_left)
+        sheet.write(row, col+5, domain.checked_count, styles.data_aligned_centre)
+        sheet.write(row, col+6, domain.out_of_domain_count, styles.data_aligned_centre)
+        sheet.write(row, col+7, stats.percent(domain.out_of_domain_count), styles.data_percent)
+        sheet.write(row, col+8, examples_text(domain.examples), styles.data_aligned_left)
+        row = row + 1
+
+
+# ---------------------------------------------------------------------------------
+# write_subtype_statistics
+# writes the records of each subtype code, then the statistics of every field
+# within each subtype, with the subtype's default value and domain
+# ---------------------------------------------------------------------------------
+
+def write_subtype_statistics(book, styles, subtype_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param subtype_statistics: the field statistics of each subtype
+    :type subtype_statistics: field_properties.SubtypeStatistics
+    """
+    log.info("writing sheet_subtypes")
+    sheet = book.add_sheet("subtypes", cell_overwrite_ok=True)
+    codes = subtype_statistics.codes()
+    total = sum(subtype_statistics.record_count(code) for code in codes)
+
+    # set column widths
+    sheet.col(1).width = 256 * 10   # code
+    sheet.col(2).width = 256 * 30   # subtype
+    sheet.col(3).width = 256 * 35   # field
+    for col in range(4, 15):
+        sheet.col(col).width = 256 * 14
+    sheet.col(12).width = 256 * 30  # domain
+    sheet.col(15).width = 256 * 40  # examples
+
+    # write title
+    title = "Subtype Statistics"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = "Subtype field " + subtype_statistics.subtype_field
+    sheet.write(2, 1, subtitle, styles.subtitle)
+    sample_info = None
+    if codes:
+        sample_info = subtype_statistics.fields[codes[0]][0].sample_info
+    if sample_info is not None:
+        sheet.write(3, 1, sample_subtitle(sample_info), styles.subtitle)
+
+    # write the records of each subtype
+    row = 4  # heading row
+    for col, heading in enumerate(["Code", "Subtype", "Default Subtype", "Records", "Records %"], 1):
+        sheet.write(row, col, heading, styles.heading)
+    row = 5  # starting row
+    col = 1  # starting column
+    for code in codes:
+        record_count = subtype_statistics.record_count(code)
+        subtype = subtype_statistics.subtypes.get(code)
+        sheet.write(row, col, cell_value(code), styles.data_aligned_centre)
+        sheet.write(row, col+1, subtype_statistics.name(code), styles.data_aligned_left)
+        sheet.write(row, col+2, "Yes" if subtype is not None and subtype.is_default else "",
+                    styles.data_aligned_centre)
+        sheet.write(row, col+3, record_count, styles.data_aligned_centre)
+        sheet.write(row, col+4, float(record_count) / total if total else 0.0, styles.data_percent)
+        row = row + 1
+
+    # write the field statistics of each subtype
+    row = row + 1  # heading row
+    headings = ["Code", "Subtype", "Field", "Default Value", "Records",
+                "NULL", "NULL %", "Distinct", "Min", "Max", "Mean",
+                "Domain", "Out of Domain", "Out of Domain %", "e.g."]
+    for col, heading in enumerate(headings, 1):
+        sheet.write(row, col, heading, styles.heading)
+    row = row + 1  # starting row
+    col = 1  # starting column
+    for code in codes:
+        subtype = subtype_statistics.subtypes.get(code)
+        for stats in subtype_statistics.fields[code]:
+            if row > last_row(book):
+                log.warning("subtypes truncated at " + str(last_row(book)) + " rows")
+                return
+            default = subtype.defaults.get(stats.field_name) if subtype is not None else None
+            sheet.write(row, col, cell_value(code), styles.data_aligned_centre)
+            sheet.write(row, col+1, subtype_statistics.name(code), styles.data_aligned_left)
+            sheet.write(row, col+2, stats.field_name, styles.data_aligned_left)
+            sheet.write(row, col+3, cell_value(default), styles.data_aligned_left)
+            sheet.write(row, col+4, stats.record_count, styles.data_aligned_centre)
+            sheet.write(row, col+5, stats.null_count, styles.data_aligned_centre)
+            sheet.write(row, col+6, stats.percent(stats.null_count), styles.data_percent)
+            distinct = stats.populated_count if stats.distinct is None else stats.distinct.count()
+            sheet.write(row, col+7, distinct, styles.data_aligned_centre)
+            numeric = stats.numeric
+            if numeric is not None and numeric.count:
+                sheet.write(row, col+8, numeric.minimum, styles.data_aligned_centre)
+                sheet.write(row, col+9, numeric.maximum, styles.data_aligned_centre)
+                sheet.write(row, col+10, numeric.mean, styles.data_aligned_centre)
+            if stats.domain is not None:
+                domain = stats.domain
+                sheet.write(row, col+11, domain.domain_name, styles.data_aligned_left)
+                sheet.write(row, col+12, domain.out_of_domain_count, styles.data_aligned_centre)
+                sheet.write(row, col+13, stats.percent(domain.out_of_domain_count), styles.data_percent)
+                sheet.write(row, col+14, examples_text(domain.examples), styles.data_aligned_left)
+            row = row + 1
+
+
+def examples_text(examples):
+    """
+    :param examples: field values
+    :type examples: list
+
+    :return: the values separated by " | ", text with printable_text
+    :rtype: basestring
+    """
+    return " | ".join(printable_text(example) if isinstance(example, field_properties.string_types)
+                      else str(cell_value(example)) for example in examples)
+
+
+def printable_text(value):
+    """
+    :return: the value with control characters written as escapes, e.g. \x07,
+             so they can be seen (and an .xlsx can hold them)
+    :rtype: basestring
+    """
+    return "".join(c if u" " <= c != u"\x7f" else "\\x{:02x}".format(ord(c)) for c in value)
+
+
+# ---------------------------------------------------------------------------------
+# write_geometry_statistics
+# writes the shape counts, extent, area and length statistics and the size
+# distributions (by power of ten) of a feature class
+# ---------------------------------------------------------------------------------
+
+def write_geometry_statistics(book, styles, geometry_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param geometry_statistics: the statistics of the shapes
+    :type geometry_statistics: geometry_properties.GeometryStatistics
+    """
+    log.info("writing sheet_geometry")
+    sheet = book.add_sheet("geometry", cell_overwrite_ok=True)
+    stats = geometry_statistics
+
+    # areas for polygons, lengths (perimeters) for polylines and polygons
+    sizes = []
+    if stats.shape_type in ("Polygon", "MultiPatch"):
+        sizes.append(("Area", stats.areas))
+    if stats.shape_type in ("Polyline", "Polygon", "MultiPatch"):
+        sizes.append(("Length", stats.lengths))
+
+    # set column widths
+    sheet.col(1).width = 256 * 18
+    for col in range(2, 9):
+        sheet.col(col).width = 256 * 16
+
+    # write title
+    title = "Geometry Statistics"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = "Planar measures in the feature class units; percentiles are estimated from log10 bins"
+    sheet.write(2, 1, subtitle, styles.subtitle)
+
+    # write shape counts, extent and mean centre
+    extent = stats.extent or (None, None, None, None)
+    mean_centre = stats.mean_centre or (None, None)
+    properties = [("Shape Type", stats.shape_type),
+                  ("Records", stats.record_count),
+                  ("NULL shapes", stats.null_count),
+                  ("Empty shapes", stats.empty_count),
+                  ("Measured shapes", stats.measured_count),
+                  ("XMin", extent[0]),
+                  ("YMin", extent[1]),
+                  ("XMax", extent[2]),
+                  ("YMax", extent[3]),
+                  ("Mean centre X", mean_centre[0]),
+                  ("Mean centre Y", mean_centre[1])]
+    row = 4  # starting row
+    for heading, value in properties:
+        sheet.write(row, 1, heading, styles.heading)
+        sheet.write(row, 2, value, styles.data_aligned_centre)
+        row = row + 1
+    if not sizes:
+        return
+
+    # write size statistics, one column per size
+    row = row + 1
+    sheet.write(row, 1, "Statistic", styles.heading)
+    for col, (name, distribution) in enumerate(sizes, 2):
+        sheet.write(row, col, name, styles.heading)
+    headings = ["Zero", "Min", "Max", "Mean", "Total"]
+    headings += ["P" + '{:g}'.format(fraction * 100) for fraction, value in stats.areas.percentiles()]
+    columns = [[d.zero_count, d.minimum, d.maximum, d.mean, d.total] + [v for f, v in d.percentiles()]
+               for name, d in sizes]
+    for i, heading in enumerate(headings):
+        row = row + 1
+        sheet.write(row, 1, heading, styles.heading)
+        for col, values in enumerate(columns, 2):
+            sheet.write(row, col, values[i], styles.data_aligned_centre)
+
+    # write the size distributions
+    row = row + 2
+    headings = ["Size", "Lower", "Upper", "Count", "% of shapes"]
+    for col, heading in enumerate(headings, 1):
+        sheet.write(row, col, heading, styles.heading)
+    for name, distribution in sizes:
+        for size_bin in distribution.histogram():
+            row = row + 1
+            fraction = float(size_bin.count) / distribution.count if distribution.count else 0.0
+            sheet.write(row, 1, name, styles.data_aligned_left)
+            sheet.write(row, 2, size_bin.lower, styles.data_aligned_centre)
+            sheet.write(row, 3, size_bin.upper, styles.data_aligned_centre)
+            sheet.write(row, 4, size_bin.count, styles.data_aligned_centre)
+            sheet.write(row, 5, fraction, styles.data_percent)
+
+
+# ---------------------------------------------------------------------------------
+# write_density_grid
+# writes the density grid of the centroids: a summary with the skew, the
+# densest cells, and the grid itself with north at the top, ready for a
+# colour scale
+# ---------------------------------------------------------------------------------
+
+def write_density_grid(book, styles, geometry_statistics):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param geometry_statistics: the statistics of the shapes, with their density grid
+    :type geometry_statistics: geometry_properties.GeometryStatistics
+    """
+    log.info("writing sheet_density")
+    sheet = book.add_sheet("density", cell_overwrite_ok=True)
+    grid = geometry_statistics.density
+    units = geometry_statistics.units
+
+    # set column widths
+    sheet.col(1).width = 256 * 24
+    for col in range(2, 9):
+        sheet.col(col).width = 256 * 14
+
+    # write title
+    title = "Density Grid"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = "Shape centroids per {:g} {} cell".format(grid.cell_size, units)
+    sheet.write(2, 1, subtitle, styles.subtitle)
+
+    # write summary
+    row_count, column_count = grid.counts.shape
+    occupied = int((grid.counts > 0).sum())
+    extent = grid.extent
+    properties = [("Cell size", grid.cell_size),
+                  ("Units", units),
+                  ("Columns", column_count),
+                  ("Rows", row_count),
+                  ("XMin", extent[0]),
+                  ("YMin", extent[1]),
+                  ("XMax", extent[2]),
+                  ("YMax", extent[3]),
+                  ("Occupied cells", occupied),
+                  ("Empty cells", row_count * column_count - occupied),
+                  ("Max per cell", int(grid.counts.max())),
+                  ("Mean per occupied cell", float(grid.point_count) / occupied),
+                  ("Skew (Gini, 0 to 1)", grid.gini())]
+    row = 4  # starting row
+    for heading, value in properties:
+        sheet.write(row, 1, heading, styles.heading)
+        sheet.write(row, 2, value, styles.data_aligned_centre)
+        row = row + 1
+
+    # write the densest cells
+    row = row + 1
+    headings = ["Rank", "XMin", "YMin", "XMax", "YMax", "Count", "% of shapes"]
+    for col, heading in enumerate(headings, 1):
+        sheet.write(row, col, heading, styles.heading)
+    for rank, cell in enumerate(grid.densest(), 1):
+        row = row + 1
+        sheet.write(row, 1, rank, styles.data_aligned_centre)
+        sheet.write(row, 2, cell.xmin, styles.data_aligned_centre)
+        sheet.write(row, 3, cell.ymin, styles.data_aligned_centre)
+        sheet.write(row, 4, cell.xmax, styles.data_aligned_centre)
+        sheet.write(row, 5, cell.ymax, styles.data_aligned_centre)
+        sheet.write(row, 6, cell.count, styles.data_aligned_centre)
+        sheet.write(row, 7, float(cell.count) / grid.point_count, styles.data_percent)
+
+    # write the grid, north at the top: YMin of each row down the side, XMin of each column across
+    display = grid.coarsened(density_display_cells)
+    row = row + 2
+    sheet.write(row, 1, "Grid, {:g} {} cells".format(display.cell_size, units), styles.heading)
+    display_rows, display_columns = display.counts.shape
+    for column in range(display_columns):
+        sheet.write(row, column + 2, display.cell(0, column).xmin, styles.heading)
+    for grid_row in range(display_rows - 1, -1, -1):
+        row = row + 1
+        sheet.write(row, 1, display.cell(grid_row, 0).ymin, styles.heading)
+        for column in range(display_columns):
+            sheet.write(row, column + 2, int(display.counts[grid_row, column]), styles.data_aligned_centre)
+
+
+# ---------------------------------------------------------------------------------
+# write_run_stats
+# writes the calls, wall time, rows and peak memory of each stage and backend
+# call; saving the workbook comes after, so its time is only in the JSON
+# ---------------------------------------------------------------------------------
+
+def write_run_stats(book, styles, spans):
+    """
+    :param book: the workbook to add the sheet to
+    :type book: xlwt.Workbook or xlsx_writer.Workbook
+
+    :param styles: the workbook styles
+    :type styles: Styles
+
+    :param spans: the spans of the run so far; those not yet ended are left out
+    :type spans: list of run_stats.Span
+    """
+    log.info("writing sheet_run_stats")
+    sheet = book.add_sheet("run_stats", cell_overwrite_ok=True)
+
+    # set column widths
+    sheet.col(1).width = 256 * 30   # span
+    for col in range(2, 7):
+        sheet.col(col).width = 256 * 14
+
+    # write title
+    title = "Run Stats"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = "Wall time of each stage and backend call, to the end of the report's last sheet"
+    sheet.write(2, 1, subtitle, styles.subtitle)
+
+    # write headings
+    headings = ["Span", "Calls", "Seconds", "Rows", "Rows/s", "Peak Memory (MB)"]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for span in spans:
+        if not span.calls:
+            continue
+        rows_per_second = span.rows_per_second
+        sheet.write(row, col, span.name, styles.data_aligned_left)
+        sheet.write(row, col+1, span.calls, styles.data_aligned_centre)
+        sheet.write(row, col+2, round(span.seconds, 3), styles.data_aligned_centre)
+        sheet.write(row, col+3, span.rows, styles.data_aligned_centre)
+        sheet.write(row, col+4, None if rows_per_second is None else int(rows_per_second),
+                    styles.data_aligned_centre)
+        sheet.write(row, col+5, None if span.peak_bytes is None else round(span.peak_bytes / 1048576.0, 1),
+                    styles.data_aligned_centre)
+        row = row + 1
+
+
+def sample_subtitle(sample_info):
+    """
+    :param sample_info: how the records were sampled
+    :type sample_info: sampling.SampleInfo
+
+    :rtype: basestring
+    """
+    return ("SAMPLED: from {:,} of {:,} records ({}), with 95% confidence intervals"
+            .format(sample_info.sample_size, sample_info.population_size, sample_info.method))
+
+
+def interval_text(interval):
+    """
+    :param interval: (low, high) fractions
+    :type interval: tuple of float
+
+    :rtype: basestring
+    """
+    return "[{:.2%}, {:.2%}]".format(*interval)
+
+
+def cell_value(value):
+    """
+    :param value: a field value
+    :return: the value in a form xlwt can write without a date format
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return str(value)
+    return value
+
+
+# ---------------------------------------------------------------------------------
+# write_run_summary
+# writes one row per dataset profiled by batch_profile.profile_gdb
+# ---------------------------------------------------------------------------------
+
+def write_run_summary(gdb_path, results, xls_path):
+    """
+    :param gdb_path: the geodatabase that was profiled
+    :type gdb_path: basestring
+
+    :param results: one result per dataset
+    :type results: list of batch_profile.ProfileResult
+
+    :param xls_path: the full path to the output .xls or .xlsx file
+    :type xls_path: basestring
+    """
+    book = create_workbook(xls_path)
+    styles = create_styles(book)
+
+    log.info("writing sheet_run_summary")
+    sheet = book.add_sheet("run_summary", cell_overwrite_ok=True)
+
+    # set column widths
+    sheet.col(1).width = 256 * 80   # dataset
+    sheet.col(2).width = 256 * 12   # status
+    sheet.col(3).width = 256 * 16   # duration
+    sheet.col(4).width = 256 * 80   # report
+    sheet.col(5).width = 256 * 80   # error
+
+    # write title
+    title = "Geodatabase Profile Summary"
+    sheet.write(1, 1, title, styles.title)
+    failed = len([r for r in results if r.status == "FAILED"])
+    cancelled = len([r for r in results if r.status == "CANCELLED"])
+    subtitle = gdb_path + ": " + str(len(results)) + " datasets, " + str(failed) + " failed"
+    if cancelled:
+        subtitle += ", " + str(cancelled) + " CANCELLED"
+    sheet.write(2, 1, subtitle, styles.subtitle)
+
+    # write headings
+    headings = ["Dataset", "Status", "Duration", "Report", "Error"]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for result in results:
+        error = result.error.strip().splitlines()[-1] if result.error else ""
+        sheet.write(row, col, result.dataset_path, styles.data_aligned_left)
+        sheet.write(row, col+1, result.status, styles.data_aligned_centre)
+        sheet.write(row, col+2, str(result.duration), styles.data_aligned_centre)
+        sheet.write(row, col+3, result.report_path, styles.data_aligned_left)
+        sheet.write(row, col+4, error, styles.data_aligned_left)
+        row = row + 1
+
+    log.debug("Saving " + xls_path)
+    book.save(xls_path)
+    return True
+
+
+# ---------------------------------------------------------------------------------
+# write_profile_diff
+# writes one row per change found by profile_diff.diff_profiles
+# ---------------------------------------------------------------------------------
+
+def change_value(value):
+    """
+    :param value: the old or new value of a profile_diff.Change
+    :return: the value as cell_value, a tuple such as a CRS (wkid, name) as "wkid, name"
+    """
+    if isinstance(value, tuple):
+        return ", ".join(str(cell_value(item)) for item in value)
+    return cell_value(value)
+
+
+def write_profile_diff(old_path, new_path, changes, xls_path):
+    """
+    :param old_path: the old profiles that were compared
+    :type old_path: basestring
+
+    :param new_path: the new profiles that were compared
+    :type new_path: basestring
+
+    :param changes: the changes, by feature class
+    :type changes: list of profile_diff.Change
+
+    :param xls_path: the full path to the output .xls or .xlsx file
+    :type xls_path: basestring
+    """
+    book = create_workbook(xls_path)
+    styles = create_styles(book)
+
+    log.info("writing sheet_profile_diff")
+    sheet = book.add_sheet("profile_diff", cell_overwrite_ok=True)
+
+    # set column widths
+    sheet.col(1).width = 256 * 40   # feature class
+    sheet.col(2).width = 256 * 35   # field
+    sheet.col(3).width = 256 * 22   # change
+    sheet.col(4).width = 256 * 30   # old
+    sheet.col(5).width = 256 * 30   # new
+
+    # write title
+    title = "Profile Changes"
+    sheet.write(1, 1, title, styles.title)
+    subtitle = old_path + " to " + new_path + ": " + str(len(changes)) + " changes"
+    sheet.write(2, 1, subtitle, styles.subtitle)
+
+    # write headings
+    headings = ["Feature Class", "Field", "Change", "Old", "New"]
+    row = 4  # heading row
+    col = 1  # starting column
+    for heading in headings:
+        sheet.write(row, col, heading, styles.heading)
+        col = col + 1
+
+    # write data
+    row = 5  # starting row
+    col = 1  # starting column
+    for change in changes:
+        if row > last_row(book):
+            log.warning("profile_diff truncated at " + str(last_row(book)) + " rows")
+            break
+        sheet.write(row, col, change.fc_name, styles.data_aligned_left)
+        sheet.write(row, col+1, change.field_name, styles.data_aligned_left)
+        sheet.write(row, col+2, change.change, styles.data_aligned_left)
+        sheet.write(row, col+3, change_value(change.old), styles.data_aligned_centre)
+        sheet.write(row, col+4, change_value(change.new), styles.data_aligned_centre)
+        row = row + 1
+
+    log.debug("Saving " + xls_path)
+    book.save(xls_path)
+    return True
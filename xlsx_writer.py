@@ -0,0 +1,293 @@
+import datetime
+import logging
+import math
+import numbers
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+log = logging.getLogger()
+
+# --------------------------------------------
+# run config (globals) - not user configurable
+# --------------------------------------------
+max_row = 1048575  # the last row index of an xlsx sheet
+max_col = 16383  # the last column index of an xlsx sheet
+
+# cell style indexes into <cellXfs> in styles_xml, in xls_output.Styles order
+title_style = 1
+subtitle_style = 2
+heading_style = 3
+data_aligned_left_style = 4
+data_aligned_centre_style = 5
+data_percent_style = 6
+
+# the same fonts, fill, border and number format as the xlwt styles in xls_output
+styles_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="5">
+<font><sz val="10"/><name val="Arial"/></font>
+<font><b/><sz val="16"/><name val="Century Gothic"/></font>
+<font><i/><sz val="8"/><name val="Century Gothic"/></font>
+<font><b/><sz val="10"/><color rgb="FF808080"/><name val="Century Gothic"/></font>
+<font><sz val="10"/><name val="Consolas"/></font>
+</fonts>
+<fills count="3">
+<fill><patternFill patternType="none"/></fill>
+<fill><patternFill patternType="gray125"/></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FFFAFAFA"/><bgColor indexed="64"/></patternFill></fill>
+</fills>
+<borders count="2">
+<border><left/><right/><top/><bottom/><diagonal/></border>
+<border><left/><right/><top/><bottom style="thin"><color rgb="FFC0C0C0"/></bottom><diagonal/></border>
+</borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="7">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="left" vertical="center"/></xf>
+<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="left" vertical="center"/></xf>
+<xf numFmtId="0" fontId="3" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="left" vertical="center"/></xf>
+<xf numFmtId="0" fontId="4" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="left" vertical="center"/></xf>
+<xf numFmtId="0" fontId="4" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="center" vertical="center"/></xf>
+<xf numFmtId="10" fontId="4" fillId="0" borderId="0" xfId="0" applyNumberFormat="1" applyFont="1" applyAlignment="1"><alignment horizontal="center" vertical="center"/></xf>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>
+"""
+
+content_types_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+{sheets}</Types>
+"""
+
+content_type_sheet_xml = ('<Override PartName="/xl/worksheets/sheet{number}.xml" ContentType='
+                          '"application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\n')
+
+root_rels_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>
+"""
+
+workbook_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets>
+{sheets}</sheets>
+</workbook>
+"""
+
+workbook_rels_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+{sheets}<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>
+"""
+
+sheet_header_xml = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\n')
+
+# characters XML 1.0 cannot hold, even escaped
+illegal_xml_chars = re.compile(u"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+# ----------------------------------------------------------------------------
+# xlsx_writer
+#     a streaming .xlsx writer with the parts of the xlwt API that
+#     xls_output uses: Workbook.add_sheet, Worksheet.col(n).width,
+#     Worksheet.write(row, col, value, style) and Workbook.save.
+#
+#     Each sheet's rows are written to a temporary file as they complete,
+#     and save() zips those files, so memory stays flat however many rows
+#     are written.  The price is that rows must be written in order: a
+#     write to an earlier row than the current one raises ValueError.
+#     Strings are written inline rather than to a shared string table,
+#     which would have to be held in memory until the end.
+# ----------------------------------------------------------------------------
+
+def column_letters(col):
+    """
+    :param col: a zero based column index
+    :type col: int
+
+    :return: the column reference, e.g. 0 is A, 27 is AB
+    :rtype: basestring
+    """
+    letters = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def cell_xml(row, col, value, style):
+    """
+    :return: the <c> element of one cell
+    :rtype: basestring
+    """
+    reference = column_letters(col) + str(row + 1)
+    style_attribute = ' s="' + str(style) + '"' if style else ""
+    if value is None:
+        return '<c r="' + reference + '"' + style_attribute + '/>'
+    if isinstance(value, bool):
+        return '<c r="' + reference + '"' + style_attribute + ' t="b"><v>' + str(int(value)) + '</v></c>'
+    if isinstance(value, numbers.Real) and not (math.isnan(value) or math.isinf(value)):
+        text = repr(value) if isinstance(value, float) else str(int(value))
+        return '<c r="' + reference + '"' + style_attribute + '><v>' + text + '</v></c>'
+    if isinstance(value, (datetime.date, datetime.time)):
+        value = str(value)
+    elif not isinstance(value, type(u"")):
+        value = value.decode("utf-8") if isinstance(value, bytes) else type(u"")(value)
+    text = escape(illegal_xml_chars.sub(u"", value))
+    return ('<c r="' + reference + '"' + style_attribute + ' t="inlineStr"><is><t xml:space="preserve">' +
+            text + '</t></is></c>')
+
+
+class Column(object):
+    """the width of a column, in 1/256ths of a character as in xlwt"""
+
+    def __init__(self):
+        self.width = None
+
+
+class Worksheet(object):
+
+    def __init__(self, name, temp_folder):
+        """
+        :param name: the sheet name
+        :type name: basestring
+
+        :param temp_folder: where the sheet XML is written until the workbook is saved
+        :type temp_folder: basestring
+        """
+        self.name = name
+        self.path = os.path.join(temp_folder, "sheet" + str(id(self)) + ".xml")
+        self.columns = {}
+        self.row_count = 0
+        self._rows_file = None
+        self._row = None
+        self._cells = {}
+
+    def col(self, col):
+        """
+        :param col: a zero based column index
+        :type col: int
+
+        :rtype: Column
+        """
+        return self.columns.setdefault(col, Column())
+
+    def _flush_row(self):
+        """write the buffered row"""
+        if self._row is None:
+            return
+        if self._rows_file is None:
+            self._rows_file = open(self.path + ".rows", "wb")
+        parts = ['<row r="' + str(self._row + 1) + '">']
+        parts.extend(self._cells[col] for col in sorted(self._cells))
+        parts.append("</row>\n")
+        self._rows_file.write(u"".join(parts).encode("utf-8"))
+        self.row_count += 1
+        self._row = None
+        self._cells = {}
+
+    def write(self, row, col, value, style=0):
+        """
+        :param row: a zero based row index, no less than the last row written
+        :type row: int
+
+        :param col: a zero based column index
+        :type col: int
+
+        :param value: a string, number, bool, date or None
+        :param style: a cell style index, e.g. xlsx_writer.heading_style
+        :type style: int
+        """
+        if row > max_row or col > max_col:
+            raise ValueError("cell (" + str(row) + ", " + str(col) + ") is beyond the xlsx sheet limits")
+        if self._row is not None and row != self._row:
+            if row < self._row:
+                raise ValueError("sheet " + self.name + " rows must be written in order: row " +
+                                 str(row) + " after row " + str(self._row))
+            self._flush_row()
+        self._row = row
+        self._cells[col] = cell_xml(row, col, value, style)
+
+    def close(self):
+        """
+        write the sheet XML to self.path: the column widths, which may be set
+        at any time, come before the rows, so the rows are copied in after them
+        """
+        self._flush_row()
+        with open(self.path, "wb") as sheet_file:
+            sheet_file.write(sheet_header_xml.encode("utf-8"))
+            widths = [(col, column.width) for col, column in sorted(self.columns.items())
+                      if column.width is not None]
+            if widths:
+                sheet_file.write(b"<cols>")
+                for col, width in widths:
+                    sheet_file.write(('<col min="{0}" max="{0}" width="{1:.2f}" customWidth="1"/>'
+                                      .format(col + 1, width / 256.0)).encode("utf-8"))
+                sheet_file.write(b"</cols>\n")
+            sheet_file.write(b"<sheetData>\n")
+            if self._rows_file is not None:
+                self._rows_file.close()
+                with open(self._rows_file.name, "rb") as rows_file:
+                    shutil.copyfileobj(rows_file, sheet_file)
+                os.remove(self._rows_file.name)
+                self._rows_file = None
+            sheet_file.write(b"</sheetData>\n</worksheet>\n")
+
+
+class Workbook(object):
+
+    def __init__(self):
+        self.sheets = []
+        self.temp_folder = tempfile.mkdtemp(prefix="xlsx_")
+
+    def add_sheet(self, name, cell_overwrite_ok=True):
+        """
+        :param name: the sheet name
+        :type name: basestring
+
+        :param cell_overwrite_ok: accepted for xlwt compatibility; a cell of
+                                  the current row can be written again
+        :type cell_overwrite_ok: bool
+
+        :rtype: Worksheet
+        """
+        sheet = Worksheet(name, self.temp_folder)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, xlsx_path):
+        """
+        :param xlsx_path: the full path to the output xlsx file
+        :type xlsx_path: basestring
+        """
+        try:
+            for sheet in self.sheets:
+                sheet.close()
+            numbers = range(1, len(self.sheets) + 1)
+            with zipfile.ZipFile(xlsx_path, "w", zipfile.ZIP_DEFLATED) as package:
+                package.writestr("[Content_Types].xml", content_types_xml.format(
+                    sheets="".join(content_type_sheet_xml.format(number=n) for n in numbers)))
+                package.writestr("_rels/.rels", root_rels_xml)
+                package.writestr("xl/workbook.xml", workbook_xml.format(sheets="".join(
+                    '<sheet name="{0}" sheetId="{1}" r:id="rId{1}"/>\n'.format(escape(sheet.name, {'"': "&quot;"}), n)
+                    for n, sheet in zip(numbers, self.sheets))).encode("utf-8"))
+                package.writestr("xl/_rels/workbook.xml.rels", workbook_rels_xml.format(sheets="".join(
+                    '<Relationship Id="rId{0}" Type="http://schemas.openxmlformats.org/officeDocument/'
+                    '2006/relationships/worksheet" Target="worksheets/sheet{0}.xml"/>\n'.format(n)
+                    for n in numbers)))
+                package.writestr("xl/styles.xml", styles_xml)
+                for n, sheet in zip(numbers, self.sheets):
+                    package.write(sheet.path, "xl/worksheets/sheet" + str(n) + ".xml")
+        finally:
+            shutil.rmtree(self.temp_folder, ignore_errors=True)